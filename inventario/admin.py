@@ -1,10 +1,13 @@
 from django.contrib import admin
+from inventario.services.busqueda import BusquedaProductoService
+from inventario.services.cache_productos import CacheProductoService
 from .models import (
     Producto, Categoria, Proveedor, Lote,
     EntradaInventario, SalidaInventario, InventarioFisico,
     AlertaStock, Notificacion, OrdenAutomatica, OrdenAutomaticaItem,
     Kit, KitItem, HistorialPrecioProducto, CotizacionProveedor,
-    Auditoria, CustomUser, Pais, Region, Ciudad, Comuna, Cargo
+    Auditoria, CustomUser, Pais, Region, Ciudad, Comuna, Cargo,
+    MovimientoStock, SnapshotStock, ConsumoDiario, PlanReposicion
 )
 
 # =======================
@@ -21,10 +24,20 @@ class PaisAdmin(admin.ModelAdmin):
     list_display = ('id', 'nombre')
     search_fields = ('nombre',)
 
+# Ciudad.__str__ y Comuna.__str__ incluyen el nombre de la región o la ciudad:
+# los listados, filtros, selects y autocompletados de estos admin las traen en el
+# mismo JOIN para no hacer una consulta por fila.
+class CiudadListFilter(admin.RelatedFieldListFilter):
+    def field_choices(self, field, request, model_admin):
+        ciudades = Ciudad.objects.select_related('region').order_by('nombre')
+        return [(ciudad.pk, str(ciudad)) for ciudad in ciudades]
+
+
 @admin.register(Region)
 class RegionAdmin(admin.ModelAdmin):
     list_display = ('id', 'nombre', 'pais')
     list_filter = ('pais',)
+    list_select_related = ('pais',)
     search_fields = ('nombre',)
 
 @admin.register(Ciudad)
@@ -33,12 +46,23 @@ class CiudadAdmin(admin.ModelAdmin):
     list_filter = ('region',)
     search_fields = ('nombre',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('region')
+
 @admin.register(Comuna)
 class ComunaAdmin(admin.ModelAdmin):
     list_display = ('id', 'nombre', 'ciudad')
-    list_filter = ('ciudad',)
+    list_filter = (('ciudad', CiudadListFilter),)
     search_fields = ('nombre',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('ciudad__region')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'ciudad':
+            kwargs['queryset'] = Ciudad.objects.select_related('region')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 @admin.register(Cargo)
 class CargoAdmin(admin.ModelAdmin):
     list_display = ('id', 'nombre')
@@ -64,6 +88,17 @@ class ProductoAdmin(admin.ModelAdmin):
     autocomplete_fields = ('lote',)
     ordering = ('nombre',)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        CacheProductoService.invalidar([obj.pk])
+        if change:
+            BusquedaProductoService.invalidar()
+
+    def delete_model(self, request, obj):
+        producto_id = obj.pk
+        super().delete_model(request, obj)
+        CacheProductoService.invalidar([producto_id])
+
 @admin.register(Lote)
 class LoteAdmin(admin.ModelAdmin):
     list_display = ('id', 'codigo', 'proveedor', 'fecha_fabricacion', 'fecha_vencimiento')
@@ -72,10 +107,15 @@ class LoteAdmin(admin.ModelAdmin):
 
 @admin.register(Proveedor)
 class ProveedorAdmin(admin.ModelAdmin):
-    list_display = ('id', 'nombre', 'rut', 'telefono', 'correo')
+    list_display = ('id', 'nombre', 'rut', 'telefono', 'correo', 'dias_entrega')
     search_fields = ('nombre', 'rut')
     ordering = ('nombre',)
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'comuna':
+            kwargs['queryset'] = Comuna.objects.select_related('ciudad')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 # =======================
 # ENTRADAS / SALIDAS / INVENTARIO FÍSICO
 # =======================
@@ -105,6 +145,43 @@ class InventarioFisicoAdmin(admin.ModelAdmin):
     list_display = ('id', 'producto', 'stock_registrado', 'stock_real', 'diferencia', 'fecha')
     search_fields = ('producto__nombre',)
 
+@admin.register(MovimientoStock)
+class MovimientoStockAdmin(admin.ModelAdmin):
+    list_display = ('id', 'producto', 'delta', 'origen', 'fecha')
+    list_filter = ('origen',)
+    search_fields = ('producto__nombre', 'producto__sku')
+    list_select_related = ('producto',)
+    show_full_result_count = False
+
+    # El libro es de solo agregado: no se edita ni se borra desde el admin.
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(SnapshotStock)
+class SnapshotStockAdmin(admin.ModelAdmin):
+    list_display = ('id', 'producto', 'fecha', 'stock')
+    search_fields = ('producto__nombre', 'producto__sku')
+    list_select_related = ('producto',)
+
+@admin.register(ConsumoDiario)
+class ConsumoDiarioAdmin(admin.ModelAdmin):
+    list_display = ('id', 'producto', 'fecha', 'motivo', 'cantidad', 'salidas')
+    list_filter = ('motivo',)
+    search_fields = ('producto__nombre', 'producto__sku')
+    list_select_related = ('producto',)
+    date_hierarchy = 'fecha'
+
+@admin.register(PlanReposicion)
+class PlanReposicionAdmin(admin.ModelAdmin):
+    list_display = ('producto', 'demanda_diaria', 'dias_entrega', 'stock_seguridad',
+                    'punto_reorden', 'cantidad_pedido', 'fecha_calculo')
+    search_fields = ('producto__nombre', 'producto__sku')
+    list_select_related = ('producto',)
+    readonly_fields = ('fecha_calculo',)
+
 # =======================
 # ALERTAS / NOTIFICACIONES
 # =======================
@@ -185,6 +262,10 @@ class AuditoriaAdmin(admin.ModelAdmin):
     list_display = ('id', 'accion', 'modelo_afectado', 'usuario', 'fecha')
     list_filter = ('modelo_afectado', 'usuario', 'accion')
     search_fields = ('modelo_afectado', 'usuario__username')
+    list_select_related = ('usuario',)
+    date_hierarchy = 'fecha'
+    # Evita el COUNT(*) sin filtros sobre toda la tabla en cada página.
+    show_full_result_count = False
 
 # =======================
 # USUARIOS
@@ -193,6 +274,7 @@ class AuditoriaAdmin(admin.ModelAdmin):
 @admin.register(CustomUser)
 class CustomUserAdmin(admin.ModelAdmin):
     list_display = ('id', 'username', 'rut', 'email', 'cargo', 'comuna', 'is_active', 'is_staff')
+    list_select_related = ('cargo', 'comuna__ciudad')
     list_filter = ('is_staff', 'is_superuser', 'cargo')
     search_fields = ('username', 'rut', 'email')
     autocomplete_fields = ('comuna', 'cargo')
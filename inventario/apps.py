@@ -1,16 +1,13 @@
 from django.apps import AppConfig
-from django.apps import AppConfig
 
 class InventarioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventario'
 
     def ready(self):
-        import inventario.signals  # noqa
-
-class InventarioConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'inventario'
-
-def ready(self):
-    import inventario.signals
+        # inventario.signals no se importa: sus órdenes automáticas por alerta
+        # nunca estuvieron conectadas (una segunda definición de esta clase, sin
+        # ready, reemplazaba a la primera) y las órdenes se generan agrupadas por
+        # proveedor desde OrdenService y las tareas de Celery.
+        from inventario.services.geografia import conectar_invalidacion
+        conectar_invalidacion()
@@ -1,6 +1,11 @@
 import django_filters
 from django_filters import rest_framework as filters
-from inventario.models import OrdenAutomatica
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+from inventario.models import (
+    OrdenAutomatica, Auditoria, EntradaInventario, SalidaInventario, HistorialPrecioProducto
+)
+from inventario.services.busqueda import BusquedaProductoService
 
 class OrdenAutomaticaFilter(filters.FilterSet):
     estado = filters.CharFilter(field_name='estado', lookup_expr='iexact')
@@ -33,3 +38,87 @@ class OrdenAutomaticaFilter(filters.FilterSet):
             'producto_nombre',
             'proveedor_nombre',
         ]
+
+
+class AuditoriaFilter(filters.FilterSet):
+    modelo = filters.CharFilter(field_name='modelo_afectado')
+    id_objeto = filters.NumberFilter(field_name='id_objeto')
+    usuario = filters.NumberFilter(field_name='usuario__id')
+    accion = filters.CharFilter(field_name='accion')
+
+    fecha_min = filters.IsoDateTimeFilter(field_name='fecha', lookup_expr='gte')
+    fecha_max = filters.IsoDateTimeFilter(field_name='fecha', lookup_expr='lt')
+
+    class Meta:
+        model = Auditoria
+        fields = ['modelo', 'id_objeto', 'usuario', 'accion', 'fecha_min', 'fecha_max']
+
+
+class EntradaInventarioFilter(filters.FilterSet):
+    producto = filters.NumberFilter(field_name='producto_id')
+    proveedor = filters.NumberFilter(field_name='proveedor_id')
+    orden = filters.NumberFilter(field_name='orden_id')
+
+    fecha_min = filters.IsoDateTimeFilter(field_name='fecha', lookup_expr='gte')
+    fecha_max = filters.IsoDateTimeFilter(field_name='fecha', lookup_expr='lt')
+
+    class Meta:
+        model = EntradaInventario
+        fields = ['producto', 'proveedor', 'orden', 'fecha_min', 'fecha_max']
+
+
+class SalidaInventarioFilter(filters.FilterSet):
+    producto = filters.NumberFilter(field_name='producto_id')
+    responsable = filters.NumberFilter(field_name='responsable_id')
+    motivo = filters.CharFilter(field_name='motivo')
+
+    fecha_min = filters.IsoDateTimeFilter(field_name='fecha', lookup_expr='gte')
+    fecha_max = filters.IsoDateTimeFilter(field_name='fecha', lookup_expr='lt')
+
+    class Meta:
+        model = SalidaInventario
+        fields = ['producto', 'responsable', 'motivo', 'fecha_min', 'fecha_max']
+
+
+class HistorialPrecioProductoFilter(filters.FilterSet):
+    producto = filters.NumberFilter(field_name='producto_id')
+    proveedor = filters.NumberFilter(field_name='proveedor_id')
+
+    fecha_min = filters.IsoDateTimeFilter(field_name='fecha_registro', lookup_expr='gte')
+    fecha_max = filters.IsoDateTimeFilter(field_name='fecha_registro', lookup_expr='lt')
+
+    class Meta:
+        model = HistorialPrecioProducto
+        fields = ['producto', 'proveedor', 'fecha_min', 'fecha_max']
+
+
+class BusquedaProductoFilter(BaseFilterBackend):
+    """
+    ?search= por relevancia sobre productos (ver BusquedaProductoService). La vista
+    indica en `busqueda_producto` la ruta desde su modelo a Producto ("" si es
+    Producto). Sin ?ordering= los resultados salen del más al menos relevante, por
+    eso debe ir después de OrderingFilter en filter_backends.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        termino = request.query_params.get(self.search_param, "").replace("\x00", "").strip()
+        if not termino:
+            return queryset
+        queryset = BusquedaProductoService.filtrar(queryset, termino, getattr(view, "busqueda_producto", ""))
+        if api_settings.ORDERING_PARAM in request.query_params:
+            return queryset
+        return queryset.order_by("-rango_busqueda", "pk")
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            "name": self.search_param,
+            "required": False,
+            "in": "query",
+            "description": (
+                "Busca por nombre de producto o de proveedor (tolera errores de tipeo y palabras "
+                "incompletas) y por SKU, código de barras o código de lote que contengan el texto "
+                "(primero el código exacto, luego los que empiezan con él)."
+            ),
+            "schema": {"type": "string"},
+        }]
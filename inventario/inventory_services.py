@@ -1,4 +1,5 @@
 from datetime import datetime
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Sum, F, Q, Value
 from .models import (
@@ -6,32 +7,21 @@ from .models import (
     InventarioFisico, HistorialPrecioProducto, EntradaInventario,
     SalidaInventario, Notificacion, Auditoria, CustomUser, CotizacionProveedor
 )
+from .services.alertas import AlertaService
+from .services.consumo import ConsumoService
+from .services.ordenes import OrdenService
+from .services.stock import StockService, StockInsuficienteError
 
 
 # === 1. Servicio: Verificación de bajo stock ===
 def verificar_stock_bajo():
-    productos = Producto.objects.filter(stock__lte=F('stock_minimo'))
-    for producto in productos:
-        if not AlertaStock.objects.filter(producto=producto, activa=True).exists():
-            AlertaStock.objects.create(
-                producto=producto,
-                mensaje=f"Stock bajo para {producto.nombre}",
-                tipo='bajo_stock'
-            )
+    return AlertaService.evaluar_todas()
 
 
 # === 2. Servicio: Generación de orden automática desde alerta ===
 def generar_orden_automatica(alerta):
-    producto = alerta.producto
-    proveedor = producto.proveedor
-    cantidad = producto.stock_minimo * 2
-
-    return OrdenAutomatica.objects.create(
-        alerta=alerta,
-        producto=producto,
-        proveedor=proveedor,
-        cantidad_ordenada=cantidad
-    )
+    # La cantidad sale del plan de reposición del producto (ver OrdenService.cantidad_sugerida).
+    return OrdenService.crear_orden_desde_alerta(alerta)
 
 
 # === 3. Servicio: Verificar silencio de alertas ===
@@ -71,22 +61,24 @@ def registrar_entrada(producto, cantidad, responsable, observacion=""):
         responsable=responsable,
         observacion=observacion
     )
-    producto.stock += cantidad
-    producto.save()
+    StockService.sumar(producto, cantidad)
 
 
 # === 7. Servicio: Generar salida de inventario ===
 def registrar_salida(producto, cantidad, responsable, motivo="uso", observacion=""):
-    if producto.stock >= cantidad:
-        SalidaInventario.objects.create(
+    with transaction.atomic():
+        try:
+            StockService.restar(producto, cantidad)
+        except StockInsuficienteError:
+            return
+        salida = SalidaInventario.objects.create(
             producto=producto,
             cantidad=cantidad,
             responsable=responsable,
             motivo=motivo,
             observacion=observacion
         )
-        producto.stock -= cantidad
-        producto.save()
+        ConsumoService.acumular([salida])
 
 
 # === 8. Servicio: Generar auditoría ===
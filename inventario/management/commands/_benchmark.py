@@ -0,0 +1,116 @@
+"""
+Utilidades compartidas por los comandos benchmark_*.
+
+Los benchmarks crean sus propios datos con el prefijo BENCH y los eliminan al
+terminar, pero escriben en la base configurada: ejecútalos contra una base de
+desarrollo, nunca contra producción.
+"""
+import time
+from contextlib import contextmanager
+
+from inventario.models import Categoria, Proveedor, Lote, Producto, CustomUser, Auditoria
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+
+PREFIJO = "BENCH"
+
+
+def crear_catalogo(cantidad, stock=100, stock_minimo=20, precio=1000):
+    """Crea `cantidad` productos de prueba bajo un lote/proveedor propios."""
+    categoria, _ = Categoria.objects.get_or_create(nombre=f"{PREFIJO} Categoría")
+    proveedor = Proveedor.objects.filter(nombre=f"{PREFIJO} Proveedor").first()
+    if proveedor is None:
+        proveedor = Proveedor.objects.create(
+            nombre=f"{PREFIJO} Proveedor",
+            rut=generar_rut_valido(),
+            direccion="Benchmark 1",
+            correo="benchmark@maestranza.cl",
+        )
+    lote, _ = Lote.objects.get_or_create(
+        codigo=f"{PREFIJO}-LOTE", defaults={"proveedor": proveedor, "categoria": categoria}
+    )
+    inicio = Producto.objects.filter(sku__startswith=f"{PREFIJO}-").count()
+    Producto.objects.bulk_create(
+        [
+            Producto(
+                nombre=f"{PREFIJO} Producto {i}",
+                lote=lote,
+                precio=precio,
+                stock=stock,
+                stock_minimo=stock_minimo,
+                codigo_barra=f"9{i:011d}",
+                sku=f"{PREFIJO}-{i:07d}",
+            )
+            for i in range(inicio, inicio + cantidad)
+        ],
+        batch_size=2000,
+    )
+    return list(Producto.objects.filter(sku__startswith=f"{PREFIJO}-").order_by("id"))
+
+
+def crear_usuario(role="admin"):
+    """Usuario autenticable para los benchmarks que recorren la API."""
+    usuario = CustomUser.objects.filter(username=f"{PREFIJO.lower()}_{role}").first()
+    if usuario is None:
+        usuario = CustomUser.objects.create_user(
+            username=f"{PREFIJO.lower()}_{role}",
+            password=None,
+            rut=generar_rut_valido(),
+            telefono="+56900000000",
+            correo=f"{PREFIJO.lower()}_{role}@maestranza.cl",
+            role=role,
+        )
+    return usuario
+
+
+def cliente_api(usuario):
+    """APIClient autenticado que apunta a un host permitido con DEBUG=True."""
+    from rest_framework.test import APIClient
+
+    cliente = APIClient(SERVER_NAME="localhost")
+    cliente.force_authenticate(usuario)
+    return cliente
+
+
+def limpiar_catalogo():
+    """Elimina todo lo creado por crear_catalogo (movimientos incluidos, por cascada)."""
+    Producto.objects.filter(sku__startswith=f"{PREFIJO}-").delete()
+    Lote.objects.filter(codigo=f"{PREFIJO}-LOTE").delete()
+    Proveedor.objects.filter(nombre=f"{PREFIJO} Proveedor").delete()
+    Categoria.objects.filter(nombre=f"{PREFIJO} Categoría").delete()
+    Auditoria.objects.filter(usuario__username__startswith=f"{PREFIJO.lower()}_").delete()
+    CustomUser.objects.filter(username__startswith=f"{PREFIJO.lower()}_").delete()
+
+
+@contextmanager
+def fechas_manuales(modelo, campo):
+    """
+    Desactiva temporalmente auto_now_add de `campo` para que bulk_create respete
+    las fechas asignadas (los benchmarks necesitan historiales repartidos en el tiempo).
+    """
+    field = modelo._meta.get_field(campo)
+    anterior = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = anterior
+
+
+@contextmanager
+def cronometro():
+    """Context manager que expone el tiempo transcurrido en `resultado['segundos']`."""
+    resultado = {"segundos": 0.0}
+    inicio = time.perf_counter()
+    try:
+        yield resultado
+    finally:
+        resultado["segundos"] = time.perf_counter() - inicio
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) por vecino más cercano sobre una lista de números."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * (len(ordenados) - 1)))))
+    return ordenados[indice]
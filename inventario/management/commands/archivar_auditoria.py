@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from inventario.services.auditoria import AuditoriaService
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve los registros de auditoría más antiguos que la retención a archivos "
+        "mensuales .jsonl.gz y los elimina de la base."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--meses", type=int, default=None,
+                            help="Meses completos a conservar (por defecto AUDITORIA_RETENCION_MESES).")
+        parser.add_argument("--directorio", default=None,
+                            help="Destino de los archivos (por defecto AUDITORIA_ARCHIVO_DIR).")
+
+    def handle(self, *args, **options):
+        limite = AuditoriaService.limite_retencion(options["meses"])
+        archivados = AuditoriaService.archivar(limite, options["directorio"])
+        for mes, cantidad in archivados.items():
+            self.stdout.write(f"{mes}: {cantidad} registros archivados")
+        if not archivados:
+            self.stdout.write(f"Sin registros anteriores a {limite:%Y-%m-%d}.")
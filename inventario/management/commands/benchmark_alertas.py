@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from inventario.models import AlertaStock, Producto
+from inventario.services.alertas import AlertaService
+from ._benchmark import PREFIJO, crear_catalogo, limpiar_catalogo, cronometro
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide AlertaService.evaluar_todas sobre un catálogo sintético, con una "
+        "fracción de productos bajo el stock mínimo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=100_000)
+        parser.add_argument("--fraccion-baja", type=float, default=0.1,
+                            help="Fracción de productos que quedan bajo el stock mínimo.")
+
+    def handle(self, *args, **options):
+        total = options["productos"]
+
+        limpiar_catalogo()
+        try:
+            crear_catalogo(total, stock=100, stock_minimo=20)
+            cada = max(1, int(round(1 / options["fraccion_baja"]))) if options["fraccion_baja"] else 0
+            if cada:
+                bajos = list(
+                    Producto.objects.filter(sku__startswith=f"{PREFIJO}-")
+                    .values_list("id", flat=True)[::cada]
+                )
+                Producto.objects.filter(id__in=bajos).update(stock=F("stock_minimo") - 1)
+
+            with cronometro() as primera:
+                nuevas = AlertaService.evaluar_todas()
+            with cronometro() as segunda:
+                repetidas = AlertaService.evaluar_todas()
+
+            self.stdout.write(f"productos={total} alertas_nuevas={len(nuevas)} "
+                              f"primera_pasada={primera['segundos']:.3f}s")
+            self.stdout.write(f"segunda pasada (sin cambios) alertas_nuevas={len(repetidas)} "
+                              f"tiempo={segunda['segundos']:.3f}s")
+        finally:
+            AlertaStock.objects.filter(producto__sku__startswith=f"{PREFIJO}-").delete()
+            limpiar_catalogo()
@@ -0,0 +1,60 @@
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from inventario.models import Auditoria
+from inventario.services.auditoria import AuditoriaService
+from ._benchmark import crear_catalogo, crear_usuario, cliente_api, limpiar_catalogo, percentil
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia p50/p99 de POST /api/salidas/ con cada modo de auditoría "
+        "(sync, on_commit, async)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--peticiones", type=int, default=500)
+
+    @override_settings(ALERTAS_POR_EVENTO=False)
+    def handle(self, *args, **options):
+        peticiones = options["peticiones"]
+
+        limpiar_catalogo()
+        try:
+            producto = crear_catalogo(1, stock=peticiones * 3)[0]
+            usuario = crear_usuario()
+            cliente = cliente_api(usuario)
+            payload = {
+                "producto": producto.id, "cantidad": 1, "motivo": "consumo",
+                "responsable": usuario.id, "observacion": "benchmark",
+            }
+
+            for modo in ("sync", "on_commit", "async"):
+                encolados = []
+                # En modo async no hay broker aquí: la cola se simula en memoria y
+                # los lotes se escriben después, fuera de la medición.
+                with override_settings(AUDITORIA_MODO=modo), mock.patch(
+                    "inventario.tasks.tarea_registrar_auditoria.delay", side_effect=encolados.append
+                ):
+                    latencias = []
+                    for _ in range(peticiones):
+                        inicio = time.perf_counter()
+                        respuesta = cliente.post("/api/salidas/", payload, format="json")
+                        latencias.append((time.perf_counter() - inicio) * 1000)
+                        if respuesta.status_code != 201:
+                            raise RuntimeError(f"POST /api/salidas/ respondió {respuesta.status_code}: {respuesta.data}")
+
+                for lote in encolados:
+                    AuditoriaService.registrar_masivo(AuditoriaService.deserializar(lote))
+                registros = Auditoria.objects.filter(usuario=usuario, modelo_afectado="SalidaInventario").count()
+                Auditoria.objects.filter(usuario=usuario).delete()
+
+                self.stdout.write(
+                    f"{modo:<10} peticiones={peticiones} auditoria={registros} "
+                    f"p50={percentil(latencias, 50):.2f}ms p99={percentil(latencias, 99):.2f}ms"
+                )
+        finally:
+            limpiar_catalogo()
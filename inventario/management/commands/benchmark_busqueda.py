@@ -0,0 +1,106 @@
+import random
+import time
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from inventario.models import Producto
+from inventario.services.busqueda import BusquedaProductoService
+from ._benchmark import crear_catalogo, crear_usuario, cliente_api, limpiar_catalogo, cronometro, percentil
+
+HERRAMIENTAS = [
+    "martillo", "destornillador", "alicate", "llave", "taladro", "broca", "sierra", "lija", "electrodo",
+    "careta", "guante", "casco", "disco", "esmeril", "soldadora", "tornillo", "perno", "tuerca",
+    "arandela", "remache", "cinta", "pintura", "brocha", "rodillo", "manguera", "valvula", "codo",
+    "abrazadera", "cadena", "candado", "bisagra", "escuadra", "nivel", "huincha", "formon", "cincel",
+]
+ATRIBUTOS = [
+    "acero", "bronce", "inoxidable", "galvanizado", "industrial", "reforzado", "electrico", "manual",
+    "neumatico", "hidraulico", "corto", "largo", "fino", "grueso", "plano", "cruz", "hexagonal",
+]
+
+
+def typo(palabra, azar):
+    """Quita, duplica o cambia una letra interior."""
+    i = azar.randrange(1, len(palabra) - 1)
+    return azar.choice([
+        palabra[:i] + palabra[i + 1:],
+        palabra[:i] + palabra[i] + palabra[i:],
+        palabra[:i] + azar.choice("aeiou") + palabra[i + 1:],
+    ])
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el ?search= anterior (icontains sobre nombre, código de barras, SKU y código "
+        "de lote) con BusquedaProductoService sobre un catálogo con nombres variados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=200_000)
+        parser.add_argument("--busquedas", type=int, default=300)
+
+    def medir(self, nombre, terminos, funcion):
+        latencias = []
+        for termino in terminos:
+            inicio = time.perf_counter()
+            funcion(termino)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        self.stdout.write(
+            f"{nombre:<26} búsquedas={len(terminos)} p50={percentil(latencias, 50):.2f}ms "
+            f"p99={percentil(latencias, 99):.2f}ms"
+        )
+
+    def handle(self, *args, **options):
+        azar = random.Random(42)
+        limpiar_catalogo()
+        try:
+            productos = crear_catalogo(options["productos"])
+            for producto in productos:
+                producto.nombre = (
+                    f"{azar.choice(HERRAMIENTAS).capitalize()} {azar.choice(ATRIBUTOS)} "
+                    f"{azar.choice(ATRIBUTOS)} {azar.randint(1, 500)}mm"
+                )
+            Producto.objects.bulk_update(productos, ["nombre"], batch_size=2000)
+            BusquedaProductoService.invalidar()
+
+            terminos = []
+            for _ in range(options["busquedas"]):
+                tipo = azar.random()
+                if tipo < 0.4:
+                    terminos.append(typo(azar.choice(HERRAMIENTAS), azar))
+                elif tipo < 0.6:
+                    terminos.append(azar.choice(HERRAMIENTAS)[:azar.randint(3, 5)])
+                elif tipo < 0.8:
+                    terminos.append(f"{azar.choice(HERRAMIENTAS)} {azar.choice(ATRIBUTOS)}")
+                else:
+                    terminos.append(azar.choice(productos).codigo_barra[:azar.randint(8, 12)])
+
+            def anterior(termino):
+                filtro = reduce(or_, [
+                    Q(**{f"{campo}__icontains": termino})
+                    for campo in ("nombre", "codigo_barra", "sku", "lote__codigo")
+                ])
+                resultado = Producto.objects.filter(filtro)
+                return resultado.count(), list(resultado.values_list("id", flat=True)[:20])
+
+            self.medir("icontains (anterior)", terminos, anterior)
+
+            with cronometro() as construccion:
+                BusquedaProductoService.indice()
+            self.stdout.write(f"{'índice en memoria':<26} construcción={construccion['segundos']:.2f}s")
+            self.medir("BusquedaProductoService", terminos, BusquedaProductoService.buscar)
+
+            cliente = cliente_api(crear_usuario())
+            self.medir(
+                "GET /api/productos/?search", terminos[:100],
+                lambda termino: cliente.get("/api/productos/", {"search": termino})
+            )
+            ejemplo = terminos[0]
+            encontrados = BusquedaProductoService.buscar(ejemplo)[:3]
+            nombres = dict(Producto.objects.filter(id__in=[i for i, _ in encontrados]).values_list("id", "nombre"))
+            self.stdout.write(f"ejemplo '{ejemplo}': " + ", ".join(f"{nombres[i]} ({r})" for i, r in encontrados))
+        finally:
+            limpiar_catalogo()
@@ -0,0 +1,65 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from inventario.models import Producto
+from inventario.serializers import ProductoSerializer
+from inventario.services.cache_productos import CacheProductoService
+from ._benchmark import crear_catalogo, crear_usuario, cliente_api, limpiar_catalogo, percentil
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula lecturas de escáner (búsqueda por código de barras, con SKUs calientes) "
+        "y GET /api/productos/{id}/, con y sin la caché de productos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=10_000)
+        parser.add_argument("--lecturas", type=int, default=5_000)
+        parser.add_argument("--calientes", type=int, default=200,
+                            help="Productos que reciben el 90%% de las lecturas.")
+
+    def medir(self, nombre, codigos, funcion):
+        latencias = []
+        for codigo in codigos:
+            inicio = time.perf_counter()
+            funcion(codigo)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        self.stdout.write(
+            f"{nombre:<22} lecturas={len(codigos)} p50={percentil(latencias, 50):.3f}ms "
+            f"p99={percentil(latencias, 99):.3f}ms total={sum(latencias) / 1000:.2f}s"
+        )
+
+    def handle(self, *args, **options):
+        azar = random.Random(42)
+        limpiar_catalogo()
+        try:
+            productos = crear_catalogo(options["productos"])
+            calientes = productos[:options["calientes"]]
+            elegidos = [
+                azar.choice(calientes) if azar.random() < 0.9 else azar.choice(productos)
+                for _ in range(options["lecturas"])
+            ]
+            codigos = [p.codigo_barra for p in elegidos]
+
+            def sin_cache(codigo):
+                producto = Producto.objects.select_related("lote__proveedor", "lote__categoria").get(
+                    Q(sku=codigo) | Q(codigo_barra=codigo)
+                )
+                return ProductoSerializer(producto).data
+
+            self.medir("búsqueda sin caché", codigos, sin_cache)
+            CacheProductoService.reiniciar_estadisticas()
+            self.medir("búsqueda con caché", codigos, CacheProductoService.buscar)
+            self.stdout.write(f"{'':<22} {CacheProductoService.estadisticas()}")
+
+            cliente = cliente_api(crear_usuario())
+            urls = [f"/api/productos/{p.id}/" for p in elegidos]
+            CacheProductoService.reiniciar_estadisticas()
+            self.medir("GET detalle con caché", urls, cliente.get)
+            self.stdout.write(f"{'':<22} {CacheProductoService.estadisticas()}")
+        finally:
+            limpiar_catalogo()
@@ -0,0 +1,73 @@
+import os
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventario.models import EntradaInventario, SalidaInventario, InventarioFisico
+from inventario.services.conciliacion import ConciliacionService
+from ._benchmark import crear_catalogo, limpiar_catalogo, fechas_manuales, cronometro
+
+
+class Command(BaseCommand):
+    help = (
+        "Concilia un catálogo con un conteo físico por producto y N entradas/salidas "
+        "posteriores (que no tocaron Producto.stock), midiendo el reporte y la corrección."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=10_000)
+        parser.add_argument("--movimientos", type=int, default=1_000_000)
+
+    def handle(self, *args, **options):
+        cantidad = options["productos"]
+        movimientos = options["movimientos"]
+        azar = random.Random(42)
+
+        limpiar_catalogo()
+        try:
+            productos = crear_catalogo(cantidad, stock=1000)
+            ids = [p.id for p in productos]
+            conteo = timezone.now() - timedelta(days=30)
+
+            self.stdout.write(f"Creando {cantidad} conteos y {movimientos} movimientos...")
+            with fechas_manuales(InventarioFisico, "fecha_conteo"):
+                InventarioFisico.objects.bulk_create(
+                    [InventarioFisico(producto_id=i, stock_real=1000, diferencia=0, fecha_conteo=conteo) for i in ids],
+                    batch_size=5000,
+                )
+            for desde in range(0, movimientos, 50_000):
+                hasta = min(desde + 50_000, movimientos)
+                mitad = (hasta - desde) // 2
+                EntradaInventario.objects.bulk_create(
+                    [EntradaInventario(producto_id=azar.choice(ids), cantidad=2) for _ in range(mitad)],
+                    batch_size=5000,
+                )
+                SalidaInventario.objects.bulk_create(
+                    [SalidaInventario(producto_id=azar.choice(ids), cantidad=1, motivo="consumo")
+                     for _ in range(hasta - desde - mitad)],
+                    batch_size=5000,
+                )
+
+            with open(os.devnull, "w", newline="") as destino:
+                with cronometro() as reporte:
+                    resumen = ConciliacionService.conciliar(destino)
+                self.stdout.write(
+                    f"reporte      movimientos={movimientos} discrepancias={resumen['discrepancias']} "
+                    f"tiempo={reporte['segundos']:.2f}s"
+                )
+
+                with cronometro() as correccion:
+                    resumen = ConciliacionService.conciliar(destino, aplicar=True)
+                self.stdout.write(
+                    f"corrección   corregidos={resumen['corregidos']} tiempo={correccion['segundos']:.2f}s"
+                )
+
+                with cronometro() as verificacion:
+                    resumen = ConciliacionService.conciliar(destino)
+                self.stdout.write(
+                    f"verificación discrepancias={resumen['discrepancias']} tiempo={verificacion['segundos']:.2f}s"
+                )
+        finally:
+            limpiar_catalogo()
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ._benchmark import crear_catalogo, crear_usuario, cliente_api, limpiar_catalogo, cronometro
+
+
+class Command(BaseCommand):
+    help = (
+        "Sondeo del cliente móvil sobre /api/productos/: GET completo frente a GET "
+        "condicional (If-None-Match) que responde 304, en el listado y en el detalle."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=2000)
+        parser.add_argument("--repeticiones", type=int, default=200)
+        parser.add_argument("--page-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        repeticiones = options["repeticiones"]
+        limpiar_catalogo()
+        try:
+            productos = crear_catalogo(options["productos"])
+            cliente = cliente_api(crear_usuario())
+            urls = {
+                "listado": f"/api/productos/?page_size={options['page_size']}",
+                "detalle": f"/api/productos/{productos[0].id}/",
+            }
+            for nombre, url in urls.items():
+                etag = cliente.get(url)["ETag"]
+                variantes = (
+                    ("completo", {}),
+                    ("condicional", {"HTTP_IF_NONE_MATCH": etag}),
+                )
+                for variante, cabeceras in variantes:
+                    with CaptureQueriesContext(connection) as consultas, cronometro() as tiempo:
+                        for _ in range(repeticiones):
+                            respuesta = cliente.get(url, **cabeceras)
+                    self.stdout.write(
+                        f"{nombre:<8} {variante:<12} estado={respuesta.status_code} "
+                        f"consultas={len(consultas) / repeticiones:.0f} "
+                        f"tiempo={tiempo['segundos'] / repeticiones * 1000:.2f}ms "
+                        f"bytes={len(respuesta.content)}"
+                    )
+        finally:
+            limpiar_catalogo()
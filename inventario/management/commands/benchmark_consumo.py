@@ -0,0 +1,81 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from inventario.models import SalidaInventario
+from inventario.services.consumo import ConsumoService
+from ._benchmark import crear_catalogo, limpiar_catalogo, fechas_manuales, cronometro
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el consumo promedio de todo el catálogo calculado con un SUM sobre "
+        "SalidaInventario por producto contra una lectura del acumulado ConsumoDiario."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=5_000)
+        parser.add_argument("--salidas", type=int, default=500_000)
+        parser.add_argument("--dias", type=int, default=30)
+
+    def handle(self, *args, **options):
+        cantidad = options["productos"]
+        total_salidas = options["salidas"]
+        dias = options["dias"]
+        azar = random.Random(42)
+
+        limpiar_catalogo()
+        try:
+            ids = [p.id for p in crear_catalogo(cantidad)]
+            ahora = timezone.now()
+            self.stdout.write(f"Creando {total_salidas} salidas en 90 días para {cantidad} productos...")
+            with fechas_manuales(SalidaInventario, "fecha"):
+                for desde in range(0, total_salidas, 50_000):
+                    SalidaInventario.objects.bulk_create(
+                        [
+                            SalidaInventario(
+                                producto_id=azar.choice(ids), cantidad=azar.randint(1, 10),
+                                motivo=azar.choice(["consumo", "consumo", "merma"]),
+                                fecha=ahora - timedelta(minutes=azar.randint(0, 90 * 24 * 60)),
+                            )
+                            for _ in range(min(50_000, total_salidas - desde))
+                        ],
+                        batch_size=5000,
+                    )
+
+            with cronometro() as carga:
+                filas = ConsumoService.reconstruir()
+            self.stdout.write(f"reconstruir   filas={filas} tiempo={carga['segundos']:.2f}s")
+
+            # Forma anterior: un SUM sobre SalidaInventario por producto.
+            limite = ahora - timedelta(days=dias)
+            with cronometro() as anterior:
+                for producto_id in ids:
+                    SalidaInventario.objects.filter(
+                        producto_id=producto_id, fecha__gte=limite
+                    ).aggregate(total=Sum("cantidad"))
+            self.stdout.write(
+                f"por producto  consultas={len(ids)} tiempo={anterior['segundos']:.2f}s"
+            )
+
+            reset_queries()
+            with CaptureQueriesContext(connection) as consultas, cronometro() as acumulado:
+                estadisticas = ConsumoService.estadisticas(ids, dias=dias)
+            self.stdout.write(
+                f"acumulado     consultas={len(consultas)} productos={len(estadisticas)} "
+                f"tiempo={acumulado['segundos']:.2f}s (promedio, medias móviles y percentiles)"
+            )
+
+            # Costo de mantener el acumulado al registrar una salida.
+            salida = SalidaInventario.objects.filter(producto_id=ids[0]).first()
+            with cronometro() as escritura:
+                for _ in range(1000):
+                    ConsumoService.acumular([salida])
+            self.stdout.write(f"acumular      1000 salidas tiempo={escritura['segundos']:.3f}ms/salida")
+        finally:
+            limpiar_catalogo()
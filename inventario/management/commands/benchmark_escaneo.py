@@ -0,0 +1,68 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventario.services.cache_productos import CacheProductoService
+from ._benchmark import crear_catalogo, crear_usuario, cliente_api, limpiar_catalogo, percentil
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara, por la API, la búsqueda de un código escaneado con ?search= del listado "
+        "contra GET /api/productos/scan/{codigo}/ y POST /api/productos/scan/ en lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=10_000)
+        parser.add_argument("--lecturas", type=int, default=2_000)
+        parser.add_argument("--lote", type=int, default=500)
+
+    def medir(self, nombre, solicitudes, funcion, objetivo=None):
+        latencias = []
+        for solicitud in solicitudes:
+            inicio = time.perf_counter()
+            respuesta = funcion(solicitud)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            assert respuesta.status_code == 200, respuesta.content
+        p99 = percentil(latencias, 99)
+        veredicto = "" if objetivo is None else f" (objetivo p99<{objetivo}ms: {'ok' if p99 < objetivo else 'NO'})"
+        self.stdout.write(
+            f"{nombre:<24} solicitudes={len(solicitudes)} p50={percentil(latencias, 50):.3f}ms "
+            f"p99={p99:.3f}ms{veredicto}"
+        )
+
+    def handle(self, *args, **options):
+        azar = random.Random(42)
+        limpiar_catalogo()
+        try:
+            productos = crear_catalogo(options["productos"])
+            codigos = [
+                azar.choice(productos).codigo_barra if azar.random() < 0.5 else azar.choice(productos).sku
+                for _ in range(options["lecturas"])
+            ]
+            cliente = cliente_api(crear_usuario())
+
+            self.medir("listado ?search=", codigos[:200], lambda c: cliente.get("/api/productos/", {"search": c}))
+
+            # Primera pasada en frío para llenar la caché; se mide la segunda.
+            for codigo in codigos:
+                cliente.get(f"/api/productos/scan/{codigo}/")
+            self.medir("GET scan/{codigo}", codigos, lambda c: cliente.get(f"/api/productos/scan/{c}/"), 5)
+
+            tamano = options["lote"]
+            lotes = [
+                [azar.choice(productos).codigo_barra for _ in range(tamano)] for _ in range(20)
+            ]
+            CacheProductoService.reiniciar_estadisticas()
+            self.medir(
+                f"POST scan ({tamano} fríos)", lotes,
+                lambda l: cliente.post("/api/productos/scan/", {"codigos": l}, format="json")
+            )
+            self.medir(
+                f"POST scan ({tamano} cache)", lotes,
+                lambda l: cliente.post("/api/productos/scan/", {"codigos": l}, format="json")
+            )
+            self.stdout.write(f"{'':<24} {CacheProductoService.estadisticas()}")
+        finally:
+            limpiar_catalogo()
@@ -0,0 +1,86 @@
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from inventario.models import SalidaInventario
+from ._benchmark import crear_catalogo, crear_usuario, cliente_api, limpiar_catalogo, cronometro
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide /api/salidas/export/ (CSV y NDJSON en streaming) frente a recorrer el listado JSON "
+        "paginado, y la memoria máxima de la exportación con distinta cantidad de filas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--salidas", type=int, default=200_000)
+        parser.add_argument("--productos", type=int, default=1_000)
+        parser.add_argument("--paginas-json", type=int, default=20, help="Páginas de 1000 filas a recorrer en JSON.")
+
+    def exportar(self, cliente, parametros, medir_memoria=False):
+        """(filas, bytes, segundos, pico de memoria en bytes o None)."""
+        if medir_memoria:
+            tracemalloc.start()
+        with cronometro() as tiempo:
+            respuesta = cliente.get("/api/salidas/export/", parametros)
+            filas = tamano = 0
+            for bloque in respuesta.streaming_content:
+                filas += bloque.count(b"\n")
+                tamano += len(bloque)
+        pico = None
+        if medir_memoria:
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return filas, tamano, tiempo["segundos"], pico
+
+    def crear_salidas(self, productos, usuario, cantidad):
+        for inicio in range(0, cantidad, 20_000):
+            SalidaInventario.objects.bulk_create(
+                [
+                    SalidaInventario(
+                        producto=productos[i % len(productos)], cantidad=1, motivo="consumo", responsable=usuario
+                    )
+                    for i in range(inicio, min(inicio + 20_000, cantidad))
+                ],
+                batch_size=5000,
+            )
+
+    def handle(self, *args, **options):
+        total = options["salidas"]
+        limpiar_catalogo()
+        try:
+            productos = crear_catalogo(options["productos"])
+            usuario = crear_usuario()
+            cliente = cliente_api(usuario)
+
+            # Con streaming el pico de memoria no debería crecer con las filas exportadas.
+            creadas = 0
+            for cantidad in (total // 10, total):
+                self.crear_salidas(productos, usuario, cantidad - creadas)
+                creadas = cantidad
+                filas, _, _, pico = self.exportar(cliente, {"responsable": usuario.id}, medir_memoria=True)
+                self.stdout.write(f"memoria máxima export csv filas={filas - 1:,} pico={pico / 1e6:.1f} MB")
+
+            for formato in ("csv", "ndjson"):
+                filas, tamano, segundos, _ = self.exportar(cliente, {"formato": formato})
+                self.stdout.write(
+                    f"export {formato:<7} líneas={filas:,} MB={tamano / 1e6:.1f} "
+                    f"tiempo={segundos:.2f}s filas/s={filas / segundos:,.0f}"
+                )
+
+            filas = 0
+            with cronometro() as tiempo:
+                url = "/api/salidas/?page_size=1000&paginacion=cursor"
+                for _ in range(options["paginas_json"]):
+                    datos = cliente.get(url).json()
+                    filas += len(datos["results"])
+                    url = datos["next"]
+                    if not url:
+                        break
+            self.stdout.write(
+                f"listado JSON paginado filas={filas:,} tiempo={tiempo['segundos']:.2f}s "
+                f"filas/s={filas / tiempo['segundos']:,.0f}"
+            )
+        finally:
+            SalidaInventario.objects.filter(producto__sku__startswith="BENCH-").delete()
+            limpiar_catalogo()
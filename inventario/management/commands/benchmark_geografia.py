@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from inventario.models import Pais, Region, Ciudad, Comuna
+from inventario.services.geografia import GeografiaService
+from ._benchmark import PREFIJO, crear_usuario, cliente_api, limpiar_catalogo, cronometro
+
+URL_ARBOL = "/api/geografia/arbol/"
+
+
+def _recorrer_listados(cliente):
+    """Lo que hacía la app al iniciar: todas las páginas de países, regiones, ciudades y comunas."""
+    peticiones = 0
+    for url in ("/api/paises/", "/api/regiones/", "/api/ciudades/", "/api/comunas/"):
+        while url:
+            datos = cliente.get(url).json()
+            peticiones += 1
+            url = datos.get("next")
+    return peticiones
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga de la geografía al iniciar la app: recorrer los listados paginados frente "
+        "a GET /api/geografia/arbol/ (armándolo, ya en memoria y revalidado con ETag)."
+    )
+
+    def add_arguments(self, parser):
+        # Por defecto, el tamaño de Chile: 16 regiones, 56 provincias y 346 comunas.
+        parser.add_argument("--regiones", type=int, default=16)
+        parser.add_argument("--ciudades", type=int, default=56)
+        parser.add_argument("--comunas", type=int, default=346)
+        parser.add_argument("--repeticiones", type=int, default=20)
+
+    def handle(self, *args, **options):
+        Pais.objects.filter(nombre__startswith=PREFIJO).delete()
+        try:
+            pais = Pais.objects.create(nombre=f"{PREFIJO} País")
+            regiones = Region.objects.bulk_create([
+                Region(nombre=f"{PREFIJO} Región {i}", pais=pais) for i in range(options["regiones"])
+            ])
+            ciudades = Ciudad.objects.bulk_create([
+                Ciudad(nombre=f"{PREFIJO} Ciudad {i}", region=regiones[i % len(regiones)])
+                for i in range(options["ciudades"])
+            ])
+            Comuna.objects.bulk_create([
+                Comuna(nombre=f"{PREFIJO} Comuna {i}", ciudad=ciudades[i % len(ciudades)])
+                for i in range(options["comunas"])
+            ])
+            GeografiaService.invalidar()
+            cliente = cliente_api(crear_usuario())
+
+            def arbol_frio():
+                GeografiaService.invalidar()
+                return cliente.get(URL_ARBOL)
+
+            etag = cliente.get(URL_ARBOL)["ETag"]
+            variantes = [
+                ("listados paginados", lambda: _recorrer_listados(cliente)),
+                ("árbol (armándolo)", arbol_frio),
+                ("árbol (en memoria)", lambda: cliente.get(URL_ARBOL)),
+                ("árbol (304)", lambda: cliente.get(URL_ARBOL, HTTP_IF_NONE_MATCH=etag)),
+            ]
+            for nombre, funcion in variantes:
+                with CaptureQueriesContext(connection) as consultas, cronometro() as tiempo:
+                    for _ in range(options["repeticiones"]):
+                        resultado = funcion()
+                peticiones = resultado if isinstance(resultado, int) else 1
+                bytes_ = len(resultado.content) if not isinstance(resultado, int) else None
+                self.stdout.write(
+                    f"{nombre:<20} peticiones={peticiones:<3} "
+                    f"consultas={len(consultas) / options['repeticiones']:.0f} "
+                    f"tiempo={tiempo['segundos'] / options['repeticiones'] * 1000:.2f}ms"
+                    + (f" bytes={bytes_}" if bytes_ is not None else "")
+                )
+        finally:
+            Pais.objects.filter(nombre__startswith=PREFIJO).delete()
+            limpiar_catalogo()
@@ -0,0 +1,44 @@
+import io
+
+from django.core.management.base import BaseCommand
+
+from ._benchmark import PREFIJO, crear_catalogo, crear_usuario, limpiar_catalogo, cronometro
+from inventario.services.importacion import ImportacionProductoService
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide ImportacionProductoService con un CSV generado: primero solo altas y luego el "
+        "mismo archivo otra vez (todas las filas son actualizaciones por SKU)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        filas = options["filas"]
+        limpiar_catalogo()
+        try:
+            crear_catalogo(1)
+            usuario = crear_usuario()
+            lineas = ["sku,nombre,descripcion,precio,stock,stock_minimo,codigo_barra,lote_codigo"]
+            lineas += [
+                f"{PREFIJO}-IMP-{i:07d},{PREFIJO} Importado {i},Catálogo proveedor,{1000 + i % 500},"
+                f"{i % 50},{i % 5},8{i:011d},{PREFIJO}-LOTE"
+                for i in range(filas)
+            ]
+            contenido = ("\n".join(lineas) + "\n").encode("utf-8")
+            self.stdout.write(f"archivo: {filas:,} filas, {len(contenido) / 1e6:.1f} MB")
+
+            for nombre in ("altas", "actualizaciones"):
+                with cronometro() as tiempo:
+                    resumen = ImportacionProductoService.importar(
+                        io.BytesIO(contenido), "benchmark.csv", usuario=usuario
+                    )
+                self.stdout.write(
+                    f"{nombre:<16} creados={resumen['creados']:,} actualizados={resumen['actualizados']:,} "
+                    f"errores={len(resumen['errores'])} tiempo={tiempo['segundos']:.2f}s "
+                    f"filas/s={filas / tiempo['segundos']:,.0f}"
+                )
+        finally:
+            limpiar_catalogo()
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from ._benchmark import crear_catalogo, crear_usuario, cliente_api, limpiar_catalogo, cronometro
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara N entradas registradas con POST /api/entradas/ individuales "
+        "contra una sola llamada a POST /api/entradas/bulk/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=1000)
+        parser.add_argument("--productos", type=int, default=50)
+
+    def handle(self, *args, **options):
+        filas = options["filas"]
+
+        limpiar_catalogo()
+        try:
+            productos = crear_catalogo(options["productos"], stock=0)
+            cliente = cliente_api(crear_usuario())
+            items = [
+                {"producto": productos[i % len(productos)].id, "cantidad": 1 + i % 7, "precio_unitario": 1000}
+                for i in range(filas)
+            ]
+
+            with cronometro() as individual:
+                for item in items:
+                    respuesta = cliente.post("/api/entradas/", item, format="json")
+                    if respuesta.status_code != 201:
+                        raise RuntimeError(f"POST /api/entradas/ falló: {respuesta.status_code} {respuesta.data}")
+
+            with cronometro() as masivo:
+                respuesta = cliente.post("/api/entradas/bulk/", {"items": items}, format="json")
+                if respuesta.status_code != 201:
+                    raise RuntimeError(f"POST /api/entradas/bulk/ falló: {respuesta.status_code} {respuesta.data}")
+
+            self.stdout.write(f"individual  filas={filas} tiempo={individual['segundos']:.3f}s "
+                              f"({filas / individual['segundos']:.0f} filas/s)")
+            self.stdout.write(f"bulk        filas={filas} tiempo={masivo['segundos']:.3f}s "
+                              f"({filas / masivo['segundos']:.0f} filas/s)")
+            self.stdout.write(f"aceleración x{individual['segundos'] / masivo['segundos']:.1f}")
+        finally:
+            limpiar_catalogo()
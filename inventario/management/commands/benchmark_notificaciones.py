@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inventario.models import CustomUser, Notificacion
+from inventario.services.notificaciones import NotificacionService
+from ._benchmark import PREFIJO, limpiar_catalogo, cronometro
+
+# Rol exclusivo del benchmark: ningún usuario real lo tiene.
+ROL = PREFIJO
+
+
+def _crear_destinatarios(cantidad):
+    prefijo = PREFIJO.lower()
+    CustomUser.objects.bulk_create(
+        [
+            CustomUser(
+                username=f"{prefijo}_n{i}",
+                password="!",
+                rut=f"{PREFIJO}{i:07d}",
+                telefono="+56900000000",
+                correo=f"{prefijo}_n{i}@maestranza.cl",
+                role=ROL,
+            )
+            for i in range(cantidad)
+        ],
+        batch_size=2000,
+    )
+
+
+def _uno_por_usuario(mensaje):
+    """Patrón anterior: un INSERT por destinatario."""
+    for usuario in CustomUser.objects.filter(role=ROL):
+        Notificacion.objects.create(usuario=usuario, mensaje=mensaje)
+
+
+class Command(BaseCommand):
+    help = (
+        "Notifica a un rol con muchos usuarios y compara un INSERT por usuario con "
+        "bulk_create por lotes, midiendo también cuánto queda abierta la transacción "
+        "del llamador cuando la escritura se difiere a Celery."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--destinatarios", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        cantidad = options["destinatarios"]
+        mensaje = f"{PREFIJO} notificación"
+
+        limpiar_catalogo()
+        try:
+            _crear_destinatarios(cantidad)
+
+            estrategias = [
+                ("uno-por-usuario", lambda: _uno_por_usuario(mensaje)),
+                ("bulk_create", lambda: NotificacionService.crear_para_roles(mensaje, [ROL])),
+            ]
+            for nombre, funcion in estrategias:
+                with cronometro() as tiempo:
+                    with transaction.atomic():
+                        funcion()
+                creadas = Notificacion.objects.filter(mensaje=mensaje).count()
+                Notificacion.objects.filter(mensaje=mensaje).delete()
+                self.stdout.write(
+                    f"{nombre:<16} destinatarios={cantidad} creadas={creadas} "
+                    f"transaccion={tiempo['segundos']:.3f}s"
+                )
+
+            # Diferido: el llamador solo registra el on_commit; la tarea se simula en proceso.
+            with mock.patch("inventario.tasks.tarea_notificar_roles.delay") as encolar:
+                with cronometro() as tiempo:
+                    with transaction.atomic():
+                        NotificacionService.notificar_roles(mensaje, [ROL], diferido=True)
+            with cronometro() as tarea:
+                NotificacionService.crear_para_roles(*encolar.call_args.args)
+            Notificacion.objects.filter(mensaje=mensaje).delete()
+            self.stdout.write(
+                f"{'diferido':<16} destinatarios={cantidad} transaccion={tiempo['segundos']:.3f}s "
+                f"tarea={tarea['segundos']:.3f}s"
+            )
+        finally:
+            limpiar_catalogo()
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from inventario.models import AlertaStock
+from inventario.services.ordenes import OrdenService
+from ._benchmark import PREFIJO, crear_catalogo, limpiar_catalogo, cronometro
+
+
+def _orden_por_alerta(alertas):
+    """Patrón anterior: una orden (y una transacción) por cada alerta pendiente."""
+    return [OrdenService.crear_orden_desde_alerta(alerta) for alerta in alertas]
+
+
+def _agrupado(alertas):
+    return OrdenService.generar_ordenes_por_proveedor(alertas)
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera órdenes desde alertas pendientes y compara una orden por alerta "
+        "con la generación agrupada por proveedor (tiempo y consultas)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alertas", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cantidad = options["alertas"]
+
+        limpiar_catalogo()
+        try:
+            productos = crear_catalogo(cantidad, stock=2, stock_minimo=10)
+            AlertaStock.objects.bulk_create(
+                [AlertaStock(producto=p, estado="activa") for p in productos], batch_size=2000
+            )
+            pendientes = OrdenService.alertas_pendientes().filter(producto__sku__startswith=f"{PREFIJO}-")
+
+            estrategias = [
+                ("orden-por-alerta", lambda: _orden_por_alerta(list(pendientes))),
+                ("agrupado", lambda: _agrupado(pendientes)),
+            ]
+            for nombre, funcion in estrategias:
+                # Cada estrategia corre en una transacción que se revierte: las alertas
+                # vuelven a quedar pendientes y no se envían notificaciones reales.
+                with transaction.atomic():
+                    with CaptureQueriesContext(connection) as consultas, cronometro() as tiempo:
+                        ordenes = funcion()
+                    transaction.set_rollback(True)
+
+                self.stdout.write(
+                    f"{nombre:<18} alertas={cantidad} ordenes={len(ordenes)} "
+                    f"consultas={len(consultas)} tiempo={tiempo['segundos']:.3f}s"
+                )
+        finally:
+            limpiar_catalogo()
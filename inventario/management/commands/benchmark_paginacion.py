@@ -0,0 +1,83 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.pagination import Cursor, CursorPagination
+
+from inventario.models import SalidaInventario
+from ._benchmark import (
+    crear_catalogo, crear_usuario, cliente_api, limpiar_catalogo, fechas_manuales, percentil
+)
+
+URL = "/api/salidas/"
+
+
+def _url_cursor(posicion):
+    """Enlace de cursor equivalente a haber recorrido la lista hasta `posicion`."""
+    paginador = CursorPagination()
+    paginador.base_url = f"http://localhost{URL}?paginacion=cursor"
+    return paginador.encode_cursor(Cursor(offset=0, reverse=False, position=posicion))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara GET /api/salidas/ en páginas profundas: número de página con COUNT, "
+        "sin COUNT (?count=no) y por cursor (?paginacion=cursor)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=5_000_000)
+        parser.add_argument("--repeticiones", type=int, default=20)
+        parser.add_argument("--page-size", type=int, default=100)
+
+    @override_settings(ALERTAS_POR_EVENTO=False)
+    def handle(self, *args, **options):
+        filas = options["filas"]
+        repeticiones = options["repeticiones"]
+        page_size = options["page_size"]
+
+        limpiar_catalogo()
+        try:
+            producto = crear_catalogo(1)[0]
+            cliente = cliente_api(crear_usuario())
+            self.stdout.write(f"Creando {filas} salidas...")
+            inicio = timezone.now()
+            with fechas_manuales(SalidaInventario, "fecha"):
+                for desde in range(0, filas, 50_000):
+                    SalidaInventario.objects.bulk_create(
+                        [
+                            SalidaInventario(
+                                producto=producto, cantidad=1, motivo="consumo",
+                                fecha=inicio - timedelta(seconds=i),
+                            )
+                            for i in range(desde, min(desde + 50_000, filas))
+                        ],
+                        batch_size=5000,
+                    )
+
+            for profundidad in (0.0, 0.5, 0.99):
+                pagina = int(filas * profundidad) // page_size + 1
+                # La fila anterior a la página pedida define la posición del cursor.
+                anterior = inicio - timedelta(seconds=(pagina - 1) * page_size - 1)
+                variantes = [
+                    ("pagina+count", f"{URL}?page={pagina}&page_size={page_size}"),
+                    ("pagina sin count", f"{URL}?page={pagina}&page_size={page_size}&count=no"),
+                    ("cursor", (_url_cursor(str(anterior)) if pagina > 1 else f"{URL}?paginacion=cursor")
+                     + f"&page_size={page_size}"),
+                ]
+                for nombre, url in variantes:
+                    latencias = []
+                    for _ in range(repeticiones):
+                        t0 = time.perf_counter()
+                        respuesta = cliente.get(url)
+                        latencias.append((time.perf_counter() - t0) * 1000)
+                        if respuesta.status_code != 200:
+                            raise RuntimeError(f"GET {url} respondió {respuesta.status_code}")
+                    self.stdout.write(
+                        f"pagina={pagina:<8} {nombre:<17} filas={len(respuesta.data['results'])} "
+                        f"p50={percentil(latencias, 50):.1f}ms p99={percentil(latencias, 99):.1f}ms"
+                    )
+        finally:
+            limpiar_catalogo()
@@ -0,0 +1,65 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventario.models import ConsumoDiario
+from inventario.services.planificacion import PlanificacionService, np
+from ._benchmark import crear_catalogo, limpiar_catalogo, cronometro
+
+
+class Command(BaseCommand):
+    help = (
+        "Planifica la reposición de un catálogo de prueba (carga, cálculo con NumPy y "
+        "en Python puro, y escritura masiva), midiendo cada etapa."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=100_000)
+        parser.add_argument("--dias-con-consumo", type=int, default=10,
+                            help="Días con salidas por producto dentro de la historia.")
+
+    def handle(self, *args, **options):
+        cantidad = options["productos"]
+        azar = random.Random(42)
+        parametros = PlanificacionService.parametros()
+        hoy = timezone.localdate()
+
+        limpiar_catalogo()
+        try:
+            ids = [p.id for p in crear_catalogo(cantidad)]
+            self.stdout.write(f"Creando consumo diario de {cantidad} productos...")
+            dias = range(parametros["dias_historia"])
+            lote = []
+            for producto_id in ids:
+                for dia in azar.sample(dias, options["dias_con_consumo"]):
+                    lote.append(ConsumoDiario(
+                        producto_id=producto_id, fecha=hoy - timedelta(days=dia), motivo="consumo",
+                        cantidad=azar.randint(1, 20), salidas=1,
+                    ))
+                if len(lote) >= 50_000:
+                    ConsumoDiario.objects.bulk_create(lote, batch_size=5000)
+                    lote = []
+            ConsumoDiario.objects.bulk_create(lote, batch_size=5000)
+
+            with cronometro() as carga:
+                productos, consumo = PlanificacionService.cargar(parametros, hoy)
+            self.stdout.write(f"carga         productos={len(productos)} tiempo={carga['segundos']:.2f}s")
+
+            modos = [True, False] if np is not None else [False]
+            for usar_numpy in modos:
+                with cronometro() as calculo:
+                    planes = PlanificacionService.calcular(productos, consumo, parametros, usar_numpy)
+                nombre = "numpy" if usar_numpy else "python"
+                self.stdout.write(f"cálculo {nombre:<6} tiempo={calculo['segundos']:.3f}s")
+
+            with cronometro() as escritura:
+                PlanificacionService.guardar(planes)
+            self.stdout.write(f"escritura     planes={len(planes)} tiempo={escritura['segundos']:.2f}s")
+
+            with cronometro() as total:
+                PlanificacionService.planificar(hasta=hoy)
+            self.stdout.write(f"total         tiempo={total['segundos']:.2f}s")
+        finally:
+            limpiar_catalogo()
@@ -0,0 +1,104 @@
+import logging
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from maestranza_backend.utils.logger import ColaHandler, FormatoJSON
+from maestranza_backend.utils.middleware import RequestIDMiddleware
+from ._benchmark import cronometro, percentil
+
+
+class ArchivoLento(logging.FileHandler):
+    """FileHandler que espera `latencia` segundos por registro (disco lento o de red)."""
+
+    def __init__(self, archivo, latencia):
+        super().__init__(archivo, encoding="utf-8")
+        self.latencia = latencia
+
+    def emit(self, record):
+        if self.latencia:
+            time.sleep(self.latencia)
+        super().emit(record)
+
+
+class Command(BaseCommand):
+    help = (
+        "Latencia por petición de un endpoint que registra varias líneas de log (como "
+        "OrdenService al generar órdenes y entradas), escribiendo con un FileHandler "
+        "síncrono o con ColaHandler. --latencia-disco simula un disco lento. También "
+        "compara f-strings con argumentos perezosos cuando el nivel está desactivado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--peticiones", type=int, default=2000)
+        parser.add_argument("--registros", type=int, default=10, help="Líneas de log por petición.")
+        parser.add_argument("--latencia-disco", type=float, default=0.0, help="Milisegundos por escritura.")
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger("benchmark_registro")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        registros = options["registros"]
+        latencia = options["latencia_disco"] / 1000
+
+        def vista(request):
+            for i in range(registros):
+                logger.info(
+                    "✅ %s entradas generadas automáticamente por orden #%s.", 1, i,
+                    extra={"datos": {"orden": i, "producto": "Perno 10mm", "cantidad": 5}},
+                )
+            return HttpResponse(b"{}", content_type="application/json")
+
+        cadena = RequestIDMiddleware(vista)
+        peticiones = [RequestFactory().get("/api/ordenes/") for _ in range(100)]
+
+        with tempfile.TemporaryDirectory() as directorio:
+            sincrono = ArchivoLento(os.path.join(directorio, "sincrono.log"), latencia)
+            sincrono.setFormatter(FormatoJSON())
+            cola = ColaHandler(os.path.join(directorio, "cola.log"))
+            # El listener escribe con el mismo destino lento que la variante síncrona.
+            cola.listener.stop()
+            cola.destino.close()
+            cola.destino = ArchivoLento(os.path.join(directorio, "cola.log"), latencia)
+            cola.destino.setFormatter(FormatoJSON())
+            cola.reiniciar()
+
+            for nombre, handler in (("FileHandler síncrono", sincrono), ("ColaHandler", cola)):
+                logger.addHandler(handler)
+                duraciones = []
+                try:
+                    with cronometro() as total:
+                        for i in range(options["peticiones"]):
+                            inicio = time.perf_counter()
+                            cadena(peticiones[i % 100])
+                            duraciones.append(time.perf_counter() - inicio)
+                    with cronometro() as vaciado:
+                        handler.close()
+                finally:
+                    logger.removeHandler(handler)
+
+                self.stdout.write(
+                    f"{nombre:<21} p50={percentil(duraciones, 50) * 1e6:.0f}µs "
+                    f"p99={percentil(duraciones, 99) * 1e6:.0f}µs "
+                    f"peticiones={total['segundos']:.3f}s vaciado={vaciado['segundos']:.3f}s "
+                    f"({options['peticiones']:,} peticiones x {registros} registros)"
+                )
+
+        # Nivel desactivado: la f-string se formatea igual; los argumentos no.
+        logger.setLevel(logging.WARNING)
+        orden = {"id": 15, "proveedor": "Proveedor Norte"}
+        veces = 200_000
+        with cronometro() as fstring:
+            for _ in range(veces):
+                logger.info(f"📝 Cotización creada para orden #{orden['id']} - proveedor: {orden['proveedor']}")
+        with cronometro() as perezoso:
+            for _ in range(veces):
+                logger.info("📝 Cotización creada para orden #%s - proveedor: %s", orden["id"], orden["proveedor"])
+        self.stdout.write(
+            f"nivel desactivado: f-string={fstring['segundos'] / veces * 1e9:.0f}ns/llamada "
+            f"argumentos={perezoso['segundos'] / veces * 1e9:.0f}ns/llamada"
+        )
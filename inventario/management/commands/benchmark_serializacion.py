@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+
+from inventario.models import Producto
+from inventario.serializers import ProductoSerializer, ProductoLecturaSerializer
+from ._benchmark import crear_catalogo, crear_usuario, cliente_api, limpiar_catalogo, cronometro
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide filas por segundo al serializar productos (consulta incluida) con ProductoSerializer "
+        "sobre instancias y con ProductoLecturaSerializer sobre .values(), completo y con ?fields=."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=20_000)
+        parser.add_argument("--repeticiones", type=int, default=3)
+
+    def medir(self, nombre, funcion, repeticiones):
+        mejor = None
+        for _ in range(repeticiones):
+            with cronometro() as tiempo:
+                filas = len(funcion())
+            mejor = tiempo["segundos"] if mejor is None else min(mejor, tiempo["segundos"])
+        self.stdout.write(f"{nombre:<52} filas={filas} tiempo={mejor:.3f}s filas/s={filas / mejor:,.0f}")
+
+    def handle(self, *args, **options):
+        repeticiones = options["repeticiones"]
+        limpiar_catalogo()
+        try:
+            crear_catalogo(options["productos"])
+            productos = Producto.objects.filter(sku__startswith="BENCH-").order_by("id")
+            campos = ["id", "sku", "stock", "is_low_stock"]
+
+            self.medir(
+                "ProductoSerializer (select_related)",
+                lambda: ProductoSerializer(productos.select_related("lote__proveedor", "lote__categoria"), many=True).data,
+                repeticiones,
+            )
+            self.medir(
+                "ProductoLecturaSerializer completo",
+                lambda: ProductoLecturaSerializer.representar(productos.values(*ProductoLecturaSerializer.columnas())),
+                repeticiones,
+            )
+            self.medir(
+                f"ProductoLecturaSerializer {','.join(campos)}",
+                lambda: ProductoLecturaSerializer.representar(
+                    productos.values(*ProductoLecturaSerializer.columnas(campos)), campos
+                ),
+                repeticiones,
+            )
+
+            cliente = cliente_api(crear_usuario())
+            for nombre, parametros in [
+                ("GET ?page_size=1000 (caché fría)", {"page_size": 1000}),
+                ("GET ?page_size=1000 (caché tibia)", {"page_size": 1000}),
+                ("GET ?page_size=1000&fields=...", {"page_size": 1000, "fields": ",".join(campos)}),
+            ]:
+                with cronometro() as tiempo:
+                    filas = len(cliente.get("/api/productos/", parametros).json()["results"])
+                self.stdout.write(f"{nombre:<52} filas={filas} tiempo={tiempo['segundos']:.3f}s")
+        finally:
+            limpiar_catalogo()
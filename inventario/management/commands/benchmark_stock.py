@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from inventario.models import Producto
+from inventario.services.stock import StockService, StockInsuficienteError
+from ._benchmark import crear_catalogo, limpiar_catalogo, cronometro
+
+
+def _salida_leer_y_guardar(producto_id, cantidad):
+    """Patrón anterior: leer el producto, restar en Python y guardar."""
+    try:
+        producto = Producto.objects.get(id=producto_id)
+        if producto.stock < cantidad:
+            return False
+        producto.stock -= cantidad
+        producto.save(update_fields=["stock"])
+        return True
+    finally:
+        connection.close()
+
+
+def _salida_atomica(producto_id, cantidad):
+    try:
+        with transaction.atomic():
+            StockService.restar(producto_id, cantidad)
+        return True
+    except StockInsuficienteError:
+        return False
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Lanza salidas concurrentes contra un mismo producto y compara el patrón "
+        "leer-y-guardar con StockService (actualizaciones perdidas y throughput)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--salidas", type=int, default=400)
+        parser.add_argument("--hilos", type=int, default=16)
+        parser.add_argument("--cantidad", type=int, default=1, help="Unidades por salida.")
+
+    # Se mide solo la mutación de stock, sin encolar evaluaciones de alerta.
+    @override_settings(ALERTAS_POR_EVENTO=False)
+    def handle(self, *args, **options):
+        salidas = options["salidas"]
+        hilos = options["hilos"]
+        cantidad = options["cantidad"]
+        stock_inicial = salidas * cantidad
+
+        estrategias = [
+            ("leer-y-guardar", _salida_leer_y_guardar),
+            ("StockService", _salida_atomica),
+        ]
+
+        limpiar_catalogo()
+        try:
+            for nombre, funcion in estrategias:
+                producto = crear_catalogo(1, stock=stock_inicial)[0]
+
+                with cronometro() as tiempo:
+                    with ThreadPoolExecutor(max_workers=hilos) as pool:
+                        resultados = list(pool.map(lambda _: funcion(producto.id, cantidad), range(salidas)))
+
+                exitosas = sum(resultados)
+                producto.refresh_from_db()
+                esperado = stock_inicial - exitosas * cantidad
+                perdidas = (producto.stock - esperado) // cantidad
+                throughput = salidas / tiempo["segundos"] if tiempo["segundos"] else 0
+
+                self.stdout.write(
+                    f"{nombre:<16} salidas={salidas} hilos={hilos} exitosas={exitosas} "
+                    f"stock_final={producto.stock} esperado={esperado} "
+                    f"perdidas={perdidas} tiempo={tiempo['segundos']:.3f}s "
+                    f"throughput={throughput:.0f} ops/s"
+                )
+                limpiar_catalogo()
+        finally:
+            limpiar_catalogo()
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from inventario.views import ProductoViewSet
+from maestranza_backend.utils.medicion import MedicionMiddleware
+from maestranza_backend.utils.telemetria import TelemetriaMiddleware, telemetria
+from ._benchmark import cronometro
+
+
+class Command(BaseCommand):
+    help = (
+        "Microbenchmark del costo por petición de TelemetriaMiddleware y MedicionMiddleware "
+        "sobre una vista vacía (sin base de datos): tiempo con cada middleware menos el tiempo "
+        "de la vista sola, en microsegundos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--peticiones", type=int, default=100_000)
+        parser.add_argument("--rondas", type=int, default=5, help="Se informa la mejor ronda de cada variante.")
+
+    def handle(self, *args, **options):
+        cuerpo = b"x" * 2048
+
+        def vista(request):
+            # Lo que deja process_view de MedicionMiddleware al resolver un viewset.
+            request.medicion_vista = (ProductoViewSet, "list")
+            return HttpResponse(cuerpo, content_type="application/json")
+
+        variantes = {
+            "vista sola": vista,
+            "medición": MedicionMiddleware(vista),
+            "telemetría + medición": TelemetriaMiddleware(MedicionMiddleware(vista)),
+        }
+        peticiones = [RequestFactory().get("/api/productos/") for _ in range(1000)]
+        total = options["peticiones"]
+
+        mejores = {}
+        for _ in range(options["rondas"]):
+            for nombre, cadena in variantes.items():
+                with cronometro() as tiempo:
+                    for i in range(total):
+                        cadena(peticiones[i % 1000])
+                mejores[nombre] = min(mejores.get(nombre, float("inf")), tiempo["segundos"])
+        telemetria.reiniciar()
+
+        base = mejores["vista sola"] / total * 1e6
+        self.stdout.write(f"vista sola: {base:.2f} µs/petición ({total:,} peticiones, mejor de {options['rondas']})")
+        for nombre in ("medición", "telemetría + medición"):
+            por_peticion = mejores[nombre] / total * 1e6
+            self.stdout.write(f"{nombre:<22} {por_peticion:.2f} µs/petición  costo={por_peticion - base:.2f} µs")
@@ -0,0 +1,29 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from inventario.services.conciliacion import ConciliacionService
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara Producto.stock con el stock esperado según entradas, salidas, conteos "
+        "físicos y el libro de movimientos; escribe las discrepancias en CSV y, con "
+        "--aplicar, corrige las que tienen una base confiable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--salida", default="-", help="Archivo CSV de destino ('-' para stdout).")
+        parser.add_argument("--aplicar", action="store_true", help="Aplica las correcciones en bloque.")
+
+    def handle(self, *args, **options):
+        if options["salida"] == "-":
+            resumen = ConciliacionService.conciliar(sys.stdout, aplicar=options["aplicar"])
+        else:
+            with open(options["salida"], "w", newline="", encoding="utf-8") as destino:
+                resumen = ConciliacionService.conciliar(destino, aplicar=options["aplicar"])
+
+        self.stderr.write(
+            f"Discrepancias: {resumen['discrepancias']} - corregibles: {resumen['corregibles']} "
+            f"- corregidas: {resumen['corregidos']}"
+        )
@@ -0,0 +1,58 @@
+import csv
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.models import CustomUser
+from inventario.services.importacion import ImportacionProductoService, COLUMNAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa productos desde un CSV o XLSX (encabezados: " + ", ".join(COLUMNAS) + "). "
+        "Crea los productos nuevos y actualiza por SKU los existentes; escribe las filas "
+        "rechazadas en un reporte CSV."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Ruta del archivo .csv o .xlsx.")
+        parser.add_argument("--modo", choices=["atomico", "parcial"], default="atomico",
+                            help="atomico: cualquier fila inválida cancela todo; parcial: se omiten esas filas.")
+        parser.add_argument("--reporte", default="-", help="CSV de errores por fila ('-' para stdout).")
+        parser.add_argument("--usuario", help="Username que queda como responsable en la auditoría.")
+
+    def handle(self, *args, **options):
+        usuario = None
+        if options["usuario"]:
+            usuario = CustomUser.objects.filter(username=options["usuario"]).first()
+            if usuario is None:
+                raise CommandError(f"No existe el usuario '{options['usuario']}'.")
+
+        try:
+            with open(options["archivo"], "rb") as archivo:
+                resumen = ImportacionProductoService.importar(
+                    archivo, os.path.basename(options["archivo"]), usuario=usuario, modo=options["modo"]
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if resumen["errores"]:
+            if options["reporte"] == "-":
+                self.escribir_reporte(sys.stdout, resumen["errores"])
+            else:
+                with open(options["reporte"], "w", newline="", encoding="utf-8") as destino:
+                    self.escribir_reporte(destino, resumen["errores"])
+
+        self.stderr.write(
+            f"Filas: {resumen['filas']} - creados: {resumen['creados']} - actualizados: {resumen['actualizados']} "
+            f"- lotes creados: {resumen['lotes_creados']} - filas con error: {len(resumen['errores'])}"
+        )
+
+    @staticmethod
+    def escribir_reporte(destino, errores):
+        escritor = csv.writer(destino)
+        escritor.writerow(["fila", "sku", "columna", "error"])
+        for error in errores:
+            for columna, mensaje in error["error"].items():
+                escritor.writerow([error["fila"], error["sku"], columna, mensaje])
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from inventario.services.planificacion import PlanificacionService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el punto de reorden y la cantidad de pedido de todo el catálogo "
+        "a partir del consumo diario. Los parámetros omitidos se toman de settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias-historia", type=int, default=None)
+        parser.add_argument("--dias-entrega", type=int, default=None,
+                            help="Plazo para proveedores sin dias_entrega.")
+        parser.add_argument("--nivel-servicio", type=float, default=None)
+        parser.add_argument("--sin-numpy", action="store_true", help="Fuerza el cálculo en Python puro.")
+
+    def handle(self, *args, **options):
+        planes = PlanificacionService.planificar(
+            usar_numpy=False if options["sin_numpy"] else None,
+            dias_historia=options["dias_historia"],
+            dias_entrega=options["dias_entrega"],
+            nivel_servicio=options["nivel_servicio"],
+        )
+        self.stdout.write(f"Plan de reposición recalculado para {planes} productos.")
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from inventario.services.consumo import ConsumoService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el acumulado de consumo diario (producto × día × motivo) desde las "
+        "salidas de inventario. Úselo para la carga inicial o para reparar un rango."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", default=None, help="Primer día a recalcular (AAAA-MM-DD).")
+        parser.add_argument("--hasta", default=None, help="Último día a recalcular (AAAA-MM-DD).")
+
+    def handle(self, *args, **options):
+        fechas = {}
+        for nombre in ("desde", "hasta"):
+            valor = options[nombre]
+            fechas[nombre] = parse_date(valor) if valor else None
+            if valor and fechas[nombre] is None:
+                raise CommandError(f"--{nombre} debe tener el formato AAAA-MM-DD.")
+
+        guardados = ConsumoService.reconstruir(**fechas)
+        self.stdout.write(f"Consumo diario recalculado: {guardados} filas.")
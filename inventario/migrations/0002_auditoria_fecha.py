@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:32
+
+import django.core.validators
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditoria',
+            name='fecha',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='ordenautomatica',
+            name='cantidad_ordenada',
+            field=models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AlterField(
+            model_name='ordenautomaticaitem',
+            name='cantidad_ordenada',
+            field=models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
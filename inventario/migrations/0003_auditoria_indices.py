@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0002_auditoria_fecha'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['fecha'], name='auditoria_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['modelo_afectado', 'id_objeto'], name='auditoria_objeto_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['usuario', 'fecha'], name='auditoria_usuario_fecha_idx'),
+        ),
+    ]
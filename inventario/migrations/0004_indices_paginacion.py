@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_auditoria_indices'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entradainventario',
+            index=models.Index(fields=['fecha', 'id'], name='entrada_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialprecioproducto',
+            index=models.Index(fields=['fecha_registro', 'id'], name='historial_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['usuario', 'fecha_creacion', 'id'], name='notificacion_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salidainventario',
+            index=models.Index(fields=['fecha', 'id'], name='salida_fecha_id_idx'),
+        ),
+    ]
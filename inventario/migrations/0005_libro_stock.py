@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0004_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('origen', models.CharField(choices=[('inicial', 'Stock inicial'), ('entrada', 'Entrada'), ('salida', 'Salida'), ('anulacion', 'Anulación de movimiento'), ('ajuste', 'Ajuste manual')], max_length=16)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_stock', to='inventario.producto')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Stock',
+                'verbose_name_plural': 'Movimientos de Stock',
+                'ordering': ['-fecha', '-id'],
+                'indexes': [models.Index(fields=['producto', 'fecha', 'id'], name='movstock_producto_fecha_idx'), models.Index(fields=['fecha'], name='movstock_fecha_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SnapshotStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('stock', models.IntegerField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots_stock', to='inventario.producto')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Stock',
+                'verbose_name_plural': 'Snapshots de Stock',
+                'ordering': ['-fecha'],
+                'constraints': [models.UniqueConstraint(fields=('producto', 'fecha'), name='snapshot_producto_fecha_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0005_libro_stock'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='movimientostock',
+            name='origen',
+            field=models.CharField(choices=[('inicial', 'Stock inicial'), ('entrada', 'Entrada'), ('salida', 'Salida'), ('anulacion', 'Anulación de movimiento'), ('ajuste', 'Ajuste manual'), ('conciliacion', 'Corrección por conciliación')], max_length=16),
+        ),
+    ]
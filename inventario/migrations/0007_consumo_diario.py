@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0006_origen_conciliacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('motivo', models.CharField(choices=[('merma', 'Merma/Pérdida'), ('consumo', 'Consumo Interno'), ('devolucion', 'Devolución a Proveedor'), ('ajuste', 'Ajuste Manual')], max_length=128)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('salidas', models.IntegerField(default=0)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumos_diarios', to='inventario.producto')),
+            ],
+            options={
+                'verbose_name': 'Consumo Diario',
+                'verbose_name_plural': 'Consumos Diarios',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha', 'producto'], name='consumo_fecha_producto_idx')],
+                'constraints': [models.UniqueConstraint(fields=('producto', 'fecha', 'motivo'), name='consumo_producto_fecha_motivo_uniq')],
+            },
+        ),
+    ]
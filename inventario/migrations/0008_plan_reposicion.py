@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-17 12:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0007_consumo_diario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proveedor',
+            name='dias_entrega',
+            field=models.PositiveIntegerField(blank=True, help_text='Días entre el pedido y la recepción (vacío: valor por defecto)', null=True),
+        ),
+        migrations.CreateModel(
+            name='PlanReposicion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('demanda_diaria', models.FloatField(default=0)),
+                ('desviacion', models.FloatField(default=0)),
+                ('dias_entrega', models.PositiveIntegerField(default=0)),
+                ('stock_seguridad', models.PositiveIntegerField(default=0)),
+                ('punto_reorden', models.PositiveIntegerField(default=0)),
+                ('cantidad_pedido', models.PositiveIntegerField(default=0)),
+                ('fecha_calculo', models.DateTimeField(default=django.utils.timezone.now)),
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='plan_reposicion', to='inventario.producto')),
+            ],
+            options={
+                'verbose_name': 'Plan de Reposición',
+                'verbose_name_plural': 'Planes de Reposición',
+                'ordering': ['producto'],
+            },
+        ),
+    ]
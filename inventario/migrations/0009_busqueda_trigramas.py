@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# (nombre, modelo, expresión indexada). Las expresiones coinciden con las que genera
+# Django: istartswith/iexact usan UPPER(col::text) y startswith usa col::text.
+INDICES = [
+    ("producto_nombre_trgm_idx", "producto", "nombre"),
+    ("producto_sku_trgm_idx", "producto", "UPPER(sku::text)"),
+    ("producto_codigo_barra_trgm_idx", "producto", "codigo_barra"),
+    ("lote_codigo_trgm_idx", "lote", "UPPER(codigo::text)"),
+    ("proveedor_nombre_trgm_idx", "proveedor", "nombre"),
+]
+
+
+def crear_indices(apps, schema_editor):
+    # Solo PostgreSQL: en las demás bases BusquedaProductoService usa su índice en memoria.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    q = schema_editor.quote_name
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for nombre, modelo, expresion in INDICES:
+        tabla = apps.get_model("inventario", modelo)._meta.db_table
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {q(nombre)} ON {q(tabla)} USING gin (({expresion}) gin_trgm_ops)"
+        )
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for nombre, _, _ in INDICES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(nombre)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0008_plan_reposicion'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
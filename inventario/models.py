@@ -208,6 +208,9 @@ class Proveedor(models.Model):
         help_text="ejemplo@correo.cl",
         default="usuario-temporal@correo.cl",
     )
+    dias_entrega = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Días entre el pedido y la recepción (vacío: valor por defecto)"
+    )
 
     def save(self, *args, **kwargs):
         try:
@@ -312,6 +315,8 @@ class AlertaStock(models.Model):
         ("silenciada", "Silenciada"),
         ("inactiva", "Inactiva"),
     ]
+    # Estados en los que la alerta sigue abierta: no se crea otra para el mismo producto.
+    ESTADOS_ABIERTOS = ["activa", "pendiente", "silenciada"]
     
     producto = models.ForeignKey(Producto, on_delete=models.CASCADE)
     fecha_creacion = models.DateTimeField(auto_now_add=True, null=True)
@@ -416,6 +421,7 @@ class EntradaInventario(models.Model):
         verbose_name = "Entrada de Inventario"
         verbose_name_plural = "Entradas de Inventario"
         ordering = ["-fecha"]
+        indexes = [models.Index(fields=["fecha", "id"], name="entrada_fecha_id_idx")]
 
 # Creacion del modelo SALIDA-INVENTARIO
 class SalidaInventario(models.Model):
@@ -447,6 +453,7 @@ class SalidaInventario(models.Model):
         verbose_name = "Salida de Inventario"
         verbose_name_plural = "Salidas de Inventario"
         ordering = ["-fecha"]
+        indexes = [models.Index(fields=["fecha", "id"], name="salida_fecha_id_idx")]
 
 # Creacion del modelo COTIZACION-PROVEEDOR
 class CotizacionProveedor(models.Model):
@@ -492,6 +499,7 @@ class HistorialPrecioProducto(models.Model):
         verbose_name = "Historial de Precio"
         verbose_name_plural = "Historiales de Precios"
         ordering = ["-fecha_registro"]
+        indexes = [models.Index(fields=["fecha_registro", "id"], name="historial_fecha_id_idx")]
 
 # Creacion del modelo KIT
 class Kit(models.Model):
@@ -533,7 +541,7 @@ class Auditoria(models.Model):
         max_length=32,
         choices=[('crear', 'Crear'), ('actualizar', 'Actualizar'), ('eliminar', 'Eliminar')]
     )
-    fecha = models.DateTimeField(auto_now_add=True)
+    fecha = models.DateTimeField(default=timezone.now, editable=False)
     descripcion = models.TextField()
 
     def __str__(self):
@@ -546,6 +554,11 @@ class Auditoria(models.Model):
         verbose_name = "Registro de Auditoría"
         verbose_name_plural = "Registros de Auditoría"
         ordering = ["-fecha"]
+        indexes = [
+            models.Index(fields=["fecha"], name="auditoria_fecha_idx"),
+            models.Index(fields=["modelo_afectado", "id_objeto"], name="auditoria_objeto_idx"),
+            models.Index(fields=["usuario", "fecha"], name="auditoria_usuario_fecha_idx"),
+        ]
 
 # Creacion del modelo NOTIFICACION
 class Notificacion(models.Model):
@@ -564,6 +577,7 @@ class Notificacion(models.Model):
         verbose_name = "Notificación"
         verbose_name_plural = "Notificaciones"
         ordering = ["-fecha_creacion"]
+        indexes = [models.Index(fields=["usuario", "fecha_creacion", "id"], name="notificacion_usuario_fecha_idx")]
 
 # Creacion del modelo INVENTARIO-FISICO
 class InventarioFisico(models.Model):
@@ -587,3 +601,102 @@ class InventarioFisico(models.Model):
         verbose_name = "Inventario Físico"
         verbose_name_plural = "Inventarios Físicos"
         ordering = ["-fecha_conteo"]
+
+# Creacion del modelo MOVIMIENTO-STOCK
+class MovimientoStock(models.Model):
+    """Libro mayor de stock: un registro con signo por cada cambio de Producto.stock. Solo se agregan filas."""
+    ORIGENES = [
+        ("inicial", "Stock inicial"),
+        ("entrada", "Entrada"),
+        ("salida", "Salida"),
+        ("anulacion", "Anulación de movimiento"),
+        ("ajuste", "Ajuste manual"),
+        ("conciliacion", "Corrección por conciliación"),
+    ]
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name="movimientos_stock")
+    delta = models.IntegerField()
+    origen = models.CharField(max_length=16, choices=ORIGENES)
+    fecha = models.DateTimeField(default=timezone.now, editable=False)
+
+    def __str__(self):
+        try:
+            return f"{self.delta:+d} {self.producto.nombre} ({self.get_origen_display()})"
+        except Exception:
+            return "Movimiento de stock inválido"
+
+    class Meta:
+        verbose_name = "Movimiento de Stock"
+        verbose_name_plural = "Movimientos de Stock"
+        ordering = ["-fecha", "-id"]
+        indexes = [
+            models.Index(fields=["producto", "fecha", "id"], name="movstock_producto_fecha_idx"),
+            models.Index(fields=["fecha"], name="movstock_fecha_idx"),
+        ]
+
+# Creacion del modelo SNAPSHOT-STOCK
+class SnapshotStock(models.Model):
+    """Stock de un producto al cierre de `fecha` (hora local), punto de partida para consultas históricas."""
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name="snapshots_stock")
+    fecha = models.DateField()
+    stock = models.IntegerField()
+
+    def __str__(self):
+        try:
+            return f"Stock de {self.producto.nombre} al {self.fecha}: {self.stock}"
+        except Exception:
+            return "Snapshot de stock inválido"
+
+    class Meta:
+        verbose_name = "Snapshot de Stock"
+        verbose_name_plural = "Snapshots de Stock"
+        ordering = ["-fecha"]
+        constraints = [
+            models.UniqueConstraint(fields=["producto", "fecha"], name="snapshot_producto_fecha_uniq"),
+        ]
+
+# Creacion del modelo CONSUMO-DIARIO
+class ConsumoDiario(models.Model):
+    """Total de salidas de un producto por día (hora local) y motivo, mantenido al registrar cada salida."""
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name="consumos_diarios")
+    fecha = models.DateField()
+    motivo = models.CharField(max_length=128, choices=SalidaInventario._meta.get_field("motivo").choices)
+    cantidad = models.IntegerField(default=0)
+    salidas = models.IntegerField(default=0)
+
+    def __str__(self):
+        try:
+            return f"Consumo de {self.producto.nombre} el {self.fecha} ({self.motivo}): {self.cantidad}"
+        except Exception:
+            return "Consumo diario inválido"
+
+    class Meta:
+        verbose_name = "Consumo Diario"
+        verbose_name_plural = "Consumos Diarios"
+        ordering = ["-fecha"]
+        constraints = [
+            models.UniqueConstraint(fields=["producto", "fecha", "motivo"], name="consumo_producto_fecha_motivo_uniq"),
+        ]
+        indexes = [models.Index(fields=["fecha", "producto"], name="consumo_fecha_producto_idx")]
+
+# Creacion del modelo PLAN-REPOSICION
+class PlanReposicion(models.Model):
+    """Punto de reorden y cantidad de pedido de un producto, recalculados por PlanificacionService."""
+    producto = models.OneToOneField(Producto, on_delete=models.CASCADE, related_name="plan_reposicion")
+    demanda_diaria = models.FloatField(default=0)
+    desviacion = models.FloatField(default=0)
+    dias_entrega = models.PositiveIntegerField(default=0)
+    stock_seguridad = models.PositiveIntegerField(default=0)
+    punto_reorden = models.PositiveIntegerField(default=0)
+    cantidad_pedido = models.PositiveIntegerField(default=0)
+    fecha_calculo = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        try:
+            return f"Plan de {self.producto.nombre}: reorden {self.punto_reorden}, pedido {self.cantidad_pedido}"
+        except Exception:
+            return "Plan de reposición inválido"
+
+    class Meta:
+        verbose_name = "Plan de Reposición"
+        verbose_name_plural = "Planes de Reposición"
+        ordering = ["producto"]
@@ -1,6 +1,9 @@
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from inventario.services.importacion import ImportacionProductoService
+from maestranza_backend.utils.campos_dinamicos import CamposDinamicosMixin
 from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+from maestranza_backend.utils.medicion import serializacion
 from maestranza_backend.utils.validar_rut import validar_rut
 from inventario.validators import (
     validar_stock_minimo_no_negativo, validar_codigo_barra, validar_sku_formato,
@@ -19,12 +22,12 @@ from .models import (
 # Creación de los serializers localizacion regional.
 # --------------------------------------------------#
 
-class PaisSerializer(serializers.ModelSerializer):
+class PaisSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Pais
         fields = ["id", "nombre"]
 
-class RegionSerializer(serializers.ModelSerializer):
+class RegionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     pais = PaisSerializer(read_only=True)
     pais_id = serializers.PrimaryKeyRelatedField(
         source='pais', queryset=Pais.objects.all(), write_only=True
@@ -34,7 +37,7 @@ class RegionSerializer(serializers.ModelSerializer):
         model = Region
         fields = ["id", "nombre", "pais", "pais_id"]
 
-class CiudadSerializer(serializers.ModelSerializer):
+class CiudadSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     region = RegionSerializer(read_only=True)
     region_id = serializers.PrimaryKeyRelatedField(
         source='region', queryset=Region.objects.all(), write_only=True
@@ -44,7 +47,7 @@ class CiudadSerializer(serializers.ModelSerializer):
         model = Ciudad
         fields = ["id", "nombre", "region", "region_id"]
 
-class ComunaSerializer(serializers.ModelSerializer):
+class ComunaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     ciudad = CiudadSerializer(read_only=True)
     ciudad_id = serializers.PrimaryKeyRelatedField(
         source='ciudad', queryset=Ciudad.objects.all(), write_only=True
@@ -54,7 +57,7 @@ class ComunaSerializer(serializers.ModelSerializer):
         model = Comuna
         fields = ["id", "nombre", "ciudad", "ciudad_id"]
 
-class CargoSerializer(serializers.ModelSerializer):
+class CargoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Cargo
         fields = ["id", "nombre"]
@@ -64,7 +67,7 @@ class CargoSerializer(serializers.ModelSerializer):
 # -----------------------------------------------------------#
 
 # Creacion del serializer CUSTOMUSER
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     comuna = ComunaSerializer(read_only=True)
     comuna_id = serializers.PrimaryKeyRelatedField(
         source='comuna', queryset=Comuna.objects.all(), write_only=True
@@ -149,7 +152,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error inesperado al validar el usuario: {str(e)}")
 
 # Creacion del serializer CATEGORIA
-class CategoriaSerializer(serializers.ModelSerializer):
+class CategoriaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     nombre = serializers.CharField(max_length=128)
 
     class Meta:
@@ -177,7 +180,7 @@ class CategoriaSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error al validar descripción: {str(e)}")
 
 # Creacion del serializer PROVEEDOR
-class ProveedorSerializer(serializers.ModelSerializer):
+class ProveedorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     comuna_nombre = serializers.CharField(source="comuna.nombre", read_only=True)
 
     class Meta:
@@ -191,6 +194,7 @@ class ProveedorSerializer(serializers.ModelSerializer):
             'comuna_nombre',
             'telefono',
             'correo',
+            'dias_entrega',
         ]
 
     def validate_nombre(self, value):
@@ -246,12 +250,13 @@ class ProveedorSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error inesperado al validar proveedor: {str(e)}")
 
 # Creacion del serializer LOTE
-class LoteSerializer(serializers.ModelSerializer):
+class LoteSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     proveedor_nombre = serializers.CharField(source="proveedor.nombre", read_only=True)
     categoria_nombre = serializers.CharField(source="categoria.nombre", read_only=True)
 
     class Meta:
         model = Lote
+        expandibles = {"proveedor": ProveedorSerializer, "categoria": CategoriaSerializer}
         fields = [
             'id',
             'codigo',
@@ -307,7 +312,7 @@ class LoteSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error al validar fechas del lote: {str(e)}")
 
 # Creacion del serializer PRODUCTO
-class ProductoSerializer(serializers.ModelSerializer):
+class ProductoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     lote_codigo = serializers.CharField(source="lote.codigo", read_only=True)
     proveedor_id = serializers.IntegerField(source="lote.proveedor.id", read_only=True)
     proveedor_nombre = serializers.CharField(source="lote.proveedor.nombre", read_only=True)
@@ -317,6 +322,7 @@ class ProductoSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Producto
+        expandibles = {"lote": LoteSerializer}
         fields = [
             'id',
             'nombre',
@@ -409,8 +415,67 @@ class ProductoSerializer(serializers.ModelSerializer):
         except Exception as e:
             raise serializers.ValidationError(f"Error al actualizar producto: {str(e)}")
 
+# Lectura de PRODUCTO desde .values(), sin instancias ni campos DRF por fila
+class ProductoLecturaSerializer:
+    """
+    Produce la misma salida que ProductoSerializer (mismas claves, orden y formato)
+    a partir de filas de .values(), para listados de solo lectura. Con `campos` se
+    pide un subconjunto: solo se leen las columnas necesarias y solo se hace el JOIN
+    a lote, proveedor o categoría si se pide alguno de sus campos.
+    """
+    # Campo de salida -> columna de .values(). is_low_stock se calcula.
+    COLUMNAS = {
+        'id': 'id',
+        'nombre': 'nombre',
+        'descripcion': 'descripcion',
+        'precio': 'precio',
+        'stock': 'stock',
+        'stock_minimo': 'stock_minimo',
+        'codigo_barra': 'codigo_barra',
+        'sku': 'sku',
+        'habilitado': 'habilitado',
+        'fecha_actualizacion': 'fecha_actualizacion',
+        'lote': 'lote_id',
+        'lote_codigo': 'lote__codigo',
+        'proveedor_id': 'lote__proveedor_id',
+        'proveedor_nombre': 'lote__proveedor__nombre',
+        'categoria_id': 'lote__categoria_id',
+        'categoria_nombre': 'lote__categoria__nombre',
+        'is_low_stock': None,
+    }
+    CAMPOS = ProductoSerializer.Meta.fields
+    _fecha = serializers.DateTimeField()
+
+    @classmethod
+    def columnas(cls, campos=None):
+        """Columnas de .values() necesarias para `campos` (todos si es None)."""
+        columnas = {cls.COLUMNAS[campo] for campo in campos or cls.CAMPOS if cls.COLUMNAS[campo]}
+        if campos is None or 'is_low_stock' in campos:
+            columnas.update(('stock', 'stock_minimo'))
+        return sorted(columnas)
+
+    @classmethod
+    def representar(cls, filas, campos=None):
+        """Lista de dicts con `campos` (en el orden de ProductoSerializer) desde filas de .values()."""
+        campos = [campo for campo in cls.CAMPOS if campos is None or campo in campos]
+        pares = [(campo, cls.COLUMNAS[campo]) for campo in campos]
+        fecha = cls._fecha.to_representation
+        resultado = []
+        with serializacion():
+            for fila in filas:
+                datos = {}
+                for campo, columna in pares:
+                    if columna is None:
+                        datos[campo] = fila['stock'] <= fila['stock_minimo']
+                    elif columna == 'fecha_actualizacion':
+                        datos[campo] = fecha(fila[columna])
+                    else:
+                        datos[campo] = fila[columna]
+                resultado.append(datos)
+        return resultado
+
 # Creacion del serializer ALERTASTOCK
-class AlertaStockSerializer(serializers.ModelSerializer):
+class AlertaStockSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     producto_id = serializers.IntegerField(source='producto.id', read_only=True)
     producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
     sku = serializers.CharField(source='producto.sku', read_only=True)
@@ -419,6 +484,7 @@ class AlertaStockSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = AlertaStock
+        expandibles = {"producto": ProductoSerializer}
         fields = [
             'id',
             'producto',
@@ -458,12 +524,13 @@ class AlertaStockSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error al validar producto en alerta: {str(e)}")
 
 # Creacion del serializer ORDENAUTOMATICA-ITEM
-class OrdenAutomaticaItemSerializer(serializers.ModelSerializer):
+class OrdenAutomaticaItemSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
     sku = serializers.CharField(source='producto.sku', read_only=True)
 
     class Meta:
         model = OrdenAutomaticaItem
+        expandibles = {"producto": ProductoSerializer}
         fields = [
             'id',
             'producto',
@@ -500,7 +567,7 @@ class OrdenAutomaticaItemSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error inesperado al validar ítem de orden: {str(e)}")
 
 # Creacion del serializer ORDEN-AUTOMATICA
-class OrdenAutomaticaSerializer(serializers.ModelSerializer):
+class OrdenAutomaticaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     proveedor_nombre = serializers.CharField(source='proveedor.nombre', read_only=True)
     producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
     sku = serializers.CharField(source='producto.sku', read_only=True)
@@ -508,6 +575,7 @@ class OrdenAutomaticaSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = OrdenAutomatica
+        expandibles = {"producto": ProductoSerializer, "proveedor": ProveedorSerializer}
         fields = [
             'id',
             'proveedor',
@@ -562,7 +630,7 @@ class OrdenAutomaticaSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error al validar orden automática: {str(e)}")
 
 # Creacion del serializer ENTRADA-INVENTARIO
-class EntradaInventarioSerializer(serializers.ModelSerializer):
+class EntradaInventarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
     sku = serializers.CharField(source='producto.sku', read_only=True)
     proveedor_nombre = serializers.CharField(source='proveedor.nombre', read_only=True, default=None)
@@ -570,6 +638,7 @@ class EntradaInventarioSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = EntradaInventario
+        expandibles = {"producto": ProductoSerializer, "proveedor": ProveedorSerializer}
         fields = [
             'id',
             'producto',
@@ -620,7 +689,8 @@ class EntradaInventarioSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error al actualizar entrada de inventario: {str(e)}")
 
 # Creacion del serializer SALIDA-INVENTARIO
-class SalidaInventarioSerializer(serializers.ModelSerializer):
+class SalidaInventarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    producto = serializers.PrimaryKeyRelatedField(queryset=Producto.objects.all())
     producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
     sku = serializers.CharField(source='producto.sku', read_only=True)
     responsable_nombre = serializers.CharField(source='responsable.get_full_name', read_only=True, default=None)
@@ -628,6 +698,7 @@ class SalidaInventarioSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = SalidaInventario
+        expandibles = {"producto": ProductoSerializer, "responsable": CustomUserSerializer}
         fields = [
             'id',
             'producto',
@@ -669,13 +740,75 @@ class SalidaInventarioSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Debe especificar un responsable para la salida.")
         return value
 
+# Creacion del serializer de ESCANEO-LOTE
+class EscaneoLoteSerializer(serializers.Serializer):
+    MAX_CODIGOS = 500
+
+    codigos = serializers.ListField(
+        child=serializers.CharField(max_length=64), allow_empty=False, max_length=MAX_CODIGOS
+    )
+
+# Creacion de los serializers de MOVIMIENTOS-MASIVOS
+class EntradaMasivaItemSerializer(serializers.Serializer):
+    producto = serializers.IntegerField(min_value=1)
+    cantidad = serializers.IntegerField(min_value=1)
+    precio_unitario = serializers.IntegerField(min_value=0, default=0)
+    proveedor = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    orden = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+
+class SalidaMasivaItemSerializer(serializers.Serializer):
+    producto = serializers.IntegerField(min_value=1)
+    cantidad = serializers.IntegerField(min_value=1)
+    motivo = serializers.ChoiceField(choices=SalidaInventario._meta.get_field("motivo").choices)
+    observacion = serializers.CharField(required=False, allow_blank=True, default="")
+    responsable = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+
+class MovimientoMasivoSerializer(serializers.Serializer):
+    MODOS = [
+        ("atomico", "Todo o nada"),
+        ("parcial", "Omitir filas con error"),
+    ]
+    MAX_ITEMS = 5000
+
+    modo = serializers.ChoiceField(choices=MODOS, default="atomico")
+    items = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_ITEMS
+    )
+
+    def validar_items(self, item_serializer_class):
+        """
+        Valida cada fila con `item_serializer_class` en una sola pasada, sin consultas.
+        Devuelve (items_validos, errores) conservando el índice original de cada fila.
+        """
+        validos, errores = [], []
+        for indice, item in enumerate(self.validated_data["items"]):
+            fila = item_serializer_class(data=item)
+            if fila.is_valid():
+                validos.append({**fila.validated_data, "indice": indice})
+            else:
+                errores.append({"indice": indice, "error": fila.errors})
+        return validos, errores
+
+# Creacion del serializer de IMPORTACION-PRODUCTOS
+class ImportacionProductosSerializer(serializers.Serializer):
+    archivo = serializers.FileField()
+    modo = serializers.ChoiceField(choices=MovimientoMasivoSerializer.MODOS, default="atomico")
+
+    def validate_archivo(self, value):
+        try:
+            ImportacionProductoService.formato(value.name)
+            return value
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
 # Creacion del serializer COTIZACION-PROVEEDOR  
-class CotizacionProveedorSerializer(serializers.ModelSerializer):
+class CotizacionProveedorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     orden_id = serializers.IntegerField(source="orden.id", read_only=True)
     archivo_pdf_url = serializers.SerializerMethodField()
 
     class Meta:
         model = CotizacionProveedor
+        expandibles = {"orden": OrdenAutomaticaSerializer}
         fields = [
             "id",
             "orden",
@@ -705,13 +838,14 @@ class CotizacionProveedorSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error al validar monto: {str(e)}")
 
 # Creacion del serializer HISTORIAL-PRECIO-PRODUCTO
-class HistorialPrecioProductoSerializer(serializers.ModelSerializer):
+class HistorialPrecioProductoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     producto_nombre = serializers.CharField(source="producto.nombre", read_only=True)
     sku = serializers.CharField(source="producto.sku", read_only=True)
     proveedor_nombre = serializers.CharField(source="proveedor.nombre", read_only=True, default=None)
 
     class Meta:
         model = HistorialPrecioProducto
+        expandibles = {"producto": ProductoSerializer, "proveedor": ProveedorSerializer}
         fields = [
             "id",
             "producto",
@@ -733,12 +867,13 @@ class HistorialPrecioProductoSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error al validar precio: {str(e)}")
 
 # Creacion del serializer KIT-ITEM
-class KitItemSerializer(serializers.ModelSerializer):
+class KitItemSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     producto_nombre = serializers.CharField(source="producto.nombre", read_only=True)
     sku = serializers.CharField(source="producto.sku", read_only=True)
 
     class Meta:
         model = KitItem
+        expandibles = {"producto": ProductoSerializer}
         fields = [
             "id",
             "producto",
@@ -756,7 +891,7 @@ class KitItemSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error al validar cantidad: {str(e)}")
 
 # Creacion del serializer KIT
-class KitSerializer(serializers.ModelSerializer):
+class KitSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     items = KitItemSerializer(many=True, read_only=True)
 
     class Meta:
@@ -785,11 +920,12 @@ class KitSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error al validar descripción del kit: {str(e)}")
 
 # Creacion del serializer AUDITORIA
-class AuditoriaSerializer(serializers.ModelSerializer):
+class AuditoriaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     usuario_nombre = serializers.CharField(source='usuario.get_full_name', read_only=True)
 
     class Meta:
         model = Auditoria
+        expandibles = {"usuario": CustomUserSerializer}
         fields = [
             'id',
             'usuario',
@@ -828,11 +964,12 @@ class AuditoriaSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error al validar acción: {str(e)}")
 
 # Creacion del serializer NOTIFICACION
-class NotificacionSerializer(serializers.ModelSerializer):
+class NotificacionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     usuario_nombre = serializers.CharField(source='usuario.get_full_name', read_only=True)
 
     class Meta:
         model = Notificacion
+        expandibles = {"usuario": CustomUserSerializer}
         fields = [
             'id',
             'usuario',
@@ -851,7 +988,7 @@ class NotificacionSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Error al validar mensaje: {str(e)}")
 
 # Creacion del serializer INVENTARIO-FISICO
-class InventarioFisicoSerializer(serializers.ModelSerializer):
+class InventarioFisicoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
     responsable_nombre = serializers.CharField(source='responsable.get_full_name', read_only=True)
     diferencia = serializers.IntegerField(read_only=True)
@@ -866,6 +1003,7 @@ class InventarioFisicoSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = InventarioFisico
+        expandibles = {"producto": ProductoSerializer, "responsable": CustomUserSerializer}
         fields = [
             'id',
             'producto',
@@ -1,4 +1,8 @@
 from inventario.models import AlertaStock, Producto
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
 from django.utils import timezone
 from datetime import timedelta
 import logging
@@ -6,39 +10,103 @@ import logging
 logger = logging.getLogger(__name__)
 
 class AlertaService:
+    @staticmethod
+    def productos_sin_alerta_abierta():
+        """Productos habilitados con stock <= stock mínimo y sin alerta abierta."""
+        alerta_abierta = AlertaStock.objects.filter(
+            producto=OuterRef("pk"), estado__in=AlertaStock.ESTADOS_ABIERTOS
+        )
+        return Producto.objects.filter(
+            habilitado=True, stock__lte=F("stock_minimo")
+        ).filter(~Exists(alerta_abierta))
+
     @staticmethod
     def evaluar_todas():
-        """Verifica todos los productos y genera alertas si el stock está bajo el mínimo."""
+        """
+        Genera en una sola pasada las alertas faltantes de todo el catálogo:
+        una consulta para los candidatos y un bulk_create para las alertas.
+
+        bulk_create no emite post_save, así que las órdenes de estas alertas no
+        se generan aquí; quien llama decide si encolar la generación de órdenes.
+        Devuelve la lista de alertas creadas.
+        """
         try:
-            productos = Producto.objects.filter(activo=True)
-            for producto in productos:
-                try:
-                    AlertaService.generar_alerta_si_corresponde(producto)
-                except Exception as e:
-                    logger.error(f"Error generando alerta para producto {producto.id}: {str(e)}")
+            ids = list(AlertaService.productos_sin_alerta_abierta().values_list("id", flat=True))
+            if not ids:
+                return []
+            return AlertaStock.objects.bulk_create(
+                [AlertaStock(producto_id=producto_id, estado="activa") for producto_id in ids],
+                batch_size=5000
+            )
         except Exception as e:
-            logger.error(f"Error al obtener productos para evaluación de alertas: {str(e)}")
+            logger.error(f"Error al evaluar alertas de stock: {str(e)}")
+            return []
 
     @staticmethod
     def generar_alerta_si_corresponde(producto):
         """Crea alerta individual si el producto está bajo stock mínimo."""
         try:
-            if producto.stock < producto.stock_minimo:
-                existe = AlertaStock.objects.filter(producto=producto, activa=True).exists()
+            if producto.habilitado and producto.stock <= producto.stock_minimo:
+                existe = AlertaStock.objects.filter(
+                    producto=producto, estado__in=AlertaStock.ESTADOS_ABIERTOS
+                ).exists()
                 if not existe:
-                    AlertaStock.objects.create(
-                        producto=producto,
-                        mensaje=f"Stock bajo para {producto.nombre}. Stock actual: {producto.stock}",
-                        activa=True
-                    )
+                    return AlertaStock.objects.create(producto=producto, estado="activa")
+            return None
         except Exception as e:
             logger.error(f"Error al crear alerta para producto {producto.id}: {str(e)}")
+            return None
+
+    @staticmethod
+    def programar_evaluacion(producto_id):
+        """
+        Encola la evaluación de alerta de un producto cuyo stock quedó bajo el mínimo.
+
+        Las solicitudes se agrupan por producto: la primera reserva una clave en
+        caché y encola la tarea con retardo ALERTAS_VENTANA_SEGUNDOS; las que llegan
+        mientras la clave existe no encolan nada, así que una ráfaga de salidas
+        sobre el mismo SKU produce una sola evaluación. Se hace tras el commit para
+        no evaluar movimientos que terminan revertidos.
+        """
+        if not getattr(settings, "ALERTAS_POR_EVENTO", True):
+            return
+
+        def encolar():
+            ventana = getattr(settings, "ALERTAS_VENTANA_SEGUNDOS", 30)
+            if not cache.add(AlertaService._clave_evaluacion(producto_id), 1, timeout=ventana * 2):
+                return
+            try:
+                from inventario.tasks import evaluar_alerta_producto
+                evaluar_alerta_producto.apply_async(args=[producto_id], countdown=ventana)
+            except Exception as e:
+                # La clave se mantiene hasta expirar: no se reintenta contra un broker caído
+                # en cada movimiento, y el barrido horario reconcilia lo pendiente.
+                logger.error(f"No se pudo encolar la evaluación de alerta del producto {producto_id}: {str(e)}")
+
+        transaction.on_commit(encolar)
+
+    @staticmethod
+    def evaluar_producto(producto_id):
+        """Evalúa un solo producto (tarea encolada por programar_evaluacion)."""
+        cache.delete(AlertaService._clave_evaluacion(producto_id))
+        producto = Producto.objects.filter(id=producto_id).first()
+        if producto is None:
+            return None
+        return AlertaService.generar_alerta_si_corresponde(producto)
+
+    @staticmethod
+    def _clave_evaluacion(producto_id):
+        return f"alertas:evaluacion-pendiente:{producto_id}"
 
     @staticmethod
     def marcar_alertas_silenciosas():
-        """Cambia el estado de alertas activas que no han sido procesadas después de X tiempo."""
+        """Silencia las alertas activas que no han sido procesadas después de X tiempo."""
         try:
-            umbral_tiempo = timezone.now() - timedelta(hours=12)
-            AlertaStock.objects.filter(activa=True, fecha_creacion__lt=umbral_tiempo).update(activa=False)
+            ahora = timezone.now()
+            umbral_tiempo = ahora - timedelta(hours=12)
+            return AlertaStock.objects.filter(
+                estado="activa", usada_para_orden=False, fecha_creacion__lt=umbral_tiempo
+            ).update(estado="silenciada", fecha_silencio=ahora, fecha_actualizacion=ahora)
         except Exception as e:
             logger.error(f"Error al marcar alertas silenciosas: {str(e)}")
+            return 0
@@ -1,19 +1,226 @@
 from inventario.models import Auditoria
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import gzip
+import json
 import logging
+import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+MODOS = ("sync", "on_commit", "async")
+
+# Estado por hilo: un hilo atiende una petición a la vez.
+_estado = threading.local()
+
+
+class _Lote:
+    """Registros pendientes de una misma petición."""
+
+    def __init__(self):
+        self.registros = []
+        self.vaciado = False
+
+    def vaciar(self):
+        if self.vaciado:
+            return
+        self.vaciado = True
+        if self.registros:
+            AuditoriaService.despachar(self.registros)
+
+
 class AuditoriaService:
     @staticmethod
     def registrar(usuario, modelo, id_objeto, accion, descripcion):
-        """Guarda manualmente una entrada de auditoría si se necesita fuera de signals."""
+        """
+        Guarda una entrada de auditoría si se necesita fuera de signals.
+
+        Según settings.AUDITORIA_MODO:
+        - "sync": un INSERT inmediato, dentro de la transacción del llamador.
+        - "on_commit": dentro de un transaction.atomic espera al commit (si la
+          transacción o el bloque se revierte, se descarta con él). Los registros
+          confirmados de una misma petición se escriben con un solo bulk_create al
+          terminarla (ver AuditoriaMiddleware); fuera de una petición, al confirmarse.
+        - "async": igual que "on_commit", pero el lote se entrega a Celery.
+        """
+        registro = {
+            "usuario": usuario,
+            "modelo": modelo,
+            "id_objeto": id_objeto,
+            "accion": accion,
+            "descripcion": descripcion,
+            "fecha": timezone.now(),
+        }
+        if AuditoriaService.modo() == "sync":
+            AuditoriaService.registrar_masivo([registro])
+            return
+
+        if connection.in_atomic_block:
+            # Un on_commit por registro: Django lo descarta si se revierte el bloque
+            # en que se hizo, sin que haya que seguir la transacción desde aquí.
+            transaction.on_commit(partial(AuditoriaService._confirmar, registro))
+        else:
+            AuditoriaService._confirmar(registro)
+
+    @staticmethod
+    def registrar_masivo(registros):
+        """
+        Guarda varias entradas de auditoría con un solo INSERT.
+        registros: lista de diccionarios con las mismas claves que `registrar`
+        (más "fecha" o "usuario_id", opcionales).
+        """
         try:
-            Auditoria.objects.create(
-                usuario=usuario,
-                modelo_afectado=modelo,
-                id_objeto=id_objeto,
-                accion=accion,
-                descripcion=descripcion
-            )
+            return Auditoria.objects.bulk_create([
+                Auditoria(
+                    usuario_id=r.get("usuario_id", getattr(r.get("usuario"), "pk", None)),
+                    modelo_afectado=r["modelo"],
+                    id_objeto=r["id_objeto"],
+                    accion=r["accion"],
+                    descripcion=r["descripcion"],
+                    fecha=r.get("fecha") or timezone.now()
+                )
+                for r in registros
+            ], batch_size=1000)
         except Exception as e:
-            logger.error(f"Error al registrar auditoría para {modelo} id {id_objeto}: {str(e)}")
+            logger.error(f"Error al registrar auditoría masiva ({len(registros)} registros): {str(e)}")
+            return []
+
+    @staticmethod
+    def modo():
+        modo = getattr(settings, "AUDITORIA_MODO", "sync")
+        return modo if modo in MODOS else "sync"
+
+    @staticmethod
+    def despachar(registros):
+        """Escribe un lote ya confirmado según el modo: en línea o vía Celery."""
+        if AuditoriaService.modo() != "async":
+            return AuditoriaService.registrar_masivo(registros)
+        try:
+            from inventario.tasks import tarea_registrar_auditoria
+            tarea_registrar_auditoria.delay(AuditoriaService.serializar(registros))
+        except Exception as e:
+            # Sin broker el lote no se pierde: se escribe en el proceso web.
+            logger.error(f"No se pudo encolar la auditoría ({len(registros)} registros): {str(e)}")
+            AuditoriaService.registrar_masivo(registros)
+
+    @staticmethod
+    def serializar(registros):
+        """Convierte los registros a JSON plano para la cola de Celery."""
+        return [
+            {
+                "usuario_id": r.get("usuario_id", getattr(r.get("usuario"), "pk", None)),
+                "modelo": r["modelo"],
+                "id_objeto": r["id_objeto"],
+                "accion": r["accion"],
+                "descripcion": r["descripcion"],
+                "fecha": r["fecha"].isoformat() if r.get("fecha") else None,
+            }
+            for r in registros
+        ]
+
+    @staticmethod
+    def deserializar(registros):
+        return [{**r, "fecha": parse_datetime(r["fecha"]) if r.get("fecha") else None} for r in registros]
+
+    @staticmethod
+    @contextmanager
+    def lote():
+        """
+        Acumula los registros confirmados hasta salir del bloque (AuditoriaMiddleware
+        abre uno por petición). Los hechos dentro de un transaction.atomic llegan al
+        lote cuando se confirma esa transacción. Fuera de una petición, quien registre
+        muchos puede abrir su propio lote para escribirlos juntos.
+        """
+        anterior = getattr(_estado, "peticion", None)
+        _estado.peticion = _Lote()
+        try:
+            yield _estado.peticion
+        finally:
+            lote, _estado.peticion = _estado.peticion, anterior
+            lote.vaciar()
+
+    @staticmethod
+    def _confirmar(registro):
+        lote = getattr(_estado, "peticion", None)
+        if lote is None:
+            # Sin petición abierta no hay nada que agrupar.
+            AuditoriaService.despachar([registro])
+        else:
+            lote.registros.append(registro)
+
+    @staticmethod
+    def limite_retencion(meses=None, ahora=None):
+        """Primer instante del mes que queda dentro de la retención."""
+        meses = settings.AUDITORIA_RETENCION_MESES if meses is None else meses
+        ahora = timezone.localtime(ahora or timezone.now())
+        total = ahora.year * 12 + (ahora.month - 1) - meses
+        return ahora.replace(
+            year=total // 12, month=total % 12 + 1, day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+
+    @staticmethod
+    def archivar(limite=None, directorio=None, tamano_lote=5000):
+        """
+        Mueve los registros con fecha < `limite` a un archivo JSON Lines comprimido
+        por mes (auditoria-AAAA-MM-<primer_id>-<ultimo_id>.jsonl.gz) y los elimina.
+
+        El archivo se escribe y sincroniza a disco antes de borrar, y toma su nombre
+        final dentro de la misma transacción que borra las filas: si algo falla se
+        puede duplicar un mes en disco, pero nunca perder registros.
+        Devuelve {"AAAA-MM": cantidad}.
+        """
+        limite = limite or AuditoriaService.limite_retencion()
+        directorio = directorio or settings.AUDITORIA_ARCHIVO_DIR
+        os.makedirs(directorio, exist_ok=True)
+
+        resultado = {}
+        for mes in Auditoria.objects.filter(fecha__lt=limite).dates("fecha", "month"):
+            desde = timezone.make_aware(datetime(mes.year, mes.month, 1))
+            hasta = timezone.make_aware(datetime(mes.year + mes.month // 12, mes.month % 12 + 1, 1))
+            registros = Auditoria.objects.filter(fecha__gte=desde, fecha__lt=min(hasta, limite))
+            try:
+                cantidad = AuditoriaService._archivar_mes(registros, mes, directorio, tamano_lote)
+            except Exception as e:
+                logger.error(f"Error al archivar auditoría de {mes:%Y-%m}: {str(e)}")
+                raise
+            if cantidad:
+                resultado[f"{mes:%Y-%m}"] = cantidad
+        return resultado
+
+    @staticmethod
+    def _archivar_mes(registros, mes, directorio, tamano_lote):
+        parcial = os.path.join(directorio, f"auditoria-{mes:%Y-%m}.jsonl.gz.parcial")
+        ids = []
+        columnas = ("id", "fecha", "usuario_id", "usuario__username", "modelo_afectado",
+                    "id_objeto", "accion", "descripcion")
+
+        with open(parcial, "wb") as destino:
+            with gzip.GzipFile(fileobj=destino, mode="wb") as comprimido:
+                for fila in registros.order_by("id").values(*columnas).iterator(chunk_size=tamano_lote):
+                    ids.append(fila["id"])
+                    fila["fecha"] = fila["fecha"].isoformat()
+                    fila["usuario"] = fila.pop("usuario__username")
+                    comprimido.write(json.dumps(fila, ensure_ascii=False).encode("utf-8") + b"\n")
+            destino.flush()
+            os.fsync(destino.fileno())
+
+        if not ids:
+            os.remove(parcial)
+            return 0
+
+        final = os.path.join(directorio, f"auditoria-{mes:%Y-%m}-{ids[0]}-{ids[-1]}.jsonl.gz")
+        with transaction.atomic():
+            # Se borra por id: un registro del mismo mes que llegue durante la
+            # exportación (modo async) queda para la próxima ejecución.
+            for inicio in range(0, len(ids), tamano_lote):
+                Auditoria.objects.filter(id__in=ids[inicio:inicio + tamano_lote]).delete()
+            os.replace(parcial, final)
+
+        logger.info(f"Auditoría {mes:%Y-%m}: {len(ids)} registros archivados en {final}")
+        return len(ids)
@@ -0,0 +1,297 @@
+from inventario.models import Producto, Lote, Proveedor
+from bisect import bisect_left
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, CharField, ExpressionWrapper, F, FloatField, Max, Q, Value, When
+from django.db.models.functions import Cast, Concat, Greatest, StrIndex
+import heapq
+import logging
+import re
+import threading
+import unicodedata
+import uuid
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él el conteo de trigramas se hace con Counter.
+    np = None
+
+logger = logging.getLogger(__name__)
+
+CLAVE_VERSION = "busqueda:productos:version"
+# Peso de una coincidencia por nombre de proveedor frente a una por nombre de producto.
+PESO_PROVEEDOR = 0.8
+RANGO_SUBCADENA = 0.9
+RANGO_PREFIJO = 1.0
+RANGO_EXACTO = 2.0
+# Bajo este largo, los códigos que contienen el término se buscan recorriendo todos.
+LARGO_TRIGRAMA = 3
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y con cualquier carácter no alfanumérico como separador."""
+    texto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"[^0-9a-zñ]+", " ", texto).strip()
+
+
+def trigramas(texto):
+    """Trigramas de cada palabra, rellenada como en pg_trgm ("  pa", "pal", ..., "ra ")."""
+    resultado = set()
+    for palabra in normalizar(texto).split():
+        palabra = f"  {palabra} "
+        resultado.update(palabra[i:i + 3] for i in range(len(palabra) - 2))
+    return resultado
+
+
+class _IndiceTrigramas:
+    """
+    Índice en memoria del catálogo para bases sin pg_trgm (SQLite en desarrollo y
+    pruebas): trigramas del nombre de cada producto, nombres de proveedor, listas
+    ordenadas de SKU, código de barras y código de lote para buscar por prefijo y
+    trigramas de SKU y código de barras para buscar por subcadena.
+    """
+
+    def __init__(self, firma, filas):
+        self.firma = firma
+        self.ids = []
+        postings = {}
+        proveedores = {}
+        lotes = {}
+        skus, codigos = [], []
+        self.codigos_por_posicion = []
+        self.trigramas_codigos = {}
+        for posicion, (producto_id, nombre, sku, codigo_barra, lote, proveedor) in enumerate(filas):
+            self.ids.append(producto_id)
+            for trigrama in trigramas(nombre):
+                postings.setdefault(trigrama, []).append(posicion)
+            proveedores.setdefault(proveedor or "", []).append(posicion)
+            lotes.setdefault((lote or "").lower(), []).append(posicion)
+            skus.append(((sku or "").lower(), posicion))
+            codigos.append((codigo_barra or "", posicion))
+            texto = f"{(sku or '').lower()} {(codigo_barra or '').lower()}"
+            self.codigos_por_posicion.append(texto)
+            for i in range(len(texto) - LARGO_TRIGRAMA + 1):
+                lista = self.trigramas_codigos.setdefault(texto[i:i + LARGO_TRIGRAMA], [])
+                if not lista or lista[-1] != posicion:
+                    lista.append(posicion)
+
+        convertir = (lambda v: np.array(v, dtype=np.int32)) if np is not None else (lambda v: v)
+        self.postings = {trigrama: convertir(posiciones) for trigrama, posiciones in postings.items()}
+        self.proveedores = [(trigramas(nombre), posiciones) for nombre, posiciones in proveedores.items()]
+        self.lotes = sorted(lotes.items())
+        self.skus = sorted(skus)
+        self.codigos = sorted(codigos)
+
+    def _coincidencias_nombre(self, consulta, umbral):
+        """{posición: fracción de los trigramas de la consulta presentes en el nombre}."""
+        listas = [self.postings[t] for t in consulta if t in self.postings]
+        if not listas:
+            return {}
+        minimo = umbral * len(consulta)
+        if np is not None:
+            conteo = np.bincount(np.concatenate(listas), minlength=len(self.ids))
+            posiciones = np.nonzero(conteo >= minimo)[0]
+            return dict(zip(posiciones.tolist(), (conteo[posiciones] / len(consulta)).tolist()))
+        conteo = Counter(posicion for lista in listas for posicion in lista)
+        return {posicion: n / len(consulta) for posicion, n in conteo.items() if n >= minimo}
+
+    @staticmethod
+    def _prefijo(ordenados, prefijo):
+        """Pares (clave, valor) de una lista ordenada cuya clave empieza con `prefijo`."""
+        inicio = bisect_left(ordenados, (prefijo,))
+        for clave, valor in ordenados[inicio:]:
+            if not clave.startswith(prefijo):
+                break
+            yield clave, valor
+
+    def _subcadena(self, texto):
+        """Posiciones cuyo SKU o código de barras (en minúsculas) contiene `texto`."""
+        if " " in texto:
+            return []
+        if len(texto) < LARGO_TRIGRAMA:
+            candidatos = range(len(self.ids))
+        else:
+            listas = [
+                self.trigramas_codigos.get(texto[i:i + LARGO_TRIGRAMA])
+                for i in range(len(texto) - LARGO_TRIGRAMA + 1)
+            ]
+            if any(lista is None for lista in listas):
+                return []
+            candidatos = min(listas, key=len)
+        return [posicion for posicion in candidatos if texto in self.codigos_por_posicion[posicion]]
+
+    def buscar(self, termino, umbral, limite):
+        rangos = {}
+
+        def subir(posicion, rango):
+            if rango > rangos.get(posicion, 0):
+                rangos[posicion] = rango
+
+        consulta = trigramas(termino)
+        if consulta:
+            for posicion, rango in self._coincidencias_nombre(consulta, umbral).items():
+                subir(posicion, rango)
+            for nombre, posiciones in self.proveedores:
+                similitud = len(consulta & nombre) / len(consulta)
+                if similitud >= umbral:
+                    for posicion in posiciones:
+                        subir(posicion, similitud * PESO_PROVEEDOR)
+
+        codigo = termino.strip()
+        if codigo:
+            minusculas = codigo.lower()
+            for lote, posiciones in self.lotes:
+                if minusculas in lote:
+                    for posicion in posiciones:
+                        subir(posicion, RANGO_PREFIJO if lote.startswith(minusculas) else RANGO_SUBCADENA)
+            for posicion in self._subcadena(minusculas):
+                subir(posicion, RANGO_SUBCADENA)
+            for sku, posicion in self._prefijo(self.skus, minusculas):
+                subir(posicion, RANGO_EXACTO if sku == minusculas else RANGO_PREFIJO)
+            for codigo_barra, posicion in self._prefijo(self.codigos, codigo):
+                subir(posicion, RANGO_EXACTO if codigo_barra == codigo else RANGO_PREFIJO)
+
+        # Las posiciones siguen el orden de los ids: a igual rango, primero el id menor.
+        mejores = heapq.nsmallest(limite, rangos.items(), key=lambda par: (-par[1], par[0]))
+        return [(self.ids[posicion], round(rango, 4)) for posicion, rango in mejores]
+
+
+class BusquedaProductoService:
+    """
+    Búsqueda de productos por nombre (tolerante a errores de tipeo y a palabras
+    incompletas), nombre de proveedor y SKU, código de barras o código de lote que
+    contengan el término (como el SearchFilter con icontains al que reemplaza), con
+    resultados ordenados por relevancia: código exacto, luego los que empiezan con
+    el término y luego los que solo lo contienen.
+
+    En PostgreSQL usa pg_trgm (operador %> de similitud por palabra) sobre los
+    índices GIN de la migración 0009. En otras bases usa un índice de trigramas en
+    memoria por proceso, que se reconstruye cuando hay productos nuevos (cambia el
+    mayor id) o cambia la versión que renueva `invalidar` al editar nombres o códigos.
+    """
+
+    @staticmethod
+    def filtrar(queryset, termino, ruta=""):
+        """
+        Filtra `queryset` (de Producto, o de un modelo que llega a Producto por `ruta`,
+        p. ej. "producto") a los productos que coinciden con `termino` y anota su
+        relevancia en `rango_busqueda`.
+        """
+        termino = termino.strip()
+        if not termino:
+            return queryset
+        if connection.vendor == "postgresql":
+            return BusquedaProductoService._filtrar_postgres(queryset, termino, ruta)
+
+        ids = [producto_id for producto_id, _ in BusquedaProductoService.buscar(termino)]
+        campo_id = f"{ruta}_id" if ruta else "id"
+        # El orden se pasa como una sola cadena ",id1,id2,...," y la relevancia es menos la
+        # posición del id en ella: un CASE con un WHEN por resultado cuesta más en Python
+        # (al construirlo y compilarlo) que toda la consulta.
+        posicion = StrIndex(
+            Value(f",{','.join(map(str, ids))},"),
+            Concat(Value(","), Cast(campo_id, CharField()), Value(","), output_field=CharField()),
+        )
+        return queryset.filter(**{f"{campo_id}__in": ids}).annotate(
+            rango_busqueda=ExpressionWrapper(Value(0) - posicion, output_field=FloatField())
+        )
+
+    @staticmethod
+    def _filtrar_postgres(queryset, termino, ruta):
+        from django.contrib.postgres.lookups import TrigramWordSimilar
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        p = f"{ruta}__" if ruta else ""
+        exacto = Q(**{f"{p}sku__iexact": termino}) | Q(**{f"{p}codigo_barra": termino})
+        prefijo = (
+            Q(**{f"{p}sku__istartswith": termino})
+            | Q(**{f"{p}codigo_barra__startswith": termino})
+            | Q(**{f"{p}lote__codigo__istartswith": termino})
+        )
+        subcadena = (
+            Q(**{f"{p}sku__icontains": termino})
+            | Q(**{f"{p}codigo_barra__contains": termino})
+            | Q(**{f"{p}lote__codigo__icontains": termino})
+        )
+        # Un OR entre columnas de distintas tablas no puede combinar sus índices: los
+        # candidatos se buscan por tabla (cada subconsulta usa sus índices GIN, que
+        # también sirven para LIKE '%término%') y se unen.
+        productos = Producto.objects.filter(
+            Q(sku__icontains=termino) | Q(codigo_barra__contains=termino)
+            | Q(TrigramWordSimilar(F("nombre"), termino))
+        ).values("pk")
+        lotes = Lote.objects.filter(codigo__icontains=termino).values("pk")
+        proveedores = Proveedor.objects.filter(TrigramWordSimilar(F("nombre"), termino)).values("pk")
+        candidatos = (
+            Q(**{f"{p}pk__in": productos})
+            | Q(**{f"{p}lote__in": lotes})
+            | Q(**{f"{p}lote__proveedor__in": proveedores})
+        )
+        return queryset.filter(candidatos).annotate(
+            rango_busqueda=Greatest(
+                TrigramWordSimilarity(termino, f"{p}nombre"),
+                TrigramWordSimilarity(termino, f"{p}lote__proveedor__nombre") * Value(PESO_PROVEEDOR),
+                Case(
+                    When(exacto, then=Value(RANGO_EXACTO)),
+                    When(prefijo, then=Value(RANGO_PREFIJO)),
+                    When(subcadena, then=Value(RANGO_SUBCADENA)),
+                    default=Value(0.0),
+                ),
+                output_field=FloatField(),
+            )
+        )
+
+    @staticmethod
+    def buscar(termino, limite=None):
+        """[(producto_id, rango)] ordenados por relevancia, con el índice en memoria."""
+        limite = limite or settings.BUSQUEDA_MAX_RESULTADOS
+        return BusquedaProductoService.indice().buscar(termino, settings.BUSQUEDA_UMBRAL, limite)
+
+    @staticmethod
+    def indice():
+        global _indice
+        # Las bajas no hace falta detectarlas: `filtrar` solo devuelve ids que siguen en la base.
+        ultimo = Producto.objects.aggregate(ultimo=Max("id"))["ultimo"]
+        firma = (ultimo, BusquedaProductoService._version())
+        with _indice_lock:
+            if _indice is None or _indice.firma != firma:
+                filas = Producto.objects.order_by("id").values_list(
+                    "id", "nombre", "sku", "codigo_barra", "lote__codigo", "lote__proveedor__nombre"
+                )
+                try:
+                    _indice = _IndiceTrigramas(firma, filas.iterator(chunk_size=5000))
+                except Exception as e:
+                    logger.error(f"Error al construir el índice de búsqueda de productos: {str(e)}")
+                    raise
+            return _indice
+
+    @staticmethod
+    def invalidar():
+        """
+        Marca el índice en memoria como desactualizado en todos los procesos. Debe
+        llamarse al cambiar nombre, SKU, código de barras, lote o proveedor de productos
+        existentes (altas y bajas se detectan solas). Se repite al confirmar la transacción.
+        """
+        BusquedaProductoService._renovar_version()
+        if connection.in_atomic_block:
+            transaction.on_commit(BusquedaProductoService._renovar_version)
+
+    @staticmethod
+    def _version():
+        # Un token al azar y no un contador: si la caché se vacía, la versión nueva
+        # tampoco coincide con la de ningún índice ya construido.
+        version = cache.get(CLAVE_VERSION)
+        if version is None:
+            cache.add(CLAVE_VERSION, uuid.uuid4().hex, timeout=None)
+            version = cache.get(CLAVE_VERSION)
+        return version
+
+    @staticmethod
+    def _renovar_version():
+        cache.set(CLAVE_VERSION, uuid.uuid4().hex, timeout=None)
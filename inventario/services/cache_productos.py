@@ -0,0 +1,287 @@
+from inventario.models import Producto
+from maestranza_backend.utils.medicion import contar_cache
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from functools import partial
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PREFIJO = "producto"
+CONTADORES = {"aciertos": f"{PREFIJO}:stats:aciertos", "fallos": f"{PREFIJO}:stats:fallos"}
+# Los contadores se acumulan en el proceso y se suman a la caché cada tantas lecturas.
+VACIAR_CONTADORES_CADA = 100
+# Prefijo de la versión que fija una transacción abierta al modificar un producto.
+PROVISIONAL = "tx:"
+
+_contadores = {"aciertos": 0, "fallos": 0}
+_contadores_lock = threading.Lock()
+
+
+class CacheProductoService:
+    """
+    Caché de la representación de Producto (la de ProductoSerializer: stock,
+    precio, nombre, lote, proveedor, categoría...) con cuatro claves:
+    producto:ver:<id> guarda la versión vigente del producto, producto:id:<id> la
+    representación junto con la versión con que se leyó, y producto:sku:<sku> y
+    producto:cb:<codigo_barra> guardan el id.
+
+    Invalidación: cada camino que modifica un producto llama a `invalidar`, que
+    renueva su versión de inmediato y otra vez al confirmar la transacción. Una
+    representación solo vale si su versión es la vigente, y quien la carga lee la
+    versión antes de consultar la base: si otro proceso la guarda después del
+    commit con datos leídos antes, queda con la versión anterior y nadie la usa.
+    Mientras la transacción sigue abierta la versión es provisional y nadie guarda
+    ese producto en caché, así que un rollback nunca deja en caché datos que no
+    existieron.
+
+    Es una caché de lectura: las validaciones de escritura (stock suficiente,
+    por ejemplo) leen la base.
+    """
+
+    # ------------------------------------------------------------------
+    # Lecturas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def obtener(producto_id):
+        """Representación del producto, o None si no existe."""
+        return CacheProductoService.obtener_varios([producto_id]).get(int(producto_id))
+
+    @staticmethod
+    def obtener_varios(ids):
+        """{id: representación} de los productos existentes, con una sola consulta para los que no están en caché."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return {}
+        resultado, versiones = CacheProductoService._leer(ids)
+        faltantes = [i for i in ids if i not in resultado]
+        CacheProductoService._contar(aciertos=len(resultado), fallos=len(faltantes))
+        if faltantes:
+            resultado.update(CacheProductoService._cargar(Q(id__in=faltantes), versiones))
+        return resultado
+
+    @staticmethod
+    def buscar(codigo):
+        """Representación del producto con ese SKU o código de barras, o None."""
+        codigo = str(codigo).strip()
+        return CacheProductoService.buscar_varios([codigo]).get(codigo) if codigo else None
+
+    @staticmethod
+    def buscar_varios(codigos):
+        """
+        {codigo: representación} para cada SKU o código de barras encontrado.
+        Son dos lecturas de caché (alias e ids) y, para los que falten, una sola
+        consulta exacta sobre los índices únicos de sku y codigo_barra. Si un
+        código es el SKU de un producto y el código de barras de otro, gana el SKU.
+        """
+        codigos = list(dict.fromkeys(codigos))
+        if not codigos:
+            return {}
+        claves = {}
+        for codigo in codigos:
+            claves[CacheProductoService._clave_sku(codigo)] = codigo
+            claves[CacheProductoService._clave_codigo(codigo)] = codigo
+        alias = cache.get_many(list(claves))
+        por_id, versiones = CacheProductoService._leer(set(alias.values()))
+
+        resultado = {}
+        for codigo in codigos:
+            for clave in (CacheProductoService._clave_sku(codigo), CacheProductoService._clave_codigo(codigo)):
+                datos = por_id.get(alias.get(clave))
+                # El alias puede haber quedado de un SKU o código ya cambiado.
+                if datos and codigo in (datos["sku"], datos["codigo_barra"]):
+                    resultado[codigo] = datos
+                    break
+
+        faltantes = [codigo for codigo in codigos if codigo not in resultado]
+        CacheProductoService._contar(aciertos=len(resultado), fallos=len(faltantes))
+        if faltantes:
+            # Solo se guardan las representaciones de los ids que venían de un alias
+            # (con su versión leída antes de la consulta); las demás, en la próxima lectura.
+            sin_datos = [i for i in versiones if i not in por_id]
+            cargados = CacheProductoService._cargar(
+                Q(id__in=sin_datos) | Q(sku__in=faltantes) | Q(codigo_barra__in=faltantes), versiones
+            )
+            por_codigo_barra = {datos["codigo_barra"]: datos for datos in cargados.values()}
+            por_sku = {datos["sku"]: datos for datos in cargados.values()}
+            for codigo in faltantes:
+                datos = por_sku.get(codigo) or por_codigo_barra.get(codigo)
+                if datos:
+                    resultado[codigo] = datos
+        return resultado
+
+    @staticmethod
+    def _leer(ids):
+        """
+        ({id: representación vigente}, {id: versión}) en una lectura de caché. Las
+        versiones se leen antes de consultar la base por los faltantes.
+        """
+        if not ids:
+            return {}, {}
+        claves = {}
+        for producto_id in ids:
+            claves[CacheProductoService._clave_id(producto_id)] = producto_id
+            claves[CacheProductoService._clave_version(producto_id)] = producto_id
+        valores = cache.get_many(list(claves))
+        versiones = CacheProductoService._versiones(ids, valores)
+        resultado = {}
+        for producto_id in ids:
+            guardado = valores.get(CacheProductoService._clave_id(producto_id))
+            if guardado is not None and guardado[0] == versiones[producto_id]:
+                resultado[producto_id] = guardado[1]
+        return resultado, versiones
+
+    @staticmethod
+    def _versiones(ids, valores):
+        """{id: versión vigente}, creando las que falten sin pisar la de un escritor (cache.add)."""
+        versiones = {i: valores.get(CacheProductoService._clave_version(i)) for i in ids}
+        faltantes = [CacheProductoService._clave_version(i) for i, version in versiones.items() if version is None]
+        if faltantes:
+            for clave in faltantes:
+                cache.add(clave, uuid.uuid4().hex, timeout=None)
+            creadas = cache.get_many(faltantes)
+            for producto_id in ids:
+                versiones[producto_id] = versiones[producto_id] or creadas.get(
+                    CacheProductoService._clave_version(producto_id)
+                )
+        return versiones
+
+    @staticmethod
+    def _cargar(filtro, versiones):
+        """
+        Lee los productos de la base y guarda en caché los de `versiones`, cada uno
+        con la versión leída antes de esta consulta.
+        """
+        from inventario.serializers import ProductoLecturaSerializer
+
+        filas = Producto.objects.filter(filtro).values(*ProductoLecturaSerializer.columnas())
+        resultado = {datos["id"]: datos for datos in ProductoLecturaSerializer.representar(filas)}
+        guardar = {}
+        for producto_id, datos in resultado.items():
+            guardar[CacheProductoService._clave_sku(datos["sku"])] = producto_id
+            guardar[CacheProductoService._clave_codigo(datos["codigo_barra"])] = producto_id
+            version = versiones.get(producto_id)
+            if version and not version.startswith(PROVISIONAL):
+                guardar[CacheProductoService._clave_id(producto_id)] = (version, datos)
+        if guardar:
+            cache.set_many(guardar, timeout=settings.PRODUCTO_CACHE_TTL)
+        return resultado
+
+    # ------------------------------------------------------------------
+    # Invalidación
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def invalidar(ids):
+        """Renueva la versión de los productos ahora y de nuevo al confirmar la transacción en curso."""
+        ids = {int(i) for i in ids}
+        if not ids:
+            return
+        if connection.in_atomic_block:
+            CacheProductoService._renovar(ids, provisional=True)
+            # Un on_commit por llamada: si el bloque se revierte, Django lo descarta con él.
+            transaction.on_commit(partial(CacheProductoService._renovar, ids))
+        else:
+            CacheProductoService._renovar(ids)
+
+    @staticmethod
+    def invalidar_donde(**filtro):
+        """
+        Invalida los productos que cumplen el filtro (por ejemplo lote=..., lote__proveedor=...)
+        y renueva su fecha_actualizacion: cambió su representación y con ella su ETag.
+        """
+        ids = list(Producto.objects.filter(**filtro).values_list("id", flat=True))
+        if ids:
+            Producto.objects.filter(id__in=ids).update(fecha_actualizacion=timezone.now())
+        CacheProductoService.invalidar(ids)
+
+    @staticmethod
+    def _renovar(ids, provisional=False):
+        """
+        Nueva versión para los productos: las representaciones guardadas con la anterior
+        dejan de valer. La provisional (la de una transacción abierta) no se usa para
+        guardar: nadie cachea el producto hasta el commit, que la reemplaza. Si la
+        transacción se revierte, la provisional vence con el TTL.
+        """
+        # Los alias sku/cb no se tocan: `buscar` verifica que sigan apuntando al producto correcto.
+        prefijo, timeout = (PROVISIONAL, settings.PRODUCTO_CACHE_TTL) if provisional else ("", None)
+        try:
+            cache.set_many(
+                {CacheProductoService._clave_version(i): f"{prefijo}{uuid.uuid4().hex}" for i in ids}, timeout=timeout
+            )
+        except Exception as e:
+            logger.error(f"Error al invalidar la caché de productos {sorted(ids)}: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Estadísticas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _contar(aciertos=0, fallos=0):
+        contar_cache(aciertos, fallos)
+        with _contadores_lock:
+            _contadores["aciertos"] += aciertos
+            _contadores["fallos"] += fallos
+            if _contadores["aciertos"] + _contadores["fallos"] < VACIAR_CONTADORES_CADA:
+                return
+            pendientes = dict(_contadores)
+            _contadores.update(aciertos=0, fallos=0)
+        CacheProductoService._sumar_contadores(pendientes)
+
+    @staticmethod
+    def _sumar_contadores(pendientes):
+        for nombre, cantidad in pendientes.items():
+            if not cantidad:
+                continue
+            cache.add(CONTADORES[nombre], 0, timeout=None)
+            try:
+                cache.incr(CONTADORES[nombre], cantidad)
+            except ValueError:
+                cache.set(CONTADORES[nombre], cantidad, timeout=None)
+
+    @staticmethod
+    def estadisticas():
+        """Aciertos, fallos y tasa de aciertos acumulados de todos los procesos que comparten la caché."""
+        with _contadores_lock:
+            pendientes = dict(_contadores)
+            _contadores.update(aciertos=0, fallos=0)
+        CacheProductoService._sumar_contadores(pendientes)
+
+        valores = cache.get_many(list(CONTADORES.values()))
+        aciertos = valores.get(CONTADORES["aciertos"], 0)
+        fallos = valores.get(CONTADORES["fallos"], 0)
+        total = aciertos + fallos
+        return {
+            "aciertos": aciertos,
+            "fallos": fallos,
+            "tasa_aciertos": round(aciertos / total, 4) if total else None,
+            "backend": settings.CACHES["default"]["BACKEND"].rsplit(".", 1)[-1],
+        }
+
+    @staticmethod
+    def reiniciar_estadisticas():
+        with _contadores_lock:
+            _contadores.update(aciertos=0, fallos=0)
+        cache.delete_many(list(CONTADORES.values()))
+
+    @staticmethod
+    def _clave_version(producto_id):
+        return f"{PREFIJO}:ver:{producto_id}"
+
+    @staticmethod
+    def _clave_id(producto_id):
+        return f"{PREFIJO}:id:{producto_id}"
+
+    @staticmethod
+    def _clave_sku(sku):
+        return f"{PREFIJO}:sku:{sku}"
+
+    @staticmethod
+    def _clave_codigo(codigo_barra):
+        return f"{PREFIJO}:cb:{codigo_barra}"
@@ -0,0 +1,161 @@
+from inventario.models import (
+    Producto, EntradaInventario, SalidaInventario, InventarioFisico, MovimientoStock
+)
+from inventario.services.cache_productos import CacheProductoService
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+import csv
+import logging
+
+logger = logging.getLogger(__name__)
+
+COLUMNAS = [
+    "producto_id", "sku", "nombre", "stock", "esperado", "diferencia",
+    "libro", "diferencia_libro", "base", "corregible",
+]
+
+
+class ConciliacionService:
+    """
+    Compara, para todo el catálogo, Producto.stock con:
+    - el stock esperado según los movimientos: último InventarioFisico (o 0) más
+      entradas menos salidas posteriores, más los movimientos "inicial"/"ajuste"
+      del libro (altas y ediciones directas de stock, que no tienen otra fila);
+    - el stock según el libro MovimientoStock, para los productos cuyo libro
+      parte de un movimiento "inicial".
+
+    Todo el cálculo es una sola consulta agregada con GROUP BY, recorrida en
+    lotes: no hay consultas por producto.
+    """
+
+    @staticmethod
+    def _sql():
+        q = connection.ops.quote_name
+        producto = q(Producto._meta.db_table)
+        entrada = q(EntradaInventario._meta.db_table)
+        salida = q(SalidaInventario._meta.db_table)
+        conteo = q(InventarioFisico._meta.db_table)
+        libro = q(MovimientoStock._meta.db_table)
+
+        return f"""
+            WITH ultimo AS (
+                SELECT c.producto_id, c.stock_real, c.fecha_conteo
+                FROM {conteo} c
+                JOIN (SELECT producto_id, MAX(id) AS id FROM {conteo} GROUP BY producto_id) u ON u.id = c.id
+            ),
+            mov AS (
+                SELECT producto_id, cantidad AS delta, fecha FROM {entrada}
+                UNION ALL
+                SELECT producto_id, -cantidad AS delta, fecha FROM {salida}
+                UNION ALL
+                SELECT producto_id, delta, fecha FROM {libro} WHERE origen IN ('inicial', 'ajuste')
+            ),
+            esperado AS (
+                SELECT mov.producto_id, SUM(mov.delta) AS delta
+                FROM mov LEFT JOIN ultimo ON ultimo.producto_id = mov.producto_id
+                WHERE ultimo.fecha_conteo IS NULL OR mov.fecha > ultimo.fecha_conteo
+                GROUP BY mov.producto_id
+            ),
+            libro AS (
+                SELECT producto_id, SUM(delta) AS total,
+                       MAX(CASE WHEN origen = 'inicial' THEN 1 ELSE 0 END) AS con_inicial
+                FROM {libro} GROUP BY producto_id
+            ),
+            calculo AS (
+                SELECT p.id, p.sku, p.nombre, p.stock,
+                       COALESCE(ultimo.stock_real, 0) + COALESCE(esperado.delta, 0) AS esperado,
+                       CASE WHEN libro.con_inicial = 1 THEN libro.total END AS libro,
+                       CASE WHEN ultimo.producto_id IS NOT NULL THEN 'conteo'
+                            WHEN libro.con_inicial = 1 THEN 'inicial'
+                            ELSE 'sin_base' END AS base
+                FROM {producto} p
+                LEFT JOIN ultimo ON ultimo.producto_id = p.id
+                LEFT JOIN esperado ON esperado.producto_id = p.id
+                LEFT JOIN libro ON libro.producto_id = p.id
+            )
+            SELECT id, sku, nombre, stock, esperado, libro, base
+            FROM calculo
+            WHERE stock <> esperado OR (libro IS NOT NULL AND stock <> libro)
+            ORDER BY id
+        """
+
+    @staticmethod
+    def discrepancias(tamano_lote=5000):
+        """Genera las discrepancias (dicts con COLUMNAS) sin cargar todo el resultado en memoria."""
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(ConciliacionService._sql())
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                for producto_id, sku, nombre, stock, esperado, libro, base in filas:
+                    yield {
+                        "producto_id": producto_id,
+                        "sku": sku,
+                        "nombre": nombre,
+                        "stock": stock,
+                        "esperado": esperado,
+                        "diferencia": esperado - stock,
+                        "libro": libro,
+                        "diferencia_libro": None if libro is None else libro - stock,
+                        "base": base,
+                        # Sin conteo ni alta registrada el esperado no es confiable.
+                        "corregible": base != "sin_base" and esperado >= 0 and esperado != stock,
+                    }
+
+    @staticmethod
+    def aplicar_correcciones(correcciones, tamano_lote=1000):
+        """
+        Lleva el stock al esperado con un UPDATE por lote de productos y deja cada
+        ajuste en el libro con origen "conciliacion".
+
+        correcciones: {producto_id: diferencia}. Se suma la diferencia en vez de
+        fijar el valor: un movimiento ocurrido entre el cálculo y la corrección
+        cambia por igual stock y esperado, así que la diferencia sigue siendo válida.
+        """
+        ids = sorted(correcciones)
+        corregidos = 0
+        for inicio in range(0, len(ids), tamano_lote):
+            lote = ids[inicio:inicio + tamano_lote]
+            ajuste = Case(*[When(id=i, then=Value(correcciones[i])) for i in lote])
+            with transaction.atomic():
+                corregidos += Producto.objects.filter(id__in=lote).update(
+                    stock=F("stock") + ajuste, fecha_actualizacion=timezone.now()
+                )
+                MovimientoStock.objects.bulk_create([
+                    MovimientoStock(producto_id=i, delta=correcciones[i], origen="conciliacion") for i in lote
+                ])
+                CacheProductoService.invalidar(lote)
+        return corregidos
+
+    @staticmethod
+    def conciliar(destino=None, aplicar=False):
+        """
+        Recorre las discrepancias, las escribe como CSV en `destino` (un archivo de
+        texto abierto, opcional) y, con `aplicar`, corrige las corregibles.
+        Devuelve un resumen con los totales.
+        """
+        escritor = None
+        if destino is not None:
+            escritor = csv.DictWriter(destino, fieldnames=COLUMNAS)
+            escritor.writeheader()
+
+        resumen = {"discrepancias": 0, "corregibles": 0, "corregidos": 0}
+        correcciones = {}
+        for fila in ConciliacionService.discrepancias():
+            resumen["discrepancias"] += 1
+            if escritor:
+                escritor.writerow(fila)
+            if fila["corregible"]:
+                resumen["corregibles"] += 1
+                if aplicar:
+                    correcciones[fila["producto_id"]] = fila["diferencia"]
+
+        if correcciones:
+            try:
+                resumen["corregidos"] = ConciliacionService.aplicar_correcciones(correcciones)
+            except Exception as e:
+                logger.error(f"Error al aplicar correcciones de stock: {str(e)}")
+                raise
+        return resumen
@@ -0,0 +1,176 @@
+from inventario.models import ConsumoDiario, SalidaInventario
+from collections import defaultdict
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+def _percentil(ordenados, p):
+    """Percentil `p` (0-100) con interpolación lineal sobre una lista ya ordenada."""
+    if not ordenados:
+        return 0
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = math.floor(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+class ConsumoService:
+    """
+    Mantiene ConsumoDiario (producto × día × motivo) y responde estadísticas de
+    consumo para muchos productos con una sola lectura de esa tabla, en lugar de
+    sumar SalidaInventario producto por producto.
+    """
+
+    @staticmethod
+    def acumular(salidas, signo=1):
+        """
+        Suma (signo=1) o descuenta (signo=-1, al eliminar) las salidas en el
+        acumulado diario. Debe llamarse en la misma transacción que crea o borra
+        las salidas, después de guardarlas (se usa su fecha).
+        """
+        totales = defaultdict(lambda: [0, 0])
+        for salida in salidas:
+            clave = (salida.producto_id, timezone.localdate(salida.fecha), salida.motivo)
+            totales[clave][0] += signo * salida.cantidad
+            totales[clave][1] += signo
+        if not totales:
+            return
+
+        filas = sorted((*clave, cantidad, cantidad_salidas) for clave, (cantidad, cantidad_salidas) in totales.items())
+        if connection.vendor in ("postgresql", "sqlite"):
+            for inicio in range(0, len(filas), 500):
+                ConsumoService._upsert(filas[inicio:inicio + 500])
+        else:
+            ConsumoService._upsert_orm(filas)
+
+    @staticmethod
+    def _upsert(filas):
+        """INSERT ... ON CONFLICT que suma sobre la fila existente en una sola sentencia."""
+        q = connection.ops.quote_name
+        tabla = q(ConsumoDiario._meta.db_table)
+        columnas = ", ".join(q(c) for c in ("producto_id", "fecha", "motivo", "cantidad", "salidas"))
+        valores = ", ".join(["(%s, %s, %s, %s, %s)"] * len(filas))
+        sql = (
+            f"INSERT INTO {tabla} ({columnas}) VALUES {valores} "
+            f"ON CONFLICT ({q('producto_id')}, {q('fecha')}, {q('motivo')}) DO UPDATE SET "
+            f"{q('cantidad')} = {tabla}.{q('cantidad')} + EXCLUDED.{q('cantidad')}, "
+            f"{q('salidas')} = {tabla}.{q('salidas')} + EXCLUDED.{q('salidas')}"
+        )
+        params = []
+        for producto_id, fecha, motivo, cantidad, salidas in filas:
+            params += [producto_id, connection.ops.adapt_datefield_value(fecha), motivo, cantidad, salidas]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    @staticmethod
+    def _upsert_orm(filas):
+        with transaction.atomic(savepoint=False):
+            for producto_id, fecha, motivo, cantidad, salidas in filas:
+                actualizados = ConsumoDiario.objects.filter(
+                    producto_id=producto_id, fecha=fecha, motivo=motivo
+                ).update(cantidad=F("cantidad") + cantidad, salidas=F("salidas") + salidas)
+                if not actualizados:
+                    ConsumoDiario.objects.create(
+                        producto_id=producto_id, fecha=fecha, motivo=motivo, cantidad=cantidad, salidas=salidas
+                    )
+
+    @staticmethod
+    def reconstruir(desde=None, hasta=None):
+        """
+        Recalcula el acumulado (opcionalmente solo entre las fechas `desde` y
+        `hasta`, inclusive) desde SalidaInventario con un único GROUP BY.
+        Sirve para la carga inicial y para reparar el acumulado. Devuelve la
+        cantidad de filas guardadas.
+        """
+        salidas = SalidaInventario.objects.annotate(dia=TruncDate("fecha"))
+        acumulado = ConsumoDiario.objects.all()
+        if desde:
+            salidas = salidas.filter(dia__gte=desde)
+            acumulado = acumulado.filter(fecha__gte=desde)
+        if hasta:
+            salidas = salidas.filter(dia__lte=hasta)
+            acumulado = acumulado.filter(fecha__lte=hasta)
+
+        filas = (
+            salidas.order_by()
+            .values("producto_id", "dia", "motivo")
+            .annotate(total=Sum("cantidad"), cantidad_salidas=Count("id"))
+        )
+        guardados = 0
+        try:
+            with transaction.atomic():
+                acumulado.delete()
+                lote = []
+                for fila in filas.iterator(chunk_size=5000):
+                    lote.append(ConsumoDiario(
+                        producto_id=fila["producto_id"], fecha=fila["dia"], motivo=fila["motivo"],
+                        cantidad=fila["total"], salidas=fila["cantidad_salidas"],
+                    ))
+                    if len(lote) >= 5000:
+                        guardados += len(ConsumoDiario.objects.bulk_create(lote))
+                        lote = []
+                if lote:
+                    guardados += len(ConsumoDiario.objects.bulk_create(lote))
+        except Exception as e:
+            logger.error(f"Error al reconstruir el consumo diario: {str(e)}")
+            raise
+        return guardados
+
+    @staticmethod
+    def series(productos=None, dias=30, motivos=None, hasta=None):
+        """
+        Consumo diario de los últimos `dias` días hasta `hasta` (por defecto hoy),
+        como {producto_id: [cantidad del día más antiguo, ..., cantidad de `hasta`]}.
+        Los días sin salidas valen 0. Sin `productos` se incluyen solo los que
+        tuvieron consumo en el período. Es una sola consulta sobre el índice (fecha, producto).
+        """
+        hasta = hasta or timezone.localdate()
+        desde = hasta - timedelta(days=dias - 1)
+
+        consumos = ConsumoDiario.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+        if productos is not None:
+            consumos = consumos.filter(producto_id__in=productos)
+        if motivos:
+            consumos = consumos.filter(motivo__in=motivos)
+
+        resultado = {producto_id: [0] * dias for producto_id in productos or ()}
+        filas = consumos.order_by().values_list("producto_id", "fecha").annotate(total=Sum("cantidad"))
+        for producto_id, fecha, total in filas.iterator(chunk_size=5000):
+            serie = resultado.setdefault(producto_id, [0] * dias)
+            serie[(fecha - desde).days] = total
+        return resultado
+
+    @staticmethod
+    def estadisticas(productos=None, dias=30, ventanas=(7, 30), percentiles=(50, 90, 95), motivos=None, hasta=None):
+        """
+        Estadísticas de consumo diario por producto sobre los últimos `dias` días:
+        total, promedio, desviación estándar, máximo, medias móviles de los
+        últimos N días para cada N de `ventanas` y los `percentiles` pedidos.
+        Devuelve {producto_id: {...}}.
+        """
+        resultado = {}
+        for producto_id, serie in ConsumoService.series(productos, dias, motivos, hasta).items():
+            total = sum(serie)
+            promedio = total / dias
+            ordenados = sorted(serie)
+            resultado[producto_id] = {
+                "producto": producto_id,
+                "dias": dias,
+                "total": total,
+                "promedio": round(promedio, 2),
+                "desviacion": round(math.sqrt(sum((x - promedio) ** 2 for x in serie) / dias), 2),
+                "maximo": ordenados[-1],
+                "medias_moviles": {
+                    str(ventana): round(sum(serie[-ventana:]) / ventana, 2)
+                    for ventana in ventanas if ventana <= dias
+                },
+                "percentiles": {f"p{p}": round(_percentil(ordenados, p), 2) for p in percentiles},
+            }
+        return resultado
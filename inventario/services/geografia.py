@@ -0,0 +1,107 @@
+from inventario.models import Pais, Region, Ciudad, Comuna
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+import hashlib
+import json
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+CLAVE_VERSION = "geografia:version"
+
+_arbol = None
+_arbol_lock = threading.Lock()
+
+
+class ArbolGeografia:
+    """Árbol serializado: `contenido` (JSON compacto en bytes), su `etag` y la `version` con que se armó."""
+
+    __slots__ = ("version", "contenido", "etag")
+
+    def __init__(self, version, contenido):
+        self.version = version
+        self.contenido = contenido
+        # Del contenido y no de la versión: procesos con cachés locales distintas dan el mismo ETag.
+        self.etag = f'"{hashlib.sha256(contenido).hexdigest()[:32]}"'
+
+
+class GeografiaService:
+    """
+    Árbol país → región → ciudad → comuna, precargado en memoria de cada proceso
+    y servido como un solo documento JSON (/api/geografia/arbol/).
+
+    Las tablas casi no cambian: el árbol se arma con cuatro consultas y se reusa
+    mientras no cambie la versión compartida en la caché, que `invalidar` renueva
+    en cada alta, cambio o baja de Pais, Region, Ciudad o Comuna (señales que
+    conecta InventarioConfig.ready). bulk_create/update no emiten señales: quien
+    los use sobre estas tablas debe llamar a `invalidar`.
+    """
+
+    @staticmethod
+    def arbol():
+        global _arbol
+        # La versión se lee antes de consultar: si cambia mientras se arma, el
+        # árbol queda con la anterior y la próxima llamada lo vuelve a armar.
+        version = GeografiaService._version()
+        with _arbol_lock:
+            # Sin caché disponible (version None) no hay cómo saber si cambió: se rearma.
+            if _arbol is None or version is None or _arbol.version != version:
+                try:
+                    _arbol = ArbolGeografia(version, GeografiaService._serializar())
+                except Exception as e:
+                    logger.error(f"Error al construir el árbol de geografía: {str(e)}")
+                    raise
+            return _arbol
+
+    @staticmethod
+    def _serializar():
+        comunas = {}
+        for comuna_id, nombre, ciudad_id in Comuna.objects.order_by("nombre").values_list("id", "nombre", "ciudad_id"):
+            comunas.setdefault(ciudad_id, []).append({"id": comuna_id, "nombre": nombre})
+        ciudades = {}
+        for ciudad_id, nombre, region_id in Ciudad.objects.order_by("nombre").values_list("id", "nombre", "region_id"):
+            ciudades.setdefault(region_id, []).append(
+                {"id": ciudad_id, "nombre": nombre, "comunas": comunas.get(ciudad_id, [])}
+            )
+        regiones = {}
+        for region_id, nombre, pais_id in Region.objects.order_by("nombre").values_list("id", "nombre", "pais_id"):
+            regiones.setdefault(pais_id, []).append(
+                {"id": region_id, "nombre": nombre, "ciudades": ciudades.get(region_id, [])}
+            )
+        paises = [
+            {"id": pais_id, "nombre": nombre, "regiones": regiones.get(pais_id, [])}
+            for pais_id, nombre in Pais.objects.order_by("nombre").values_list("id", "nombre")
+        ]
+        return json.dumps({"paises": paises}, ensure_ascii=False, separators=(",", ":")).encode()
+
+    @staticmethod
+    def invalidar():
+        """Marca el árbol como desactualizado en todos los procesos; se repite al confirmar la transacción."""
+        GeografiaService._renovar_version()
+        if connection.in_atomic_block:
+            transaction.on_commit(GeografiaService._renovar_version)
+
+    @staticmethod
+    def _version():
+        version = cache.get(CLAVE_VERSION)
+        if version is None:
+            cache.add(CLAVE_VERSION, uuid.uuid4().hex, timeout=None)
+            version = cache.get(CLAVE_VERSION)
+        return version
+
+    @staticmethod
+    def _renovar_version():
+        cache.set(CLAVE_VERSION, uuid.uuid4().hex, timeout=None)
+
+
+def _invalidar_por_senal(sender, **kwargs):
+    GeografiaService.invalidar()
+
+
+def conectar_invalidacion():
+    for modelo in (Pais, Region, Ciudad, Comuna):
+        for senal in (post_save, post_delete):
+            senal.connect(_invalidar_por_senal, sender=modelo, dispatch_uid=f"geografia_{modelo.__name__}")
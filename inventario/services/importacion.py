@@ -0,0 +1,337 @@
+from inventario.models import Producto, Lote, Proveedor, Categoria, MovimientoStock
+from inventario.services.auditoria import AuditoriaService
+from inventario.services.busqueda import BusquedaProductoService
+from inventario.services.cache_productos import CacheProductoService
+from inventario.validators import validar_codigo_barra, validar_sku_formato
+from django.core.exceptions import ValidationError
+from django.db import transaction
+import csv
+import io
+import logging
+import os
+import re
+
+try:
+    import openpyxl
+except ImportError:  # openpyxl es opcional: sin él solo se importan archivos CSV.
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+FORMATOS = ("csv", "xlsx")
+# Columnas que se pueden actualizar en productos existentes, con su campo del modelo.
+ACTUALIZABLES = {
+    "nombre": "nombre",
+    "descripcion": "descripcion",
+    "precio": "precio",
+    "stock_minimo": "stock_minimo",
+    "codigo_barra": "codigo_barra",
+    "habilitado": "habilitado",
+    "lote_codigo": "lote",
+}
+COLUMNAS = ["sku", *ACTUALIZABLES, "stock", "proveedor_rut", "categoria"]
+REQUERIDAS_ALTA = ["nombre", "precio", "codigo_barra", "lote_codigo"]
+# Enteros con punto como separador de miles (1.500).
+MILES = re.compile(r"^\d{1,3}(\.\d{3})+$")
+# Columnas que pueden venir vacías al actualizar un producto existente (las demás
+# ACTUALIZABLES dan "No puede quedar vacío."): descripcion vacía borra la
+# descripción y lote_codigo vacío conserva el lote actual.
+VACIABLES = ("descripcion", "lote_codigo")
+VERDADEROS = {"1", "si", "sí", "s", "true", "verdadero", "x"}
+FALSOS = {"0", "no", "n", "false", "falso"}
+MAX_NOMBRE = Producto._meta.get_field("nombre").max_length
+MAX_CODIGO = Producto._meta.get_field("codigo_barra").max_length
+
+
+def _rut(valor):
+    """RUT sin puntos, guion ni espacios y con K mayúscula, para comparar."""
+    return re.sub(r"[^0-9K]", "", str(valor or "").upper())
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        # Excel guarda los códigos numéricos como float.
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _entero(valor, minimo):
+    if isinstance(valor, float):
+        numero = int(valor) if valor.is_integer() else None
+    elif isinstance(valor, int):
+        numero = valor
+    else:
+        texto = _texto(valor)
+        if MILES.match(texto):
+            texto = texto.replace(".", "")
+        numero = int(texto) if texto.isdigit() else None
+    if numero is None:
+        raise ValidationError("Debe ser un número entero.")
+    if numero < minimo:
+        raise ValidationError(f"Debe ser mayor o igual a {minimo}.")
+    return numero
+
+
+def _booleano(valor):
+    texto = _texto(valor).lower()
+    if texto in VERDADEROS:
+        return True
+    if texto in FALSOS:
+        return False
+    raise ValidationError("Use si/no.")
+
+
+class ImportacionProductoService:
+    """
+    Importación masiva de productos desde CSV o XLSX (con encabezados: sku,
+    nombre, descripcion, precio, stock, stock_minimo, codigo_barra, habilitado,
+    lote_codigo, proveedor_rut, categoria).
+
+    El archivo se lee fila por fila y se valida completo en memoria contra los
+    SKU, códigos de barras, lotes, proveedores y categorías existentes, leídos con
+    una consulta por tabla. Después se crean los lotes nuevos y los productos se
+    insertan o actualizan (por SKU) con bulk_create(update_conflicts=True) en
+    bloques, todo en una transacción.
+
+    - Una fila con un SKU existente (o sin SKU y con el código de barras de un
+      producto existente) actualiza ese producto, solo en las columnas presentes
+      en el archivo. El stock de un producto existente no se toca: cambia solo con
+      entradas y salidas.
+    - Un producto nuevo sin SKU recibe "SKU-<codigo_barra>".
+    - Un lote que no existe se crea con el proveedor (por RUT) y la categoría (por
+      nombre) de la fila, que deben existir.
+    """
+
+    @staticmethod
+    def leer(archivo, formato):
+        """Filas del archivo (listas de valores), la primera con los encabezados."""
+        if formato == "xlsx":
+            if openpyxl is None:
+                raise ValueError("Para importar archivos XLSX se necesita el paquete openpyxl.")
+            libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+            try:
+                for fila in libro.worksheets[0].iter_rows(values_only=True):
+                    yield list(fila)
+            finally:
+                libro.close()
+            return
+
+        texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+        try:
+            primera = texto.readline()
+            # Excel en español separa con punto y coma.
+            separador = ";" if primera.count(";") > primera.count(",") else ","
+            yield next(csv.reader([primera], delimiter=separador), [])
+            yield from csv.reader(texto, delimiter=separador)
+        finally:
+            texto.detach()
+
+    @staticmethod
+    def formato(nombre_archivo):
+        extension = os.path.splitext(nombre_archivo or "")[1].lower().lstrip(".")
+        if extension not in FORMATOS:
+            raise ValueError(f"Formato no soportado: '{extension}'. Use {' o '.join(FORMATOS)}.")
+        return extension
+
+    @staticmethod
+    def importar(archivo, nombre_archivo, usuario=None, modo="atomico", tamano_lote=2000):
+        """
+        Importa el archivo y devuelve un resumen:
+        {"filas", "creados", "actualizados", "lotes_creados", "errores"}, con un error
+        por fila rechazada: {"fila": número de línea en el archivo, "sku", "error": {columna: mensaje}}.
+        modo: 'parcial' (se importan las filas válidas) o 'atomico' (con un error no se importa nada).
+        """
+        filas = ImportacionProductoService.leer(archivo, ImportacionProductoService.formato(nombre_archivo))
+        encabezados = [_texto(c).lower() for c in next(filas, [])]
+        desconocidas = [c for c in encabezados if c and c not in COLUMNAS]
+        if desconocidas or not encabezados:
+            raise ValueError(
+                f"Encabezados inválidos: {', '.join(desconocidas) or '(vacío)'}. Columnas: {', '.join(COLUMNAS)}."
+            )
+
+        validas, errores, lotes_nuevos, total = ImportacionProductoService._validar(encabezados, filas)
+        resumen = {"filas": total, "creados": 0, "actualizados": 0, "lotes_creados": 0, "errores": errores}
+        if not validas or (errores and modo == "atomico"):
+            return resumen
+
+        actualizar = [campo for columna, campo in ACTUALIZABLES.items() if columna in encabezados]
+        try:
+            with transaction.atomic():
+                resumen["lotes_creados"] = ImportacionProductoService._crear_lotes(lotes_nuevos, validas)
+                creados, actualizados = ImportacionProductoService._guardar(validas, actualizar, tamano_lote)
+                AuditoriaService.registrar_masivo([
+                    {
+                        "usuario": usuario,
+                        "modelo": "Producto",
+                        "id_objeto": producto_id,
+                        "accion": accion,
+                        "descripcion": f"Producto '{nombre}' {verbo} por importación de '{nombre_archivo}'.",
+                    }
+                    for ids, accion, verbo in ((creados, "crear", "creado"), (actualizados, "actualizar", "actualizado"))
+                    for producto_id, nombre in ids
+                ])
+                CacheProductoService.invalidar([producto_id for producto_id, _ in actualizados])
+                if actualizados:
+                    BusquedaProductoService.invalidar()
+        except Exception as e:
+            logger.error(f"Error al importar productos desde '{nombre_archivo}': {str(e)}")
+            raise
+        resumen["creados"] = len(creados)
+        resumen["actualizados"] = len(actualizados)
+        return resumen
+
+    @staticmethod
+    def _validar(encabezados, filas):
+        existentes = {}
+        por_codigo = {}
+        for producto_id, sku, codigo_barra, lote_id in Producto.objects.values_list(
+            "id", "sku", "codigo_barra", "lote_id"
+        ).iterator(chunk_size=10000):
+            existentes[sku] = (producto_id, lote_id)
+            por_codigo[codigo_barra] = sku
+        lotes = dict(Lote.objects.values_list("codigo", "id"))
+        proveedores = {_rut(rut): proveedor_id for proveedor_id, rut in Proveedor.objects.values_list("id", "rut")}
+        categorias = {
+            nombre.lower(): categoria_id for categoria_id, nombre in Categoria.objects.values_list("id", "nombre")
+        }
+
+        validas, errores = [], []
+        lotes_nuevos = {}
+        skus_archivo, codigos_archivo = {}, {}
+        total = 0
+        for numero, valores in enumerate(filas, start=2):
+            if not any(_texto(v) for v in valores):
+                continue
+            total += 1
+            fila = dict(zip(encabezados, valores))
+            datos, error = ImportacionProductoService._validar_fila(fila, encabezados)
+
+            sku = datos.get("sku")
+            codigo = datos.get("codigo_barra")
+            if not sku and codigo in por_codigo:
+                sku = datos["sku"] = por_codigo[codigo]
+            existente = existentes.get(sku) if sku else None
+            if existente is None:
+                for columna in REQUERIDAS_ALTA:
+                    if columna not in datos and columna not in error:
+                        error[columna] = "Requerido para crear un producto."
+                if codigo and not sku:
+                    sku = datos["sku"] = f"SKU-{codigo}"
+                    if sku in existentes:
+                        error["sku"] = f"El SKU generado {sku} ya pertenece a otro producto."
+                if "stock_minimo" in datos and datos["stock_minimo"] > datos.get("stock", 0):
+                    error["stock_minimo"] = "El stock mínimo no puede ser mayor al stock inicial."
+            else:
+                for columna in ACTUALIZABLES:
+                    if columna in encabezados and columna not in VACIABLES and columna not in datos | error:
+                        error[columna] = "No puede quedar vacío."
+
+            if codigo and por_codigo.get(codigo, sku) != sku:
+                error["codigo_barra"] = f"Ya pertenece al producto con SKU {por_codigo[codigo]}."
+            if sku in skus_archivo:
+                error["sku"] = f"Repetido en la fila {skus_archivo[sku]}."
+            elif codigo and codigo in codigos_archivo:
+                error["codigo_barra"] = f"Repetido en la fila {codigos_archivo[codigo]}."
+
+            lote = datos.get("lote_codigo")
+            if lote and lote not in lotes and lote not in lotes_nuevos and "lote_codigo" not in error:
+                proveedor = proveedores.get(_rut(fila.get("proveedor_rut")))
+                categoria = categorias.get(_texto(fila.get("categoria")).lower())
+                if proveedor is None:
+                    error["proveedor_rut"] = "El lote no existe y su proveedor no se encontró por RUT."
+                if categoria is None:
+                    error["categoria"] = "El lote no existe y su categoría no se encontró."
+                if not error:
+                    lotes_nuevos[lote] = Lote(codigo=lote, proveedor_id=proveedor, categoria_id=categoria)
+
+            if error:
+                errores.append({"fila": numero, "sku": sku or "", "error": error})
+                continue
+            if sku:
+                skus_archivo[sku] = numero
+            if codigo:
+                codigos_archivo[codigo] = numero
+            datos["id"], datos["lote_actual"] = existente or (None, None)
+            datos["lote_id"] = lotes.get(lote)
+            validas.append(datos)
+        return validas, errores, lotes_nuevos, total
+
+    @staticmethod
+    def _validar_fila(fila, encabezados):
+        """(datos limpios de las columnas con valor, {columna: error})."""
+        datos, error = {}, {}
+        for columna in encabezados:
+            valor = fila.get(columna)
+            if columna in ("proveedor_rut", "categoria") or not _texto(valor):
+                continue
+            try:
+                if columna in ("precio", "stock", "stock_minimo"):
+                    datos[columna] = _entero(valor, minimo=1 if columna == "precio" else 0)
+                elif columna == "habilitado":
+                    datos[columna] = _booleano(valor)
+                elif columna == "codigo_barra":
+                    codigo = _texto(valor)
+                    if len(codigo) > MAX_CODIGO:
+                        raise ValidationError(f"Máximo {MAX_CODIGO} caracteres.")
+                    datos[columna] = validar_codigo_barra(codigo)
+                elif columna == "sku":
+                    datos[columna] = validar_sku_formato(_texto(valor))
+                elif columna == "nombre" and len(_texto(valor)) > MAX_NOMBRE:
+                    raise ValidationError(f"Máximo {MAX_NOMBRE} caracteres.")
+                else:
+                    datos[columna] = _texto(valor)
+            except ValidationError as e:
+                error[columna] = " ".join(e.messages)
+        return datos, error
+
+    @staticmethod
+    def _crear_lotes(lotes_nuevos, validas):
+        if not lotes_nuevos:
+            return 0
+        creados = Lote.objects.bulk_create(lotes_nuevos.values(), batch_size=1000)
+        ids = dict(Lote.objects.filter(codigo__in=lotes_nuevos).values_list("codigo", "id"))
+        for datos in validas:
+            if datos["lote_id"] is None and datos.get("lote_codigo") in ids:
+                datos["lote_id"] = ids[datos["lote_codigo"]]
+        return len(creados)
+
+    @staticmethod
+    def _guardar(validas, actualizar, tamano_lote):
+        """Inserta o actualiza por SKU. Devuelve ([(id, nombre)] creados, [(id, nombre)] actualizados)."""
+        creados, actualizados = [], []
+        campos = [*actualizar, "fecha_actualizacion"]
+        for inicio in range(0, len(validas), tamano_lote):
+            bloque = validas[inicio:inicio + tamano_lote]
+            Producto.objects.bulk_create(
+                [
+                    Producto(
+                        sku=d["sku"],
+                        nombre=d.get("nombre", ""),
+                        descripcion=d.get("descripcion", ""),
+                        precio=d.get("precio", 0),
+                        stock=d.get("stock", 0) if d["id"] is None else 0,
+                        stock_minimo=d.get("stock_minimo", Producto._meta.get_field("stock_minimo").default),
+                        codigo_barra=d.get("codigo_barra", ""),
+                        habilitado=d.get("habilitado", True),
+                        lote_id=d["lote_id"] or d["lote_actual"],
+                    )
+                    for d in bloque
+                ],
+                update_conflicts=True,
+                unique_fields=["sku"],
+                update_fields=campos,
+            )
+            ids = dict(Producto.objects.filter(sku__in=[d["sku"] for d in bloque]).values_list("sku", "id"))
+            movimientos = []
+            for d in bloque:
+                producto_id = ids[d["sku"]]
+                if d["id"] is not None:
+                    actualizados.append((producto_id, d.get("nombre", d["sku"])))
+                    continue
+                creados.append((producto_id, d["nombre"]))
+                if d.get("stock"):
+                    movimientos.append(MovimientoStock(producto_id=producto_id, delta=d["stock"], origen="inicial"))
+            MovimientoStock.objects.bulk_create(movimientos, batch_size=1000)
+        return creados, actualizados
@@ -1,10 +1,13 @@
 from inventario.models import (
     EntradaInventario, SalidaInventario, InventarioFisico,
-    Auditoria, Producto, Proveedor, OrdenAutomatica
+    Auditoria, Producto, Proveedor, OrdenAutomatica, CustomUser
 )
+from collections import defaultdict
 from django.db import transaction
 from django.utils import timezone
 from inventario.services.auditoria import AuditoriaService
+from inventario.services.consumo import ConsumoService
+from inventario.services.stock import StockService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,8 +33,7 @@ class InventarioService:
                 total=total,
             )
 
-            producto.stock += cantidad
-            producto.save(update_fields=["stock"])
+            StockService.sumar(producto, cantidad)
 
             AuditoriaService.registrar(
                 usuario=None,
@@ -54,8 +56,8 @@ class InventarioService:
         try:
             if not producto or cantidad <= 0:
                 raise ValueError("Producto inválido o cantidad no válida.")
-            if producto.stock < cantidad:
-                raise ValueError("No hay stock suficiente para realizar la salida.")
+
+            StockService.restar(producto, cantidad)
 
             salida = SalidaInventario.objects.create(
                 producto=producto,
@@ -64,9 +66,7 @@ class InventarioService:
                 motivo=motivo,
                 observacion=observacion
             )
-
-            producto.stock -= cantidad
-            producto.save(update_fields=["stock"])
+            ConsumoService.acumular([salida])
 
             AuditoriaService.registrar(
                 usuario=responsable,
@@ -110,3 +110,165 @@ class InventarioService:
         except Exception as e:
             logger.error(f"Error al registrar conteo físico para producto {getattr(producto, 'id', 'N/A')}: {str(e)}")
             raise
+
+    @staticmethod
+    def registrar_entradas_masivas(items, usuario, modo="atomico"):
+        """
+        Registra un lote de entradas con un INSERT masivo de movimientos, un UPDATE
+        de stock por producto y un INSERT masivo de auditoría.
+        items: lista de diccionarios validados con su 'indice' dentro del payload.
+        modo: 'atomico' (todo o nada) o 'parcial' (se omiten solo las filas con error).
+        """
+        productos = Producto.objects.in_bulk({i["producto"] for i in items})
+        proveedores = Proveedor.objects.in_bulk({i["proveedor"] for i in items if i.get("proveedor")})
+        ordenes = OrdenAutomatica.objects.in_bulk({i["orden"] for i in items if i.get("orden")})
+
+        errores = []
+        entradas = []
+        ordenes_usadas = set()
+        for item in items:
+            producto = productos.get(item["producto"])
+            proveedor = proveedores.get(item.get("proveedor"))
+            orden = ordenes.get(item.get("orden"))
+
+            if producto is None:
+                error = f"El producto {item['producto']} no existe."
+            elif item.get("proveedor") and proveedor is None:
+                error = f"El proveedor {item['proveedor']} no existe."
+            elif item.get("orden") and orden is None:
+                error = f"La orden {item['orden']} no existe."
+            elif orden and orden.estado != "completada":
+                error = "Solo se puede registrar una entrada desde una orden completada."
+            elif orden and (orden.usada_para_ingreso or orden.id in ordenes_usadas):
+                error = "Esta orden ya fue utilizada para generar una entrada de inventario."
+            else:
+                error = None
+
+            if error:
+                errores.append({"indice": item["indice"], "error": error})
+                continue
+
+            if orden:
+                ordenes_usadas.add(orden.id)
+            entrada = EntradaInventario(
+                producto=producto,
+                proveedor=proveedor,
+                orden=orden,
+                cantidad=item["cantidad"],
+                precio_unitario=item.get("precio_unitario", 0),
+                total=item["cantidad"] * item.get("precio_unitario", 0),
+            )
+            entrada.indice = item["indice"]
+            entradas.append(entrada)
+
+        def descripcion(entrada):
+            return (
+                f"Entrada de {entrada.cantidad} unidades al producto '{entrada.producto.nombre}'"
+                f"{' desde orden automática' if entrada.orden_id else ''} (carga masiva)."
+            )
+
+        resultado = InventarioService._guardar_lote(
+            EntradaInventario, entradas, errores, usuario, modo, signo=1, descripcion=descripcion
+        )
+        if resultado["creados"] and ordenes_usadas:
+            OrdenAutomatica.objects.filter(
+                id__in={e.orden_id for e in resultado["creados"] if e.orden_id}
+            ).update(usada_para_ingreso=True, fecha_actualizacion=timezone.now())
+        return resultado
+
+    @staticmethod
+    def registrar_salidas_masivas(items, usuario, modo="atomico"):
+        """
+        Registra un lote de salidas validando el stock disponible de cada producto
+        contra la suma de las cantidades solicitadas en el lote.
+        items: lista de diccionarios validados con su 'indice' dentro del payload.
+        modo: 'atomico' (todo o nada) o 'parcial' (se omiten solo las filas con error).
+        """
+        productos = Producto.objects.in_bulk({i["producto"] for i in items})
+        responsables = CustomUser.objects.in_bulk({i["responsable"] for i in items if i.get("responsable")})
+        disponible = {producto_id: p.stock for producto_id, p in productos.items()}
+
+        errores = []
+        salidas = []
+        for item in items:
+            producto = productos.get(item["producto"])
+            responsable = responsables.get(item.get("responsable")) if item.get("responsable") else usuario
+
+            if producto is None:
+                error = f"El producto {item['producto']} no existe."
+            elif item.get("responsable") and responsable is None:
+                error = f"El responsable {item['responsable']} no existe."
+            elif item["cantidad"] > disponible[producto.id]:
+                error = f"No hay suficiente stock de '{producto.nombre}' para realizar la salida."
+            else:
+                error = None
+
+            if error:
+                errores.append({"indice": item["indice"], "error": error})
+                continue
+
+            disponible[producto.id] -= item["cantidad"]
+            salida = SalidaInventario(
+                producto=producto,
+                cantidad=item["cantidad"],
+                motivo=item["motivo"],
+                observacion=item.get("observacion", ""),
+                responsable=responsable,
+            )
+            salida.indice = item["indice"]
+            salidas.append(salida)
+
+        def descripcion(salida):
+            return (
+                f"Salida de {salida.cantidad} unidades del producto '{salida.producto.nombre}' "
+                f"por motivo '{salida.get_motivo_display()}' (carga masiva)."
+            )
+
+        return InventarioService._guardar_lote(
+            SalidaInventario, salidas, errores, usuario, modo, signo=-1, descripcion=descripcion
+        )
+
+    @staticmethod
+    def _guardar_lote(modelo, movimientos, errores, usuario, modo, signo, descripcion):
+        """Aplica stock, inserta movimientos y auditoría de un lote ya validado."""
+        if errores and modo == "atomico":
+            return {"creados": [], "errores": errores}
+
+        deltas = defaultdict(int)
+        for movimiento in movimientos:
+            deltas[movimiento.producto_id] += signo * movimiento.cantidad
+
+        with transaction.atomic():
+            nuevos = StockService.aplicar_deltas(deltas)
+            fallidos = set(deltas) - set(nuevos)
+            if fallidos:
+                for movimiento in movimientos:
+                    if movimiento.producto_id in fallidos:
+                        errores.append({
+                            "indice": movimiento.indice,
+                            "error": "El stock del producto cambió durante la carga; reintente.",
+                        })
+                if modo == "atomico":
+                    transaction.set_rollback(True)
+                    return {"creados": [], "errores": sorted(errores, key=lambda e: e["indice"])}
+                movimientos = [m for m in movimientos if m.producto_id not in fallidos]
+
+            for movimiento in movimientos:
+                movimiento.producto.stock = nuevos[movimiento.producto_id]
+
+            creados = modelo.objects.bulk_create(movimientos, batch_size=1000)
+            if modelo is SalidaInventario:
+                ConsumoService.acumular(creados)
+
+            AuditoriaService.registrar_masivo([
+                {
+                    "usuario": usuario,
+                    "modelo": modelo.__name__,
+                    "id_objeto": movimiento.id,
+                    "accion": "crear",
+                    "descripcion": descripcion(movimiento),
+                }
+                for movimiento in creados
+            ])
+
+        return {"creados": creados, "errores": sorted(errores, key=lambda e: e["indice"])}
@@ -1,10 +1,14 @@
 from inventario.models import Notificacion, CustomUser
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
 import logging
 
 logger = logging.getLogger(__name__)
 
 class NotificacionService:
+    TAMANO_LOTE = 1000
+
     @staticmethod
     def crear(usuario, mensaje):
         """Envía una notificación a un usuario."""
@@ -17,17 +21,58 @@ class NotificacionService:
             return None
 
     @staticmethod
-    def notificar_roles(mensaje, roles):
-        """Envía notificación a todos los usuarios de ciertos roles."""
+    def notificar_roles(mensaje, roles, diferido=None):
+        """
+        Envía notificación a todos los usuarios de ciertos roles.
+
+        Las notificaciones se escriben después del commit de la transacción en
+        curso (o de inmediato si no hay una), para no alargar la transacción de
+        quien notifica. Con `diferido` (por defecto settings.NOTIFICACIONES_DIFERIDAS)
+        la escritura se delega a una tarea de Celery.
+        """
         try:
             if not mensaje.strip():
                 return
 
-            usuarios = CustomUser.objects.filter(role__in=roles)
-            for usuario in usuarios:
-                try:
-                    Notificacion.objects.create(usuario=usuario, mensaje=mensaje.strip())
-                except Exception as e:
-                    logger.error(f"Error al crear notificación para usuario {usuario.id}: {str(e)}")
+            roles = list(roles)
+            if diferido is None:
+                diferido = settings.NOTIFICACIONES_DIFERIDAS
+
+            if diferido:
+                transaction.on_commit(lambda: NotificacionService._encolar(mensaje, roles))
+            else:
+                transaction.on_commit(lambda: NotificacionService.crear_para_roles(mensaje, roles))
         except Exception as e:
             logger.error(f"Error al enviar notificaciones por roles {roles}: {str(e)}")
+
+    @staticmethod
+    def crear_para_roles(mensaje, roles):
+        """Crea las notificaciones con bulk_create en lotes de TAMANO_LOTE. Devuelve cuántas creó."""
+        try:
+            mensaje = mensaje.strip()
+            usuarios = CustomUser.objects.filter(role__in=roles).values_list("id", flat=True)
+            creadas = 0
+            lote = []
+            for usuario_id in usuarios.iterator(chunk_size=NotificacionService.TAMANO_LOTE):
+                lote.append(Notificacion(usuario_id=usuario_id, mensaje=mensaje))
+                if len(lote) >= NotificacionService.TAMANO_LOTE:
+                    Notificacion.objects.bulk_create(lote)
+                    creadas += len(lote)
+                    lote = []
+            if lote:
+                Notificacion.objects.bulk_create(lote)
+                creadas += len(lote)
+            return creadas
+        except Exception as e:
+            logger.error(f"Error al crear notificaciones para roles {roles}: {str(e)}")
+            return 0
+
+    @staticmethod
+    def _encolar(mensaje, roles):
+        try:
+            from inventario.tasks import tarea_notificar_roles
+            tarea_notificar_roles.delay(mensaje, roles)
+        except Exception as e:
+            # Sin broker disponible la notificación no se pierde: se escribe aquí.
+            logger.error(f"No se pudo encolar la notificación para roles {roles}: {str(e)}")
+            NotificacionService.crear_para_roles(mensaje, roles)
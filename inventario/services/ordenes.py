@@ -1,82 +1,187 @@
-from inventario.models import OrdenAutomatica, AlertaStock, EntradaInventario, CotizacionProveedor
+from inventario.models import (
+    OrdenAutomatica, OrdenAutomaticaItem, AlertaStock, EntradaInventario, CotizacionProveedor, CustomUser
+)
 from inventario.services.notificaciones import NotificacionService
 from inventario.services.inventario import InventarioService
 from maestranza_backend.utils.logger import audit_logger
-from django.db import transaction
+from collections import defaultdict
+from django.db import connection, transaction
+from django.db.models import Case, Value, When
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
 class OrdenService:
     @staticmethod
-    @transaction.atomic
     def crear_orden_desde_alerta(alerta: AlertaStock):
         try:
             if not alerta or alerta.estado not in ["activa", "pendiente"]:
                 raise ValidationError("La alerta no está en un estado válido para generar una orden.")
 
-            if alerta.usada:
+            if alerta.usada_para_orden or alerta.orden_relacionada_id:
                 raise ValidationError("Esta alerta ya ha sido utilizada para generar una orden.")
 
-            producto = alerta.producto
-            lote = producto.lote
-            proveedor = lote.proveedor
+            ordenes = OrdenService.generar_ordenes_por_proveedor(
+                AlertaStock.objects.filter(id=alerta.id)
+            )
+            if not ordenes:
+                raise ValidationError("Esta alerta ya ha sido utilizada para generar una orden.")
 
-            if not proveedor:
-                raise ValidationError("El producto no tiene proveedor asignado a su lote.")
+            alerta.refresh_from_db(fields=["usada_para_orden", "orden_relacionada", "estado"])
+            return ordenes[0]
 
-            orden = OrdenAutomatica.objects.create(
-                alerta=alerta,
-                producto=producto,
-                proveedor=proveedor,
-                cantidad_ordenada=alerta.stock_sugerido or producto.stock_minimo,
-                estado="pendiente"
-            )
+        except Exception as e:
+            logger.error(f"Error al crear orden desde alerta {getattr(alerta, 'id', 'N/A')}: {str(e)}")
+            raise
 
-            alerta.usada = True
-            alerta.orden_relacionada = orden
-            alerta.save(update_fields=["usada", "orden_relacionada"])
+    @staticmethod
+    def cantidad_sugerida(stock, stock_minimo, punto_reorden=None, cantidad_pedido=None):
+        """
+        Unidades a pedir. Con plan de reposición (PlanificacionService) se pide el
+        lote económico, o lo necesario para volver al punto de reorden si es más;
+        sin plan (o sin consumo registrado), hasta el doble del stock mínimo.
+        """
+        if cantidad_pedido:
+            return max(1, cantidad_pedido, (punto_reorden or 0) - stock)
+        return max(1, stock_minimo * 2 - stock)
 
-            NotificacionService.notificar_roles(
-                f"📦 Se ha generado una nueva orden automática para el producto '{producto.nombre}' (stock actual: {producto.stock}).",
-                roles=["admin", "inventario"]
-            )
+    @staticmethod
+    def alertas_pendientes():
+        """Alertas abiertas que todavía no generan orden."""
+        return AlertaStock.objects.filter(
+            estado__in=["activa", "pendiente"],
+            usada_para_orden=False,
+            orden_relacionada__isnull=True
+        )
 
-            audit_logger.info(f"✅ Orden automática #{orden.id} generada desde alerta #{alerta.id} por servicio.")
+    @staticmethod
+    def generar_ordenes_por_proveedor(alertas=None):
+        """
+        Agrupa las alertas pendientes por proveedor (producto.lote.proveedor) y crea
+        una orden por proveedor con un ítem por producto.
+
+        El número de consultas no depende de la cantidad de alertas: una lectura de
+        alertas, un bulk_create de órdenes, un bulk_create de ítems y un único UPDATE
+        de alertas (CASE por proveedor para la orden relacionada). Al confirmar la transacción se envía una única
+        notificación resumen. Devuelve la lista de órdenes creadas.
+        """
+        if alertas is None:
+            alertas = OrdenService.alertas_pendientes()
+
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                # Dos ejecuciones simultáneas no toman las mismas alertas.
+                alertas = alertas.select_for_update(skip_locked=True, of=("self",))
+
+            filas = list(alertas.order_by("id").values(
+                "id", "producto_id", "producto__stock", "producto__stock_minimo",
+                "producto__lote__proveedor_id", "producto__lote__proveedor__nombre",
+                "producto__plan_reposicion__punto_reorden", "producto__plan_reposicion__cantidad_pedido",
+            ))
+            if not filas:
+                return []
+
+            por_proveedor = defaultdict(dict)
+            alertas_por_proveedor = defaultdict(list)
+            for fila in filas:
+                proveedor_id = fila["producto__lote__proveedor_id"]
+                alertas_por_proveedor[proveedor_id].append(fila["id"])
+                # Si un producto tiene más de una alerta abierta se pide una sola vez.
+                por_proveedor[proveedor_id].setdefault(fila["producto_id"], fila)
+
+            proveedores = sorted(por_proveedor)
+            ordenes = []
+            for proveedor_id in proveedores:
+                productos = por_proveedor[proveedor_id]
+                cantidades = {
+                    producto_id: OrdenService.cantidad_sugerida(
+                        fila["producto__stock"], fila["producto__stock_minimo"],
+                        fila["producto__plan_reposicion__punto_reorden"],
+                        fila["producto__plan_reposicion__cantidad_pedido"],
+                    )
+                    for producto_id, fila in productos.items()
+                }
+                unica = next(iter(productos.values())) if len(productos) == 1 else None
+                orden = OrdenAutomatica(
+                    proveedor_id=proveedor_id,
+                    producto_id=unica["producto_id"] if unica else None,
+                    alerta_id=unica["id"] if unica else None,
+                    cantidad_ordenada=sum(cantidades.values()),
+                    estado="pendiente",
+                )
+                orden.cantidades = cantidades
+                ordenes.append(orden)
 
-            return orden
+            OrdenAutomatica.objects.bulk_create(ordenes)
 
-        except Exception as e:
-            logger.error(f"Error al crear orden desde alerta {getattr(alerta, 'id', 'N/A')}: {str(e)}")
-            raise
+            OrdenAutomaticaItem.objects.bulk_create([
+                OrdenAutomaticaItem(
+                    orden=orden,
+                    alerta_id=por_proveedor[orden.proveedor_id][producto_id]["id"],
+                    producto_id=producto_id,
+                    cantidad_ordenada=cantidad,
+                )
+                for orden in ordenes
+                for producto_id, cantidad in orden.cantidades.items()
+            ], batch_size=1000)
+
+            AlertaStock.objects.filter(id__in=[fila["id"] for fila in filas]).update(
+                orden_relacionada_id=Case(*[
+                    When(id__in=alertas_por_proveedor[orden.proveedor_id], then=Value(orden.id))
+                    for orden in ordenes
+                ]),
+                usada_para_orden=True, estado="pendiente", fecha_actualizacion=timezone.now(),
+            )
+
+            nombres = {f["producto__lote__proveedor_id"]: f["producto__lote__proveedor__nombre"] for f in filas}
+            resumen = ", ".join(
+                f"#{orden.id} {nombres[orden.proveedor_id]} ({len(orden.cantidades)} productos)"
+                for orden in ordenes
+            )
+            mensaje = (
+                f"📦 Se generaron {len(ordenes)} órdenes automáticas para "
+                f"{sum(len(o.cantidades) for o in ordenes)} productos con stock bajo: {resumen}."
+            )
+            NotificacionService.notificar_roles(
+                mensaje, roles=[CustomUser.Roles.ADMIN, CustomUser.Roles.INVENTARIO]
+            )
+
+        audit_logger.info("✅ %s órdenes automáticas generadas desde %s alertas.", len(ordenes), len(filas))
+        return ordenes
 
     @staticmethod
     @transaction.atomic
     def generar_entrada_si_orden_confirmada(orden: OrdenAutomatica):
+        """Registra una entrada por producto de la orden completada. Devuelve la lista de entradas creadas."""
         try:
             if not orden or orden.estado != "completada":
-                return None  # No hacer nada si no está completada
+                return []  # No hacer nada si no está completada
 
             ya_existe = EntradaInventario.objects.filter(orden=orden).exists()
             if ya_existe:
-                return None  # Ya se generó la entrada antes
-
-            producto = orden.producto
-            cantidad = orden.cantidad_ordenada
-            proveedor = orden.proveedor
-
-            entrada = InventarioService.registrar_entrada(
-                producto=producto,
-                cantidad=cantidad,
-                proveedor=proveedor,
-                orden=orden,
-                precio_unitario=producto.precio_actual or 0
-            )
+                return []  # Ya se generó la entrada antes
+
+            # Las órdenes agrupadas por proveedor traen un ítem por producto.
+            lineas = [(item.producto, item.cantidad_ordenada) for item in orden.items.select_related("producto")]
+            if not lineas:
+                lineas = [(orden.producto, orden.cantidad_ordenada)]
+
+            entradas = [
+                InventarioService.registrar_entrada(
+                    producto=producto,
+                    cantidad=cantidad,
+                    proveedor=orden.proveedor,
+                    orden=orden,
+                    precio_unitario=producto.precio or 0
+                )
+                for producto, cantidad in lineas
+            ]
 
-            audit_logger.info(f"✅ Entrada generada automáticamente por orden #{orden.id}.")
+            audit_logger.info("✅ %s entradas generadas automáticamente por orden #%s.", len(entradas), orden.id)
 
-            return entrada
+            return entradas
 
         except Exception as e:
             logger.error(f"Error al generar entrada para orden {getattr(orden, 'id', 'N/A')}: {str(e)}")
@@ -93,7 +198,7 @@ class OrdenService:
                 orden=orden,
                 defaults={
                     "proveedor": orden.proveedor,
-                    "precio_unitario": orden.producto.precio_actual or 0,
+                    "precio_unitario": (orden.producto.precio if orden.producto else 0) or 0,
                     "archivo_pdf": None,  # será generado después
                 }
             )
@@ -103,9 +208,9 @@ class OrdenService:
                     f"📄 Se ha creado una cotización para la orden #{orden.id} con el proveedor '{orden.proveedor.nombre}'.",
                     roles=["compras"]
                 )
-                audit_logger.info(f"📝 Cotización creada para orden #{orden.id} - proveedor: {orden.proveedor.nombre}")
+                audit_logger.info("📝 Cotización creada para orden #%s - proveedor: %s", orden.id, orden.proveedor.nombre)
             else:
-                audit_logger.info(f"ℹ️ Cotización ya existente para orden #{orden.id}")
+                audit_logger.info("ℹ️ Cotización ya existente para orden #%s", orden.id)
 
             return cotizacion
 
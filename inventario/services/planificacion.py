@@ -0,0 +1,198 @@
+from inventario.models import Producto, ConsumoDiario, PlanReposicion
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from statistics import NormalDist
+import logging
+import math
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se usa el mismo cálculo en Python puro.
+    np = None
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_PLAN = [
+    "demanda_diaria", "desviacion", "dias_entrega", "stock_seguridad",
+    "punto_reorden", "cantidad_pedido", "fecha_calculo",
+]
+
+
+class PlanificacionService:
+    """
+    Calcula para todo el catálogo habilitado, a partir del consumo diario de los
+    últimos PLANIFICACION_DIAS_HISTORIA días:
+    - demanda diaria media (d) y su desviación estándar (σ), con los días sin
+      salidas contados como 0;
+    - demanda durante el plazo de entrega L del proveedor: d·L;
+    - stock de seguridad: z·σ·√L, con z según PLANIFICACION_NIVEL_SERVICIO;
+    - punto de reorden: d·L + stock de seguridad;
+    - cantidad de pedido (lote económico): √(2·D·S / H), con D = d·365,
+      S = PLANIFICACION_COSTO_PEDIDO y H = precio · PLANIFICACION_COSTO_MANTENCION.
+
+    El consumo llega ya agregado por producto desde la base (una consulta) y las
+    fórmulas se aplican a todo el catálogo a la vez con NumPy.
+    """
+
+    @staticmethod
+    def parametros(**cambios):
+        parametros = {
+            "dias_historia": settings.PLANIFICACION_DIAS_HISTORIA,
+            "dias_entrega": settings.PLANIFICACION_DIAS_ENTREGA,
+            "nivel_servicio": settings.PLANIFICACION_NIVEL_SERVICIO,
+            "costo_pedido": settings.PLANIFICACION_COSTO_PEDIDO,
+            "costo_mantencion": settings.PLANIFICACION_COSTO_MANTENCION,
+            "motivos": settings.PLANIFICACION_MOTIVOS,
+        }
+        parametros.update({clave: valor for clave, valor in cambios.items() if valor is not None})
+        return parametros
+
+    @staticmethod
+    def _sql_consumo(motivos):
+        """Por producto: suma de la demanda diaria y suma de sus cuadrados."""
+        q = connection.ops.quote_name
+        tabla = q(ConsumoDiario._meta.db_table)
+        filtro_motivos = f"AND motivo IN ({', '.join(['%s'] * len(motivos))})" if motivos else ""
+        return f"""
+            SELECT producto_id, SUM(total), SUM(total * total)
+            FROM (
+                SELECT producto_id, fecha, SUM(cantidad) AS total
+                FROM {tabla}
+                WHERE fecha >= %s AND fecha <= %s {filtro_motivos}
+                GROUP BY producto_id, fecha
+            ) diario
+            GROUP BY producto_id
+        """
+
+    @staticmethod
+    def cargar(parametros, hasta=None):
+        """
+        Lee los datos de entrada: productos habilitados ordenados por id como
+        [(id, stock, precio, dias_entrega)] y el consumo como
+        {producto_id: (suma, suma_cuadrados)}. Son dos consultas.
+        """
+        hasta = hasta or timezone.localdate()
+        desde = hasta - timedelta(days=parametros["dias_historia"] - 1)
+
+        productos = list(
+            Producto.objects.filter(habilitado=True).order_by("id")
+            .annotate(plazo=Coalesce("lote__proveedor__dias_entrega", Value(parametros["dias_entrega"])))
+            .values_list("id", "stock", "precio", "plazo")
+        )
+        motivos = list(parametros["motivos"] or [])
+        params = [connection.ops.adapt_datefield_value(desde), connection.ops.adapt_datefield_value(hasta), *motivos]
+        with connection.cursor() as cursor:
+            cursor.execute(PlanificacionService._sql_consumo(motivos), params)
+            # En PostgreSQL las sumas llegan como Decimal.
+            consumo = {
+                producto_id: (float(suma), float(cuadrados)) for producto_id, suma, cuadrados in cursor.fetchall()
+            }
+        return productos, consumo
+
+    @staticmethod
+    def calcular(productos, consumo, parametros, usar_numpy=None):
+        """
+        Aplica las fórmulas y devuelve una lista de tuplas
+        (producto_id, demanda_diaria, desviacion, dias_entrega, stock_seguridad,
+        punto_reorden, cantidad_pedido), en el orden de `productos`.
+        """
+        if usar_numpy is None:
+            usar_numpy = np is not None
+        if not productos:
+            return []
+        if usar_numpy:
+            if np is None:
+                raise RuntimeError("NumPy no está instalado.")
+            return PlanificacionService._calcular_numpy(productos, consumo, parametros)
+        return PlanificacionService._calcular_python(productos, consumo, parametros)
+
+    @staticmethod
+    def _calcular_numpy(productos, consumo, parametros):
+        datos = np.array(productos, dtype=np.float64)
+        ids, precio, plazo = datos[:, 0].astype(np.int64), datos[:, 2], datos[:, 3]
+
+        suma = np.zeros(len(ids))
+        cuadrados = np.zeros(len(ids))
+        if consumo:
+            consumo_ids = np.fromiter(consumo.keys(), dtype=np.int64, count=len(consumo))
+            valores = np.array(list(consumo.values()), dtype=np.float64)
+            posiciones = np.searchsorted(ids, consumo_ids)
+            # Solo productos habilitados: se descarta el consumo de los demás.
+            validos = (posiciones < len(ids)) & (ids[np.minimum(posiciones, len(ids) - 1)] == consumo_ids)
+            suma[posiciones[validos]] = valores[validos, 0]
+            cuadrados[posiciones[validos]] = valores[validos, 1]
+
+        dias = parametros["dias_historia"]
+        z = NormalDist().inv_cdf(parametros["nivel_servicio"])
+        demanda = suma / dias
+        desviacion = np.sqrt(np.maximum(cuadrados / dias - demanda ** 2, 0))
+        seguridad = np.maximum(np.ceil(z * desviacion * np.sqrt(plazo)), 0)
+        reorden = np.ceil(demanda * plazo + seguridad)
+        mantencion = precio * parametros["costo_mantencion"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            economica = np.sqrt(2 * demanda * 365 * parametros["costo_pedido"] / mantencion)
+        pedido = np.where((demanda > 0) & (mantencion > 0), np.ceil(economica), 0)
+
+        return list(zip(
+            ids.tolist(), np.round(demanda, 4).tolist(), np.round(desviacion, 4).tolist(),
+            plazo.astype(np.int64).tolist(), seguridad.astype(np.int64).tolist(),
+            reorden.astype(np.int64).tolist(), pedido.astype(np.int64).tolist(),
+        ))
+
+    @staticmethod
+    def _calcular_python(productos, consumo, parametros):
+        dias = parametros["dias_historia"]
+        z = NormalDist().inv_cdf(parametros["nivel_servicio"])
+        resultado = []
+        for producto_id, _, precio, plazo in productos:
+            suma, cuadrados = consumo.get(producto_id, (0, 0))
+            demanda = suma / dias
+            desviacion = math.sqrt(max(cuadrados / dias - demanda ** 2, 0))
+            seguridad = max(math.ceil(z * desviacion * math.sqrt(plazo)), 0)
+            reorden = math.ceil(demanda * plazo + seguridad)
+            mantencion = precio * parametros["costo_mantencion"]
+            pedido = 0
+            if demanda > 0 and mantencion > 0:
+                pedido = math.ceil(math.sqrt(2 * demanda * 365 * parametros["costo_pedido"] / mantencion))
+            resultado.append((
+                producto_id, round(demanda, 4), round(desviacion, 4), plazo, seguridad, reorden, pedido
+            ))
+        return resultado
+
+    @staticmethod
+    def guardar(planes, tamano_lote=5000):
+        """Escribe los planes con un INSERT ... ON CONFLICT por lote. Devuelve la cantidad guardada."""
+        ahora = timezone.now()
+        guardados = 0
+        with transaction.atomic():
+            for inicio in range(0, len(planes), tamano_lote):
+                lote = [
+                    PlanReposicion(
+                        producto_id=producto_id, demanda_diaria=demanda, desviacion=desviacion,
+                        dias_entrega=plazo, stock_seguridad=seguridad, punto_reorden=reorden,
+                        cantidad_pedido=pedido, fecha_calculo=ahora,
+                    )
+                    for producto_id, demanda, desviacion, plazo, seguridad, reorden, pedido
+                    in planes[inicio:inicio + tamano_lote]
+                ]
+                PlanReposicion.objects.bulk_create(
+                    lote, update_conflicts=True, unique_fields=["producto"], update_fields=CAMPOS_PLAN
+                )
+                guardados += len(lote)
+        return guardados
+
+    @staticmethod
+    def planificar(hasta=None, usar_numpy=None, **parametros):
+        """Recalcula y guarda el plan de reposición de todo el catálogo. Devuelve la cantidad de planes."""
+        try:
+            parametros = PlanificacionService.parametros(**parametros)
+            productos, consumo = PlanificacionService.cargar(parametros, hasta)
+            planes = PlanificacionService.calcular(productos, consumo, parametros, usar_numpy)
+            return PlanificacionService.guardar(planes)
+        except Exception as e:
+            logger.error(f"Error al planificar la reposición: {str(e)}")
+            raise
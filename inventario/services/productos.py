@@ -1,7 +1,7 @@
-from datetime import timedelta
-from django.utils import timezone
-from django.db.models import Sum
-from inventario.models import Producto, SalidaInventario
+from inventario.models import Producto
+from inventario.services.cache_productos import CacheProductoService
+from inventario.services.consumo import ConsumoService
+from inventario.services.stock import StockService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,26 +18,23 @@ class ProductoService:
                 raise ValueError("La cantidad no puede ser negativa.")
 
             if modo == "entrada":
-                producto.stock += cantidad
+                return StockService.sumar(producto, cantidad)
             elif modo == "salida":
-                if producto.stock < cantidad:
-                    raise ValueError("Stock insuficiente para la salida.")
-                producto.stock -= cantidad
+                return StockService.restar(producto, cantidad)
             else:
                 raise ValueError("Modo no reconocido. Usa 'entrada' o 'salida'.")
-
-            producto.save()
-            return producto.stock
         except Exception as e:
             logger.error(f"Error al actualizar stock para producto {getattr(producto, 'id', 'N/A')}: {str(e)}")
             raise
 
     @staticmethod
     def obtener_stock_actual(producto_id):
-        """Devuelve el stock actual de un producto."""
+        """Devuelve el stock actual de un producto (desde la caché de productos)."""
         try:
-            producto = Producto.objects.get(id=producto_id)
-            return producto.stock
+            datos = CacheProductoService.obtener(producto_id)
+            if datos is None:
+                raise Producto.DoesNotExist
+            return datos["stock"]
         except Producto.DoesNotExist:
             logger.error(f"Producto con id {producto_id} no existe.")
             return None
@@ -47,15 +44,12 @@ class ProductoService:
 
     @staticmethod
     def calcular_consumo_promedio(producto_id, dias=30):
-        """Para proyectar necesidades futuras."""
+        """Para proyectar necesidades futuras. Lee el acumulado diario (ConsumoDiario)."""
         try:
-            producto = Producto.objects.get(id=producto_id)
-            fecha_inicio = timezone.now() - timedelta(days=dias)
-            salidas = SalidaInventario.objects.filter(producto=producto, fecha__gte=fecha_inicio)
-
-            total_consumido = salidas.aggregate(total=Sum("cantidad"))["total"] or 0
-            promedio_diario = total_consumido / dias
-            return round(promedio_diario, 2)
+            if not Producto.objects.filter(id=producto_id).exists():
+                raise Producto.DoesNotExist
+            estadisticas = ConsumoService.estadisticas([producto_id], dias=dias, ventanas=(), percentiles=())
+            return estadisticas[producto_id]["promedio"]
         except Producto.DoesNotExist:
             logger.error(f"Producto con id {producto_id} no existe.")
             return 0
@@ -0,0 +1,294 @@
+from inventario.models import Producto, MovimientoStock, SnapshotStock
+from inventario.services.cache_productos import CacheProductoService
+from datetime import datetime, time, timedelta
+from django.db import connection, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StockInsuficienteError(ValueError):
+    """El producto no tiene stock suficiente para aplicar el movimiento."""
+
+
+class StockService:
+    """
+    Punto único de mutación de Producto.stock.
+
+    Cada movimiento se aplica con un solo UPDATE condicional
+    (stock = stock + delta WHERE stock >= -delta), de modo que dos terminales
+    que mueven el mismo SKU a la vez nunca pisan el valor del otro.
+    """
+
+    @staticmethod
+    def aplicar_delta(producto, delta, recortar=False, origen=None):
+        """
+        Suma `delta` (positivo o negativo) al stock y devuelve el stock resultante.
+
+        Si `recortar` es True el stock se deja en 0 en lugar de fallar cuando
+        el delta lo dejaría negativo. El cambio aplicado queda en el libro
+        MovimientoStock con `origen` (por defecto "entrada" o "salida" según el signo).
+        """
+        producto_id = getattr(producto, "pk", producto)
+        if producto_id is None:
+            raise ValueError("Producto no válido.")
+
+        delta = int(delta)
+        # Sin savepoint: si el UPDATE no aplica, el error se lanza fuera del bloque.
+        with transaction.atomic(savepoint=False):
+            resultado = StockService._aplicar(producto_id, delta, recortar)
+            if resultado is not None:
+                StockService._registrar_movimientos({producto_id: resultado[2]}, origen)
+                CacheProductoService.invalidar([producto_id])
+
+        if resultado is None:
+            if not Producto.objects.filter(pk=producto_id).exists():
+                raise Producto.DoesNotExist(f"Producto con id {producto_id} no existe.")
+            raise StockInsuficienteError("No hay stock suficiente para realizar la salida.")
+
+        nuevo_stock, stock_minimo, _ = resultado
+        StockService._al_cambiar_stock(producto_id, delta, nuevo_stock, stock_minimo)
+
+        if isinstance(producto, Producto):
+            producto.stock = nuevo_stock
+        return nuevo_stock
+
+    @staticmethod
+    def sumar(producto, cantidad, origen=None):
+        """Ingresa `cantidad` unidades al stock."""
+        if cantidad < 0:
+            raise ValueError("La cantidad no puede ser negativa.")
+        return StockService.aplicar_delta(producto, cantidad, origen=origen)
+
+    @staticmethod
+    def restar(producto, cantidad, recortar=False, origen=None):
+        """Descuenta `cantidad` unidades del stock validando disponibilidad."""
+        if cantidad < 0:
+            raise ValueError("La cantidad no puede ser negativa.")
+        return StockService.aplicar_delta(producto, -cantidad, recortar=recortar, origen=origen)
+
+    @staticmethod
+    def aplicar_deltas(deltas, origen=None):
+        """
+        Aplica {producto_id: delta} con un UPDATE por producto y un solo INSERT
+        en el libro de movimientos.
+
+        Los productos se recorren en orden de id para que dos lotes concurrentes
+        no se bloqueen mutuamente. Devuelve {producto_id: nuevo_stock}; los
+        productos sin stock suficiente (o inexistentes) quedan fuera del resultado.
+        """
+        resultados = {}
+        with transaction.atomic(savepoint=False):
+            for producto_id in sorted(deltas):
+                resultado = StockService._aplicar(producto_id, int(deltas[producto_id]), False)
+                if resultado is not None:
+                    resultados[producto_id] = resultado
+            StockService._registrar_movimientos(
+                {producto_id: aplicado for producto_id, (_, _, aplicado) in resultados.items()}, origen
+            )
+            CacheProductoService.invalidar(resultados)
+
+        for producto_id, (nuevo_stock, stock_minimo, aplicado) in resultados.items():
+            StockService._al_cambiar_stock(producto_id, aplicado, nuevo_stock, stock_minimo)
+        return {producto_id: resultado[0] for producto_id, resultado in resultados.items()}
+
+    @staticmethod
+    def registrar_ajuste(producto, anterior, origen="ajuste"):
+        """
+        Deja en el libro un cambio de stock hecho fuera de StockService (alta del
+        producto o edición directa de `stock`), comparando con el valor `anterior`.
+        """
+        aplicado = producto.stock - (anterior or 0)
+        if aplicado:
+            StockService._registrar_movimientos({producto.pk: aplicado}, origen)
+        CacheProductoService.invalidar([producto.pk])
+
+    @staticmethod
+    def _aplicar(producto_id, delta, recortar):
+        """UPDATE condicional. Devuelve (nuevo_stock, stock_minimo, delta_aplicado) o None."""
+        minimo = 0 if recortar else max(0, -delta)
+        anterior = None
+        if recortar:
+            # Con recorte el delta aplicado depende del stock previo.
+            anterior = Producto.objects.select_for_update().filter(pk=producto_id).values_list(
+                "stock", flat=True
+            ).first()
+            if anterior is None:
+                return None
+
+        if connection.vendor in ("postgresql", "sqlite"):
+            fila = StockService._update_returning(producto_id, delta, minimo, recortar)
+        else:
+            fila = StockService._update_orm(producto_id, delta, minimo, recortar)
+        if fila is None:
+            return None
+
+        nuevo_stock, stock_minimo = fila
+        return nuevo_stock, stock_minimo, (nuevo_stock - anterior if recortar else delta)
+
+    @staticmethod
+    def _registrar_movimientos(aplicados, origen=None):
+        # La fecha se toma después del UPDATE, con la fila ya bloqueada: el orden por
+        # fecha del libro coincide con el orden en que se aplicaron los cambios.
+        movimientos = [
+            MovimientoStock(
+                producto_id=producto_id,
+                delta=aplicado,
+                origen=origen or ("entrada" if aplicado > 0 else "salida"),
+            )
+            for producto_id, aplicado in aplicados.items()
+            if aplicado
+        ]
+        if movimientos:
+            MovimientoStock.objects.bulk_create(movimientos, batch_size=1000)
+
+    @staticmethod
+    def _al_cambiar_stock(producto_id, delta, nuevo_stock, stock_minimo):
+        """Efectos posteriores a un movimiento de stock ya aplicado."""
+        if delta < 0 and nuevo_stock <= stock_minimo:
+            from inventario.services.alertas import AlertaService
+            AlertaService.programar_evaluacion(producto_id)
+
+    @staticmethod
+    def _update_returning(producto_id, delta, minimo, recortar):
+        tabla = connection.ops.quote_name(Producto._meta.db_table)
+        stock = connection.ops.quote_name("stock")
+        stock_minimo = connection.ops.quote_name("stock_minimo")
+        fecha = connection.ops.quote_name("fecha_actualizacion")
+        pk = connection.ops.quote_name(Producto._meta.pk.column)
+
+        if recortar:
+            expresion = f"CASE WHEN {stock} + %s < 0 THEN 0 ELSE {stock} + %s END"
+            params = [delta, delta]
+        else:
+            expresion = f"{stock} + %s"
+            params = [delta]
+
+        sql = (
+            f"UPDATE {tabla} SET {stock} = {expresion}, {fecha} = %s "
+            f"WHERE {pk} = %s AND {stock} >= %s RETURNING {stock}, {stock_minimo}"
+        )
+        with connection.cursor() as cursor:
+            ahora = connection.ops.adapt_datetimefield_value(timezone.now())
+            cursor.execute(sql, [*params, ahora, producto_id, minimo])
+            fila = cursor.fetchone()
+        return tuple(fila) if fila else None
+
+    @staticmethod
+    def _update_orm(producto_id, delta, minimo, recortar):
+        expresion = F("stock") + delta
+        if recortar:
+            expresion = Case(When(stock__lt=-delta, then=Value(0)), default=expresion)
+
+        with transaction.atomic():
+            actualizados = Producto.objects.filter(pk=producto_id, stock__gte=minimo).update(
+                stock=expresion, fecha_actualizacion=timezone.now()
+            )
+            if not actualizados:
+                return None
+            return Producto.objects.filter(pk=producto_id).values_list("stock", "stock_minimo").first()
+
+    # ------------------------------------------------------------------
+    # Consultas históricas sobre el libro de movimientos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _inicio_dia(dia):
+        return timezone.make_aware(datetime.combine(dia, time.min))
+
+    @staticmethod
+    def tomar_snapshots(dia=None):
+        """
+        Guarda el stock al cierre de `dia` (por defecto ayer) de los productos que
+        tuvieron movimientos ese día o que aún no tienen snapshot.
+
+        El stock al cierre se obtiene en una sola consulta como stock actual menos
+        los movimientos posteriores, así que puede ejecutarse con el día ya cerrado
+        aunque sigan entrando movimientos. Devuelve la cantidad de snapshots guardados.
+        """
+        dia = dia or (timezone.localdate() - timedelta(days=1))
+        inicio = StockService._inicio_dia(dia)
+        cierre = StockService._inicio_dia(dia + timedelta(days=1))
+
+        posteriores = (
+            MovimientoStock.objects.filter(producto=OuterRef("pk"), fecha__gte=cierre)
+            .values("producto").annotate(total=Sum("delta")).values("total")
+        )
+        productos = (
+            Producto.objects.filter(
+                Exists(MovimientoStock.objects.filter(producto=OuterRef("pk"), fecha__gte=inicio, fecha__lt=cierre))
+                | ~Exists(SnapshotStock.objects.filter(producto=OuterRef("pk")))
+            )
+            .annotate(posterior=Coalesce(Subquery(posteriores), 0))
+            .values_list("id", "stock", "posterior")
+        )
+
+        guardados = 0
+        lote = []
+        for producto_id, stock, posterior in productos.iterator(chunk_size=5000):
+            lote.append(SnapshotStock(producto_id=producto_id, fecha=dia, stock=stock - posterior))
+            if len(lote) >= 5000:
+                guardados += StockService._guardar_snapshots(lote)
+                lote = []
+        if lote:
+            guardados += StockService._guardar_snapshots(lote)
+        return guardados
+
+    @staticmethod
+    def _guardar_snapshots(snapshots):
+        SnapshotStock.objects.bulk_create(
+            snapshots, update_conflicts=True, unique_fields=["producto", "fecha"], update_fields=["stock"]
+        )
+        return len(snapshots)
+
+    @staticmethod
+    def stock_en_fecha(producto, fecha):
+        """
+        Stock del producto en el instante `fecha` (incluye los movimientos con esa fecha).
+
+        Parte del snapshot más cercano anterior y reproduce solo los movimientos
+        posteriores a él (a lo sumo un día, si los snapshots se toman a diario).
+        Sin snapshot anterior, parte del siguiente snapshot (o del stock actual)
+        y descuenta hacia atrás. Las consultas usan los índices
+        (producto, fecha) de ambos modelos.
+        """
+        producto_id = getattr(producto, "pk", producto)
+        dia = timezone.localdate(fecha)
+        movimientos = MovimientoStock.objects.filter(producto_id=producto_id)
+
+        anterior = (
+            SnapshotStock.objects.filter(producto_id=producto_id, fecha__lt=dia)
+            .order_by("-fecha").values("fecha", "stock").first()
+        )
+        if anterior:
+            desde = StockService._inicio_dia(anterior["fecha"] + timedelta(days=1))
+            replay = movimientos.filter(fecha__gte=desde, fecha__lte=fecha)
+            base, signo, snapshot = anterior["stock"], 1, anterior["fecha"]
+        else:
+            siguiente = (
+                SnapshotStock.objects.filter(producto_id=producto_id, fecha__gte=dia)
+                .order_by("fecha").values("fecha", "stock").first()
+            )
+            replay = movimientos.filter(fecha__gt=fecha)
+            if siguiente:
+                hasta = StockService._inicio_dia(siguiente["fecha"] + timedelta(days=1))
+                replay = replay.filter(fecha__lt=hasta)
+                base, snapshot = siguiente["stock"], siguiente["fecha"]
+            else:
+                base = Producto.objects.filter(pk=producto_id).values_list("stock", flat=True).first()
+                if base is None:
+                    raise Producto.DoesNotExist(f"Producto con id {producto_id} no existe.")
+                snapshot = None
+            signo = -1
+
+        resumen = replay.aggregate(total=Coalesce(Sum("delta"), 0), cantidad=Count("id"))
+        return {
+            "producto": producto_id,
+            "fecha": fecha,
+            "stock": base + signo * resumen["total"],
+            "snapshot": snapshot,
+            "movimientos_reproducidos": resumen["cantidad"],
+        }
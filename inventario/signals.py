@@ -1,6 +1,9 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from inventario.models import AlertaStock, Producto, EntradaInventario, SalidaInventario, Kit
+from django.utils import timezone
+from inventario.models import (
+    AlertaStock, Producto, EntradaInventario, SalidaInventario, Kit, OrdenAutomatica, OrdenAutomaticaItem
+)
 from inventario.services.ordenes import OrdenService
 import logging
 
@@ -10,7 +13,14 @@ logger = logging.getLogger("audit")
 @receiver(post_save, sender=AlertaStock)
 def generar_orden_automatica_si_corresponde(sender, instance, created, **kwargs):
     try:
-        if instance.estado in ["activa", "pendiente"] and not instance.usada and not instance.orden_relacionada:
+        if instance.estado in ["activa", "pendiente"] and not instance.usada_para_orden and not instance.orden_relacionada_id:
             OrdenService.crear_orden_desde_alerta(instance)
     except Exception as e:
         logger.error(f"❌ Error al generar orden automática desde alerta #{instance.id}: {e}")
+
+
+@receiver(post_save, sender=OrdenAutomaticaItem)
+@receiver(post_delete, sender=OrdenAutomaticaItem)
+def renovar_fecha_de_la_orden(sender, instance, **kwargs):
+    # Los ítems no tienen fecha propia y aparecen en la orden: su cambio renueva su ETag.
+    OrdenAutomatica.objects.filter(pk=instance.orden_id).update(fecha_actualizacion=timezone.now())
@@ -1,21 +1,80 @@
 from celery import shared_task
-from models import AlertaStock
 from .services.alertas import AlertaService
 from .services.ordenes import OrdenService
+from .services.notificaciones import NotificacionService
+from .services.auditoria import AuditoriaService
+from .services.stock import StockService
+from .services.conciliacion import ConciliacionService
+from .services.planificacion import PlanificacionService
+from django.conf import settings
+from django.utils import timezone
+import os
 from maestranza_backend.utils.logger import audit_logger
 import logging
 logger = logging.getLogger("audit")
 
 @shared_task
 def verificar_alertas_stock_bajo():
-    AlertaService.evaluar_todas()
-    audit_logger.info("✅ Verificación de stock bajo ejecutada por Celery.")
+    nuevas = AlertaService.evaluar_todas()
+    audit_logger.info("✅ Verificación de stock bajo ejecutada por Celery: %s alertas nuevas.", len(nuevas))
+    if nuevas:
+        # Las alertas se crean con bulk_create (sin post_save): las órdenes se encolan aquí.
+        tarea_generar_ordenes_desde_alertas.delay()
+
+@shared_task
+def evaluar_alerta_producto(producto_id):
+    alerta = AlertaService.evaluar_producto(producto_id)
+    if alerta:
+        audit_logger.info("🔔 Alerta #%s creada por cambio de stock del producto #%s.", alerta.id, producto_id)
 
 @shared_task
 def verificar_alertas_sin_respuesta():
     AlertaService.marcar_alertas_silenciosas()
     audit_logger.info("🔕 Verificación de alertas sin respuesta ejecutada.")
 
+@shared_task
+def tarea_notificar_roles(mensaje, roles):
+    creadas = NotificacionService.crear_para_roles(mensaje, roles)
+    audit_logger.info("📨 %s notificaciones creadas para roles %s.", creadas, roles)
+    return creadas
+
+
+# acks_late + reject_on_worker_lost: si el worker se apaga a mitad de la tarea,
+# el broker vuelve a entregar el lote en lugar de perderlo.
+@shared_task(
+    acks_late=True, reject_on_worker_lost=True,
+    autoretry_for=(RuntimeError,), retry_backoff=True, max_retries=5
+)
+def tarea_registrar_auditoria(registros):
+    creados = AuditoriaService.registrar_masivo(AuditoriaService.deserializar(registros))
+    if len(creados) != len(registros):
+        raise RuntimeError(f"Se guardaron {len(creados)} de {len(registros)} registros de auditoría.")
+    return len(creados)
+
+
+@shared_task
+def tarea_archivar_auditoria():
+    archivados = AuditoriaService.archivar()
+    audit_logger.info("🗄️ Auditoría archivada: %s", archivados or "sin registros antiguos")
+    return archivados
+
+
+@shared_task
+def tarea_tomar_snapshots_stock():
+    guardados = StockService.tomar_snapshots()
+    audit_logger.info("📸 Snapshots de stock del día anterior guardados: %s.", guardados)
+    return guardados
+
+
+@shared_task
+def tarea_conciliar_stock(aplicar=False):
+    os.makedirs(settings.CONCILIACION_DIR, exist_ok=True)
+    ruta = os.path.join(settings.CONCILIACION_DIR, f"conciliacion-{timezone.localtime():%Y%m%d-%H%M%S}.csv")
+    with open(ruta, "w", newline="", encoding="utf-8") as destino:
+        resumen = ConciliacionService.conciliar(destino, aplicar=aplicar)
+    audit_logger.info("🧮 Conciliación de stock: %s (reporte en %s).", resumen, ruta)
+    return {**resumen, "reporte": ruta}
+
 
 @shared_task
 def prueba_tarea():
@@ -24,13 +83,16 @@ def prueba_tarea():
 
 @shared_task
 def tarea_generar_ordenes_desde_alertas():
-    pendientes = AlertaStock.objects.filter(
-        estado__in=["activa", "pendiente"],
-        usada=False,
-        orden_relacionada__isnull=True
-    )
-    for alerta in pendientes:
-        try:
-            OrdenService.crear_orden_desde_alerta(alerta)
-        except Exception as e:
-            logger.error(f"❌ Falló la creación de orden desde alerta #{alerta.id}: {e}")
+    try:
+        ordenes = OrdenService.generar_ordenes_por_proveedor()
+        return [orden.id for orden in ordenes]
+    except Exception as e:
+        logger.error(f"❌ Falló la generación de órdenes desde alertas: {e}")
+        return []
+
+
+@shared_task
+def tarea_planificar_reposicion():
+    planes = PlanificacionService.planificar()
+    audit_logger.info("📈 Plan de reposición recalculado para %s productos.", planes)
+    return planes
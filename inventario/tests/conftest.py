@@ -6,9 +6,16 @@ from inventario.models import (
     HistorialPrecioProducto, Notificacion, Auditoria, InventarioFisico, CotizacionProveedor,
     Comuna, Region, Ciudad, Pais, Cargo
 )
+from django.core.cache import cache
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password
 
+@pytest.fixture(autouse=True)
+def cache_limpia():
+    # Los ids se reutilizan entre tests: la caché de productos no debe arrastrar entradas.
+    cache.clear()
+    yield
+
 @pytest.fixture
 def categoria():
     return Categoria.objects.create(nombre="Categoría Test")
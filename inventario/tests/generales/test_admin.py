@@ -0,0 +1,47 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from inventario.models import Pais, Region, Ciudad, Comuna, CustomUser
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+
+
+class GeografiaAdminTests(TestCase):
+    """Ciudad.__str__ y Comuna.__str__ no deben hacer una consulta por fila en el admin."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            username="superadmin", password="clave12345", rut=generar_rut_valido(),
+            telefono="+56912345678", correo="superadmin@maestranza.cl",
+        )
+        cls.region = Region.objects.create(nombre="Biobío", pais=Pais.objects.create(nombre="Chile"))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def agregar(self, cantidad):
+        inicio = Ciudad.objects.count()
+        ciudades = Ciudad.objects.bulk_create([
+            Ciudad(nombre=f"Ciudad {i}", region=self.region) for i in range(inicio, inicio + cantidad)
+        ])
+        Comuna.objects.bulk_create([Comuna(nombre=f"Comuna {c.nombre}", ciudad=c) for c in ciudades])
+
+    def consultas(self, url):
+        with CaptureQueriesContext(connection) as capturadas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(capturadas)
+
+    def test_consultas_constantes_en_listados_y_formularios(self):
+        for url in (
+            "/admin/inventario/ciudad/",
+            "/admin/inventario/comuna/",
+            "/admin/inventario/comuna/add/",
+            "/admin/inventario/proveedor/add/",
+        ):
+            with self.subTest(url=url):
+                self.agregar(2)
+                self.client.get(url)  # La primera visita carga contenttypes y permisos.
+                pocas = self.consultas(url)
+                self.agregar(20)
+                self.assertEqual(self.consultas(url), pocas)
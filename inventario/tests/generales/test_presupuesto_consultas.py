@@ -0,0 +1,270 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from inventario.models import (
+    Pais, Region, Ciudad, Comuna, Cargo, CustomUser, Categoria, Proveedor, Lote, Producto,
+    AlertaStock, OrdenAutomatica, OrdenAutomaticaItem, EntradaInventario, SalidaInventario,
+    CotizacionProveedor, HistorialPrecioProducto, Kit, KitItem, Auditoria, Notificacion,
+    InventarioFisico,
+)
+from inventario.urls import router
+from inventario.views import PaisViewSet
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+from maestranza_backend.utils.medicion import PresupuestoConsultasExcedido
+
+FILAS = 1000
+ACCIONES_CRUD = ("list", "retrieve", "create", "update", "partial_update", "destroy")
+RUTAS_GESTOR = ("/api/alertas/",)
+
+
+class PresupuestoConsultasTests(TestCase):
+    """
+    Con FILAS registros por modelo, los listados (una página de FILAS), los
+    detalles, los ?expand= y las escrituras de cada ruta deben quedar dentro del
+    presupuesto_consultas de su acción: si alguno crece con las filas (N+1), falla.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rango = range(FILAS)
+        paises = Pais.objects.bulk_create([Pais(nombre=f"País {i}") for i in rango])
+        regiones = Region.objects.bulk_create([Region(nombre=f"Región {i}", pais=paises[i]) for i in rango])
+        ciudades = Ciudad.objects.bulk_create([Ciudad(nombre=f"Ciudad {i}", region=regiones[i]) for i in rango])
+        comunas = Comuna.objects.bulk_create([Comuna(nombre=f"Comuna {i}", ciudad=ciudades[i]) for i in rango])
+        cargos = Cargo.objects.bulk_create([Cargo(nombre=f"Cargo {i}") for i in rango])
+        usuarios = CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f"usuario{i}", first_name="Usuario", last_name=str(i), rut=f"{5_000_000 + i}-0",
+                correo=f"usuario{i}@maestranza.cl", telefono="+56912345678", direccion="Calle 1",
+                comuna=comunas[i], cargo=cargos[i],
+            )
+            for i in rango
+        ])
+        categorias = Categoria.objects.bulk_create([Categoria(nombre=f"Categoría {i}") for i in rango])
+        proveedores = Proveedor.objects.bulk_create([
+            Proveedor(
+                nombre=f"Proveedor {i}", rut=f"{70_000_000 + i}-0", direccion="Calle 2", comuna=comunas[i],
+                correo=f"proveedor{i}@maestranza.cl",
+            )
+            for i in rango
+        ])
+        lotes = Lote.objects.bulk_create([
+            Lote(codigo=f"LOTE-{i}", proveedor=proveedores[i], categoria=categorias[i]) for i in rango
+        ])
+        productos = Producto.objects.bulk_create([
+            Producto(
+                nombre=f"Producto {i}", lote=lotes[i], precio=1000 + i, stock=i % 50, stock_minimo=10,
+                codigo_barra=f"7{i:011d}", sku=f"SKU-{i:05d}",
+            )
+            for i in rango
+        ])
+        alertas = AlertaStock.objects.bulk_create([
+            AlertaStock(producto=productos[i], estado="pendiente") for i in rango
+        ])
+        ordenes = OrdenAutomatica.objects.bulk_create([
+            OrdenAutomatica(proveedor=proveedores[i], producto=productos[i], alerta=alertas[i]) for i in rango
+        ])
+        items_orden = OrdenAutomaticaItem.objects.bulk_create([
+            OrdenAutomaticaItem(orden=ordenes[i], alerta=alertas[i], producto=productos[i]) for i in rango
+        ])
+        EntradaInventario.objects.bulk_create([
+            EntradaInventario(producto=productos[i], orden=ordenes[i], proveedor=proveedores[i], cantidad=5)
+            for i in rango
+        ])
+        SalidaInventario.objects.bulk_create([
+            SalidaInventario(producto=productos[i], cantidad=1, motivo="consumo", responsable=usuarios[i])
+            for i in rango
+        ])
+        CotizacionProveedor.objects.bulk_create([CotizacionProveedor(orden=ordenes[i], monto=5000) for i in rango])
+        HistorialPrecioProducto.objects.bulk_create([
+            HistorialPrecioProducto(producto=productos[i], proveedor=proveedores[i], precio=1000) for i in rango
+        ])
+        kits = Kit.objects.bulk_create([Kit(nombre=f"Kit {i}") for i in rango])
+        items_kit = KitItem.objects.bulk_create([KitItem(kit=kits[i], producto=productos[i], cantidad=2) for i in rango])
+        InventarioFisico.objects.bulk_create([
+            InventarioFisico(producto=productos[i], stock_real=i % 50, diferencia=0, responsable=usuarios[i])
+            for i in rango
+        ])
+        # Solo los ids: setUpTestData copia los atributos de clase en cada prueba.
+        cls.ids = {
+            nombre: [fila.id for fila in filas]
+            for nombre, filas in {
+                "pais": paises, "region": regiones, "ciudad": ciudades, "comuna": comunas, "cargo": cargos,
+                "usuario": usuarios, "categoria": categorias, "proveedor": proveedores, "lote": lotes,
+                "producto": productos, "alerta": alertas, "orden": ordenes, "item_orden": items_orden,
+                "kit": kits, "item_kit": items_kit,
+            }.items()
+        }
+        # Sin movimientos, órdenes ni kits que lo protejan: se puede eliminar.
+        cls.producto_suelto = Producto.objects.create(
+            nombre="Producto suelto", lote=lotes[0], precio=1000, stock=0, codigo_barra="7888888888888",
+            sku="SKU-SUELTO",
+        )
+
+        cls.usuario = CustomUser.objects.create_user(
+            username="admin_presupuesto", password="clave12345", rut=generar_rut_valido(),
+            telefono="+56912345678", correo="admin_presupuesto@maestranza.cl", role="admin",
+        )
+        # IsInventoryManager compara con CustomUser.Roles (en mayúsculas), el resto con "admin".
+        cls.gestor = CustomUser.objects.create_user(
+            username="gestor_presupuesto", password="clave12345", rut=generar_rut_valido(),
+            telefono="+56912345678", correo="gestor_presupuesto@maestranza.cl", role=CustomUser.Roles.ADMIN,
+        )
+        Auditoria.objects.bulk_create([
+            Auditoria(
+                usuario=usuarios[i], modelo_afectado="Producto", id_objeto=productos[i].id,
+                accion="crear", descripcion=f"Registro {i}",
+            )
+            for i in rango
+        ])
+        notificaciones = Notificacion.objects.bulk_create([
+            Notificacion(usuario=cls.usuario, mensaje=f"Notificación {i}") for i in rango
+        ])
+        cls.notificacion_id = notificaciones[0].id
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.cliente_gestor = APIClient()
+        self.cliente_gestor.force_authenticate(self.gestor)
+
+    def consultar(self, url, parametros=None, metodo="get", estado=200):
+        cliente = self.cliente_gestor if url.startswith(RUTAS_GESTOR) else self.client
+        respuesta = getattr(cliente, metodo)(url, parametros, format="json" if metodo != "get" else None)
+        self.assertEqual(respuesta.status_code, estado, f"{metodo} {url} {parametros}: {respuesta.data}")
+        clase, accion = respuesta.wsgi_request.medicion_vista
+        presupuesto = getattr(clase, "presupuesto_consultas", {}).get(accion)
+        consultas = respuesta.wsgi_request.medicion.cantidad
+        self.assertIsNotNone(presupuesto, f"{clase.__name__}.{accion} no declara presupuesto de consultas")
+        self.assertLessEqual(consultas, presupuesto, f"{url} {parametros}")
+        return respuesta
+
+    def test_listados_detalles_y_expand_dentro_del_presupuesto(self):
+        for prefijo, viewset, _ in router.registry:
+            with self.subTest(ruta=prefijo):
+                url = f"/api/{prefijo}/"
+                respuesta = self.consultar(url, {"page_size": FILAS})
+                filas = respuesta.data.get("results", respuesta.data)
+                self.assertEqual(len(filas), FILAS)
+
+                self.consultar(f"{url}{filas[0]['id']}/")
+
+                expandibles = getattr(viewset.serializer_class.Meta, "expandibles", {})
+                if expandibles:
+                    self.consultar(url, {"page_size": FILAS, "expand": ",".join(expandibles)})
+
+    def escrituras(self):
+        """(método, ruta, datos, estado esperado) de al menos una escritura por ruta del router."""
+        ids = self.ids
+        ultimo = FILAS - 1
+        return [
+            ("post", "/api/paises/", {"nombre": "País nuevo"}, 201),
+            ("put", f"/api/paises/{ids['pais'][0]}/", {"nombre": "País editado"}, 200),
+            ("patch", f"/api/paises/{ids['pais'][1]}/", {"nombre": "País corregido"}, 200),
+            # Borra en cascada su región, ciudad y comuna.
+            ("delete", f"/api/paises/{ids['pais'][ultimo]}/", None, 204),
+            ("post", "/api/regiones/", {"nombre": "Región nueva", "pais_id": ids["pais"][0]}, 201),
+            ("put", f"/api/regiones/{ids['region'][0]}/", {"nombre": "Región editada", "pais_id": ids["pais"][1]}, 200),
+            ("patch", f"/api/regiones/{ids['region'][1]}/", {"nombre": "Región corregida"}, 200),
+            ("delete", f"/api/regiones/{ids['region'][ultimo - 1]}/", None, 204),
+            ("post", "/api/ciudades/", {"nombre": "Ciudad nueva", "region_id": ids["region"][0]}, 201),
+            ("put", f"/api/ciudades/{ids['ciudad'][0]}/", {"nombre": "Ciudad editada", "region_id": ids["region"][1]}, 200),
+            ("patch", f"/api/ciudades/{ids['ciudad'][1]}/", {"nombre": "Ciudad corregida"}, 200),
+            ("delete", f"/api/ciudades/{ids['ciudad'][ultimo - 2]}/", None, 204),
+            ("post", "/api/comunas/", {"nombre": "Comuna nueva", "ciudad_id": ids["ciudad"][0]}, 201),
+            ("put", f"/api/comunas/{ids['comuna'][0]}/", {"nombre": "Comuna editada", "ciudad_id": ids["ciudad"][1]}, 200),
+            ("patch", f"/api/comunas/{ids['comuna'][1]}/", {"nombre": "Comuna corregida"}, 200),
+            ("delete", f"/api/comunas/{ids['comuna'][ultimo - 3]}/", None, 204),
+            ("post", "/api/cargos/", {"nombre": "Cargo nuevo"}, 201),
+            ("put", f"/api/cargos/{ids['cargo'][0]}/", {"nombre": "Cargo editado"}, 200),
+            ("patch", f"/api/cargos/{ids['cargo'][1]}/", {"nombre": "Cargo corregido"}, 200),
+            ("delete", f"/api/cargos/{ids['cargo'][ultimo]}/", None, 204),
+            ("post", "/api/usuarios/", {
+                "username": "usuario_nuevo", "rut": generar_rut_valido(), "telefono": "+56912345678",
+                "direccion": "Calle 3", "correo": "usuario_nuevo@maestranza.cl", "role": CustomUser.Roles.AUDITOR,
+                "comuna_id": ids["comuna"][0], "cargo_id": ids["cargo"][0],
+            }, 201),
+            ("patch", f"/api/usuarios/{self.usuario.id}/", {"first_name": "Administradora"}, 200),
+            ("post", "/api/categorias/", {"nombre": "Categoría nueva"}, 201),
+            ("put", f"/api/categorias/{ids['categoria'][0]}/", {"nombre": "Categoría editada"}, 200),
+            ("patch", f"/api/categorias/{ids['categoria'][1]}/", {"descripcion": "Corregida"}, 200),
+            ("post", "/api/proveedores/", {
+                "nombre": "Proveedor nuevo", "rut": generar_rut_valido(), "direccion": "Calle 4",
+                "comuna": ids["comuna"][0], "telefono": "+56912345678",
+            }, 201),
+            ("patch", f"/api/proveedores/{ids['proveedor'][0]}/", {"nombre": "Proveedor corregido"}, 200),
+            ("post", "/api/lotes/", {
+                "codigo": "LOTE-NUEVO", "proveedor": ids["proveedor"][0], "categoria": ids["categoria"][0],
+            }, 201),
+            ("patch", f"/api/lotes/{ids['lote'][0]}/", {"observaciones": "Revisado"}, 200),
+            ("post", "/api/productos/", {
+                "nombre": "Producto nuevo", "precio": 1500, "stock": 5, "codigo_barra": "7999999999999",
+                "lote": ids["lote"][0],
+            }, 201),
+            ("patch", f"/api/productos/{ids['producto'][1]}/", {"precio": 1999}, 200),
+            ("delete", f"/api/productos/{self.producto_suelto.id}/", None, 204),
+            ("post", "/api/alertas/", {"producto": ids["producto"][5]}, 201),
+            ("patch", f"/api/alertas/{ids['alerta'][1]}/", {"estado": "archivada"}, 200),
+            ("post", "/api/ordenes/", {
+                "proveedor": ids["proveedor"][1], "producto": ids["producto"][1], "cantidad_ordenada": 5,
+            }, 201),
+            ("put", f"/api/ordenes/{ids['orden'][1]}/", {
+                "proveedor": ids["proveedor"][1], "producto": ids["producto"][1], "cantidad_ordenada": 8,
+            }, 200),
+            ("delete", f"/api/ordenes/{ids['orden'][ultimo]}/", None, 204),
+            ("put", f"/api/ordenes-items/{ids['item_orden'][0]}/", {
+                "producto": ids["producto"][0], "alerta": ids["alerta"][0], "cantidad_ordenada": 3,
+            }, 200),
+            ("delete", f"/api/ordenes-items/{ids['item_orden'][1]}/", None, 204),
+            ("post", "/api/entradas/", {
+                "producto": ids["producto"][2], "cantidad": 5, "precio_unitario": 900, "proveedor": ids["proveedor"][2],
+            }, 201),
+            ("post", "/api/entradas/bulk/", {"items": [
+                {"producto": ids["producto"][3], "cantidad": 5}, {"producto": ids["producto"][4], "cantidad": 5},
+            ]}, 201),
+            ("post", "/api/salidas/", {
+                "producto": ids["producto"][49], "cantidad": 1, "motivo": "consumo", "responsable": ids["usuario"][0],
+            }, 201),
+            ("post", "/api/salidas/bulk/", {"items": [
+                {"producto": ids["producto"][48], "cantidad": 1, "motivo": "consumo"},
+                {"producto": ids["producto"][47], "cantidad": 1, "motivo": "merma"},
+            ]}, 201),
+            ("post", "/api/cotizaciones/", {"orden": ids["orden"][2], "monto": 7000}, 201),
+            ("post", "/api/historial-precios/", {
+                "producto": ids["producto"][2], "proveedor": ids["proveedor"][2], "precio": 1200,
+            }, 201),
+            ("post", "/api/kits/", {"nombre": "Kit nuevo"}, 201),
+            ("patch", f"/api/kits/{ids['kit'][0]}/", {"descripcion": "Revisado"}, 200),
+            ("delete", f"/api/kits/{ids['kit'][ultimo]}/", None, 204),
+            ("patch", f"/api/kits-items/{ids['item_kit'][1]}/", {"cantidad": 3}, 200),
+            ("delete", f"/api/kits-items/{ids['item_kit'][2]}/", None, 204),
+            # Auditoría es de solo lectura: la escritura se rechaza sin consultas.
+            ("post", "/api/auditorias/", {"modelo_afectado": "Producto", "id_objeto": 1, "accion": "crear", "descripcion": "x"}, 400),
+            ("post", f"/api/notificaciones/{self.notificacion_id}/marcar_como_leida/", None, 200),
+            ("post", "/api/inventario-fisico/", {"producto": ids["producto"][6], "stock_real": 4}, 201),
+        ]
+
+    def test_escrituras_dentro_del_presupuesto(self):
+        rutas = set()
+        for metodo, url, datos, estado in self.escrituras():
+            with self.subTest(metodo=metodo, ruta=url):
+                self.consultar(url, datos, metodo=metodo, estado=estado)
+                rutas.add(url.split("/")[2])
+        self.assertEqual(rutas, {prefijo for prefijo, _, _ in router.registry})
+
+    def test_cada_accion_declara_presupuesto(self):
+        for prefijo, viewset, _ in router.registry:
+            acciones = [accion for accion in ACCIONES_CRUD if hasattr(viewset, accion)]
+            acciones += [extra.__name__ for extra in viewset.get_extra_actions()]
+            sin_presupuesto = set(acciones) - set(getattr(viewset, "presupuesto_consultas", {}))
+            self.assertEqual(sin_presupuesto, set(), f"/api/{prefijo}/")
+
+    def test_exceder_el_presupuesto_falla_solo_en_modo_estricto(self):
+        with mock.patch.object(PaisViewSet, "presupuesto_consultas", {"list": 1}):
+            with self.assertRaises(PresupuestoConsultasExcedido):
+                self.client.get("/api/paises/")
+            with override_settings(PRESUPUESTO_CONSULTAS_ESTRICTO=False), \
+                    self.assertLogs("maestranza_backend.utils.medicion", "WARNING"):
+                self.assertEqual(self.client.get("/api/paises/").status_code, 200)
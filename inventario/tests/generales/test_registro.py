@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+import tempfile
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from maestranza_backend.utils.logger import ColaHandler, LoggingMixin
+from maestranza_backend.utils.middleware import RequestIDMiddleware
+
+
+class RegistroTests(SimpleTestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.archivo = os.path.join(directorio.name, "prueba.log")
+        self.logger = logging.getLogger("prueba_registro")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+    def agregar_handler(self, **opciones):
+        handler = ColaHandler(self.archivo, **opciones)
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        self.addCleanup(handler.close)
+        return handler
+
+    def leer(self, archivo=None):
+        with open(archivo or self.archivo, encoding="utf-8") as f:
+            return [json.loads(linea) for linea in f]
+
+    def test_lineas_json_con_el_request_id_de_la_peticion(self):
+        handler = self.agregar_handler()
+
+        def vista(request):
+            self.logger.info("✅ %s entradas generadas por orden #%s.", 2, 15, extra={"datos": {"orden": 15}})
+            try:
+                raise ValueError("sin stock")
+            except ValueError:
+                self.logger.exception("Error al generar entrada")
+            return HttpResponse()
+
+        respuesta = RequestIDMiddleware(vista)(RequestFactory().get("/api/ordenes/"))
+        self.logger.info("fuera de la petición")
+        handler.close()
+
+        info, error, fuera = self.leer()
+        self.assertEqual(info["mensaje"], "✅ 2 entradas generadas por orden #15.")
+        self.assertEqual(info["nivel"], "INFO")
+        self.assertEqual(info["datos"], {"orden": 15})
+        self.assertEqual(info["request_id"], respuesta["X-Request-ID"])
+        self.assertEqual(error["request_id"], respuesta["X-Request-ID"])
+        self.assertIn("ValueError: sin stock", error["excepcion"])
+        self.assertIsNone(fuera["request_id"])
+
+    def test_rotacion_por_tamano(self):
+        handler = self.agregar_handler(max_bytes=500, copias=2)
+
+        for i in range(30):
+            self.logger.info("registro %s", i)
+        handler.close()
+
+        self.assertTrue(os.path.exists(f"{self.archivo}.1"))
+        self.assertFalse(os.path.exists(f"{self.archivo}.3"))
+        self.assertEqual(self.leer()[-1]["mensaje"], "registro 29")
+
+    def test_log_action_no_arma_el_registro_con_el_nivel_desactivado(self):
+        auditor = LoggingMixin()
+        audit = logging.getLogger("audit")
+        self.addCleanup(audit.setLevel, audit.level)
+        audit.setLevel(logging.WARNING)
+        with mock.patch("maestranza_backend.utils.logger.now") as ahora:
+            auditor.log_action("CREATE", "Producto", 1, None)
+            ahora.assert_not_called()
+
+            with self.assertLogs("audit", "WARNING") as registros:
+                auditor.log_action("DELETE", "Producto", 1, None)
+        ahora.assert_called_once()
+        self.assertEqual(registros.records[0].getMessage(), "Acción crítica: DELETE Producto #1")
+        self.assertEqual(registros.records[0].datos["user"]["username"], "anonymous")
@@ -0,0 +1,980 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from unittest import mock, skipIf
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from inventario.models import (
+    Producto, Proveedor, Categoria, Lote, AlertaStock, OrdenAutomatica, CustomUser, Notificacion, Auditoria,
+    MovimientoStock, SnapshotStock, EntradaInventario, SalidaInventario, InventarioFisico, ConsumoDiario,
+    PlanReposicion
+)
+from inventario.services.stock import StockService, StockInsuficienteError
+from inventario.services.productos import ProductoService
+from inventario.services.inventario import InventarioService
+from inventario.services.alertas import AlertaService
+from inventario.services.ordenes import OrdenService
+from inventario.services.notificaciones import NotificacionService
+from inventario.services.auditoria import AuditoriaService
+from inventario.services.busqueda import BusquedaProductoService
+from inventario.services.conciliacion import ConciliacionService
+from inventario.services.cache_productos import CacheProductoService
+from inventario.services.consumo import ConsumoService
+from inventario.services.importacion import ImportacionProductoService
+from inventario.services.planificacion import PlanificacionService, np
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+
+
+class StockServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre="Ferretería")
+        cls.proveedor = Proveedor.objects.create(
+            nombre="Proveedor Stock",
+            rut="76.123.456-7",
+            direccion="Av. Central 100",
+            telefono="+56911112222",
+            correo="stock@proveedor.cl"
+        )
+        cls.lote = Lote.objects.create(
+            codigo="LT-STK01",
+            proveedor=cls.proveedor,
+            categoria=cls.categoria
+        )
+
+    def setUp(self):
+        self.producto = Producto.objects.create(
+            nombre="Perno M8",
+            lote=self.lote,
+            precio=250,
+            stock=10,
+            stock_minimo=2,
+            codigo_barra="78000001",
+            sku="PERNO-M8"
+        )
+
+    def test_sumar_devuelve_nuevo_stock(self):
+        nuevo = StockService.sumar(self.producto, 5)
+        self.assertEqual(nuevo, 15)
+        self.assertEqual(self.producto.stock, 15)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 15)
+
+    def test_restar_con_stock_suficiente(self):
+        nuevo = StockService.restar(self.producto.id, 10)
+        self.assertEqual(nuevo, 0)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 0)
+
+    def test_restar_sin_stock_no_modifica(self):
+        with self.assertRaises(StockInsuficienteError):
+            StockService.restar(self.producto, 11)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 10)
+
+    def test_restar_recortado_deja_cero(self):
+        nuevo = StockService.restar(self.producto, 25, recortar=True)
+        self.assertEqual(nuevo, 0)
+
+    def test_producto_inexistente(self):
+        with self.assertRaises(Producto.DoesNotExist):
+            StockService.sumar(999999, 1)
+
+    def test_instancia_desactualizada_no_pierde_movimientos(self):
+        copia = Producto.objects.get(id=self.producto.id)
+        StockService.restar(self.producto, 4)
+        StockService.restar(copia, 4)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 2)
+
+    def test_producto_service_actualizar_stock(self):
+        self.assertEqual(ProductoService.actualizar_stock(self.producto, 3, modo="entrada"), 13)
+        self.assertEqual(ProductoService.actualizar_stock(self.producto, 13, modo="salida"), 0)
+        with self.assertRaises(ValueError):
+            ProductoService.actualizar_stock(self.producto, 1, modo="salida")
+
+    def test_inventario_service_salida_insuficiente_no_crea_registro(self):
+        with self.assertRaises(ValueError):
+            InventarioService.registrar_salida(self.producto, 50, None, "consumo")
+        self.assertFalse(self.producto.salidainventario_set.exists())
+
+    def test_cada_movimiento_queda_en_el_libro(self):
+        StockService.sumar(self.producto, 5)
+        StockService.restar(self.producto, 3)
+        with self.assertRaises(StockInsuficienteError):
+            StockService.restar(self.producto, 100)
+        StockService.restar(self.producto, 25, recortar=True, origen="anulacion")
+
+        movimientos = list(MovimientoStock.objects.filter(producto=self.producto).order_by("id").values_list("delta", "origen"))
+        self.assertEqual(movimientos, [(5, "entrada"), (-3, "salida"), (-12, "anulacion")])
+
+    def test_aplicar_deltas_registra_libro_en_un_insert(self):
+        otro = Producto.objects.create(
+            nombre="Tuerca M8", lote=self.lote, precio=80, stock=1, stock_minimo=0,
+            codigo_barra="78000002", sku="TUERCA-M8"
+        )
+        with CaptureQueriesContext(connection) as consultas:
+            nuevos = StockService.aplicar_deltas({self.producto.id: -4, otro.id: -5})
+
+        self.assertEqual(nuevos, {self.producto.id: 6})
+        inserts = [q for q in consultas if q["sql"].startswith('INSERT INTO "inventario_movimientostock"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(list(MovimientoStock.objects.values_list("producto_id", "delta")), [(self.producto.id, -4)])
+
+
+class AlertaServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre="Seguridad")
+        cls.proveedor = Proveedor.objects.create(
+            nombre="Proveedor Alertas",
+            rut="76.123.456-7",
+            direccion="Av. Alerta 200",
+            telefono="+56911112222",
+            correo="alertas@proveedor.cl"
+        )
+        cls.lote = Lote.objects.create(codigo="LT-ALR01", proveedor=cls.proveedor, categoria=cls.categoria)
+
+    def crear_producto(self, sufijo, stock, stock_minimo=5, habilitado=True):
+        return Producto.objects.create(
+            nombre=f"Producto {sufijo}",
+            lote=self.lote,
+            precio=100,
+            stock=stock,
+            stock_minimo=stock_minimo,
+            codigo_barra=f"7900000{sufijo}",
+            sku=f"ALR-{sufijo}",
+            habilitado=habilitado
+        )
+
+    def test_evaluar_todas_crea_solo_alertas_faltantes(self):
+        bajo = self.crear_producto(1, stock=2)
+        limite = self.crear_producto(2, stock=5)
+        con_alerta = self.crear_producto(3, stock=0)
+        self.crear_producto(4, stock=50)
+        self.crear_producto(5, stock=0, habilitado=False)
+        AlertaStock.objects.create(producto=con_alerta, estado="pendiente")
+
+        with self.assertNumQueries(2):
+            nuevas = AlertaService.evaluar_todas()
+
+        self.assertEqual({a.producto_id for a in nuevas}, {bajo.id, limite.id})
+        self.assertEqual(AlertaService.evaluar_todas(), [])
+
+    def test_alerta_cerrada_no_bloquea_nueva(self):
+        producto = self.crear_producto(6, stock=1)
+        AlertaStock.objects.create(producto=producto, estado="archivada")
+
+        nuevas = AlertaService.evaluar_todas()
+
+        self.assertEqual([a.producto_id for a in nuevas], [producto.id])
+        self.assertEqual(nuevas[0].estado, "activa")
+
+    def test_rafaga_de_salidas_encola_una_sola_evaluacion(self):
+        cache.clear()
+        producto = self.crear_producto(7, stock=600, stock_minimo=550)
+
+        with mock.patch("inventario.tasks.evaluar_alerta_producto.apply_async") as encolar:
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(500):
+                    StockService.restar(producto, 1)
+
+        self.assertEqual(encolar.call_count, 1)
+        self.assertEqual(encolar.call_args.kwargs["args"], [producto.id])
+
+        alerta = AlertaService.evaluar_producto(producto.id)
+        self.assertEqual(alerta.producto_id, producto.id)
+
+    def test_entrada_no_encola_evaluacion(self):
+        cache.clear()
+        producto = self.crear_producto(8, stock=0)
+
+        with mock.patch("inventario.tasks.evaluar_alerta_producto.apply_async") as encolar:
+            with self.captureOnCommitCallbacks(execute=True):
+                StockService.sumar(producto, 1)
+
+        encolar.assert_not_called()
+
+
+class OrdenServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre="Repuestos")
+        cls.lotes = []
+        for i in range(3):
+            proveedor = Proveedor.objects.create(
+                nombre=f"Proveedor Orden {i}",
+                rut=generar_rut_valido(),
+                direccion=f"Calle Orden {i}",
+                telefono="+56911112222",
+                correo=f"orden{i}@proveedor.cl"
+            )
+            cls.lotes.append(Lote.objects.create(codigo=f"LT-ORD0{i}", proveedor=proveedor, categoria=cls.categoria))
+        cls.usuario = CustomUser.objects.create_user(
+            username="inventario_orden",
+            password="clave12345",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="inventario_orden@maestranza.cl",
+            role=CustomUser.Roles.INVENTARIO
+        )
+
+    def crear_alertas(self, lote, cantidad, inicio):
+        alertas = []
+        for i in range(inicio, inicio + cantidad):
+            producto = Producto.objects.create(
+                nombre=f"Repuesto {i}",
+                lote=lote,
+                precio=100,
+                stock=2,
+                stock_minimo=5,
+                codigo_barra=f"7700000{i:03d}",
+                sku=f"ORD-{i:03d}"
+            )
+            alertas.append(AlertaStock.objects.create(producto=producto, estado="activa"))
+        return alertas
+
+    def test_una_orden_por_proveedor(self):
+        alertas = self.crear_alertas(self.lotes[0], 3, 0) + self.crear_alertas(self.lotes[1], 2, 10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ordenes = OrdenService.generar_ordenes_por_proveedor()
+
+        self.assertEqual(len(ordenes), 2)
+        por_proveedor = {o.proveedor_id: o for o in ordenes}
+        orden = por_proveedor[self.lotes[0].proveedor_id]
+        self.assertEqual(orden.items.count(), 3)
+        self.assertEqual(orden.cantidad_ordenada, 3 * 8)
+        self.assertIsNone(orden.producto_id)
+
+        for alerta in alertas:
+            alerta.refresh_from_db()
+            self.assertTrue(alerta.usada_para_orden)
+            self.assertEqual(alerta.orden_relacionada.proveedor_id, alerta.producto.lote.proveedor_id)
+
+        self.assertEqual(Notificacion.objects.filter(usuario=self.usuario).count(), 1)
+        self.assertEqual(OrdenService.generar_ordenes_por_proveedor(), [])
+
+    def test_consultas_no_crecen_con_las_alertas(self):
+        self.crear_alertas(self.lotes[0], 2, 20)
+        self.crear_alertas(self.lotes[1], 1, 30)
+        with CaptureQueriesContext(connection) as pocas:
+            OrdenService.generar_ordenes_por_proveedor()
+
+        self.crear_alertas(self.lotes[0], 20, 40)
+        self.crear_alertas(self.lotes[1], 20, 60)
+        with CaptureQueriesContext(connection) as muchas:
+            OrdenService.generar_ordenes_por_proveedor()
+
+        self.assertEqual(len(pocas), len(muchas))
+
+    def test_un_solo_update_de_alertas_para_varios_proveedores(self):
+        alertas = [
+            alerta for i, lote in enumerate(self.lotes) for alerta in self.crear_alertas(lote, 2, 100 + i * 10)
+        ]
+        tabla = AlertaStock._meta.db_table
+        with CaptureQueriesContext(connection) as consultas:
+            ordenes = OrdenService.generar_ordenes_por_proveedor()
+
+        updates = [q["sql"] for q in consultas if q["sql"].startswith(f'UPDATE "{tabla}"')]
+        self.assertEqual(len(updates), 1)
+        por_proveedor = {o.proveedor_id: o.id for o in ordenes}
+        for alerta in alertas:
+            alerta.refresh_from_db()
+            self.assertEqual(alerta.orden_relacionada_id, por_proveedor[alerta.producto.lote.proveedor_id])
+
+    def test_crear_orden_desde_alerta(self):
+        alerta = self.crear_alertas(self.lotes[2], 1, 90)[0]
+
+        orden = OrdenService.crear_orden_desde_alerta(alerta)
+
+        self.assertEqual(orden.alerta_id, alerta.id)
+        self.assertEqual(orden.producto_id, alerta.producto_id)
+        self.assertTrue(alerta.usada_para_orden)
+        self.assertEqual(OrdenAutomatica.objects.filter(alerta=alerta).count(), 1)
+
+
+    def test_entrada_de_orden_completada_siempre_es_lista(self):
+        alerta = self.crear_alertas(self.lotes[2], 1, 95)[0]
+        orden = OrdenService.crear_orden_desde_alerta(alerta)
+        self.assertEqual(OrdenService.generar_entrada_si_orden_confirmada(orden), [])
+
+        orden.estado = "completada"
+        orden.save()
+        entradas = OrdenService.generar_entrada_si_orden_confirmada(orden)
+
+        self.assertEqual([e.producto_id for e in entradas], [alerta.producto_id])
+        self.assertEqual(OrdenService.generar_entrada_si_orden_confirmada(orden), [])
+
+    def test_entradas_de_orden_por_proveedor(self):
+        self.crear_alertas(self.lotes[0], 3, 120)
+        orden = OrdenService.generar_ordenes_por_proveedor()[0]
+        orden.estado = "completada"
+        orden.save()
+
+        entradas = OrdenService.generar_entrada_si_orden_confirmada(orden)
+
+        self.assertEqual(len(entradas), 3)
+
+
+class NotificacionServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f"planta_{i}",
+                rut=f"1000000{i}-{i}",
+                telefono="+56912345678",
+                correo=f"planta_{i}@maestranza.cl",
+                role=CustomUser.Roles.PLANTA
+            )
+            for i in range(5)
+        ])
+
+    def test_crea_en_lotes_con_bulk_create(self):
+        with mock.patch.object(NotificacionService, "TAMANO_LOTE", 2):
+            with self.assertNumQueries(4):
+                creadas = NotificacionService.crear_para_roles("Turno reprogramado", [CustomUser.Roles.PLANTA])
+
+        self.assertEqual(creadas, 5)
+        self.assertEqual(Notificacion.objects.filter(mensaje="Turno reprogramado").count(), 5)
+
+    def test_se_escribe_despues_del_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            NotificacionService.notificar_roles("Corte de energía", [CustomUser.Roles.PLANTA], diferido=False)
+            self.assertFalse(Notificacion.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(Notificacion.objects.count(), 5)
+
+    def test_diferido_encola_tarea(self):
+        with mock.patch("inventario.tasks.tarea_notificar_roles.delay") as encolar:
+            with self.captureOnCommitCallbacks(execute=True):
+                NotificacionService.notificar_roles("Inventario general", [CustomUser.Roles.PLANTA], diferido=True)
+
+        encolar.assert_called_once_with("Inventario general", [CustomUser.Roles.PLANTA])
+        self.assertFalse(Notificacion.objects.exists())
+
+
+class AuditoriaServiceTests(TestCase):
+    def registrar(self, id_objeto):
+        AuditoriaService.registrar(None, "Producto", id_objeto, "crear", f"Producto {id_objeto}")
+
+    @override_settings(AUDITORIA_MODO="sync")
+    def test_sync_escribe_de_inmediato(self):
+        self.registrar(1)
+        self.assertEqual(Auditoria.objects.count(), 1)
+
+    @override_settings(AUDITORIA_MODO="on_commit")
+    def test_on_commit_escribe_un_lote_al_confirmar(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for i in range(3):
+                self.registrar(i)
+        self.assertFalse(Auditoria.objects.exists())
+
+        # Los registros confirmados de una petición se escriben juntos al terminarla.
+        with self.assertNumQueries(1):
+            with AuditoriaService.lote():
+                for callback in callbacks:
+                    callback()
+        self.assertEqual(Auditoria.objects.count(), 3)
+
+    @override_settings(AUDITORIA_MODO="on_commit")
+    def test_on_commit_descarta_bloque_revertido(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.registrar(1)
+            with transaction.atomic():
+                self.registrar(2)
+                transaction.set_rollback(True)
+            self.registrar(3)
+
+        self.assertEqual(sorted(Auditoria.objects.values_list("id_objeto", flat=True)), [1, 3])
+
+    @override_settings(AUDITORIA_MODO="async")
+    def test_async_encola_lote_serializado(self):
+        with mock.patch("inventario.tasks.tarea_registrar_auditoria.delay") as encolar:
+            with AuditoriaService.lote(), self.captureOnCommitCallbacks(execute=True):
+                self.registrar(1)
+                self.registrar(2)
+
+        encolar.assert_called_once()
+        registros = encolar.call_args.args[0]
+        self.assertEqual([r["id_objeto"] for r in registros], [1, 2])
+        self.assertFalse(Auditoria.objects.exists())
+
+        creados = AuditoriaService.registrar_masivo(AuditoriaService.deserializar(registros))
+        self.assertEqual(creados[0].fecha.isoformat(), registros[0]["fecha"])
+
+    @override_settings(AUDITORIA_MODO="async")
+    def test_async_sin_broker_escribe_en_linea(self):
+        with mock.patch("inventario.tasks.tarea_registrar_auditoria.delay", side_effect=OSError("sin broker")):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.registrar(1)
+
+        self.assertEqual(Auditoria.objects.count(), 1)
+
+    def test_archivar_mueve_meses_antiguos_a_gzip(self):
+        fecha = lambda anio, mes: timezone.make_aware(datetime(anio, mes, 15))
+        Auditoria.objects.bulk_create([
+            Auditoria(modelo_afectado="Producto", id_objeto=i, accion="crear", descripcion=f"P{i}", fecha=f)
+            for i, f in enumerate([fecha(2024, 1), fecha(2024, 1), fecha(2024, 2), fecha(2025, 6)])
+        ])
+
+        with tempfile.TemporaryDirectory() as directorio:
+            limite = AuditoriaService.limite_retencion(meses=12, ahora=fecha(2025, 6))
+            archivados = AuditoriaService.archivar(limite, directorio)
+
+            self.assertEqual(archivados, {"2024-01": 2, "2024-02": 1})
+            archivos = sorted(os.listdir(directorio))
+            self.assertEqual(len(archivos), 2)
+            self.assertTrue(archivos[0].startswith("auditoria-2024-01-"))
+            with gzip.open(os.path.join(directorio, archivos[0]), "rt", encoding="utf-8") as f:
+                filas = [json.loads(linea) for linea in f]
+
+        self.assertEqual([f["id_objeto"] for f in filas], [0, 1])
+        self.assertEqual(list(Auditoria.objects.values_list("id_objeto", flat=True)), [3])
+
+
+class LibroStockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Histórico")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Histórico",
+            rut=generar_rut_valido(),
+            direccion="Calle Historia 1",
+            telefono="+56911112222",
+            correo="historico@proveedor.cl"
+        )
+        lote = Lote.objects.create(codigo="LT-HIS01", proveedor=proveedor, categoria=categoria)
+        cls.producto = Producto.objects.create(
+            nombre="Válvula", lote=lote, precio=5000, stock=10, stock_minimo=0,
+            codigo_barra="78100001", sku="VALVULA"
+        )
+        en = LibroStockTests.en
+        MovimientoStock.objects.bulk_create([
+            MovimientoStock(producto=cls.producto, delta=10, origen="inicial", fecha=en(1, 10)),
+            MovimientoStock(producto=cls.producto, delta=-4, origen="salida", fecha=en(2, 10)),
+            MovimientoStock(producto=cls.producto, delta=4, origen="entrada", fecha=en(3, 10)),
+        ])
+
+    @staticmethod
+    def en(dia, hora):
+        return timezone.make_aware(datetime(2025, 3, dia, hora))
+
+    def stock_en(self, dia, hora):
+        return StockService.stock_en_fecha(self.producto, self.en(dia, hora))
+
+    def test_sin_snapshots_descuenta_desde_el_stock_actual(self):
+        self.assertEqual(self.stock_en(2, 12)["stock"], 6)
+        self.assertEqual(self.stock_en(1, 9)["stock"], 0)
+
+    def test_snapshots_acotan_la_reproduccion(self):
+        self.assertEqual(StockService.tomar_snapshots(date(2025, 3, 1)), 1)
+        self.assertEqual(StockService.tomar_snapshots(date(2025, 3, 2)), 1)
+        # Sin movimientos ni producto nuevo no hay nada que guardar.
+        self.assertEqual(StockService.tomar_snapshots(date(2025, 3, 4)), 0)
+        self.assertEqual(
+            list(SnapshotStock.objects.order_by("fecha").values_list("fecha", "stock")),
+            [(date(2025, 3, 1), 10), (date(2025, 3, 2), 6)]
+        )
+
+        antes = self.stock_en(3, 9)
+        despues = self.stock_en(3, 11)
+        self.assertEqual((antes["stock"], antes["snapshot"], antes["movimientos_reproducidos"]), (6, date(2025, 3, 2), 0))
+        self.assertEqual((despues["stock"], despues["movimientos_reproducidos"]), (10, 1))
+        # Antes del primer snapshot se parte de él hacia atrás.
+        self.assertEqual(self.stock_en(1, 9)["stock"], 0)
+
+
+class ConciliacionServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Conciliación")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Conciliación",
+            rut=generar_rut_valido(),
+            direccion="Calle Cuadre 1",
+            telefono="+56911112222",
+            correo="conciliacion@proveedor.cl"
+        )
+        lote = Lote.objects.create(codigo="LT-CON01", proveedor=proveedor, categoria=categoria)
+        crear = lambda sku, stock: Producto.objects.create(
+            nombre=sku, lote=lote, precio=100, stock=stock, stock_minimo=0, codigo_barra=f"79{sku}", sku=sku
+        )
+
+        # Con conteo físico: 10 contados, +5 y -3 después, pero el stock quedó en 20.
+        cls.contado = crear("100001", 10)
+        conteo = InventarioFisico.objects.create(producto=cls.contado, stock_real=10)
+        InventarioFisico.objects.filter(id=conteo.id).update(
+            fecha_conteo=timezone.make_aware(datetime(2025, 1, 1))
+        )
+        EntradaInventario.objects.create(producto=cls.contado, cantidad=5)
+        SalidaInventario.objects.create(producto=cls.contado, cantidad=3, motivo="consumo")
+        Producto.objects.filter(id=cls.contado.id).update(stock=20)
+
+        # Alta registrada en el libro y una salida: cuadra.
+        cls.cuadrado = crear("100002", 5)
+        MovimientoStock.objects.bulk_create([
+            MovimientoStock(producto=cls.cuadrado, delta=7, origen="inicial"),
+            MovimientoStock(producto=cls.cuadrado, delta=-2, origen="salida"),
+        ])
+        SalidaInventario.objects.create(producto=cls.cuadrado, cantidad=2, motivo="consumo")
+
+        # Sin conteo ni alta registrada: se informa pero no se corrige.
+        cls.sin_base = crear("100003", 9)
+
+    def test_una_sola_consulta(self):
+        with self.assertNumQueries(1):
+            filas = list(ConciliacionService.discrepancias())
+
+        por_producto = {f["producto_id"]: f for f in filas}
+        self.assertEqual(set(por_producto), {self.contado.id, self.sin_base.id})
+        self.assertEqual((por_producto[self.contado.id]["esperado"], por_producto[self.contado.id]["diferencia"]), (12, -8))
+        self.assertTrue(por_producto[self.contado.id]["corregible"])
+        self.assertEqual(por_producto[self.sin_base.id]["base"], "sin_base")
+        self.assertFalse(por_producto[self.sin_base.id]["corregible"])
+
+    def test_csv_y_correccion(self):
+        destino = io.StringIO()
+        resumen = ConciliacionService.conciliar(destino, aplicar=True)
+
+        self.assertEqual(resumen, {"discrepancias": 2, "corregibles": 1, "corregidos": 1})
+        filas = list(csv.DictReader(io.StringIO(destino.getvalue())))
+        self.assertEqual([f["sku"] for f in filas], ["100001", "100003"])
+
+        self.contado.refresh_from_db()
+        self.assertEqual(self.contado.stock, 12)
+        self.assertTrue(MovimientoStock.objects.filter(producto=self.contado, delta=-8, origen="conciliacion").exists())
+        self.assertEqual([f["producto_id"] for f in ConciliacionService.discrepancias()], [self.sin_base.id])
+
+
+class ConsumoServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Consumo")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Consumo",
+            rut=generar_rut_valido(),
+            direccion="Calle Consumo 1",
+            telefono="+56911112222",
+            correo="consumo@proveedor.cl"
+        )
+        lote = Lote.objects.create(codigo="LT-CON01", proveedor=proveedor, categoria=categoria)
+        cls.producto = Producto.objects.create(
+            nombre="Guante", lote=lote, precio=1000, stock=100, stock_minimo=0,
+            codigo_barra="78300001", sku="GUANTE"
+        )
+        cls.otro = Producto.objects.create(
+            nombre="Casco", lote=lote, precio=9000, stock=100, stock_minimo=0,
+            codigo_barra="78300002", sku="CASCO"
+        )
+
+    def acumulado(self):
+        return list(
+            ConsumoDiario.objects.order_by("producto_id", "motivo")
+            .values_list("producto_id", "motivo", "cantidad", "salidas")
+        )
+
+    def test_las_salidas_se_acumulan_por_dia_y_motivo(self):
+        InventarioService.registrar_salida(self.producto, 3, None, "consumo")
+        InventarioService.registrar_salida(self.producto, 2, None, "consumo")
+        InventarioService.registrar_salidas_masivas([
+            {"indice": 0, "producto": self.producto.id, "cantidad": 4, "motivo": "merma"},
+            {"indice": 1, "producto": self.otro.id, "cantidad": 1, "motivo": "consumo"},
+        ], usuario=None)
+
+        self.assertEqual(self.acumulado(), [
+            (self.producto.id, "consumo", 5, 2),
+            (self.producto.id, "merma", 4, 1),
+            (self.otro.id, "consumo", 1, 1),
+        ])
+        self.assertEqual(set(ConsumoDiario.objects.values_list("fecha", flat=True)), {timezone.localdate()})
+
+        salida = SalidaInventario.objects.filter(producto=self.producto, motivo="consumo").first()
+        ConsumoService.acumular([salida], signo=-1)
+        salida.delete()
+        incremental = self.acumulado()
+
+        self.assertEqual(ConsumoService.reconstruir(), 3)
+        self.assertEqual(self.acumulado(), incremental)
+
+    def test_estadisticas_en_una_consulta(self):
+        hoy = date(2025, 3, 10)
+        ConsumoDiario.objects.bulk_create([
+            ConsumoDiario(producto=self.producto, fecha=hoy - timedelta(days=d), motivo="consumo", cantidad=c, salidas=1)
+            for d, c in [(0, 4), (1, 2), (2, 6), (9, 8)]
+        ] + [
+            ConsumoDiario(producto=self.producto, fecha=hoy, motivo="merma", cantidad=10, salidas=1),
+            # Fuera de la ventana de 10 días.
+            ConsumoDiario(producto=self.producto, fecha=hoy - timedelta(days=10), motivo="consumo", cantidad=99, salidas=1),
+        ])
+
+        with self.assertNumQueries(1):
+            resultado = ConsumoService.estadisticas(
+                [self.producto.id, self.otro.id], dias=10, ventanas=(3, 10), percentiles=(50, 90),
+                motivos=["consumo"], hasta=hoy
+            )
+
+        estadisticas = resultado[self.producto.id]
+        self.assertEqual(estadisticas["total"], 20)
+        self.assertEqual(estadisticas["promedio"], 2.0)
+        self.assertEqual(estadisticas["maximo"], 8)
+        self.assertEqual(estadisticas["medias_moviles"], {"3": 4.0, "10": 2.0})
+        # Serie ordenada: 0 x6, 2, 4, 6, 8.
+        self.assertEqual(estadisticas["percentiles"], {"p50": 0.0, "p90": 6.2})
+        self.assertEqual(resultado[self.otro.id]["total"], 0)
+
+        todos = ConsumoService.estadisticas(dias=10, hasta=hoy)
+        self.assertEqual(list(todos), [self.producto.id])
+        self.assertEqual(todos[self.producto.id]["total"], 30)
+
+    def test_consumo_promedio_usa_el_acumulado(self):
+        ConsumoDiario.objects.create(producto=self.producto, fecha=timezone.localdate(), motivo="consumo", cantidad=15)
+
+        self.assertEqual(ProductoService.calcular_consumo_promedio(self.producto.id, dias=30), 0.5)
+        self.assertEqual(ProductoService.calcular_consumo_promedio(0), 0)
+
+
+class PlanificacionServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Planificación")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Planificación",
+            rut=generar_rut_valido(),
+            direccion="Calle Plan 1",
+            telefono="+56911112222",
+            correo="planificacion@proveedor.cl",
+            dias_entrega=4
+        )
+        lento = Proveedor.objects.create(
+            nombre="Proveedor Sin Plazo",
+            rut=generar_rut_valido(),
+            direccion="Calle Plan 2",
+            telefono="+56911113333",
+            correo="sinplazo@proveedor.cl"
+        )
+        cls.producto = Producto.objects.create(
+            nombre="Filtro", lote=Lote.objects.create(codigo="LT-PLA01", proveedor=proveedor, categoria=categoria),
+            precio=1000, stock=5, stock_minimo=3, codigo_barra="78400001", sku="FILTRO"
+        )
+        cls.sin_consumo = Producto.objects.create(
+            nombre="Junta", lote=Lote.objects.create(codigo="LT-PLA02", proveedor=lento, categoria=categoria),
+            precio=500, stock=1, stock_minimo=3, codigo_barra="78400002", sku="JUNTA"
+        )
+        cls.hoy = date(2025, 3, 10)
+        # 10 días de historia: 5 unidades en 4 días (d = 2, σ = √6); las devoluciones no son demanda.
+        ConsumoDiario.objects.bulk_create([
+            ConsumoDiario(producto=cls.producto, fecha=cls.hoy - timedelta(days=d), motivo="consumo", cantidad=5)
+            for d in (0, 2, 4, 6)
+        ] + [ConsumoDiario(producto=cls.producto, fecha=cls.hoy, motivo="devolucion", cantidad=50)])
+
+    def planificar(self, **parametros):
+        return PlanificacionService.planificar(hasta=self.hoy, dias_historia=10, dias_entrega=6, **parametros)
+
+    def test_plan_de_reposicion(self):
+        self.assertEqual(self.planificar(usar_numpy=False), 2)
+
+        plan = PlanReposicion.objects.get(producto=self.producto)
+        self.assertEqual((plan.demanda_diaria, plan.desviacion, plan.dias_entrega), (2.0, 2.4495, 4))
+        # Demanda en el plazo 8 + seguridad ⌈1,645·√6·√4⌉ = 9.
+        self.assertEqual((plan.stock_seguridad, plan.punto_reorden), (9, 17))
+        # Lote económico: √(2·730·20000 / 250).
+        self.assertEqual(plan.cantidad_pedido, 342)
+
+        vacio = PlanReposicion.objects.get(producto=self.sin_consumo)
+        self.assertEqual((vacio.dias_entrega, vacio.punto_reorden, vacio.cantidad_pedido), (6, 0, 0))
+
+    @skipIf(np is None, "NumPy no está instalado")
+    def test_numpy_y_python_coinciden(self):
+        parametros = PlanificacionService.parametros(dias_historia=10)
+        productos, consumo = PlanificacionService.cargar(parametros, self.hoy)
+
+        self.assertEqual(
+            PlanificacionService.calcular(productos, consumo, parametros, usar_numpy=True),
+            PlanificacionService.calcular(productos, consumo, parametros, usar_numpy=False),
+        )
+
+    def test_las_ordenes_usan_el_plan(self):
+        self.planificar()
+        alertas = [
+            AlertaStock.objects.create(producto=self.producto, estado="activa"),
+            AlertaStock.objects.create(producto=self.sin_consumo, estado="activa"),
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrdenService.generar_ordenes_por_proveedor()
+
+        cantidades = {
+            alerta.producto_id: alerta.producto.ordenautomaticaitem_set.get().cantidad_ordenada
+            for alerta in alertas
+        }
+        # Sin consumo se mantiene la regla anterior: el doble del mínimo menos el stock.
+        self.assertEqual(cantidades, {self.producto.id: 342, self.sin_consumo.id: 5})
+        self.assertEqual(OrdenService.cantidad_sugerida(0, 3, punto_reorden=400, cantidad_pedido=342), 400)
+
+
+class CacheProductoServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Caché")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Caché",
+            rut=generar_rut_valido(),
+            direccion="Calle Caché 1",
+            telefono="+56911112222",
+            correo="cache@proveedor.cl"
+        )
+        cls.lote = Lote.objects.create(codigo="LT-CAC01", proveedor=proveedor, categoria=categoria)
+        cls.producto = Producto.objects.create(
+            nombre="Llave", lote=cls.lote, precio=2500, stock=10, stock_minimo=0,
+            codigo_barra="78500001", sku="LLAVE"
+        )
+
+    def test_lecturas_repetidas_no_consultan_la_base(self):
+        CacheProductoService.reiniciar_estadisticas()
+        self.assertEqual(CacheProductoService.obtener(self.producto.id)["proveedor_nombre"], "Proveedor Caché")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(CacheProductoService.obtener(self.producto.id)["stock"], 10)
+            self.assertEqual(CacheProductoService.buscar("LLAVE")["id"], self.producto.id)
+            self.assertEqual(CacheProductoService.buscar("78500001")["id"], self.producto.id)
+        self.assertIsNone(CacheProductoService.buscar("NO-EXISTE"))
+
+        self.assertEqual(
+            {k: v for k, v in CacheProductoService.estadisticas().items() if k != "backend"},
+            {"aciertos": 3, "fallos": 2, "tasa_aciertos": 0.6}
+        )
+
+    def test_los_movimientos_de_stock_invalidan(self):
+        CacheProductoService.obtener(self.producto.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockService.sumar(self.producto, 5)
+            # Con la transacción abierta se lee de la base y no se guarda en caché.
+            self.assertEqual(CacheProductoService.obtener(self.producto.id)["stock"], 15)
+            with self.assertNumQueries(1):
+                CacheProductoService.obtener(self.producto.id)
+
+        self.assertEqual(CacheProductoService.obtener(self.producto.id)["stock"], 15)
+        with self.assertNumQueries(0):
+            CacheProductoService.obtener(self.producto.id)
+
+    def test_un_rollback_no_deja_datos_en_cache(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                StockService.restar(self.producto, 4)
+                CacheProductoService.obtener(self.producto.id)
+                raise RuntimeError
+
+        self.assertEqual(CacheProductoService.obtener(self.producto.id)["stock"], 10)
+
+    def test_transaccion_posterior_a_un_rollback_vuelve_a_invalidar_al_confirmar(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                CacheProductoService.invalidar([self.producto.id])
+                transaction.set_rollback(True)
+            with transaction.atomic():
+                CacheProductoService.invalidar([self.producto.id])
+
+        # La invalidación del bloque revertido se descartó; la nueva registró su propio on_commit.
+        self.assertEqual([c.args[0] for c in callbacks], [{self.producto.id}])
+
+    def test_lector_que_guarda_despues_del_commit_no_deja_datos_viejos(self):
+        # Otro proceso lee la versión y la fila antes de que el escritor confirme...
+        _, versiones = CacheProductoService._leer([self.producto.id])
+        fila_vieja = CacheProductoService._cargar(Q(id=self.producto.id), {})[self.producto.id]
+        with self.captureOnCommitCallbacks(execute=True):
+            StockService.sumar(self.producto, 5)
+        # ...y la guarda después del commit.
+        cache.set(CacheProductoService._clave_id(self.producto.id), (versiones[self.producto.id], fila_vieja))
+
+        self.assertEqual(CacheProductoService.obtener(self.producto.id)["stock"], 15)
+
+    def test_cambio_de_sku_no_deja_alias_viejo(self):
+        CacheProductoService.buscar("LLAVE")
+        Producto.objects.filter(id=self.producto.id).update(sku="LLAVE-2")
+        CacheProductoService.invalidar([self.producto.id])
+
+        self.assertIsNone(CacheProductoService.buscar("LLAVE"))
+        self.assertEqual(CacheProductoService.buscar("LLAVE-2")["id"], self.producto.id)
+
+    def test_buscar_varios_resuelve_en_una_consulta(self):
+        # Su código de barras coincide con el SKU de self.producto: debe ganar el SKU.
+        otro = Producto.objects.create(
+            nombre="Llave inglesa", lote=self.lote, precio=3000, stock=4, stock_minimo=0,
+            codigo_barra="LLAVE", sku="LLAVE-INGLESA"
+        )
+        codigos = ["LLAVE", "78500001", "LLAVE-INGLESA", "NO-EXISTE"]
+
+        with self.assertNumQueries(1):
+            resultado = CacheProductoService.buscar_varios(codigos)
+        with self.assertNumQueries(1):
+            # Solo el código inexistente vuelve a la base.
+            self.assertEqual(CacheProductoService.buscar_varios(codigos), resultado)
+
+        self.assertEqual(
+            {codigo: datos["id"] for codigo, datos in resultado.items()},
+            {"LLAVE": self.producto.id, "78500001": self.producto.id, "LLAVE-INGLESA": otro.id}
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(CacheProductoService.buscar_varios(codigos[:3]), resultado)
+
+
+class BusquedaProductoServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Búsqueda")
+        proveedor = Proveedor.objects.create(
+            nombre="Ferretería Austral",
+            rut=generar_rut_valido(),
+            direccion="Calle Búsqueda 1",
+            telefono="+56911112222",
+            correo="busqueda@proveedor.cl"
+        )
+        lote = Lote.objects.create(codigo="LT-BUS01", proveedor=proveedor, categoria=categoria)
+        datos = [
+            ("Martillo de bola", "MAR-001", "78600001"),
+            ("Martillo carpintero", "MAR-002", "78600002"),
+            ("Destornillador plano", "DES-001", "78600003"),
+            ("Llave ajustable", "78600001X", "78600004"),
+        ]
+        cls.productos = [
+            Producto.objects.create(
+                nombre=nombre, lote=lote, precio=1000, stock=5, stock_minimo=1, sku=sku, codigo_barra=codigo
+            )
+            for nombre, sku, codigo in datos
+        ]
+
+    def ids(self, termino):
+        return [producto_id for producto_id, _ in BusquedaProductoService.buscar(termino)]
+
+    def test_tolera_errores_de_tipeo_y_palabras_incompletas(self):
+        martillos = {self.productos[0].id, self.productos[1].id}
+        self.assertEqual(set(self.ids("martilo")), martillos)
+        self.assertEqual(set(self.ids("mart")), martillos)
+        self.assertEqual(self.ids("destornilador"), [self.productos[2].id])
+        self.assertEqual(self.ids("tornado"), [])
+
+    def test_codigos_exactos_antes_que_prefijos(self):
+        self.assertEqual(self.ids("78600001"), [self.productos[0].id, self.productos[3].id])
+        self.assertEqual(self.ids("mar-00"), [self.productos[0].id, self.productos[1].id])
+        self.assertEqual(len(self.ids("LT-BUS")), 4)
+        # El proveedor también se busca, con menos peso que el nombre del producto.
+        self.assertEqual(len(self.ids("ferreteria")), 4)
+
+    def test_codigos_por_subcadena_despues_de_prefijos(self):
+        # Como el SearchFilter original (icontains), los códigos también coinciden por la mitad.
+        self.assertEqual(self.ids("600003"), [self.productos[2].id])
+        self.assertEqual(self.ids("r-00"), [self.productos[0].id, self.productos[1].id])
+        self.assertEqual(len(self.ids("bus01")), 4)
+        self.assertEqual(self.ids("01x"), [self.productos[3].id])
+        self.assertEqual(self.ids("-001")[:2], [self.productos[0].id, self.productos[2].id])
+
+    def test_sin_numpy_da_el_mismo_resultado(self):
+        con_numpy = BusquedaProductoService.buscar("martillo bola")
+        cache.clear()
+        with mock.patch("inventario.services.busqueda.np", None), mock.patch("inventario.services.busqueda._indice", None):
+            self.assertEqual(BusquedaProductoService.buscar("martillo bola"), con_numpy)
+        self.assertEqual(con_numpy[0][0], self.productos[0].id)
+
+    def test_el_indice_se_reconstruye_con_altas_y_ediciones(self):
+        self.assertEqual(self.ids("alicate"), [])
+        nuevo = Producto.objects.create(
+            nombre="Alicate", lote=self.productos[0].lote, precio=1000, stock=5, stock_minimo=1,
+            sku="ALI-001", codigo_barra="78600005"
+        )
+        self.assertEqual(self.ids("alicate"), [nuevo.id])
+
+        Producto.objects.filter(id=nuevo.id).update(nombre="Tenaza")
+        BusquedaProductoService.invalidar()
+        self.assertEqual(self.ids("alicate"), [])
+        self.assertEqual(self.ids("tenaza"), [nuevo.id])
+
+        with self.assertNumQueries(1):
+            # Índice vigente: solo la consulta que lo verifica.
+            BusquedaProductoService.buscar("tenaza")
+
+
+
+class ImportacionProductoServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre="Eléctricos")
+        cls.proveedor = Proveedor.objects.create(
+            nombre="Proveedor Importación",
+            rut="76.123.456-7",
+            direccion="Calle Carga 5",
+            telefono="+56911112222",
+            correo="importacion@proveedor.cl"
+        )
+        cls.lote = Lote.objects.create(codigo="LT-IMP01", proveedor=cls.proveedor, categoria=cls.categoria)
+        cls.existente = Producto.objects.create(
+            nombre="Cable 2mm", descripcion="Rollo", lote=cls.lote, precio=9000, stock=7, stock_minimo=2,
+            codigo_barra="80000001", sku="CABLE-2MM"
+        )
+
+    def importar(self, texto, modo="atomico"):
+        return ImportacionProductoService.importar(io.BytesIO(texto.encode("utf-8")), "catalogo.csv", modo=modo)
+
+    def test_crea_actualiza_y_crea_lotes_en_pocas_consultas(self):
+        texto = (
+            "sku;nombre;precio;stock;codigo_barra;lote_codigo;proveedor_rut;categoria\n"
+            "CABLE-2MM;Cable 2,5mm;9.500;99;80000001;LT-IMP01;;\n"
+            ";Enchufe;1.200;10;80000002;LT-IMP02;76123456-7;eléctricos\n"
+            "INT-01;Interruptor;2500;0;80000003;LT-IMP02;76123456-7;Eléctricos\n"
+        )
+        with CaptureQueriesContext(connection) as consultas:
+            resumen = self.importar(texto)
+
+        self.assertEqual(resumen, {"filas": 3, "creados": 2, "actualizados": 1, "lotes_creados": 1, "errores": []})
+        self.assertLess(len(consultas), 20)
+        self.existente.refresh_from_db()
+        self.assertEqual((self.existente.nombre, self.existente.precio), ("Cable 2,5mm", 9500))
+        # Stock y columnas ausentes de un producto existente no cambian.
+        self.assertEqual((self.existente.stock, self.existente.descripcion), (7, "Rollo"))
+
+        enchufe = Producto.objects.get(codigo_barra="80000002")
+        self.assertEqual((enchufe.sku, enchufe.stock, enchufe.lote.codigo), ("SKU-80000002", 10, "LT-IMP02"))
+        self.assertEqual(list(MovimientoStock.objects.filter(producto=enchufe).values_list("delta", "origen")), [(10, "inicial")])
+        self.assertEqual(Auditoria.objects.filter(modelo_afectado="Producto").count(), 3)
+
+    def test_reporte_de_errores_por_fila(self):
+        texto = (
+            "sku,nombre,precio,stock,codigo_barra,lote_codigo\n"
+            "NUEVO-1,Tornillo,0,5,123,LT-IMP01\n"
+            "NUEVO-2,Tuerca,100,5,80000001,LT-IMP01\n"
+            "NUEVO-3,Perno,100,5,80000009,LT-NO-EXISTE\n"
+            "NUEVO-4,Arandela,100,5,80000010,LT-IMP01\n"
+            "NUEVO-4,Arandela bis,100,5,80000011,LT-IMP01\n"
+        )
+        resumen = self.importar(texto)
+
+        errores = {e["fila"]: e["error"] for e in resumen["errores"]}
+        self.assertEqual(sorted(errores), [2, 3, 4, 6])
+        self.assertEqual(set(errores[2]), {"precio", "codigo_barra"})
+        self.assertIn("CABLE-2MM", errores[3]["codigo_barra"])
+        self.assertEqual(set(errores[4]), {"proveedor_rut", "categoria"})
+        self.assertIn("fila 5", errores[6]["sku"])
+        self.assertEqual(resumen["creados"], 0)
+        self.assertFalse(Producto.objects.filter(sku="NUEVO-4").exists())
+
+        resumen = self.importar(texto, modo="parcial")
+        self.assertEqual(resumen["creados"], 1)
+        self.assertTrue(Producto.objects.filter(sku="NUEVO-4", nombre="Arandela").exists())
+
+    def test_encabezados_desconocidos(self):
+        with self.assertRaises(ValueError):
+            self.importar("sku,nombre,color\nA-1,B,rojo\n")
+        with self.assertRaises(ValueError):
+            ImportacionProductoService.importar(io.BytesIO(b""), "catalogo.txt")
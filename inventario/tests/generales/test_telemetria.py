@@ -0,0 +1,89 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from inventario.models import Categoria, CustomUser, Lote, Producto, Proveedor
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+from maestranza_backend.utils.telemetria import telemetria
+
+
+class TelemetriaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = CustomUser.objects.create_user(
+            username="admin_telemetria",
+            password="clave12345",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="admin_telemetria@maestranza.cl",
+            role="admin"
+        )
+        cls.staff = CustomUser.objects.create_user(
+            username="staff_telemetria",
+            password="clave12345",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="staff_telemetria@maestranza.cl",
+            is_staff=True,
+        )
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Telemetría", rut=generar_rut_valido(), direccion="Calle 1",
+            correo="telemetria@maestranza.cl"
+        )
+        categoria = Categoria.objects.create(nombre="Categoría Telemetría")
+        lote = Lote.objects.create(codigo="L-TEL", proveedor=proveedor, categoria=categoria)
+        cls.producto = Producto.objects.create(
+            nombre="Perno", lote=lote, precio=100, stock=10, stock_minimo=2,
+            codigo_barra="77700001", sku="SKU-TEL-1"
+        )
+
+    def setUp(self):
+        telemetria.reiniciar()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_server_timing_y_request_id(self):
+        respuesta = self.client.get("/api/paises/")
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta["X-Request-ID"])
+        partes = [parte.strip() for parte in respuesta["Server-Timing"].split(",")]
+        self.assertTrue(partes[0].startswith("total;dur="))
+        self.assertRegex(partes[1], r'^db;dur=[\d.]+;desc="\d+ consultas"$')
+        self.assertTrue(partes[2].startswith("serializacion;dur="))
+
+    def test_metricas_en_formato_prometheus(self):
+        self.client.get("/api/paises/")
+        self.client.get(f"/api/productos/{self.producto.id}/")
+        respuesta = self.client.get(f"/api/productos/{self.producto.id}/")
+        self.assertIn('cache;desc="1 aciertos 0 fallos"', respuesta["Server-Timing"])
+
+        self.client.force_login(self.staff)
+        texto = self.client.get("/metrics").content.decode()
+
+        self.assertIn("# TYPE maestranza_peticion_segundos histogram", texto)
+        self.assertIn('maestranza_peticion_segundos_count{vista="PaisViewSet",accion="list"} 1', texto)
+        self.assertIn('maestranza_db_consultas_bucket{vista="PaisViewSet",accion="list",le="+Inf"} 1', texto)
+        self.assertIn('maestranza_peticiones_total{vista="ProductoViewSet",accion="retrieve",codigo="2xx"} 2', texto)
+        self.assertIn('maestranza_cache_aciertos_total{vista="ProductoViewSet",accion="retrieve"} 1', texto)
+        self.assertIn('maestranza_cache_fallos_total{vista="ProductoViewSet",accion="retrieve"} 1', texto)
+
+    @override_settings(METRICAS_TOKEN="secreto", TELEMETRIA_SERVER_TIMING=False)
+    def test_metricas_con_token_y_sin_server_timing(self):
+        self.assertFalse(self.client.get("/api/paises/").has_header("Server-Timing"))
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer otro").status_code, 401)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secreto").status_code, 200)
+
+    def test_metricas_exigen_staff_sin_token(self):
+        respuesta = self.client.get("/metrics")
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertEqual(respuesta["WWW-Authenticate"], "Bearer")
+        # La sesión de un usuario que no es staff tampoco basta.
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    @override_settings(METRICAS_PUBLICAS=True)
+    def test_metricas_publicas_solo_si_se_configura(self):
+        self.assertEqual(APIClient().get("/metrics").status_code, 200)
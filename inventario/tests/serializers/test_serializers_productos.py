@@ -0,0 +1,46 @@
+import json
+from django.test import TestCase
+from inventario.models import Producto, Proveedor, Categoria, Lote
+from inventario.serializers import ProductoSerializer, ProductoLecturaSerializer
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+
+
+class ProductoLecturaSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Pintura")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Pintura",
+            rut=generar_rut_valido(),
+            direccion="Calle Brocha 4",
+            telefono="+56911112222",
+            correo="pintura@proveedor.cl"
+        )
+        lote = Lote.objects.create(codigo="LT-PIN01", proveedor=proveedor, categoria=categoria)
+        Producto.objects.create(
+            nombre="Esmalte", descripcion="Galón blanco", lote=lote, precio=15990, stock=3, stock_minimo=5,
+            codigo_barra="78700001", sku="ESM-001"
+        )
+        Producto.objects.create(
+            nombre="Diluyente", lote=lote, precio=4990, stock=40, stock_minimo=5,
+            codigo_barra="78700002", sku="DIL-001", habilitado=False
+        )
+
+    def test_misma_salida_que_producto_serializer(self):
+        productos = Producto.objects.select_related("lote__proveedor", "lote__categoria").order_by("id")
+        esperado = json.dumps(ProductoSerializer(productos, many=True).data)
+
+        filas = Producto.objects.order_by("id").values(*ProductoLecturaSerializer.columnas())
+        self.assertEqual(json.dumps(ProductoLecturaSerializer.representar(filas)), esperado)
+
+    def test_subconjunto_de_campos_sin_joins_innecesarios(self):
+        self.assertEqual(ProductoLecturaSerializer.columnas(["id", "stock"]), ["id", "stock"])
+        self.assertEqual(
+            ProductoLecturaSerializer.columnas(["sku", "is_low_stock"]), ["sku", "stock", "stock_minimo"]
+        )
+
+        filas = Producto.objects.order_by("id").values(*ProductoLecturaSerializer.columnas(["is_low_stock", "sku"]))
+        self.assertEqual(
+            ProductoLecturaSerializer.representar(filas, ["is_low_stock", "sku"]),
+            [{"sku": "ESM-001", "is_low_stock": True}, {"sku": "DIL-001", "is_low_stock": False}]
+        )
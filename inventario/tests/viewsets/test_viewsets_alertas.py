@@ -0,0 +1,57 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from inventario.models import AlertaStock, Categoria, CustomUser, Lote, Producto, Proveedor
+from inventario.services.stock import StockService
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+
+
+class AlertaCondicionalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Alertas", rut=generar_rut_valido(), direccion="Calle 5",
+            correo="alertas@proveedor.cl"
+        )
+        cls.lote = Lote.objects.create(
+            codigo="LT-ALE01", proveedor=proveedor, categoria=Categoria.objects.create(nombre="Fijaciones")
+        )
+        cls.producto = Producto.objects.create(
+            nombre="Tornillo", lote=cls.lote, precio=50, stock=1, stock_minimo=10,
+            codigo_barra="78500001", sku="ALE-1"
+        )
+        cls.alerta = AlertaStock.objects.create(producto=cls.producto, estado="pendiente", usada_para_orden=True)
+        cls.usuario = CustomUser.objects.create_user(
+            username="gestor_alertas", password="clave12345", rut=generar_rut_valido(),
+            telefono="+56912345678", correo="gestor_alertas@test.cl", role=CustomUser.Roles.ADMIN
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_cambio_de_stock_renueva_el_etag_con_producto_expandido(self):
+        detalle = f"/api/alertas/{self.alerta.id}/"
+        etag_detalle = self.client.get(detalle, {"expand": "producto"})["ETag"]
+        etag_listado = self.client.get("/api/alertas/", {"expand": "producto"})["ETag"]
+        self.assertEqual(
+            self.client.get(detalle, {"expand": "producto"}, HTTP_IF_NONE_MATCH=etag_detalle).status_code, 304
+        )
+
+        StockService.sumar(self.producto, 4)
+
+        respuesta = self.client.get(detalle, {"expand": "producto"}, HTTP_IF_NONE_MATCH=etag_detalle)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["producto"]["stock"], 5)
+        respuesta = self.client.get("/api/alertas/", {"expand": "producto"}, HTTP_IF_NONE_MATCH=etag_listado)
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_cambio_de_lote_renueva_el_etag_de_sus_alertas(self):
+        detalle = f"/api/alertas/{self.alerta.id}/"
+        etag = self.client.get(detalle)["ETag"]
+
+        self.client.patch(f"/api/categorias/{self.lote.categoria_id}/", {"nombre": "Pernos"}, format="json")
+
+        respuesta = self.client.get(detalle, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["categoria_nombre"], "Pernos")
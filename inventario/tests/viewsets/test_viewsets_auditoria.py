@@ -0,0 +1,71 @@
+from datetime import timedelta
+import json
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from inventario.models import Auditoria, CustomUser
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+
+
+class AuditoriaViewSetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = CustomUser.objects.create_user(
+            username="admin_auditoria",
+            password="clave12345",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="admin_auditoria@maestranza.cl",
+            role="admin"
+        )
+        ahora = timezone.now()
+        # Varios registros con la misma fecha para ejercitar el desempate por id.
+        Auditoria.objects.bulk_create([
+            Auditoria(
+                usuario=cls.usuario,
+                modelo_afectado="Producto" if i % 2 else "Lote",
+                id_objeto=i,
+                accion="crear",
+                descripcion=f"Registro {i}",
+                fecha=ahora - timedelta(minutes=i // 3)
+            )
+            for i in range(25)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_paginacion_por_cursor_recorre_todo_sin_repetir(self):
+        vistos = []
+        url = "/api/auditorias/?page_size=4"
+        while url:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertNotIn("count", respuesta.data)
+            vistos.extend(r["id"] for r in respuesta.data["results"])
+            url = respuesta.data["next"]
+
+        esperado = list(Auditoria.objects.order_by("-fecha", "-id").values_list("id", flat=True))
+        self.assertEqual(vistos, esperado)
+
+    def test_filtra_por_modelo_y_objeto(self):
+        respuesta = self.client.get("/api/auditorias/", {"modelo": "Producto", "id_objeto": 7})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([r["id_objeto"] for r in respuesta.data["results"]], [7])
+
+    def test_exportacion_ndjson_con_filtros(self):
+        respuesta = self.client.get("/api/auditorias/export/", {"formato": "ndjson", "modelo": "Lote"})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        self.assertTrue(respuesta["Content-Type"].startswith("application/x-ndjson"))
+        filas = [json.loads(linea) for linea in b"".join(respuesta.streaming_content).decode().splitlines()]
+        esperado = Auditoria.objects.filter(modelo_afectado="Lote").order_by("-fecha", "-id")
+        self.assertEqual([f["id"] for f in filas], list(esperado.values_list("id", flat=True)))
+        self.assertEqual(filas[0]["usuario"], self.usuario.id)
+        self.assertEqual(filas[0]["fecha"], timezone.localtime(esperado[0].fecha).isoformat())
+
+    def test_exportacion_formato_invalido(self):
+        self.assertEqual(self.client.get("/api/auditorias/export/", {"formato": "xml"}).status_code, 400)
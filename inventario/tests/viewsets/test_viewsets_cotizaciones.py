@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from inventario.models import (
+    AlertaStock, Categoria, CotizacionProveedor, CustomUser, Lote, OrdenAutomatica, OrdenAutomaticaItem,
+    Producto, Proveedor
+)
+from inventario.serializers import CotizacionProveedorSerializer
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+
+
+class CotizacionCondicionalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Cotizaciones", rut=generar_rut_valido(), direccion="Calle 9",
+            correo="cotizaciones@proveedor.cl"
+        )
+        lote = Lote.objects.create(
+            codigo="LT-COT01", proveedor=proveedor, categoria=Categoria.objects.create(nombre="Aceros")
+        )
+        cls.producto = producto = Producto.objects.create(
+            nombre="Plancha de acero", lote=lote, precio=20000, stock=1, stock_minimo=5,
+            codigo_barra="78400001", sku="ACE-1"
+        )
+        orden = OrdenAutomatica.objects.create(proveedor=proveedor, producto=producto, cantidad_ordenada=10)
+        cls.alerta = AlertaStock.objects.create(producto=producto, estado="pendiente", usada_para_orden=True)
+        cls.cotizacion = CotizacionProveedor.objects.create(orden=orden, monto=150000)
+        cls.usuario = CustomUser.objects.create_user(
+            username="compras_cotizacion", password="clave12345", rut=generar_rut_valido(),
+            telefono="+56912345678", correo="compras_cotizacion@test.cl", role="admin"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_detalle_y_listado_304_sin_serializar(self):
+        detalle = f"/api/cotizaciones/{self.cotizacion.id}/"
+        etag_detalle = self.client.get(detalle)["ETag"]
+        etag_listado = self.client.get("/api/cotizaciones/")["ETag"]
+
+        with mock.patch.object(CotizacionProveedorSerializer, "to_representation") as serializar:
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get(detalle, HTTP_IF_NONE_MATCH=etag_detalle).status_code, 304)
+            with self.assertNumQueries(1):
+                self.assertEqual(
+                    self.client.get("/api/cotizaciones/", HTTP_IF_NONE_MATCH=etag_listado).status_code, 304
+                )
+        serializar.assert_not_called()
+
+        self.cotizacion.monto = 140000
+        self.cotizacion.save()
+        self.assertEqual(self.client.get(detalle, HTTP_IF_NONE_MATCH=etag_detalle).status_code, 200)
+        self.assertEqual(self.client.get("/api/cotizaciones/", HTTP_IF_NONE_MATCH=etag_listado).status_code, 200)
+
+    def test_escrituras_sin_validadores(self):
+        respuesta = self.client.patch(f"/api/cotizaciones/{self.cotizacion.id}/", {"monto": 120000}, format="json")
+
+        self.assertFalse(respuesta.has_header("ETag"))
+
+    def test_cambio_en_la_orden_expandida_renueva_el_etag(self):
+        detalle = f"/api/cotizaciones/{self.cotizacion.id}/"
+        etag = self.client.get(detalle, {"expand": "orden"})["ETag"]
+
+        OrdenAutomaticaItem.objects.create(
+            orden=self.cotizacion.orden, producto=self.producto, alerta=self.alerta, cantidad_ordenada=10
+        )
+
+        respuesta = self.client.get(detalle, {"expand": "orden"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.data["orden"]["items"]), 1)
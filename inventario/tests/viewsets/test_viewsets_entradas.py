@@ -0,0 +1,68 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from inventario.models import (
+    Producto, Proveedor, Categoria, Lote, CustomUser, EntradaInventario, OrdenAutomatica
+)
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+
+
+class EntradaInventarioBulkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre="Repuestos")
+        cls.proveedor = Proveedor.objects.create(
+            nombre="Proveedor Entradas",
+            rut="76.123.456-7",
+            direccion="Calle Andén 20",
+            telefono="+56911112222",
+            correo="entradas@proveedor.cl"
+        )
+        cls.lote = Lote.objects.create(codigo="LT-ENT01", proveedor=cls.proveedor, categoria=cls.categoria)
+        cls.usuario = CustomUser.objects.create_user(
+            username="recepcion",
+            password="recepcion123",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="recepcion@test.cl",
+            role="admin"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.producto = Producto.objects.create(
+            nombre="Rodamiento", lote=self.lote, precio=4000, stock=5, stock_minimo=2,
+            codigo_barra="71000001", sku="RODAM"
+        )
+
+    def test_bulk_crea_entradas_y_suma_stock(self):
+        respuesta = self.client.post("/api/entradas/bulk/", {
+            "items": [
+                {"producto": self.producto.id, "cantidad": 10, "precio_unitario": 4000, "proveedor": self.proveedor.id},
+                {"producto": self.producto.id, "cantidad": 5},
+            ]
+        }, format="json")
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        self.assertEqual(respuesta.data["creados"], 2)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 20)
+        self.assertEqual(EntradaInventario.objects.get(id=respuesta.data["ids"][0]).total, 40000)
+
+    def test_bulk_no_reutiliza_orden(self):
+        orden = OrdenAutomatica.objects.create(
+            producto=self.producto, proveedor=self.proveedor, cantidad_ordenada=5, estado="completada"
+        )
+        respuesta = self.client.post("/api/entradas/bulk/", {
+            "modo": "parcial",
+            "items": [
+                {"producto": self.producto.id, "cantidad": 5, "orden": orden.id},
+                {"producto": self.producto.id, "cantidad": 5, "orden": orden.id},
+            ]
+        }, format="json")
+
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.data["creados"], 1)
+        self.assertEqual(respuesta.data["errores"][0]["indice"], 1)
+        orden.refresh_from_db()
+        self.assertTrue(orden.usada_para_ingreso)
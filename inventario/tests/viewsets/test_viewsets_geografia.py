@@ -0,0 +1,55 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from inventario.models import Pais, Region, Ciudad, Comuna
+
+
+class GeografiaArbolTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        chile = Pais.objects.create(nombre="Chile")
+        cls.region = Region.objects.create(nombre="Valparaíso", pais=chile)
+        cls.ciudad = Ciudad.objects.create(nombre="Valparaíso", region=cls.region)
+        Comuna.objects.create(nombre="Viña del Mar", ciudad=cls.ciudad)
+        Comuna.objects.create(nombre="Concón", ciudad=cls.ciudad)
+        Region.objects.create(nombre="Atacama", pais=chile)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_arbol_completo_ordenado_por_nombre(self):
+        respuesta = self.client.get("/api/geografia/arbol/")
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta["Content-Type"], "application/json")
+        self.assertIn("max-age=", respuesta["Cache-Control"])
+        chile, = respuesta.json()["paises"]
+        self.assertEqual([r["nombre"] for r in chile["regiones"]], ["Atacama", "Valparaíso"])
+        self.assertEqual(chile["regiones"][0]["ciudades"], [])
+        comunas = chile["regiones"][1]["ciudades"][0]["comunas"]
+        self.assertEqual([c["nombre"] for c in comunas], ["Concón", "Viña del Mar"])
+
+    def test_etag_304_y_sin_consultas_con_el_arbol_cargado(self):
+        etag = self.client.get("/api/geografia/arbol/")["ETag"]
+
+        with self.assertNumQueries(0):
+            respuesta = self.client.get("/api/geografia/arbol/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta["ETag"], etag)
+        self.assertEqual(respuesta.content, b"")
+
+    def test_cambios_en_la_geografia_renuevan_el_arbol(self):
+        etag = self.client.get("/api/geografia/arbol/")["ETag"]
+
+        Comuna.objects.create(nombre="Quilpué", ciudad=self.ciudad)
+        respuesta = self.client.get("/api/geografia/arbol/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta["ETag"], etag)
+        self.assertIn("Quilpué", respuesta.content.decode())
+
+        etag = respuesta["ETag"]
+        self.region.delete()
+        respuesta = self.client.get("/api/geografia/arbol/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([r["nombre"] for r in respuesta.json()["paises"][0]["regiones"]], ["Atacama"])
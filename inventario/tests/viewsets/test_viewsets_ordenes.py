@@ -0,0 +1,72 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from inventario.models import (
+    AlertaStock, Categoria, CustomUser, Lote, OrdenAutomatica, OrdenAutomaticaItem, Producto, Proveedor
+)
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+
+
+class OrdenCondicionalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = Proveedor.objects.create(
+            nombre="Proveedor Órdenes", rut=generar_rut_valido(), direccion="Calle 6",
+            correo="ordenes@proveedor.cl"
+        )
+        lote = Lote.objects.create(
+            codigo="LT-ORD01", proveedor=cls.proveedor, categoria=Categoria.objects.create(nombre="Válvulas")
+        )
+        cls.productos = [
+            Producto.objects.create(
+                nombre=f"Válvula {i}", lote=lote, precio=3000, stock=0, stock_minimo=4,
+                codigo_barra=f"7860000{i}", sku=f"ORD-{i}"
+            )
+            for i in range(2)
+        ]
+        cls.alertas = [
+            AlertaStock.objects.create(producto=producto, estado="pendiente", usada_para_orden=True)
+            for producto in cls.productos
+        ]
+        cls.orden = OrdenAutomatica.objects.create(proveedor=cls.proveedor, cantidad_ordenada=4)
+        OrdenAutomaticaItem.objects.create(
+            orden=cls.orden, producto=cls.productos[0], alerta=cls.alertas[0], cantidad_ordenada=4
+        )
+        cls.usuario = CustomUser.objects.create_user(
+            username="compras_ordenes", password="clave12345", rut=generar_rut_valido(),
+            telefono="+56912345678", correo="compras_ordenes@test.cl", role="admin"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_nuevo_item_renueva_el_etag_de_la_orden(self):
+        detalle = f"/api/ordenes/{self.orden.id}/"
+        etag_detalle = self.client.get(detalle)["ETag"]
+        etag_listado = self.client.get("/api/ordenes/")["ETag"]
+        self.assertEqual(self.client.get(detalle, HTTP_IF_NONE_MATCH=etag_detalle).status_code, 304)
+
+        OrdenAutomaticaItem.objects.create(
+            orden=self.orden, producto=self.productos[1], alerta=self.alertas[1], cantidad_ordenada=4
+        )
+
+        respuesta = self.client.get(detalle, HTTP_IF_NONE_MATCH=etag_detalle)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.data["items"]), 2)
+        self.assertEqual(self.client.get("/api/ordenes/", HTTP_IF_NONE_MATCH=etag_listado).status_code, 200)
+
+    def test_cambio_de_producto_o_proveedor_renueva_el_etag_de_la_orden(self):
+        detalle = f"/api/ordenes/{self.orden.id}/"
+        etag = self.client.get(detalle)["ETag"]
+
+        self.client.patch(f"/api/productos/{self.productos[0].id}/", {"nombre": "Válvula de bola"}, format="json")
+        respuesta = self.client.get(detalle, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["items"][0]["producto_nombre"], "Válvula de bola")
+
+        etag = respuesta["ETag"]
+        self.client.patch(f"/api/proveedores/{self.proveedor.id}/", {"nombre": "Válvulas Del Norte"}, format="json")
+        respuesta = self.client.get(detalle, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["proveedor_nombre"], "Válvulas Del Norte")
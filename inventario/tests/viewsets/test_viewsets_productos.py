@@ -0,0 +1,465 @@
+import json
+from datetime import datetime
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from inventario.models import (
+    Producto, Proveedor, Categoria, Lote, CustomUser, MovimientoStock, ConsumoDiario, AlertaStock
+)
+from inventario.serializers import ProductoSerializer
+from inventario.views import ProductoViewSet
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+
+
+class ProductoStockAtTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Válvulas")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Válvulas",
+            rut=generar_rut_valido(),
+            direccion="Calle Válvula 5",
+            telefono="+56911112222",
+            correo="valvulas@proveedor.cl"
+        )
+        cls.lote = Lote.objects.create(codigo="LT-VAL01", proveedor=proveedor, categoria=categoria)
+        cls.usuario = CustomUser.objects.create_user(
+            username="consulta_stock",
+            password="clave12345",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="consulta_stock@test.cl",
+            role="admin"
+        )
+        cls.producto = Producto.objects.create(
+            nombre="Válvula 1/2", lote=cls.lote, precio=3000, stock=7, stock_minimo=0,
+            codigo_barra="78200001", sku="VALV-12"
+        )
+        MovimientoStock.objects.bulk_create([
+            MovimientoStock(producto=cls.producto, delta=10, origen="inicial",
+                            fecha=timezone.make_aware(datetime(2025, 3, 1, 8))),
+            MovimientoStock(producto=cls.producto, delta=-3, origen="salida",
+                            fecha=timezone.make_aware(datetime(2025, 3, 2, 8))),
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_stock_al_cierre_de_un_dia(self):
+        respuesta = self.client.get(f"/api/productos/{self.producto.id}/stock-at/", {"fecha": "2025-03-01"})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["stock"], 10)
+
+    def test_stock_en_fecha_y_hora(self):
+        respuesta = self.client.get(
+            f"/api/productos/{self.producto.id}/stock-at/", {"fecha": "2025-03-02T07:00:00"}
+        )
+
+        self.assertEqual(respuesta.data["stock"], 10)
+
+    def test_fecha_obligatoria_y_valida(self):
+        url = f"/api/productos/{self.producto.id}/stock-at/"
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {"fecha": "ayer"}).status_code, 400)
+
+    def test_crear_y_editar_stock_quedan_en_el_libro(self):
+        respuesta = self.client.post("/api/productos/", {
+            "nombre": "Válvula 3/4", "lote": self.lote.id, "precio": 3500, "stock": 4,
+            "stock_minimo": 1, "codigo_barra": "78200002", "sku": "VALV-34"
+        }, format="json")
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        producto_id = respuesta.data["id"]
+
+        self.client.patch(f"/api/productos/{producto_id}/", {"stock": 9}, format="json")
+
+        self.assertEqual(
+            list(MovimientoStock.objects.filter(producto_id=producto_id).order_by("id").values_list("delta", "origen")),
+            [(4, "inicial"), (5, "ajuste")]
+        )
+
+
+class ProductoConsumoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Protección")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Protección",
+            rut=generar_rut_valido(),
+            direccion="Calle Casco 7",
+            telefono="+56911112222",
+            correo="proteccion@proveedor.cl"
+        )
+        lote = Lote.objects.create(codigo="LT-PRO01", proveedor=proveedor, categoria=categoria)
+        cls.usuario = CustomUser.objects.create_user(
+            username="consulta_consumo",
+            password="clave12345",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="consulta_consumo@test.cl",
+            role="admin"
+        )
+        cls.producto = Producto.objects.create(
+            nombre="Casco", lote=lote, precio=9000, stock=50, stock_minimo=0,
+            codigo_barra="78200101", sku="CASCO-1"
+        )
+        cls.otro = Producto.objects.create(
+            nombre="Antiparra", lote=lote, precio=4000, stock=50, stock_minimo=0,
+            codigo_barra="78200102", sku="ANTI-1"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def registrar_salida(self, cantidad):
+        respuesta = self.client.post("/api/salidas/", {
+            "producto": self.producto.id, "cantidad": cantidad, "motivo": "consumo", "responsable": self.usuario.id
+        }, format="json")
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        return respuesta.data["id"]
+
+    def test_salidas_por_api_actualizan_el_acumulado(self):
+        self.registrar_salida(6)
+        salida_id = self.registrar_salida(4)
+        self.client.delete(f"/api/salidas/{salida_id}/")
+
+        consumo = ConsumoDiario.objects.get(producto=self.producto)
+        self.assertEqual((consumo.cantidad, consumo.salidas), (6, 1))
+
+    def test_estadisticas_de_varios_productos(self):
+        self.registrar_salida(30)
+
+        respuesta = self.client.get("/api/productos/consumo/", {
+            "productos": f"{self.otro.id},{self.producto.id},999999", "dias": 10, "ventanas": "1,10", "percentiles": "100"
+        })
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([e["producto"] for e in respuesta.data], [self.otro.id, self.producto.id])
+        self.assertEqual(respuesta.data[1]["promedio"], 3.0)
+        self.assertEqual(respuesta.data[1]["medias_moviles"], {"1": 30.0, "10": 3.0})
+        self.assertEqual(respuesta.data[1]["percentiles"], {"p100": 30})
+
+    def test_sin_productos_pagina_el_catalogo(self):
+        respuesta = self.client.get("/api/productos/consumo/", {"search": "Casco"})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([e["producto"] for e in respuesta.data["results"]], [self.producto.id])
+
+    def test_parametros_invalidos(self):
+        url = "/api/productos/consumo/"
+        self.assertEqual(self.client.get(url, {"dias": "0"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"dias": "7", "ventanas": "30"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"motivo": "venta"}).status_code, 400)
+
+
+class ProductoCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Herramientas")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Herramientas",
+            rut=generar_rut_valido(),
+            direccion="Calle Martillo 3",
+            telefono="+56911112222",
+            correo="herramientas@proveedor.cl"
+        )
+        lote = Lote.objects.create(codigo="LT-HER01", proveedor=proveedor, categoria=categoria)
+        cls.usuario = CustomUser.objects.create_user(
+            username="admin_cache",
+            password="clave12345",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="admin_cache@test.cl",
+            role="admin"
+        )
+        cls.productos = [
+            Producto.objects.create(
+                nombre=f"Martillo {i}", lote=lote, precio=5000 + i, stock=20, stock_minimo=2,
+                codigo_barra=f"7820020{i}", sku=f"MART-{i}"
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_detalle_y_listado_iguales_al_serializer(self):
+        producto = Producto.objects.select_related("lote__proveedor", "lote__categoria").get(id=self.productos[0].id)
+        esperado = ProductoSerializer(producto).data
+
+        self.assertEqual(self.client.get(f"/api/productos/{producto.id}/").json(), json.loads(json.dumps(esperado)))
+        listado = self.client.get("/api/productos/", {"ordering": "-precio"}).json()
+        self.assertEqual([p["id"] for p in listado["results"]], [p.id for p in reversed(self.productos)])
+        self.assertEqual(listado["results"][-1], json.loads(json.dumps(esperado)))
+        self.assertEqual(self.client.get("/api/productos/0/").status_code, 404)
+
+    def test_importacion_invalida_cache_y_busqueda(self):
+        producto = self.productos[0]
+        self.client.get(f"/api/productos/{producto.id}/")
+        self.client.get("/api/productos/", {"search": "martillo"})
+        archivo = SimpleUploadedFile(
+            "catalogo.csv",
+            b"sku,nombre,precio,stock,codigo_barra,lote_codigo\n"
+            b"MART-0,Martillo carpintero,7000,0,78200200,LT-HER01\n"
+            b"LLAVE-1,Llave inglesa,4000,3,78200299,LT-HER01\n",
+        )
+
+        respuesta = self.client.post("/api/productos/importar/", {"archivo": archivo}, format="multipart")
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        self.assertEqual((respuesta.data["creados"], respuesta.data["actualizados"]), (1, 1))
+        self.assertEqual(self.client.get(f"/api/productos/{producto.id}/").data["precio"], 7000)
+        encontrados = self.client.get("/api/productos/", {"search": "carpintero"}).data["results"]
+        self.assertEqual([p["sku"] for p in encontrados], ["MART-0"])
+        self.assertEqual(self.client.get("/api/productos/", {"search": "llave"}).data["results"][0]["sku"], "LLAVE-1")
+
+        archivo = SimpleUploadedFile("catalogo.csv", b"sku,nombre\nLLAVE-1,\n")
+        respuesta = self.client.post("/api/productos/importar/", {"archivo": archivo}, format="multipart")
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data["errores"], [{"fila": 2, "sku": "LLAVE-1", "error": {"nombre": "No puede quedar vacío."}}])
+
+    def test_salida_por_api_invalida_el_detalle(self):
+        producto = self.productos[1]
+        self.client.get(f"/api/productos/{producto.id}/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post("/api/salidas/", {
+                "producto": producto.id, "cantidad": 8, "motivo": "consumo", "responsable": self.usuario.id
+            }, format="json")
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        self.assertEqual(respuesta.data["producto_nombre"], "Martillo 1")
+
+        self.assertEqual(self.client.get(f"/api/productos/{producto.id}/").data["stock"], 12)
+        self.assertEqual(
+            self.client.post("/api/salidas/", {
+                "producto": producto.id, "cantidad": 13, "motivo": "consumo", "responsable": self.usuario.id
+            }, format="json").status_code,
+            400
+        )
+
+    def test_estadisticas_de_cache(self):
+        self.client.get(f"/api/productos/{self.productos[2].id}/")
+        self.client.get(f"/api/productos/{self.productos[2].id}/")
+
+        respuesta = self.client.get("/api/productos/cache-stats/")
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertGreaterEqual(respuesta.data["aciertos"], 1)
+        self.assertIn("tasa_aciertos", respuesta.data)
+
+    def test_escaneo_por_codigo_de_barras_y_sku(self):
+        producto = self.productos[0]
+
+        respuesta = self.client.get(f"/api/productos/scan/{producto.codigo_barra}/")
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["id"], producto.id)
+        self.assertEqual(set(respuesta.data), set(ProductoViewSet.campos_escaneo))
+        self.assertEqual(respuesta.data["lote_codigo"], "LT-HER01")
+
+        # El primer escaneo deja el alias; la representación se guarda al leerla por id
+        # (con la versión leída antes de consultar), y desde ahí no hay consultas.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(f"/api/productos/scan/{producto.sku}/").data["id"], producto.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(f"/api/productos/scan/{producto.sku}/").data["id"], producto.id)
+        self.assertEqual(self.client.get("/api/productos/scan/NO-EXISTE/").status_code, 404)
+
+    def test_escaneo_en_lote(self):
+        codigos = [p.codigo_barra for p in self.productos] + ["MART-0", "NO-EXISTE"]
+
+        respuesta = self.client.post("/api/productos/scan/", {"codigos": codigos}, format="json")
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(list(respuesta.data["encontrados"]), codigos[:4])
+        self.assertEqual(respuesta.data["encontrados"]["MART-0"]["id"], self.productos[0].id)
+        self.assertEqual(respuesta.data["no_encontrados"], ["NO-EXISTE"])
+        self.assertEqual(
+            self.client.post("/api/productos/scan/", {"codigos": ["X"] * 501}, format="json").status_code, 400
+        )
+
+
+class ProductoBusquedaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Soldadura")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Soldadura",
+            rut=generar_rut_valido(),
+            direccion="Calle Arco 9",
+            telefono="+56911112222",
+            correo="soldadura@proveedor.cl"
+        )
+        lote = Lote.objects.create(codigo="LT-SOL01", proveedor=proveedor, categoria=categoria)
+        cls.usuario = CustomUser.objects.create_user(
+            username="admin_busqueda",
+            password="clave12345",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="admin_busqueda@test.cl",
+            role=CustomUser.Roles.ADMIN
+        )
+        cls.electrodo = Producto.objects.create(
+            nombre="Electrodo 6011", lote=lote, precio=900, stock=1, stock_minimo=5,
+            codigo_barra="78300001", sku="ELEC-6011"
+        )
+        cls.careta = Producto.objects.create(
+            nombre="Careta de soldar electrónica", lote=lote, precio=35000, stock=3, stock_minimo=1,
+            codigo_barra="78300002", sku="CAR-001"
+        )
+        AlertaStock.objects.create(producto=cls.electrodo)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_busqueda_por_relevancia(self):
+        # "electrónica" se parece a "electrodo", pero con menos relevancia.
+        respuesta = self.client.get("/api/productos/", {"search": "electrodo"})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([p["id"] for p in respuesta.data["results"]], [self.electrodo.id, self.careta.id])
+
+        # Con error de tipeo, y la coincidencia exacta de SKU primero.
+        respuesta = self.client.get("/api/productos/", {"search": "careta soldr"})
+        self.assertEqual([p["id"] for p in respuesta.data["results"]], [self.careta.id])
+        respuesta = self.client.get("/api/productos/", {"search": "car-001"})
+        self.assertEqual(respuesta.data["results"][0]["id"], self.careta.id)
+
+        # Un ?ordering= explícito manda sobre la relevancia.
+        respuesta = self.client.get("/api/productos/", {"search": "LT-SOL", "ordering": "-precio"})
+        self.assertEqual([p["id"] for p in respuesta.data["results"]], [self.careta.id, self.electrodo.id])
+        self.assertEqual(self.client.get("/api/productos/", {"search": "xyzw"}).data["count"], 0)
+
+    def test_busqueda_en_alertas(self):
+        respuesta = self.client.get("/api/alertas/", {"search": "electrodo 6011"})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([a["producto"] for a in respuesta.data["results"]], [self.electrodo.id])
+        self.assertEqual(self.client.get("/api/alertas/", {"search": "careta"}).data["count"], 0)
+
+
+    def test_listado_con_campos_solicitados(self):
+        with self.assertNumQueries(2):
+            # COUNT de la paginación y la página, sin JOIN a lote.
+            respuesta = self.client.get("/api/productos/", {"fields": "id,stock,is_low_stock", "ordering": "-precio"})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["results"], [
+            {"id": self.careta.id, "stock": 3, "is_low_stock": False},
+            {"id": self.electrodo.id, "stock": 1, "is_low_stock": True},
+        ])
+
+        respuesta = self.client.get("/api/productos/", {"fields": "sku,proveedor_nombre", "search": "electrodo"})
+        self.assertEqual(respuesta.data["results"][0], {"sku": "ELEC-6011", "proveedor_nombre": "Proveedor Soldadura"})
+
+        detalle = self.client.get(f"/api/productos/{self.careta.id}/", {"fields": "nombre,precio"})
+        self.assertEqual(detalle.data, {"nombre": "Careta de soldar electrónica", "precio": 35000})
+        self.assertEqual(self.client.get("/api/productos/", {"fields": "id,clave"}).status_code, 400)
+
+    def test_listado_con_omit_y_expand(self):
+        respuesta = self.client.get("/api/productos/", {"omit": "descripcion,proveedor_nombre", "ordering": "id"})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotIn("descripcion", respuesta.data["results"][0])
+        self.assertNotIn("proveedor_nombre", respuesta.data["results"][0])
+        self.assertIn("lote_codigo", respuesta.data["results"][0])
+
+        respuesta = self.client.get(f"/api/productos/{self.careta.id}/", {"fields": "id,lote", "expand": "lote"})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["lote"]["codigo"], self.careta.lote.codigo)
+
+
+class ProductoCondicionalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Pinturas")
+        cls.proveedor = Proveedor.objects.create(
+            nombre="Proveedor Pinturas",
+            rut=generar_rut_valido(),
+            direccion="Calle Brocha 8",
+            telefono="+56911112222",
+            correo="pinturas@proveedor.cl"
+        )
+        cls.lote = Lote.objects.create(codigo="LT-PIN01", proveedor=cls.proveedor, categoria=categoria)
+        cls.usuario = CustomUser.objects.create_user(
+            username="admin_condicional",
+            password="clave12345",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="admin_condicional@test.cl",
+            role="admin"
+        )
+        cls.producto = Producto.objects.create(
+            nombre="Esmalte blanco", lote=cls.lote, precio=8000, stock=12, stock_minimo=2,
+            codigo_barra="78300001", sku="PIN-1"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_detalle_304_sin_consultas_ni_serializacion(self):
+        url = f"/api/productos/{self.producto.id}/"
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta["Cache-Control"], "private, no-cache")
+        self.assertTrue(respuesta.has_header("Last-Modified"))
+        etag = respuesta["ETag"]
+
+        with self.assertNumQueries(0):
+            respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta["ETag"], etag)
+        self.assertEqual(respuesta.content, b"")
+        self.assertEqual(self.client.get(url, {"fields": "id,precio"}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.client.patch(url, {"precio": 8500}, format="json")
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["precio"], 8500)
+        self.assertNotEqual(respuesta["ETag"], etag)
+
+    def test_listado_304_con_una_consulta(self):
+        respuesta = self.client.get("/api/productos/")
+        etag = respuesta["ETag"]
+        # Una baja no cambia ninguna fecha: el listado solo se revalida por ETag.
+        self.assertFalse(respuesta.has_header("Last-Modified"))
+
+        with self.assertNumQueries(1):
+            respuesta = self.client.get("/api/productos/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(self.client.get("/api/productos/", {"page_size": 5}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        otro = Producto.objects.create(
+            nombre="Esmalte negro", lote=self.lote, precio=8000, stock=5, stock_minimo=2,
+            codigo_barra="78300002", sku="PIN-2"
+        )
+        respuesta = self.client.get("/api/productos/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["count"], 2)
+
+        etag = respuesta["ETag"]
+        ultima = self.client.get(f"/api/productos/{otro.id}/")["Last-Modified"]
+        self.producto.delete()
+        self.assertEqual(self.client.get("/api/productos/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get("/api/productos/", HTTP_IF_MODIFIED_SINCE=ultima).status_code, 200)
+
+    def test_cambio_de_proveedor_renueva_el_etag_de_sus_productos(self):
+        url = f"/api/productos/{self.producto.id}/"
+        etag = self.client.get(url)["ETag"]
+
+        self.client.patch(f"/api/proveedores/{self.proveedor.id}/", {"nombre": "Pinturas Del Sur"}, format="json")
+
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["proveedor_nombre"], "Pinturas Del Sur")
+
+    def test_cambio_de_lote_renueva_el_etag_del_listado(self):
+        etag = self.client.get("/api/productos/")["ETag"]
+
+        barnices = Categoria.objects.create(nombre="Barnices")
+
+        self.client.patch(f"/api/lotes/{self.lote.id}/", {"categoria": barnices.id}, format="json")
+
+        respuesta = self.client.get("/api/productos/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data["results"][0]["categoria_nombre"], "Barnices")
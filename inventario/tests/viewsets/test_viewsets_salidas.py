@@ -0,0 +1,270 @@
+import csv
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from inventario.models import (
+    Producto, Proveedor, Categoria, Lote, CustomUser, SalidaInventario, Auditoria, Kit
+)
+from inventario.services.cache_productos import CacheProductoService
+from maestranza_backend.utils.campos_dinamicos import recortar_relaciones
+from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+
+
+class SalidaInventarioBulkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre="Consumibles")
+        cls.proveedor = Proveedor.objects.create(
+            nombre="Proveedor Salidas",
+            rut="76.123.456-7",
+            direccion="Calle Bodega 10",
+            telefono="+56911112222",
+            correo="salidas@proveedor.cl"
+        )
+        cls.lote = Lote.objects.create(codigo="LT-SAL01", proveedor=cls.proveedor, categoria=cls.categoria)
+        cls.usuario = CustomUser.objects.create_user(
+            username="bodeguero",
+            password="bodega123",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="bodeguero@test.cl",
+            role="admin"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.guante = Producto.objects.create(
+            nombre="Guante", lote=self.lote, precio=500, stock=10, stock_minimo=2,
+            codigo_barra="70000001", sku="GUANTE"
+        )
+        self.casco = Producto.objects.create(
+            nombre="Casco", lote=self.lote, precio=9000, stock=3, stock_minimo=1,
+            codigo_barra="70000002", sku="CASCO"
+        )
+
+    def test_salida_valida_el_stock_de_la_base_y_no_el_de_la_cache(self):
+        CacheProductoService.obtener(self.guante.id)
+        # Un cambio que no pasó por `invalidar`: la caché todavía dice stock 10.
+        Producto.objects.filter(id=self.guante.id).update(stock=2)
+
+        respuesta = self.client.post("/api/salidas/", {
+            "producto": self.guante.id, "cantidad": 5, "motivo": "consumo", "responsable": self.usuario.id,
+        }, format="json")
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn("stock", str(respuesta.data))
+        self.assertFalse(SalidaInventario.objects.exists())
+
+    def test_bulk_atomico_agrega_por_producto(self):
+        respuesta = self.client.post("/api/salidas/bulk/", {
+            "items": [
+                {"producto": self.guante.id, "cantidad": 4, "motivo": "consumo"},
+                {"producto": self.guante.id, "cantidad": 6, "motivo": "merma"},
+                {"producto": self.casco.id, "cantidad": 3, "motivo": "consumo"},
+            ]
+        }, format="json")
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        self.assertEqual(respuesta.data["creados"], 3)
+        self.guante.refresh_from_db()
+        self.casco.refresh_from_db()
+        self.assertEqual(self.guante.stock, 0)
+        self.assertEqual(self.casco.stock, 0)
+        self.assertEqual(Auditoria.objects.filter(modelo_afectado="SalidaInventario").count(), 3)
+
+    def test_bulk_atomico_rechaza_todo_si_falta_stock(self):
+        respuesta = self.client.post("/api/salidas/bulk/", [
+            {"producto": self.guante.id, "cantidad": 8, "motivo": "consumo"},
+            {"producto": self.guante.id, "cantidad": 8, "motivo": "consumo"},
+        ], format="json")
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual([e["indice"] for e in respuesta.data["errores"]], [1])
+        self.guante.refresh_from_db()
+        self.assertEqual(self.guante.stock, 10)
+        self.assertFalse(SalidaInventario.objects.exists())
+
+    def test_bulk_parcial_omite_filas_con_error(self):
+        respuesta = self.client.post("/api/salidas/bulk/", {
+            "modo": "parcial",
+            "items": [
+                {"producto": self.guante.id, "cantidad": 2, "motivo": "consumo"},
+                {"producto": self.casco.id, "cantidad": 99, "motivo": "consumo"},
+                {"producto": 999999, "cantidad": 1, "motivo": "consumo"},
+                {"producto": self.casco.id, "cantidad": 1, "motivo": "no-existe"},
+            ]
+        }, format="json")
+
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.data["creados"], 1)
+        self.assertEqual([e["indice"] for e in respuesta.data["errores"]], [1, 2, 3])
+        self.guante.refresh_from_db()
+        self.casco.refresh_from_db()
+        self.assertEqual(self.guante.stock, 8)
+        self.assertEqual(self.casco.stock, 3)
+
+
+class SalidaInventarioPaginacionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Paginación")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Paginación",
+            rut="76.123.456-7",
+            direccion="Calle Página 1",
+            telefono="+56911112222",
+            correo="paginacion@proveedor.cl"
+        )
+        lote = Lote.objects.create(codigo="LT-PAG01", proveedor=proveedor, categoria=categoria)
+        cls.usuario = CustomUser.objects.create_user(
+            username="paginador",
+            password="pagina123",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="paginador@test.cl",
+            role="admin"
+        )
+        producto = Producto.objects.create(
+            nombre="Tornillo", lote=lote, precio=50, stock=0, stock_minimo=0,
+            codigo_barra="70000099", sku="TORNILLO"
+        )
+        # bulk_create deja la misma fecha en todas: el cursor debe desempatar por id.
+        SalidaInventario.objects.bulk_create([
+            SalidaInventario(producto=producto, cantidad=1, motivo="consumo") for _ in range(11)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_paginacion_por_cursor(self):
+        vistos = []
+        url = "/api/salidas/?paginacion=cursor&page_size=4"
+        while url:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            vistos.extend(s["id"] for s in respuesta.data["results"])
+            url = respuesta.data["next"]
+
+        self.assertEqual(vistos, list(SalidaInventario.objects.order_by("-fecha", "-id").values_list("id", flat=True)))
+
+    def test_sin_conteo(self):
+        respuesta = self.client.get("/api/salidas/", {"count": "no", "page_size": 5, "page": 3})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIsNone(respuesta.data["count"])
+        self.assertEqual(len(respuesta.data["results"]), 1)
+        self.assertIsNone(respuesta.data["next"])
+        self.assertIn("page=2", respuesta.data["previous"])
+
+    def test_conteo_estimado_y_exacto(self):
+        estimado = self.client.get("/api/salidas/", {"count": "estimado", "page_size": 5})
+        exacto = self.client.get("/api/salidas/", {"page_size": 5})
+
+        self.assertIsNotNone(estimado.data["next"])
+        self.assertEqual(exacto.data["count"], 11)
+        # Fuera de PostgreSQL la estimación cae en COUNT(*).
+        self.assertEqual(estimado.data["count"], 11)
+
+
+class SalidaInventarioCamposTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Campos")
+        proveedor = Proveedor.objects.create(
+            nombre="Proveedor Campos",
+            rut="76.123.456-7",
+            direccion="Calle Campo 3",
+            telefono="+56911112222",
+            correo="campos@proveedor.cl"
+        )
+        lote = Lote.objects.create(codigo="LT-CAM01", proveedor=proveedor, categoria=categoria)
+        cls.usuario = CustomUser.objects.create_user(
+            username="campista",
+            password="campos123",
+            rut=generar_rut_valido(),
+            telefono="+56912345678",
+            correo="campista@test.cl",
+            role="admin",
+            first_name="Ana",
+            last_name="Rojas",
+        )
+        cls.producto = Producto.objects.create(
+            nombre="Tuerca", lote=lote, precio=30, stock=0, stock_minimo=0,
+            codigo_barra="70000098", sku="TUERCA"
+        )
+        SalidaInventario.objects.bulk_create([
+            SalidaInventario(producto=cls.producto, cantidad=i, motivo="consumo", responsable=cls.usuario)
+            for i in range(1, 4)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def consultar(self, params):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get("/api/salidas/", params)
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        listado = [c["sql"] for c in consultas.captured_queries if 'FROM "inventario_salidainventario"' in c["sql"]]
+        return respuesta.data["results"], listado[-1]
+
+    def test_fields_sin_joins(self):
+        filas, sql = self.consultar({"fields": "id,cantidad"})
+
+        self.assertEqual([set(f) for f in filas], [{"id", "cantidad"}] * 3)
+        self.assertNotIn("JOIN", sql)
+
+    def test_omit_quita_solo_el_join_que_no_se_usa(self):
+        filas, sql = self.consultar({"omit": "responsable_nombre"})
+
+        self.assertNotIn("responsable_nombre", filas[0])
+        self.assertEqual(filas[0]["producto_nombre"], "Tuerca")
+        self.assertIn("inventario_producto", sql)
+        self.assertNotIn("inventario_customuser", sql)
+
+        filas, sql = self.consultar({"fields": "id,responsable_nombre"})
+        self.assertEqual(filas[0]["responsable_nombre"], "Ana Rojas")
+        self.assertNotIn("inventario_producto", sql)
+
+    def test_expand_sin_consultas_por_fila(self):
+        with self.assertNumQueries(2):
+            respuesta = self.client.get("/api/salidas/", {"fields": "id,producto", "expand": "producto"})
+
+        self.assertEqual(respuesta.status_code, 200)
+        producto = respuesta.data["results"][0]["producto"]
+        self.assertEqual(producto["sku"], "TUERCA")
+        self.assertEqual(producto["proveedor_nombre"], "Proveedor Campos")
+
+    def test_campos_invalidos(self):
+        self.assertEqual(self.client.get("/api/salidas/", {"fields": "id,precio"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/salidas/", {"expand": "cantidad"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/salidas/", {"omit": ","}).status_code, 400)
+
+    def test_exportacion_csv(self):
+        SalidaInventario.objects.create(producto=self.producto, cantidad=9, motivo="merma", responsable=self.usuario)
+
+        respuesta = self.client.get("/api/salidas/export/", {"motivo": "consumo"})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("attachment;", respuesta["Content-Disposition"])
+        filas = list(csv.DictReader(b"".join(respuesta.streaming_content).decode().splitlines()))
+        self.assertEqual([f["cantidad"] for f in filas], ["3", "2", "1"])
+        self.assertEqual(filas[0]["sku"], "TUERCA")
+        self.assertEqual(filas[0]["responsable_nombre"], "Ana Rojas")
+
+        respuesta = self.client.get("/api/salidas/export/", {"fields": "id,cantidad"})
+        encabezado = b"".join(respuesta.streaming_content).decode().splitlines()[0]
+        self.assertEqual(encabezado, "id,cantidad")
+
+    def test_prefetch_recortado(self):
+        queryset = Kit.objects.prefetch_related("items__producto")
+
+        self.assertEqual(recortar_relaciones(queryset, {"items"})._prefetch_related_lookups, ("items",))
+        self.assertEqual(recortar_relaciones(queryset, set())._prefetch_related_lookups, ())
+        self.assertEqual(
+            recortar_relaciones(queryset, {"items", "items__producto"})._prefetch_related_lookups,
+            ("items__producto",),
+        )
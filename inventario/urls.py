@@ -8,7 +8,7 @@ from .views import (
     AlertaStockViewSet, OrdenAutomaticaViewSet, OrdenAutomaticaItemViewSet,
     EntradaInventarioViewSet, SalidaInventarioViewSet, CotizacionProveedorViewSet,
     HistorialPrecioProductoViewSet, KitViewSet, KitItemViewSet, AuditoriaViewSet,
-    NotificacionViewSet, InventarioFisicoViewSet
+    NotificacionViewSet, InventarioFisicoViewSet, GeografiaArbolView
 )
 
 router = DefaultRouter()
@@ -37,6 +37,7 @@ router.register(r'inventario-fisico', InventarioFisicoViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('geografia/arbol/', GeografiaArbolView.as_view(), name='geografia-arbol'),
     # JWT Autenticacion
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -1,12 +1,37 @@
+from datetime import datetime, time
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status,viewsets, permissions, filters, serializers
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from inventario.filters import OrdenAutomaticaFilter
+from rest_framework.views import APIView
+from inventario.filters import (
+    OrdenAutomaticaFilter, AuditoriaFilter, BusquedaProductoFilter,
+    EntradaInventarioFilter, SalidaInventarioFilter, HistorialPrecioProductoFilter
+)
 from inventario.services.auditoria import AuditoriaService
+from inventario.services.busqueda import BusquedaProductoService
+from inventario.services.cache_productos import CacheProductoService
+from inventario.services.consumo import ConsumoService
+from inventario.services.geografia import GeografiaService
+from inventario.services.importacion import ImportacionProductoService
+from inventario.services.inventario import InventarioService
+from inventario.services.stock import StockService, StockInsuficienteError
+from maestranza_backend.utils.campos_dinamicos import CamposDinamicosViewMixin, campos_pedidos
+from maestranza_backend.utils.condicional import RespuestaCondicionalViewMixin
+from maestranza_backend.utils.exportacion import ExportacionViewMixin, nombre_completo
 from maestranza_backend.utils.generar_rut_valido import generar_rut_valido
+from maestranza_backend.utils.pagination import AuditoriaCursorPagination
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework.permissions import IsAuthenticated
 from maestranza_backend.permissions import (
@@ -24,7 +49,9 @@ from .serializers import(
     CategoriaSerializer, ProductoSerializer, LoteSerializer, ProveedorSerializer, AlertaStockSerializer,
     OrdenAutomaticaSerializer, OrdenAutomaticaItemSerializer, EntradaInventarioSerializer,
     SalidaInventarioSerializer, CotizacionProveedorSerializer, HistorialPrecioProductoSerializer,
-    KitSerializer, KitItemSerializer, AuditoriaSerializer, NotificacionSerializer, InventarioFisicoSerializer
+    KitSerializer, KitItemSerializer, AuditoriaSerializer, NotificacionSerializer, InventarioFisicoSerializer,
+    MovimientoMasivoSerializer, EntradaMasivaItemSerializer, SalidaMasivaItemSerializer,
+    EscaneoLoteSerializer, ProductoLecturaSerializer, ImportacionProductosSerializer
 )
 import logging
 logger = logging.getLogger("django.request")
@@ -42,9 +69,13 @@ logger = logging.getLogger("django.request")
     partial_update=extend_schema(summary="Actualizar parcialmente un país"),
     destroy=extend_schema(summary="Eliminar un país"),
 )
-class PaisViewSet(viewsets.ModelViewSet):
+class PaisViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = Pais.objects.all().order_by('nombre')
     serializer_class = PaisSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 3,
+        "update": 4, "partial_update": 3, "destroy": 10,
+    }
 
 @extend_schema_view(
     list=extend_schema(summary="Listar regiones"),
@@ -54,9 +85,13 @@ class PaisViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary="Actualizar parcialmente una región"),
     destroy=extend_schema(summary="Eliminar una región"),
 )
-class RegionViewSet(viewsets.ModelViewSet):
+class RegionViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = Region.objects.select_related('pais').order_by('nombre')
     serializer_class = RegionSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 3,
+        "update": 4, "partial_update": 3, "destroy": 8,
+    }
 
 @extend_schema_view(
     list=extend_schema(summary="Listar ciudades"),
@@ -66,9 +101,13 @@ class RegionViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary="Actualizar parcialmente una ciudad"),
     destroy=extend_schema(summary="Eliminar una ciudad"),
 )
-class CiudadViewSet(viewsets.ModelViewSet):
+class CiudadViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = Ciudad.objects.select_related('region__pais').order_by('nombre')
     serializer_class = CiudadSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 4,
+        "update": 5, "partial_update": 3, "destroy": 6,
+    }
 
 @extend_schema_view(
     list=extend_schema(summary="Listar comunas"),
@@ -78,9 +117,37 @@ class CiudadViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary="Actualizar parcialmente una comuna"),
     destroy=extend_schema(summary="Eliminar una comuna"),
 )
-class ComunaViewSet(viewsets.ModelViewSet):
-    queryset = Comuna.objects.select_related('ciudad__region').order_by('nombre')
+class ComunaViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
+    queryset = Comuna.objects.select_related('ciudad__region__pais').order_by('nombre')
     serializer_class = ComunaSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 5,
+        "update": 6, "partial_update": 3, "destroy": 5,
+    }
+
+class GeografiaArbolView(APIView):
+    """
+    Países, regiones, ciudades y comunas en un solo documento, desde el árbol en
+    memoria de GeografiaService: sin consultas mientras no cambie la geografía.
+    """
+
+    @extend_schema(
+        summary="Árbol de geografía",
+        description=(
+            "Devuelve {\"paises\": [{id, nombre, regiones: [{id, nombre, ciudades: [{id, nombre, "
+            "comunas: [{id, nombre}]}]}]}]} ordenado por nombre, en lugar de recorrer los listados "
+            "paginados. Incluye ETag y Cache-Control: con If-None-Match responde 304 si no cambió. "
+            "Cualquier cambio en países, regiones, ciudades o comunas genera un ETag nuevo."
+        ),
+        responses={200: OpenApiTypes.OBJECT, 304: None},
+        tags=["Geografía"]
+    )
+    def get(self, request):
+        arbol = GeografiaService.arbol()
+        response = HttpResponse(arbol.contenido, content_type="application/json")
+        response["ETag"] = arbol.etag
+        response["Cache-Control"] = f"public, max-age={settings.GEOGRAFIA_MAX_AGE}"
+        return get_conditional_response(request, etag=arbol.etag, response=response)
 
 @extend_schema_view(
     list=extend_schema(summary="Listar cargos"),
@@ -90,9 +157,13 @@ class ComunaViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(summary="Actualizar parcialmente un cargo"),
     destroy=extend_schema(summary="Eliminar un cargo"),
 )
-class CargoViewSet(viewsets.ModelViewSet):
+class CargoViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = Cargo.objects.all().order_by('nombre')
     serializer_class = CargoSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 3,
+        "update": 4, "partial_update": 3, "destroy": 4,
+    }
 
 # --------------------------------------------------------#
 # Creación de los viewsets fundamentales para el proyecto.
@@ -131,9 +202,13 @@ class CargoViewSet(viewsets.ModelViewSet):
         tags=["Usuarios"]
     ),
 )
-class CustomUserViewSet(viewsets.ModelViewSet):
+class CustomUserViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = CustomUser.objects.select_related('comuna__ciudad__region__pais', 'cargo').all()
     serializer_class = CustomUserSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 11,
+        "update": 13, "partial_update": 4, "destroy": 3,
+    }
     permission_classes = [permissions.IsAuthenticated]  # Se puede personalizar por rol
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['role', 'is_active', 'comuna', 'cargo']
@@ -235,9 +310,13 @@ class CustomUserViewSet(viewsets.ModelViewSet):
         tags=["Categorías"]
     ),
 )
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = Categoria.objects.all().order_by('nombre')
     serializer_class = CategoriaSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 3,
+        "update": 6, "partial_update": 5, "destroy": 4,
+    }
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'descripcion']
     ordering_fields = ['nombre', 'id']
@@ -261,6 +340,7 @@ class CategoriaViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         try:
             categoria = serializer.save()
+            CacheProductoService.invalidar_donde(lote__categoria=categoria)
             AuditoriaService.registrar(
                 usuario=self.request.user,
                 modelo="Categoria",
@@ -334,9 +414,13 @@ class CategoriaViewSet(viewsets.ModelViewSet):
         tags=["Proveedores"]
     ),
 )
-class ProveedorViewSet(viewsets.ModelViewSet):
-    queryset = Proveedor.objects.all().order_by('id')
+class ProveedorViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
+    queryset = Proveedor.objects.select_related('comuna').order_by('id')
     serializer_class = ProveedorSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 7,
+        "update": 11, "partial_update": 6, "destroy": 10,
+    }
     lookup_field = "id"
     filterset_fields = ['comuna']
     search_fields = ['nombre', 'rut', 'correo']
@@ -362,6 +446,10 @@ class ProveedorViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         try:
             proveedor = serializer.save()
+            CacheProductoService.invalidar_donde(lote__proveedor=proveedor)
+            # Las órdenes muestran el nombre del proveedor: cambia su ETag.
+            OrdenAutomatica.objects.filter(proveedor=proveedor).update(fecha_actualizacion=timezone.now())
+            BusquedaProductoService.invalidar()
             AuditoriaService.registrar(
                 usuario=self.request.user,
                 modelo="Proveedor",
@@ -440,9 +528,13 @@ class ProveedorViewSet(viewsets.ModelViewSet):
         tags=["Lotes"]
     ),
 )
-class LoteViewSet(viewsets.ModelViewSet):
+class LoteViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = Lote.objects.select_related("proveedor", "categoria").all().order_by("-fecha_fabricacion")
     serializer_class = LoteSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 5,
+        "update": 8, "partial_update": 5, "destroy": 5,
+    }
     lookup_field = "id"
     filterset_fields = ["proveedor", "categoria", "fecha_fabricacion", "fecha_vencimiento"]
     search_fields = ["codigo", "observaciones", "proveedor__nombre", "categoria__nombre"]
@@ -468,6 +560,8 @@ class LoteViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         try:
             lote = serializer.save()
+            CacheProductoService.invalidar_donde(lote=lote)
+            BusquedaProductoService.invalidar()
             AuditoriaService.registrar(
                 usuario=self.request.user,
                 modelo="Lote",
@@ -507,16 +601,38 @@ class LoteViewSet(viewsets.ModelViewSet):
             status=status.HTTP_204_NO_CONTENT
         )
 
+def parametro_enteros(request, nombre, defecto, minimo=1, maximo=None):
+    """Lee un parámetro de query con enteros separados por coma (?dias=30, ?productos=1,2,3)."""
+    valor = request.query_params.get(nombre)
+    if not valor:
+        return list(defecto)
+    try:
+        enteros = [int(parte) for parte in valor.split(",") if parte.strip()]
+    except ValueError:
+        raise ValidationError({nombre: "Debe ser una lista de enteros separados por coma."})
+    if any(e < minimo or (maximo is not None and e > maximo) for e in enteros):
+        rango = f"entre {minimo} y {maximo}" if maximo is not None else f"mayores o iguales a {minimo}"
+        raise ValidationError({nombre: f"Los valores deben estar {rango}."})
+    return enteros
+
 # Creacion del viewset PRODUCTO
 @extend_schema_view(
     list=extend_schema(
         summary="Listar productos",
-        description="Devuelve un listado de todos los productos registrados, incluyendo lote, proveedor, categoría y estado de stock.",
+        description=(
+            "Devuelve un listado de todos los productos registrados, incluyendo lote, proveedor, categoría "
+            "y estado de stock. Con ?fields=id,nombre,stock (u ?omit=descripcion) responde solo esos "
+            "campos, leídos directo de la base con las columnas y JOIN mínimos; ?expand=lote incluye "
+            "el lote completo en vez de su id."
+        ),
         tags=["Productos"]
     ),
     retrieve=extend_schema(
         summary="Obtener detalle de un producto",
-        description="Muestra la información detallada de un producto específico, incluyendo su stock y relaciones.",
+        description=(
+            "Muestra la información detallada de un producto específico, incluyendo su stock y relaciones. "
+            "Acepta ?fields=, ?omit= y ?expand= igual que el listado."
+        ),
         tags=["Productos"]
     ),
     create=extend_schema(
@@ -540,19 +656,90 @@ class LoteViewSet(viewsets.ModelViewSet):
         tags=["Productos"]
     ),
 )
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(RespuestaCondicionalViewMixin, CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = Producto.objects.select_related('lote__proveedor', 'lote__categoria').all()
     serializer_class = ProductoSerializer
+    presupuesto_consultas = {
+        "list": 6, "retrieve": 1, "create": 9, "update": 9, "partial_update": 6, "destroy": 15,
+        "cache_stats": 0, "consumo": 5, "importar": 11, "scan": 2, "scan_codigo": 1, "stock_at": 5,
+    }
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, BusquedaProductoFilter]
     filterset_fields = ['lote', 'habilitado', 'stock']
-    search_fields = ['nombre', 'codigo_barra', 'sku', 'lote__codigo']
+    busqueda_producto = ""
     ordering_fields = ['nombre', 'precio', 'stock', 'fecha_actualizacion']
     ordering = ['id']
+    # Respuesta reducida de los endpoints de escaneo (lectores de código de barras).
+    campos_escaneo = [
+        'id', 'sku', 'codigo_barra', 'nombre', 'precio', 'stock', 'stock_minimo',
+        'is_low_stock', 'habilitado', 'lote_codigo',
+    ]
+
+    def list(self, request, *args, **kwargs):
+        if "expand" in request.query_params:
+            return super().list(request, *args, **kwargs)
+        campos = campos_pedidos(request, ProductoLecturaSerializer.CAMPOS)
+        queryset = self.filter_queryset(self.get_queryset())
+        concretos = {campo.attname for campo in Producto._meta.concrete_fields}
+        orden = {campo.lstrip("-") for campo in queryset.query.order_by if isinstance(campo, str)} & concretos
+
+        if campos is not None:
+            # Proyección con .values(): sin instancias, sin caché y solo con los JOIN que pidan los campos.
+            # El id y las columnas de orden se leen siempre (la paginación por cursor las necesita).
+            filas = queryset.select_related(None).values(
+                *{"id", *orden, *ProductoLecturaSerializer.columnas(campos)}
+            )
+            pagina = self.paginate_queryset(filas)
+            resultado = ProductoLecturaSerializer.representar(filas if pagina is None else pagina, campos)
+            if pagina is None:
+                return Response(resultado)
+            return self.get_paginated_response(resultado)
+
+        # Filtros, orden y paginación se resuelven en la base leyendo solo los ids;
+        # las representaciones salen de CacheProductoService (las mismas de ProductoSerializer).
+        productos = queryset.select_related(None).only("id", *orden)
+        pagina = self.paginate_queryset(productos)
+        ids = [p.id for p in (productos if pagina is None else pagina)]
+        datos = CacheProductoService.obtener_varios(ids)
+        resultado = [datos[i] for i in ids if i in datos]
+        if pagina is None:
+            return Response(resultado)
+        return self.get_paginated_response(resultado)
+
+    def retrieve(self, request, *args, **kwargs):
+        if "expand" in request.query_params:
+            return super().retrieve(request, *args, **kwargs)
+        campos = campos_pedidos(request, ProductoLecturaSerializer.CAMPOS)
+        datos = self.datos_en_cache()
+        if campos is not None:
+            datos = {campo: valor for campo, valor in datos.items() if campo in campos}
+        return Response(datos)
+
+    def datos_en_cache(self):
+        """Representación del producto del detalle desde CacheProductoService (una lectura por petición)."""
+        if not hasattr(self, "_datos_producto"):
+            try:
+                producto_id = int(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+            except (TypeError, ValueError):
+                raise NotFound("Producto no encontrado.")
+            datos = CacheProductoService.obtener(producto_id)
+            if datos is None:
+                raise NotFound("Producto no encontrado.")
+            self._datos_producto = datos
+        return self._datos_producto
+
+    def fechas_actualizacion_objeto(self):
+        # Sin ?expand= el detalle sale de la caché, que ya trae la fecha.
+        if "expand" in self.request.query_params:
+            return super().fechas_actualizacion_objeto()
+        fecha = self.datos_en_cache()["fecha_actualizacion"]
+        return [parse_datetime(fecha) if fecha else None]
 
     def perform_create(self, serializer):
         try:
-            producto = serializer.save()
+            with transaction.atomic():
+                producto = serializer.save()
+                StockService.registrar_ajuste(producto, 0, origen="inicial")
             AuditoriaService.registrar(
                 usuario=self.request.user,
                 modelo="Producto",
@@ -567,7 +754,11 @@ class ProductoViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         try:
-            producto = serializer.save()
+            with transaction.atomic():
+                anterior = serializer.instance.stock
+                producto = serializer.save()
+                StockService.registrar_ajuste(producto, anterior)
+                BusquedaProductoService.invalidar()
             AuditoriaService.registrar(
                 usuario=self.request.user,
                 modelo="Producto",
@@ -587,6 +778,7 @@ class ProductoViewSet(viewsets.ModelViewSet):
             producto_id = instance.id
             nombre = instance.nombre
             instance.delete()
+            CacheProductoService.invalidar([producto_id])
             AuditoriaService.registrar(
                 usuario=self.request.user,
                 modelo="Producto",
@@ -599,6 +791,163 @@ class ProductoViewSet(viewsets.ModelViewSet):
         except Exception as e:
             raise ValidationError(f"Error al eliminar producto: {str(e)}")
 
+    @extend_schema(
+        summary="Stock histórico de un producto",
+        description=(
+            "Devuelve el stock del producto en la fecha indicada (?fecha=AAAA-MM-DD para el cierre "
+            "de ese día, o una fecha y hora ISO 8601). Se calcula desde el snapshot diario más "
+            "cercano más los movimientos del libro posteriores a él."
+        ),
+        tags=["Productos"]
+    )
+    @action(detail=True, methods=["get"], url_path="stock-at")
+    def stock_at(self, request, pk=None):
+        valor = request.query_params.get("fecha")
+        if not valor:
+            raise ValidationError("El parámetro 'fecha' es obligatorio.")
+
+        try:
+            dia = parse_date(valor)
+            if dia is not None:
+                # Una fecha sin hora se interpreta como el cierre de ese día.
+                fecha = timezone.make_aware(datetime.combine(dia, time.max))
+            else:
+                fecha = parse_datetime(valor)
+                if fecha is None:
+                    raise ValueError
+                if timezone.is_naive(fecha):
+                    fecha = timezone.make_aware(fecha)
+        except ValueError:
+            raise ValidationError("Fecha inválida. Use AAAA-MM-DD o AAAA-MM-DDTHH:MM[:SS][±HH:MM].")
+
+        producto = self.get_object()
+        return Response(StockService.stock_en_fecha(producto, fecha))
+
+    @extend_schema(
+        summary="Estadísticas de la caché de productos",
+        description="Aciertos, fallos y tasa de aciertos de la caché de productos, acumulados entre procesos.",
+        tags=["Productos"]
+    )
+    @action(detail=False, methods=["get"], url_path="cache-stats", permission_classes=[IsAdminUserOnly])
+    def cache_stats(self, request):
+        return Response(CacheProductoService.estadisticas())
+
+    def escaneado(self, datos):
+        return {campo: datos[campo] for campo in self.campos_escaneo}
+
+    @extend_schema(
+        summary="Escanear producto",
+        description=(
+            "Busca un producto por SKU o código de barras exactos (si un código es el SKU de un "
+            "producto y el código de barras de otro, gana el SKU) y devuelve una respuesta reducida. "
+            "Sin búsqueda parcial, filtros ni paginación: se resuelve desde la caché de productos "
+            "o, si no está, con una consulta sobre los índices únicos."
+        ),
+        tags=["Productos"]
+    )
+    @action(detail=False, methods=["get"], url_path=r"scan/(?P<codigo>[^/]+)")
+    def scan_codigo(self, request, codigo=None):
+        datos = CacheProductoService.buscar(codigo)
+        if datos is None:
+            raise NotFound("Producto no encontrado.")
+        return Response(self.escaneado(datos))
+
+    @extend_schema(
+        summary="Escanear productos en lote",
+        description=(
+            "Resuelve hasta 500 SKU o códigos de barras en una sola llamada, con una única consulta "
+            "para los que no estén en caché. Devuelve 'encontrados' ({codigo: producto}, en el orden "
+            "recibido) y 'no_encontrados'."
+        ),
+        request=EscaneoLoteSerializer,
+        tags=["Productos"]
+    )
+    @action(detail=False, methods=["post"], url_path="scan")
+    def scan(self, request):
+        serializer = EscaneoLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        codigos = list(dict.fromkeys(serializer.validated_data["codigos"]))
+        encontrados = CacheProductoService.buscar_varios(codigos)
+        return Response({
+            "encontrados": {c: self.escaneado(encontrados[c]) for c in codigos if c in encontrados},
+            "no_encontrados": [c for c in codigos if c not in encontrados],
+        })
+
+    @extend_schema(
+        summary="Importar productos desde CSV o XLSX",
+        description=(
+            "Recibe un archivo (multipart, campo 'archivo') con encabezados sku, nombre, descripcion, precio, "
+            "stock, stock_minimo, codigo_barra, habilitado, lote_codigo, proveedor_rut y categoria. Cada fila "
+            "crea un producto o, si su SKU (o su código de barras, cuando no trae SKU) ya existe, actualiza las "
+            "columnas presentes; el stock de productos existentes no cambia. Los lotes que no existen se crean "
+            "con el proveedor y la categoría de la fila. Con modo 'atomico' (por defecto) cualquier fila "
+            "inválida cancela la importación; con 'parcial' solo se omiten esas filas. Responde los totales y "
+            "un error por fila rechazada con su número de línea."
+        ),
+        request={"multipart/form-data": ImportacionProductosSerializer},
+        tags=["Productos"]
+    )
+    @action(
+        detail=False, methods=["post"], url_path="importar",
+        parser_classes=[MultiPartParser, FormParser], permission_classes=[IsInventoryManagerOrAdmin]
+    )
+    def importar(self, request):
+        serializer = ImportacionProductosSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        archivo = serializer.validated_data["archivo"]
+        modo = serializer.validated_data["modo"]
+        try:
+            resumen = ImportacionProductoService.importar(archivo, archivo.name, usuario=request.user, modo=modo)
+        except ValueError as e:
+            raise ValidationError({"archivo": str(e)})
+        importados = resumen["creados"] + resumen["actualizados"]
+        return Response(
+            {"modo": modo, **resumen},
+            status=status.HTTP_201_CREATED if importados else status.HTTP_400_BAD_REQUEST
+        )
+
+    @extend_schema(
+        summary="Estadísticas de consumo de productos",
+        description=(
+            "Devuelve, por producto, el consumo diario de los últimos ?dias= días (30 por defecto, máx. 366): "
+            "total, promedio, desviación, máximo, medias móviles (?ventanas=7,30) y percentiles "
+            "(?percentiles=50,90,95). Se puede filtrar por ?motivo= (repetible). Con ?productos=1,2,3 "
+            "(máx. 1.000) responde esos productos; sin él, la página actual del listado de productos "
+            "con sus mismos filtros. Se calcula con una sola lectura del acumulado diario."
+        ),
+        tags=["Productos"]
+    )
+    @action(detail=False, methods=["get"], url_path="consumo")
+    def consumo(self, request):
+        dias = parametro_enteros(request, "dias", [30], maximo=366)
+        if len(dias) != 1:
+            raise ValidationError({"dias": "Indique un solo valor."})
+        ventanas = parametro_enteros(request, "ventanas", [7, 30], maximo=dias[0])
+        percentiles = parametro_enteros(request, "percentiles", [50, 90, 95], minimo=0, maximo=100)
+        motivos = request.query_params.getlist("motivo")
+        validos = dict(SalidaInventario._meta.get_field("motivo").choices)
+        if any(m not in validos for m in motivos):
+            raise ValidationError({"motivo": f"Motivos válidos: {', '.join(validos)}."})
+
+        def calcular(ids):
+            estadisticas = ConsumoService.estadisticas(
+                ids, dias=dias[0], ventanas=ventanas, percentiles=percentiles, motivos=motivos
+            )
+            return [estadisticas[i] for i in ids]
+
+        ids = parametro_enteros(request, "productos", [])
+        if ids:
+            if len(ids) > 1000:
+                raise ValidationError({"productos": "Se permiten hasta 1.000 productos por consulta."})
+            existentes = set(Producto.objects.filter(id__in=ids).values_list("id", flat=True))
+            return Response(calcular([i for i in dict.fromkeys(ids) if i in existentes]))
+
+        productos = self.filter_queryset(self.get_queryset()).select_related(None).only("id")
+        pagina = self.paginate_queryset(productos)
+        if pagina is None:
+            return Response(calcular([p.id for p in productos]))
+        return self.get_paginated_response(calcular([p.id for p in pagina]))
+
     def destroy(self, request, *args, **kwargs):
         try:
             instance = self.get_object()
@@ -650,15 +999,20 @@ class ProductoViewSet(viewsets.ModelViewSet):
         tags=["Alertas de Stock"]
     ),
 )
-class AlertaStockViewSet(viewsets.ModelViewSet):
+class AlertaStockViewSet(RespuestaCondicionalViewMixin, CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = AlertaStock.objects.select_related(
         "producto__lote__proveedor", "producto__lote__categoria"
     ).all()
     serializer_class = AlertaStockSerializer
+    campos_actualizacion = ("fecha_actualizacion", "producto__fecha_actualizacion")
+    presupuesto_consultas = {
+        "list": 5, "retrieve": 1, "create": 6,
+        "update": 7, "partial_update": 3, "destroy": 5,
+    }
     permission_classes = [permissions.IsAuthenticated, IsInventoryManager]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, BusquedaProductoFilter]
     filterset_fields = ['estado', 'producto', 'usada_para_orden']
-    search_fields = ['producto__nombre', 'producto__sku', 'producto__lote__proveedor__nombre']
+    busqueda_producto = "producto"
     ordering_fields = ['fecha_creacion', 'estado']
     ordering = ['-fecha_creacion']
 
@@ -745,11 +1099,18 @@ class AlertaStockViewSet(viewsets.ModelViewSet):
         tags=["Órdenes Automáticas"]
     ),
 )
-class OrdenAutomaticaViewSet(viewsets.ModelViewSet):
+class OrdenAutomaticaViewSet(RespuestaCondicionalViewMixin, CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = OrdenAutomatica.objects.select_related(
         'proveedor', 'producto', 'alerta'
-    ).prefetch_related('items').all()
+    ).prefetch_related(
+        Prefetch('items', queryset=OrdenAutomaticaItem.objects.select_related('producto'))
+    ).all()
     serializer_class = OrdenAutomaticaSerializer
+    campos_actualizacion = ("fecha_actualizacion", "producto__fecha_actualizacion", "items__producto__fecha_actualizacion")
+    presupuesto_consultas = {
+        "list": 4, "retrieve": 2, "create": 6,
+        "update": 10, "partial_update": 3, "destroy": 4,
+    }
     permission_classes = [permissions.IsAuthenticated, IsInventoryManagerOrAdmin]
     filterset_class = OrdenAutomaticaFilter
 
@@ -845,11 +1206,15 @@ class OrdenAutomaticaViewSet(viewsets.ModelViewSet):
         tags=["Ítems de Órdenes"]
     ),
 )
-class OrdenAutomaticaItemViewSet(viewsets.ModelViewSet):
+class OrdenAutomaticaItemViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = OrdenAutomaticaItem.objects.select_related(
         'producto', 'alerta', 'orden'
     ).all()
     serializer_class = OrdenAutomaticaItemSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 5,
+        "update": 6, "partial_update": 3, "destroy": 4,
+    }
     permission_classes = [IsInventoryManagerOrAdmin]
 
     def get_queryset(self):
@@ -877,13 +1242,40 @@ class OrdenAutomaticaItemViewSet(viewsets.ModelViewSet):
             raise ValidationError("No se pueden eliminar ítems de una orden que no está pendiente.")
         return super().destroy(request, *args, **kwargs)
 
+# Procesamiento común de las cargas masivas de ENTRADAS y SALIDAS
+def procesar_carga_masiva(request, item_serializer_class, registrar):
+    data = {"items": request.data} if isinstance(request.data, list) else request.data
+    envoltorio = MovimientoMasivoSerializer(data=data)
+    envoltorio.is_valid(raise_exception=True)
+    modo = envoltorio.validated_data["modo"]
+
+    items, errores = envoltorio.validar_items(item_serializer_class)
+    if errores and modo == "atomico":
+        return Response(
+            {"modo": modo, "creados": 0, "ids": [], "errores": errores},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    resultado = registrar(items, request.user, modo=modo) if items else {"creados": [], "errores": []}
+    creados = resultado["creados"]
+    errores = sorted(errores + resultado["errores"], key=lambda e: e["indice"])
+
+    return Response(
+        {"modo": modo, "creados": len(creados), "ids": [m.id for m in creados], "errores": errores},
+        status=status.HTTP_201_CREATED if creados else status.HTTP_400_BAD_REQUEST
+    )
+
 # Creacion del viewset ENTRADA-INVENTARIO
 @extend_schema_view(
     list=extend_schema(
         summary="Listar entradas de inventario",
-        description="Devuelve todas las entradas de productos registradas en el sistema. Incluye datos del producto, proveedor y orden asociada si existe.",
+        description=(
+            "Devuelve todas las entradas de productos registradas en el sistema. Incluye datos del producto, "
+            "proveedor y orden asociada si existe. Filtros: producto, proveedor, orden y rango fecha_min/fecha_max."
+        ),
         tags=["Entradas de Inventario"]
     ),
+    export=extend_schema(tags=["Entradas de Inventario"]),
     retrieve=extend_schema(
         summary="Detalle de una entrada de inventario",
         description="Muestra la información completa de una entrada, incluyendo producto, cantidad, precio, total y proveedor.",
@@ -910,12 +1302,31 @@ class OrdenAutomaticaItemViewSet(viewsets.ModelViewSet):
         tags=["Entradas de Inventario"]
     ),
 )
-class EntradaInventarioViewSet(viewsets.ModelViewSet):
+class EntradaInventarioViewSet(ExportacionViewMixin, CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = EntradaInventario.objects.select_related(
         'producto', 'orden', 'proveedor'
     ).all()
     serializer_class = EntradaInventarioSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 8, "update": 6,
+        "partial_update": 4, "destroy": 8, "bulk": 10, "export": 1,
+    }
     permission_classes = [IsInventoryManagerOrAdmin]
+    filterset_class = EntradaInventarioFilter
+    cursor_ordering = ("-fecha", "-id")
+    columnas_exportacion = {
+        "id": "id",
+        "producto": "producto_id",
+        "producto_nombre": "producto__nombre",
+        "sku": "producto__sku",
+        "cantidad": "cantidad",
+        "precio_unitario": "precio_unitario",
+        "total": "total",
+        "fecha": "fecha",
+        "orden": "orden_id",
+        "proveedor": "proveedor_id",
+        "proveedor_nombre": "proveedor__nombre",
+    }
 
     def perform_create(self, serializer):
         try:
@@ -927,16 +1338,16 @@ class EntradaInventarioViewSet(viewsets.ModelViewSet):
                 if orden.usada_para_ingreso:
                     raise ValidationError("Esta orden ya fue utilizada para generar una entrada de inventario.")
 
-            entrada = serializer.save()
+            with transaction.atomic():
+                entrada = serializer.save()
 
-            if entrada.orden:
-                entrada.orden.usada_para_ingreso = True
-                entrada.orden.save(update_fields=['usada_para_ingreso'])
+                if entrada.orden:
+                    entrada.orden.usada_para_ingreso = True
+                    entrada.orden.save(update_fields=['usada_para_ingreso'])
 
-            # Actualizar stock
-            producto = entrada.producto
-            producto.stock += entrada.cantidad
-            producto.save(update_fields=['stock'])
+                # Actualizar stock
+                producto = entrada.producto
+                StockService.sumar(producto, entrada.cantidad)
 
             # Auditoría
             AuditoriaService.registrar(
@@ -954,6 +1365,18 @@ class EntradaInventarioViewSet(viewsets.ModelViewSet):
         except Exception as e:
             raise ValidationError(f"Error al registrar entrada: {str(e)}")
 
+    @extend_schema(
+        summary="Registrar entradas en lote",
+        description="Registra hasta 5.000 entradas en una sola transacción. Con modo 'atomico' cualquier fila inválida cancela el lote; con 'parcial' solo se omiten las filas con error.",
+        request=MovimientoMasivoSerializer,
+        tags=["Entradas de Inventario"]
+    )
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        return procesar_carga_masiva(
+            request, EntradaMasivaItemSerializer, InventarioService.registrar_entradas_masivas
+        )
+
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.orden:
@@ -969,10 +1392,10 @@ class EntradaInventarioViewSet(viewsets.ModelViewSet):
             producto = instance.producto
             cantidad_revertida = instance.cantidad
             instance_id = instance.id
-            producto.stock = max(0, producto.stock - cantidad_revertida)
-            producto.save(update_fields=['stock'])
 
-            instance.delete()
+            with transaction.atomic():
+                StockService.restar(producto, cantidad_revertida, recortar=True, origen="anulacion")
+                instance.delete()
 
             AuditoriaService.registrar(
                 usuario=request.user,
@@ -992,9 +1415,13 @@ class EntradaInventarioViewSet(viewsets.ModelViewSet):
 @extend_schema_view(
     list=extend_schema(
         summary="Listar salidas de inventario",
-        description="Muestra todas las salidas de productos del inventario, incluyendo motivo, responsable y fecha.",
+        description=(
+            "Muestra todas las salidas de productos del inventario, incluyendo motivo, responsable y fecha. "
+            "Filtros: producto, responsable, motivo y rango fecha_min/fecha_max."
+        ),
         tags=["Salidas de Inventario"]
     ),
+    export=extend_schema(tags=["Salidas de Inventario"]),
     retrieve=extend_schema(
         summary="Detalle de una salida de inventario",
         description="Devuelve la información detallada de una salida específica, como producto, cantidad, motivo y observación.",
@@ -1021,24 +1448,44 @@ class EntradaInventarioViewSet(viewsets.ModelViewSet):
         tags=["Salidas de Inventario"]
     ),
 )
-class SalidaInventarioViewSet(viewsets.ModelViewSet):
+class SalidaInventarioViewSet(ExportacionViewMixin, CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = SalidaInventario.objects.select_related(
         'producto', 'responsable'
     ).all()
     serializer_class = SalidaInventarioSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 9, "update": 1,
+        "partial_update": 1, "destroy": 8, "bulk": 10, "export": 1,
+    }
     permission_classes = [IsInventoryManagerOrAdmin]
+    filterset_class = SalidaInventarioFilter
+    cursor_ordering = ("-fecha", "-id")
+    columnas_exportacion = {
+        "id": "id",
+        "producto": "producto_id",
+        "producto_nombre": "producto__nombre",
+        "sku": "producto__sku",
+        "cantidad": "cantidad",
+        "motivo": "motivo",
+        "observacion": "observacion",
+        "fecha": "fecha",
+        "responsable": "responsable_id",
+        "responsable_nombre": nombre_completo("responsable"),
+    }
 
     def perform_create(self, serializer):
         try:
             producto = serializer.validated_data.get('producto')
             cantidad = serializer.validated_data.get('cantidad')
 
-            if cantidad > producto.stock:
-                raise ValidationError("No hay suficiente stock disponible para realizar la salida.")
+            with transaction.atomic():
+                try:
+                    StockService.restar(producto, cantidad)
+                except StockInsuficienteError:
+                    raise ValidationError("No hay suficiente stock disponible para realizar la salida.")
 
-            salida = serializer.save(responsable=self.request.user)
-            producto.stock -= cantidad
-            producto.save(update_fields=['stock'])
+                salida = serializer.save(responsable=self.request.user)
+                ConsumoService.acumular([salida])
 
             AuditoriaService.registrar(
                 usuario=self.request.user,
@@ -1054,6 +1501,18 @@ class SalidaInventarioViewSet(viewsets.ModelViewSet):
         except Exception as e:
             raise ValidationError(f"Error al registrar salida: {str(e)}")
 
+    @extend_schema(
+        summary="Registrar salidas en lote",
+        description="Registra hasta 5.000 salidas en una sola transacción validando el stock de cada producto contra el total solicitado en el lote.",
+        request=MovimientoMasivoSerializer,
+        tags=["Salidas de Inventario"]
+    )
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        return procesar_carga_masiva(
+            request, SalidaMasivaItemSerializer, InventarioService.registrar_salidas_masivas
+        )
+
     def update(self, request, *args, **kwargs):
         raise ValidationError("No se permite la modificación de registros de salida una vez creados.")
 
@@ -1064,10 +1523,10 @@ class SalidaInventarioViewSet(viewsets.ModelViewSet):
             cantidad_repuesta = instance.cantidad
             salida_id = instance.id
 
-            producto.stock += cantidad_repuesta
-            producto.save(update_fields=['stock'])
-
-            instance.delete()
+            with transaction.atomic():
+                StockService.sumar(producto, cantidad_repuesta, origen="anulacion")
+                ConsumoService.acumular([instance], signo=-1)
+                instance.delete()
 
             AuditoriaService.registrar(
                 usuario=request.user,
@@ -1116,9 +1575,18 @@ class SalidaInventarioViewSet(viewsets.ModelViewSet):
         tags=["Cotizaciones de Proveedores"]
     ),
 )
-class CotizacionProveedorViewSet(viewsets.ModelViewSet):
+class CotizacionProveedorViewSet(RespuestaCondicionalViewMixin, CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = CotizacionProveedor.objects.select_related("orden").all()
     serializer_class = CotizacionProveedorSerializer
+    # ?expand=orden incluye la orden con su producto e ítems.
+    campos_actualizacion = (
+        "fecha_actualizacion", "orden__fecha_actualizacion", "orden__producto__fecha_actualizacion",
+        "orden__items__producto__fecha_actualizacion",
+    )
+    presupuesto_consultas = {
+        "list": 4, "retrieve": 2, "create": 3,
+        "update": 5, "partial_update": 4, "destroy": 4,
+    }
     permission_classes = [IsInventoryManagerOrAdmin]
 
     def perform_create(self, serializer):
@@ -1147,9 +1615,13 @@ class CotizacionProveedorViewSet(viewsets.ModelViewSet):
 @extend_schema_view(
     list=extend_schema(
         summary="Listar historial de precios",
-        description="Muestra el historial de precios registrados por producto y proveedor. Ordenados por fecha descendente.",
+        description=(
+            "Muestra el historial de precios registrados por producto y proveedor. Ordenados por fecha descendente. "
+            "Filtros: producto, proveedor y rango fecha_min/fecha_max."
+        ),
         tags=["Historial de Precios"]
     ),
+    export=extend_schema(tags=["Historial de Precios"]),
     retrieve=extend_schema(
         summary="Detalle de un registro de precio",
         description="Devuelve los detalles de un cambio de precio para un producto, incluyendo proveedor, precio y fecha.",
@@ -1176,10 +1648,26 @@ class CotizacionProveedorViewSet(viewsets.ModelViewSet):
         tags=["Historial de Precios"]
     ),
 )
-class HistorialPrecioProductoViewSet(viewsets.ModelViewSet):
+class HistorialPrecioProductoViewSet(ExportacionViewMixin, CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = HistorialPrecioProducto.objects.select_related("producto", "proveedor").all()
     serializer_class = HistorialPrecioProductoSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 4, "update": 1,
+        "partial_update": 1, "destroy": 1, "export": 1,
+    }
     permission_classes = [IsInventoryManagerOrAdmin]
+    filterset_class = HistorialPrecioProductoFilter
+    cursor_ordering = ("-fecha_registro", "-id")
+    columnas_exportacion = {
+        "id": "id",
+        "producto": "producto_id",
+        "producto_nombre": "producto__nombre",
+        "sku": "producto__sku",
+        "proveedor": "proveedor_id",
+        "proveedor_nombre": "proveedor__nombre",
+        "precio": "precio",
+        "fecha_registro": "fecha_registro",
+    }
 
     def create(self, request, *args, **kwargs):
         producto = request.data.get("producto")
@@ -1229,9 +1717,15 @@ class HistorialPrecioProductoViewSet(viewsets.ModelViewSet):
         tags=["Kits"]
     ),
 )
-class KitViewSet(viewsets.ModelViewSet):
-    queryset = Kit.objects.prefetch_related("items__producto").all()
+class KitViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
+    queryset = Kit.objects.prefetch_related(
+        Prefetch("items", queryset=KitItem.objects.select_related("producto"))
+    ).all()
     serializer_class = KitSerializer
+    presupuesto_consultas = {
+        "list": 3, "retrieve": 2, "create": 4,
+        "update": 5, "partial_update": 5, "destroy": 5,
+    }
     permission_classes = [IsInventoryManagerOrAdmin]
 
     def perform_create(self, serializer):
@@ -1319,9 +1813,13 @@ class KitViewSet(viewsets.ModelViewSet):
         tags=["Kit Items"]
     ),
 )
-class KitItemViewSet(viewsets.ModelViewSet):
+class KitItemViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = KitItem.objects.select_related("kit", "producto").all()
     serializer_class = KitItemSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 4,
+        "update": 5, "partial_update": 4, "destroy": 3,
+    }
     permission_classes = [IsInventoryManagerOrAdmin]
 
     def perform_create(self, serializer):
@@ -1348,25 +1846,27 @@ class KitItemViewSet(viewsets.ModelViewSet):
         except Exception as e:
             raise ValidationError(f"Error al agregar producto al kit: {str(e)}")
 
-    def update(self, request, *args, **kwargs):
+    def perform_update(self, serializer):
+        # Usa la instancia que ya cargó update() (con kit y producto por select_related)
+        # y el producto validado, en vez de volver a leerlos.
         try:
-            instance = self.get_object()
-            nuevo_producto = request.data.get("producto", instance.producto.id)
+            instance = serializer.instance
+            nuevo_producto = serializer.validated_data.get("producto", instance.producto)
 
             if KitItem.objects.exclude(id=instance.id).filter(kit=instance.kit_id, producto=nuevo_producto).exists():
                 raise ValidationError("Ya existe otro ítem con ese producto en este kit.")
 
-            item_actualizado = super().update(request, *args, **kwargs)
+            item = serializer.save()
 
             AuditoriaService.registrar(
-                usuario=request.user,
+                usuario=self.request.user,
                 modelo="KitItem",
-                id_objeto=instance.id,
+                id_objeto=item.id,
                 accion="actualizar",
-                descripcion=f"Ítem de kit actualizado: producto '{instance.producto.nombre}' en kit '{instance.kit.nombre}'."
+                descripcion=f"Ítem de kit actualizado: producto '{item.producto.nombre}' en kit '{item.kit.nombre}'."
             )
 
-            return item_actualizado
+            return item
         except ValidationError as ve:
             raise ve
         except Exception as e:
@@ -1397,23 +1897,42 @@ class KitItemViewSet(viewsets.ModelViewSet):
 @extend_schema_view(
     list=extend_schema(
         summary="Listar auditorías",
-        description="Retorna todos los registros de auditoría del sistema. Solo accesible por administradores.",
+        description=(
+            "Retorna los registros de auditoría del sistema, del más reciente al más antiguo, "
+            "paginados por cursor (usar los enlaces next/previous). Permite filtrar por modelo, "
+            "id_objeto, usuario, accion y rango fecha_min/fecha_max. Solo accesible por administradores."
+        ),
         tags=["Auditoría"]
     ),
+    export=extend_schema(tags=["Auditoría"]),
     retrieve=extend_schema(
         summary="Detalle de auditoría",
         description="Muestra la información detallada de un registro de auditoría específico.",
         tags=["Auditoría"]
     ),
 )
-class AuditoriaViewSet(viewsets.ReadOnlyModelViewSet):
+class AuditoriaViewSet(ExportacionViewMixin, CamposDinamicosViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     Solo permite consultar registros de auditoría.
     No se permite crear, actualizar ni eliminar desde la API.
     """
     queryset = Auditoria.objects.select_related("usuario").all()
     serializer_class = AuditoriaSerializer
+    presupuesto_consultas = {"list": 1, "retrieve": 1, "create": 1, "update": 1, "destroy": 1, "export": 1}
     permission_classes = [IsAdminUserOnly]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = AuditoriaFilter
+    pagination_class = AuditoriaCursorPagination
+    columnas_exportacion = {
+        "id": "id",
+        "usuario": "usuario_id",
+        "usuario_nombre": nombre_completo("usuario"),
+        "modelo_afectado": "modelo_afectado",
+        "id_objeto": "id_objeto",
+        "accion": "accion",
+        "fecha": "fecha",
+        "descripcion": "descripcion",
+    }
 
     def create(self, request, *args, **kwargs):
         raise ValidationError("Los registros de auditoría no pueden ser creados manualmente.")
@@ -1437,13 +1956,15 @@ class AuditoriaViewSet(viewsets.ReadOnlyModelViewSet):
         tags=["Notificaciones"]
     ),
 )
-class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
+class NotificacionViewSet(CamposDinamicosViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     Permite listar y ver notificaciones del usuario autenticado.
     Incluye acción para marcar como leída.
     """
     serializer_class = NotificacionSerializer
+    presupuesto_consultas = {"list": 2, "retrieve": 1, "create": 1, "destroy": 1, "marcar_como_leida": 3}
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ("-fecha_creacion", "-id")
 
     def get_queryset(self):
         try:
@@ -1455,7 +1976,7 @@ class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
             if not self.request or not hasattr(self.request, "user") or self.request.user.is_anonymous:
                 return Notificacion.objects.none()
 
-            return Notificacion.objects.filter(usuario=self.request.user)
+            return Notificacion.objects.select_related("usuario").filter(usuario=self.request.user)
 
         except Exception as e:
             # Prevención total ante fallos inesperados
@@ -1521,9 +2042,13 @@ class NotificacionViewSet(viewsets.ReadOnlyModelViewSet):
         tags=["Inventario Físico"]
     ),
 )
-class InventarioFisicoViewSet(viewsets.ModelViewSet):
+class InventarioFisicoViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = InventarioFisico.objects.select_related("producto", "responsable").all()
     serializer_class = InventarioFisicoSerializer
+    presupuesto_consultas = {
+        "list": 2, "retrieve": 1, "create": 3,
+        "update": 1, "partial_update": 1, "destroy": 1,
+    }
     permission_classes = [IsInventoryManagerOrAdmin]
 
     def perform_create(self, serializer):
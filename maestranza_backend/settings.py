@@ -53,7 +53,10 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'inventario.CustomUser'
 
 MIDDLEWARE = [
+    "maestranza_backend.utils.middleware.RequestIDMiddleware",
+    "maestranza_backend.utils.telemetria.TelemetriaMiddleware",
     'django.middleware.security.SecurityMiddleware',
+    "maestranza_backend.utils.medicion.MedicionMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -61,6 +64,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "corsheaders.middleware.CorsMiddleware",
+    "maestranza_backend.utils.middleware.AuditoriaMiddleware",
 ]
 
 CORS_ALLOWED_ORIGINS = [
@@ -79,7 +83,7 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "maestranza_backend.utils.pagination.PaginacionConfigurable",
     "PAGE_SIZE": config("API_PAGE_SIZE", default=100, cast=int),
 }
 
@@ -188,18 +192,31 @@ ERROR_LOG_FILE = os.path.join(LOG_DIR, "errors.log")
 
 LOG_LEVEL = config("LOG_LEVEL", default="INFO")
 
+# Rotación de los archivos de log: por tamaño (LOG_ROTACION_BYTES, 0 la desactiva)
+# o, si se define LOG_ROTACION_CUANDO ("midnight", "H", ...), por tiempo.
+LOG_ROTACION_BYTES = config("LOG_ROTACION_BYTES", default=10 * 1024 * 1024, cast=int)
+LOG_ROTACION_CUANDO = config("LOG_ROTACION_CUANDO", default="")
+LOG_COPIAS = config("LOG_COPIAS", default=10, cast=int)
+
+# Los handlers escriben líneas JSON desde un hilo de fondo (ver utils/logger.py).
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "handlers": {
         "audit_file": {
-            "class": "logging.FileHandler",
-            "filename": AUDIT_LOG_FILE,
+            "()": "maestranza_backend.utils.logger.ColaHandler",
+            "archivo": AUDIT_LOG_FILE,
+            "max_bytes": LOG_ROTACION_BYTES,
+            "copias": LOG_COPIAS,
+            "cuando": LOG_ROTACION_CUANDO,
             "level": LOG_LEVEL,
         },
         "error_file": {
-            "class": "logging.FileHandler",
-            "filename": ERROR_LOG_FILE,
+            "()": "maestranza_backend.utils.logger.ColaHandler",
+            "archivo": ERROR_LOG_FILE,
+            "max_bytes": LOG_ROTACION_BYTES,
+            "copias": LOG_COPIAS,
+            "cuando": LOG_ROTACION_CUANDO,
             "level": "ERROR",
         },
     },
@@ -225,15 +242,119 @@ CELERY_TIMEZONE = TIME_ZONE
 
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 
+# Caché compartida (django-redis) si REDIS_CACHE_URL está definido; si no, memoria
+# local del proceso (desarrollo y tests). Con IGNORE_EXCEPTIONS una caída de Redis
+# se trata como fallo de caché y las lecturas van a la base.
+REDIS_CACHE_URL = config("REDIS_CACHE_URL", default="")
+if REDIS_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                "IGNORE_EXCEPTIONS": True,
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            # El límite por defecto (300 claves) no alcanza para la caché de productos.
+            "OPTIONS": {"MAX_ENTRIES": 100_000},
+        }
+    }
+
+# Segundos que vive la representación de un producto en caché (CacheProductoService).
+# Los cambios por la API y StockService la invalidan antes; el TTL acota los demás.
+PRODUCTO_CACHE_TTL = config("PRODUCTO_CACHE_TTL", default=300, cast=int)
+
+# Segundos que los clientes pueden reusar el árbol de geografía (/api/geografia/arbol/)
+# sin volver a pedirlo; después lo revalidan con su ETag (304 si no cambió).
+GEOGRAFIA_MAX_AGE = config("GEOGRAFIA_MAX_AGE", default=86400, cast=int)
+
+# Búsqueda de productos (BusquedaProductoService, parámetro ?search=). El umbral es la
+# fracción de trigramas del término que debe aparecer en el nombre; en PostgreSQL lo
+# fija pg_trgm.word_similarity_threshold (0.6 por defecto) y este valor aplica al índice
+# en memoria de las demás bases, igual que el máximo de resultados.
+BUSQUEDA_UMBRAL = config("BUSQUEDA_UMBRAL", default=0.6, cast=float)
+BUSQUEDA_MAX_RESULTADOS = config("BUSQUEDA_MAX_RESULTADOS", default=500, cast=int)
+
+# Alertas por evento: cada salida que deja un producto bajo su stock mínimo
+# encola una evaluación de ese producto, agrupando las ráfagas dentro de la ventana.
+ALERTAS_POR_EVENTO = config("ALERTAS_POR_EVENTO", default=True, cast=bool)
+ALERTAS_VENTANA_SEGUNDOS = config("ALERTAS_VENTANA_SEGUNDOS", default=30, cast=int)
+
+# Notificaciones por rol: con True se escriben en una tarea de Celery después del
+# commit; con False se escriben en el mismo proceso, también después del commit.
+NOTIFICACIONES_DIFERIDAS = config("NOTIFICACIONES_DIFERIDAS", default=False, cast=bool)
+
+# Auditoría: "sync" (INSERT en línea), "on_commit" (un bulk_create por transacción
+# o petición confirmada) o "async" (el lote confirmado se entrega a Celery).
+AUDITORIA_MODO = config("AUDITORIA_MODO", default="on_commit")
+
+# Archivo mensual: los registros con más de AUDITORIA_RETENCION_MESES meses se
+# mueven a archivos auditoria-AAAA-MM-*.jsonl.gz en AUDITORIA_ARCHIVO_DIR.
+AUDITORIA_RETENCION_MESES = config("AUDITORIA_RETENCION_MESES", default=12, cast=int)
+AUDITORIA_ARCHIVO_DIR = config("AUDITORIA_ARCHIVO_DIR", default=os.path.join(BASE_DIR, "archivo", "auditoria"))
+
+# Conciliación de stock: reportes CSV de discrepancias generados por la tarea nocturna.
+CONCILIACION_DIR = config("CONCILIACION_DIR", default=os.path.join(BASE_DIR, "archivo", "conciliacion"))
+
+# Presupuesto de consultas por acción (presupuesto_consultas de cada viewset): al
+# excederlo MedicionMiddleware escribe un warning, o lanza una excepción si es estricto
+# (el plugin de pytest maestranza_backend.utils.pytest_medicion lo activa en las pruebas).
+PRESUPUESTO_CONSULTAS_ESTRICTO = config("PRESUPUESTO_CONSULTAS_ESTRICTO", default=False, cast=bool)
+
+# Telemetría por petición (maestranza_backend.utils.telemetria): encabezado
+# Server-Timing en cada respuesta e histogramas en /metrics. /metrics exige
+# "Authorization: Bearer <METRICAS_TOKEN>" o una sesión de staff; METRICAS_PUBLICAS
+# la abre sin autenticación (solo si la red ya la protege).
+TELEMETRIA_SERVER_TIMING = config("TELEMETRIA_SERVER_TIMING", default=True, cast=bool)
+METRICAS_TOKEN = config("METRICAS_TOKEN", default="")
+METRICAS_PUBLICAS = config("METRICAS_PUBLICAS", default=False, cast=bool)
+
+# Exportaciones en streaming (/export/): filas leídas de la base y escritas en la
+# respuesta por cada bloque.
+EXPORTACION_TAMANO_LOTE = config("EXPORTACION_TAMANO_LOTE", default=2000, cast=int)
+
+# Planificación de reposición (PlanificacionService): historia de consumo considerada,
+# plazo de entrega para proveedores sin dias_entrega, nivel de servicio del stock de
+# seguridad, costo fijo por pedido (CLP) y costo anual de mantener una unidad como
+# fracción de su precio. Solo los motivos listados cuentan como demanda.
+PLANIFICACION_DIAS_HISTORIA = config("PLANIFICACION_DIAS_HISTORIA", default=90, cast=int)
+PLANIFICACION_DIAS_ENTREGA = config("PLANIFICACION_DIAS_ENTREGA", default=7, cast=int)
+PLANIFICACION_NIVEL_SERVICIO = config("PLANIFICACION_NIVEL_SERVICIO", default=0.95, cast=float)
+PLANIFICACION_COSTO_PEDIDO = config("PLANIFICACION_COSTO_PEDIDO", default=20000, cast=float)
+PLANIFICACION_COSTO_MANTENCION = config("PLANIFICACION_COSTO_MANTENCION", default=0.25, cast=float)
+PLANIFICACION_MOTIVOS = ["consumo", "merma"]
+
 CELERY_BEAT_SCHEDULE = {
     "verificar_alertas_stock_bajo": {
         "task": "inventario.tasks.verificar_alertas_stock_bajo",
-        "schedule": crontab(minute=0, hour="*/1"),  # cada hora
+        "schedule": crontab(minute=0, hour="*/1"),  # cada hora, reconciliación de las alertas por evento
     },
     "verificar_alertas_silenciosas": {
         "task": "inventario.tasks.verificar_alertas_sin_respuesta",
         "schedule": crontab(minute=0, hour="*/12"),  # cada 12 horas
     },
+    "snapshots_stock_diarios": {
+        "task": "inventario.tasks.tarea_tomar_snapshots_stock",
+        "schedule": crontab(minute=15, hour=0),  # cierre del día anterior, 00:15
+    },
+    "conciliar_stock_nocturno": {
+        "task": "inventario.tasks.tarea_conciliar_stock",
+        "schedule": crontab(minute=30, hour=1),  # solo reporte; las correcciones se aplican a mano
+    },
+    "planificar_reposicion_nocturna": {
+        "task": "inventario.tasks.tarea_planificar_reposicion",
+        "schedule": crontab(minute=0, hour=2),  # con el consumo del día anterior ya completo
+    },
+    "archivar_auditoria_mensual": {
+        "task": "inventario.tasks.tarea_archivar_auditoria",
+        "schedule": crontab(minute=0, hour=3, day_of_month=1),  # el día 1 de cada mes, 03:00
+    },
     "generar_ordenes_automaticas_cada_hora": {
         "task": "inventario.tasks.tarea_generar_ordenes_desde_alertas",
         "schedule": crontab(minute=0, hour="*"),
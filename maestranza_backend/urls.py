@@ -10,10 +10,12 @@
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from maestranza_backend.utils.telemetria import metricas
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('inventario.urls')),  # ✅ ESTA LÍNEA ES NECESARIA
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path('metrics', metricas, name='metricas'),
 ]
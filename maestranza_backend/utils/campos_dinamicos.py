@@ -0,0 +1,230 @@
+"""
+Campos dinámicos en lecturas de la API: ?fields=, ?omit= y ?expand=.
+
+- ?fields=id,stock responde solo esos campos; ?omit=descripcion, todos menos esos.
+- ?expand=producto reemplaza el id de una relación por su representación completa
+  (solo las relaciones declaradas en Meta.expandibles del serializer).
+
+CamposDinamicosMixin va en los serializers y CamposDinamicosViewMixin en los
+viewsets: con cualquiera de los tres parámetros la vista arma select_related y
+prefetch_related solo con las relaciones que leen los campos que quedaron.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+from maestranza_backend.utils.medicion import serializacion
+
+PARAMETROS = ("fields", "omit", "expand")
+
+
+def _lista(request, nombre, disponibles):
+    valor = request.query_params.get(nombre)
+    if valor is None:
+        return None
+    elegidos = [parte.strip() for parte in valor.split(",") if parte.strip()]
+    invalidos = [campo for campo in elegidos if campo not in disponibles]
+    if not elegidos or invalidos:
+        raise ValidationError({
+            nombre: f"Campos inválidos: {', '.join(invalidos) or '(vacío)'}. Disponibles: {', '.join(disponibles)}."
+        })
+    return elegidos
+
+
+def campos_pedidos(request, disponibles):
+    """
+    Campos a responder según ?fields= u ?omit=, en el orden de `disponibles`, o None
+    si no viene ninguno de los dos. Un campo desconocido es un 400.
+    """
+    incluir = _lista(request, "fields", disponibles)
+    omitir = _lista(request, "omit", disponibles)
+    if incluir is None and omitir is None:
+        return None
+    return [
+        campo for campo in disponibles
+        if (incluir is None or campo in incluir) and campo not in (omitir or ())
+    ]
+
+
+def campos_expandidos(request, expandibles):
+    """Relaciones pedidas en ?expand= (lista vacía si no viene)."""
+    return _lista(request, "expand", list(expandibles)) or []
+
+
+def pide_campos(request):
+    return request.method in SAFE_METHODS and any(nombre in request.query_params for nombre in PARAMETROS)
+
+
+def relaciones(serializer, modelo, prefijo=""):
+    """
+    Rutas de las relaciones ("lote", "lote__proveedor", "items__producto"...) que
+    recorren los campos legibles de `serializer`, incluidos sus serializers anidados.
+    Los SerializerMethodField y los campos con source="*" no cuentan.
+    """
+    rutas = set()
+    for campo in serializer.fields.values():
+        if campo.write_only or campo.source == "*":
+            continue
+        partes = campo.source.split(".")
+        actual, ruta = modelo, prefijo
+        for indice, parte in enumerate(partes):
+            try:
+                relacion = actual._meta.get_field(parte)
+            except FieldDoesNotExist:
+                actual = None
+                break
+            if not relacion.is_relation:
+                actual = None
+                break
+            if indice == len(partes) - 1 and isinstance(campo, serializers.RelatedField):
+                # Un PrimaryKeyRelatedField sobre la FK lee solo la columna <campo>_id.
+                actual = None
+                break
+            ruta = f"{ruta}__{parte}" if ruta else parte
+            rutas.add(ruta)
+            actual = relacion.related_model
+
+        anidado = campo.child if isinstance(campo, serializers.ListSerializer) else campo
+        if actual is not None and isinstance(anidado, serializers.Serializer):
+            rutas |= relaciones(anidado, actual, ruta)
+    return rutas
+
+
+def _es_directa(modelo, ruta):
+    """True si todos los tramos de `ruta` son FK u OneToOne hacia adelante (sirve para select_related)."""
+    return _partir(modelo, ruta)[0] is None
+
+
+def _partir(modelo, ruta):
+    """
+    (tramo, resto, modelo del tramo): `ruta` cortada después de su primera relación
+    que no sirve para select_related, o (None, None, None) si no tiene ninguna.
+    """
+    partes = ruta.split("__")
+    for indice, parte in enumerate(partes, 1):
+        try:
+            relacion = modelo._meta.get_field(parte)
+        except FieldDoesNotExist:
+            return ruta, "", None
+        modelo = relacion.related_model
+        if not (relacion.many_to_one or relacion.one_to_one) or not relacion.concrete:
+            return "__".join(partes[:indice]), "__".join(partes[indice:]), modelo
+    return None, None, None
+
+
+def _cubiertas(lookup):
+    """Rutas que resuelve un lookup de prefetch_related, incluido el select_related de su queryset."""
+    ruta = lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+    partes = ruta.split("__")
+    rutas = {"__".join(partes[:n]) for n in range(1, len(partes) + 1)}
+    consulta = getattr(lookup, "queryset", None)
+    pendientes = [(ruta, consulta.query.select_related)] if consulta is not None else []
+    while pendientes:
+        prefijo, seleccion = pendientes.pop()
+        if isinstance(seleccion, dict):
+            for nombre, anidada in seleccion.items():
+                rutas.add(f"{prefijo}__{nombre}")
+                pendientes.append((f"{prefijo}__{nombre}", anidada))
+    return rutas
+
+
+def recortar_relaciones(queryset, rutas):
+    """
+    `queryset` con select_related armado desde las rutas directas de `rutas` y
+    prefetch_related reducido a los tramos de sus lookups que están en `rutas`.
+    Las rutas indirectas que ningún lookup cubre (p. ej. las de un ?expand=) se
+    agregan como Prefetch del tramo hasta su relación múltiple, con un queryset
+    recortado igual para el resto de la ruta.
+    """
+    directas = sorted(ruta for ruta in rutas if _es_directa(queryset.model, ruta))
+    prefetch = []
+    for lookup in queryset._prefetch_related_lookups:
+        ruta = lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+        if ruta in rutas:
+            prefetch.append(lookup)
+            continue
+        partes = ruta.split("__")
+        prefijos = ["__".join(partes[:n]) for n in range(len(partes) - 1, 0, -1)]
+        prefijo = next((p for p in prefijos if p in rutas), None)
+        if prefijo and prefijo not in prefetch:
+            prefetch.append(prefijo)
+
+    cubiertas = set().union(*(_cubiertas(lookup) for lookup in prefetch))
+    tramos = {}
+    for ruta in sorted(set(rutas) - set(directas) - cubiertas):
+        tramo, resto, modelo = _partir(queryset.model, ruta)
+        restos = tramos.setdefault(tramo, (modelo, set()))[1]
+        if resto:
+            restos.add(resto)
+    for tramo, (modelo, restos) in tramos.items():
+        existente = next(
+            (lookup for lookup in prefetch if getattr(lookup, "prefetch_to", lookup) == tramo), None
+        )
+        if isinstance(existente, Prefetch):
+            # No se puede repetir el tramo con otro queryset: el resto va como lookup encadenado.
+            prefetch += [f"{tramo}__{resto}" for resto in sorted(restos)]
+            continue
+        if existente is not None:
+            prefetch.remove(existente)
+        if restos and modelo is not None:
+            prefetch.append(Prefetch(tramo, queryset=recortar_relaciones(modelo._default_manager.all(), restos)))
+        else:
+            prefetch.append(tramo)
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if directas:
+        queryset = queryset.select_related(*directas)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class CamposDinamicosMixin:
+    """
+    Para ModelSerializer. Solo actúa en el serializer de primer nivel de una lectura
+    (el que recibe la request en su contexto): los serializers anidados y los de
+    escritura no cambian.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        legibles = [nombre for nombre, campo in self.fields.items() if not campo.write_only]
+        campos = campos_pedidos(request, legibles)
+        if campos is not None:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
+
+        expandibles = getattr(self.Meta, "expandibles", {})
+        for nombre in campos_expandidos(request, expandibles):
+            if nombre in self.fields:
+                self.fields[nombre] = expandibles[nombre](read_only=True)
+
+    def to_representation(self, instance):
+        with serializacion():
+            return super().to_representation(instance)
+
+    def relaciones(self):
+        return relaciones(self, self.Meta.model)
+
+
+class CamposDinamicosViewMixin:
+    """
+    Para viewsets con un serializer CamposDinamicosMixin: con ?fields=, ?omit= o
+    ?expand= en una lectura, el queryset hace JOIN y prefetch solo de las
+    relaciones que usan los campos pedidos.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not pide_campos(self.request):
+            return queryset
+        serializer = self.get_serializer()
+        if not isinstance(serializer, CamposDinamicosMixin):
+            return queryset
+        return recortar_relaciones(queryset, serializer.relaciones())
@@ -0,0 +1,125 @@
+"""
+Peticiones condicionales (ETag / Last-Modified) para list y retrieve.
+
+RespuestaCondicionalViewMixin calcula los validadores en `initial`, antes de
+que corra la acción: si el cliente ya tiene la versión vigente
+(If-None-Match / If-Modified-Since) responde 304 sin consultar las filas ni
+serializar; si no, la acción responde como siempre y el mixin agrega ETag,
+Last-Modified y Cache-Control a la respuesta.
+
+`campos_actualizacion` lista la fecha de actualización del modelo y las de los
+modelos relacionados que aparecen en su representación (o en sus ?expand=),
+como rutas del ORM ("producto__fecha_actualizacion"):
+
+- Listado: una consulta agregada sobre el mismo queryset filtrado, el máximo de
+  cada campo y `count(*)` (el conteo detecta las bajas). La acción reutiliza
+  ese queryset filtrado y la paginación por número de página ese conteo, así
+  que una respuesta 200 no suma consultas. El listado no envía Last-Modified:
+  una baja no cambia ninguna fecha, solo el conteo que va en el ETag.
+- Detalle: el objeto de get_object, que trae anotado el máximo de cada campo
+  relacionado y se carga una sola vez (la acción reutiliza la instancia).
+
+El ETag combina esos valores con la ruta completa (filtros, página, ?fields=,
+?expand=) y el formato de la respuesta. Los .update() sobre estos modelos deben
+asignar su fecha (auto_now no corre), y los cambios en modelos relacionados sin
+fecha propia (lote, proveedor, categoría, ítems de una orden) renuevan la de
+los modelos que los muestran.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+ACCIONES_CONDICIONALES = ("list", "retrieve")
+
+
+class NoModificado(Exception):
+    """Corta la petición en `initial` con la respuesta 304 ya armada."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class RespuestaCondicionalViewMixin:
+    campos_actualizacion = ("fecha_actualizacion",)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validadores = None
+        if request.method not in ("GET", "HEAD") or self.action not in ACCIONES_CONDICIONALES:
+            return
+
+        if self.action == "list":
+            queryset = self.filter_queryset(self.get_queryset())
+            self._queryset_filtrado = queryset
+            maximos = {f"ultima_{i}": Max(campo) for i, campo in enumerate(self.campos_actualizacion)}
+            # Con campos relacionados el JOIN puede repetir filas (ítems de una orden).
+            conteo = Count("pk", distinct=len(maximos) > 1)
+            resumen = queryset.order_by().aggregate(cantidad=conteo, **maximos)
+            self.conteo_filtrado = resumen["cantidad"]
+            clave = (*(resumen[nombre] for nombre in maximos), resumen["cantidad"])
+            ultima = None
+        else:
+            clave = self.fechas_actualizacion_objeto()
+            ultima = max((fecha for fecha in clave if fecha), default=None)
+
+        formato = getattr(request.accepted_renderer, "format", "")
+        firma = "|".join(str(parte) for parte in (request.get_full_path(), formato, *clave))
+        etag = f'"{hashlib.sha256(firma.encode()).hexdigest()[:32]}"'
+        ultima = int(ultima.timestamp()) if ultima else None
+        self.validadores = (etag, ultima)
+
+        response = get_conditional_response(request, etag=etag, last_modified=ultima)
+        if isinstance(response, HttpResponseNotModified):
+            raise NoModificado(self.con_validadores(response))
+
+    def fechas_actualizacion_objeto(self):
+        """Fechas de `campos_actualizacion` del objeto del detalle (None si no tiene)."""
+        propio, *relacionados = self.campos_actualizacion
+        self._anotar_relacionados = bool(relacionados)
+        try:
+            objeto = self._objeto_condicional = self.get_object()
+        finally:
+            self._anotar_relacionados = False
+        return [getattr(objeto, propio), *(getattr(objeto, f"_actualizacion_{i}") for i in range(len(relacionados)))]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, "_anotar_relacionados", False):
+            # Los máximos relacionados van en la misma consulta que carga el objeto.
+            queryset = queryset.annotate(**{
+                f"_actualizacion_{i}": Max(campo) for i, campo in enumerate(self.campos_actualizacion[1:])
+            })
+        return queryset
+
+    def filter_queryset(self, queryset):
+        # El listado filtra get_queryset() una vez más: recibe el queryset ya
+        # filtrado en `initial` (los filtros, como la búsqueda, no se repiten).
+        filtrado = self.__dict__.pop("_queryset_filtrado", None)
+        return filtrado if filtrado is not None else super().filter_queryset(queryset)
+
+    def get_object(self):
+        objeto = getattr(self, "_objeto_condicional", None)
+        return objeto if objeto is not None else super().get_object()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NoModificado):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "validadores", None) and response.status_code == 200:
+            self.con_validadores(response)
+        return response
+
+    def con_validadores(self, response):
+        etag, ultima = self.validadores
+        response["ETag"] = etag
+        if ultima is not None:
+            response["Last-Modified"] = http_date(ultima)
+        # El cliente puede guardar la respuesta, pero debe revalidarla en cada uso.
+        response["Cache-Control"] = "private, no-cache"
+        return response
@@ -0,0 +1,142 @@
+"""
+Exportación en streaming (CSV o NDJSON) de los listados de la API.
+
+ExportacionViewMixin agrega a un viewset la acción GET <recurso>/export/, que
+aplica los mismos filtros que el listado, recorre el resultado con
+values_list().iterator() y va escribiendo la respuesta por bloques: la memoria
+usada no depende de la cantidad de filas.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db.models import DateField, DateTimeField, DecimalField, F, Value
+from django.db.models.functions import Concat, Trim
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from maestranza_backend.utils.campos_dinamicos import campos_pedidos
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+
+def nombre_completo(ruta):
+    """Expresión equivalente a `<ruta>.get_full_name()` de CustomUser."""
+    return Trim(Concat(F(f"{ruta}__first_name"), Value(" "), F(f"{ruta}__last_name")))
+
+
+def _fecha_hora(valor):
+    return (timezone.localtime(valor) if timezone.is_aware(valor) else valor).isoformat()
+
+
+def _conversores(queryset, expresiones):
+    """
+    [(posición, función)] de las columnas que no se escriben tal como llegan de la
+    base: fechas en ISO 8601 (en la zona horaria local, como en la API) y decimales
+    como texto.
+    """
+    conversores = []
+    for posicion, expresion in enumerate(expresiones):
+        if isinstance(expresion, str):
+            expresion = F(expresion)
+        campo = expresion.resolve_expression(queryset.query.chain()).output_field
+        if isinstance(campo, DateTimeField):
+            conversores.append((posicion, _fecha_hora))
+        elif isinstance(campo, DateField):
+            conversores.append((posicion, lambda valor: valor.isoformat()))
+        elif isinstance(campo, DecimalField):
+            conversores.append((posicion, str))
+    return conversores
+
+
+def _filas(queryset, expresiones, tamano_lote):
+    conversores = _conversores(queryset, expresiones)
+    for fila in queryset.values_list(*expresiones).iterator(chunk_size=tamano_lote):
+        if conversores:
+            fila = list(fila)
+            for posicion, convertir in conversores:
+                if fila[posicion] is not None:
+                    fila[posicion] = convertir(fila[posicion])
+        yield fila
+
+
+def exportar_csv(queryset, columnas, tamano_lote):
+    """
+    Genera el CSV de `queryset` por bloques de `tamano_lote` filas.
+    columnas: {encabezado: ruta de values_list o expresión}.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+    for numero, fila in enumerate(_filas(queryset, list(columnas.values()), tamano_lote), 1):
+        escritor.writerow(fila)
+        if numero % tamano_lote == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def exportar_ndjson(queryset, columnas, tamano_lote):
+    """Como exportar_csv, pero con un objeto JSON por línea."""
+    nombres = list(columnas)
+    bloque = []
+    for fila in _filas(queryset, list(columnas.values()), tamano_lote):
+        bloque.append(json.dumps(dict(zip(nombres, fila)), ensure_ascii=False))
+        if len(bloque) == tamano_lote:
+            yield "\n".join(bloque) + "\n"
+            bloque = []
+    if bloque:
+        yield "\n".join(bloque) + "\n"
+
+
+EXPORTADORES = {"csv": exportar_csv, "ndjson": exportar_ndjson}
+
+
+class ExportacionViewMixin:
+    """
+    Para viewsets: `columnas_exportacion` es un dict {encabezado: ruta de values_list
+    o expresión}, con los mismos nombres que los campos del serializer, así que
+    ?fields= y ?omit= también eligen las columnas exportadas.
+    """
+    columnas_exportacion = {}
+    formato_query_param = "formato"
+
+    @extend_schema(
+        summary="Exportar en CSV o NDJSON",
+        description=(
+            "Descarga todas las filas que cumplen los filtros del listado, sin paginar. "
+            "?formato=csv (por defecto) o ?formato=ndjson (un objeto JSON por línea). "
+            "?fields= y ?omit= eligen las columnas. La respuesta se genera a medida que "
+            "se lee la base, así que se puede exportar cualquier cantidad de filas."
+        ),
+        responses={(200, "text/csv"): str, (200, "application/x-ndjson"): str},
+    )
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request, *args, **kwargs):
+        formato = request.query_params.get(self.formato_query_param, "csv")
+        if formato not in EXPORTADORES:
+            raise ValidationError({self.formato_query_param: f"Formato inválido. Opciones: {', '.join(EXPORTADORES)}."})
+        nombres = campos_pedidos(request, list(self.columnas_exportacion))
+        if nombres is None:
+            nombres = list(self.columnas_exportacion)
+        columnas = {nombre: self.columnas_exportacion[nombre] for nombre in nombres}
+
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None).prefetch_related(None)
+        orden = getattr(self, "cursor_ordering", None) or getattr(self.pagination_class, "ordering", None)
+        if orden and api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by(*orden)
+
+        filas = EXPORTADORES[formato](queryset, columnas, settings.EXPORTACION_TAMANO_LOTE)
+        respuesta = StreamingHttpResponse(filas, content_type=FORMATOS[formato])
+        nombre = f"{self.basename}-{timezone.localtime():%Y%m%d-%H%M%S}.{formato}"
+        respuesta["Content-Disposition"] = f'attachment; filename="{nombre}"'
+        return respuesta
@@ -1,8 +1,129 @@
+"""
+Logging de la aplicación.
+
+Los archivos de log (settings.LOGGING) se escriben con ColaHandler: el hilo de
+la petición solo arma el mensaje y lo encola; un QueueListener de fondo lo
+serializa como una línea JSON (FormatoJSON) y lo escribe en el archivo, rotando
+por tamaño o por tiempo. Cada registro lleva el request id de la petición en
+curso, que RequestIDMiddleware deja en `request_id_actual`.
+
+Los mensajes se registran con argumentos (`logger.info("... %s", valor)`) y no
+con f-strings, para no formatearlos cuando el nivel está desactivado.
+"""
+import copy
+import json
 import logging
+import os
+import queue
+import weakref
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.timezone import now
 
 logger = logging.getLogger("audit")
+audit_logger = logger
+
+# Request id de la petición en curso (lo fija RequestIDMiddleware).
+request_id_actual = ContextVar("request_id_actual", default=None)
+
+_formato_base = logging.Formatter()
+
+
+class FormatoJSON(logging.Formatter):
+    """Un objeto JSON por línea: fecha, nivel, logger, mensaje, request id y, si hay, datos y excepción."""
+
+    def format(self, record):
+        linea = {
+            "fecha": datetime.fromtimestamp(record.created, dt_timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "modulo": record.module,
+            "linea": record.lineno,
+        }
+        datos = getattr(record, "datos", None)
+        if datos is not None:
+            linea["datos"] = datos
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            linea["excepcion"] = record.exc_text
+        if record.stack_info:
+            linea["pila"] = self.formatStack(record.stack_info)
+        return json.dumps(linea, ensure_ascii=False, default=str)
+
+
+class ColaHandler(QueueHandler):
+    """
+    Handler para settings.LOGGING que no bloquea al hilo que registra: encola el
+    registro y un QueueListener propio lo escribe en `archivo` con FormatoJSON.
+
+    Con `cuando` ("midnight", "H", ...) el archivo rota por tiempo; si no, por
+    tamaño cada `max_bytes` (0 desactiva la rotación). Se conservan `copias`
+    archivos rotados. Al cerrar (logging.shutdown al salir del proceso) se
+    escribe lo que quede en la cola.
+    """
+
+    def __init__(self, archivo, max_bytes=0, copias=0, cuando=None):
+        super().__init__(queue.SimpleQueue())
+        if cuando:
+            self.destino = TimedRotatingFileHandler(
+                archivo, when=cuando, backupCount=copias, encoding="utf-8", delay=True
+            )
+        else:
+            self.destino = RotatingFileHandler(
+                archivo, maxBytes=max_bytes, backupCount=copias, encoding="utf-8", delay=True
+            )
+        self.destino.setFormatter(FormatoJSON())
+        self.listener = QueueListener(self.queue, self.destino)
+        self.listener.start()
+        _colas.add(self)
+
+    def prepare(self, record):
+        # En el hilo de la petición solo se resuelve lo que depende de él: el
+        # request id, el texto del mensaje (los argumentos pueden cambiar o
+        # consultar la base después) y la traza de la excepción. El JSON y la
+        # escritura quedan para el listener.
+        record = copy.copy(record)
+        peticion = getattr(record, "request", None)
+        record.request_id = request_id_actual.get() or getattr(peticion, "request_id", None)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formato_base.formatException(record.exc_info)
+            record.exc_info = None
+        record.request = None
+        return record
+
+    def reiniciar(self):
+        """Cola y listener nuevos (en el proceso hijo de un fork, el hilo del padre no existe)."""
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.destino)
+        self.listener.start()
+
+    def close(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.destino.close()
+        super().close()
+
+
+_colas = weakref.WeakSet()
+
+
+def _reiniciar_colas():
+    for handler in list(_colas):
+        handler.reiniciar()
+
+
+# Los workers de Celery (prefork) y gunicorn se crean con fork después de configurar el logging.
+os.register_at_fork(after_in_child=_reiniciar_colas)
+
 
 # Mixin reusable para consultar estados de CRUDS
 # Aquí se pueden registrar acciones de CRUD
@@ -19,6 +140,10 @@ class LoggingMixin:
 
     def log_action(self, action, object_type, object_id, user, details=None):
         try:
+            nivel = logging.WARNING if action in ["DELETE", "UPDATE_CRITICAL"] else logging.INFO
+            if not logger.isEnabledFor(nivel):
+                return
+
             username = user.username if user else "anonymous"
             user_id = user.id if user else None
             ip_address = (
@@ -36,10 +161,8 @@ class LoggingMixin:
                 "details": details,
             }
 
-            if action in ["DELETE", "UPDATE_CRITICAL"]:
-                logger.warning("Acción crítica: %s", log_data)
-            else:
-                logger.info("Acción registrada: %s", log_data)
+            mensaje = "Acción crítica: %s %s #%s" if nivel == logging.WARNING else "Acción registrada: %s %s #%s"
+            logger.log(nivel, mensaje, log_data["action"], object_type, object_id, extra={"datos": log_data})
 
         except Exception as e:
             logger.error("Error al registrar acción: %s", str(e))
@@ -0,0 +1,147 @@
+"""
+Medición por petición: cantidad de consultas SQL, tiempo en la base y tiempo de
+serialización, comparados con el presupuesto de consultas de cada acción.
+
+Cada viewset declara `presupuesto_consultas = {"list": 3, "retrieve": 2, ...}`:
+el máximo de consultas de la acción, que no debe depender de la cantidad de
+filas. MedicionMiddleware mide cada petición, emite `peticion_medida` y, si se
+excede el presupuesto, lo registra en el log o, con
+settings.PRESUPUESTO_CONSULTAS_ESTRICTO (así corren las pruebas), lanza
+PresupuestoConsultasExcedido.
+
+Los presupuestos de las escrituras cuentan el INSERT de auditoría que
+AuditoriaMiddleware hace al terminar la petición (en las pruebas no ocurre: queda
+en el on_commit de la transacción del TestCase). Una exportación en streaming
+hace su consulta después de que responde la vista, fuera de la medición.
+"""
+import contextvars
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Se emite al terminar cada petición medida, con sender=clase del viewset (o None)
+# y los argumentos request, accion, presupuesto y medicion.
+peticion_medida = Signal()
+
+_medicion_actual = contextvars.ContextVar("medicion_actual", default=None)
+
+
+class PresupuestoConsultasExcedido(AssertionError):
+    """Una acción hizo más consultas que su presupuesto_consultas."""
+
+
+class Medicion:
+    """Consultas, tiempos (en segundos) y aciertos/fallos de caché de una petición."""
+
+    def __init__(self):
+        self.consultas = []
+        self.tiempo_db = 0.0
+        self.tiempo_serializacion = 0.0
+        self.cache_aciertos = 0
+        self.cache_fallos = 0
+        self._serializando = False
+        self._db_serializando = 0.0
+
+    @property
+    def cantidad(self):
+        return len(self.consultas)
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper de las conexiones: cuenta y cronometra cada consulta.
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.consultas.append(sql)
+            self.tiempo_db += duracion
+            if self._serializando:
+                self._db_serializando += duracion
+
+
+@contextmanager
+def medir():
+    """Mide las consultas de todas las conexiones y la serialización dentro del bloque."""
+    medicion = Medicion()
+    token = _medicion_actual.set(medicion)
+    try:
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(medicion))
+            yield medicion
+    finally:
+        _medicion_actual.reset(token)
+
+
+@contextmanager
+def serializacion():
+    """
+    Suma al tiempo de serialización de la petición en curso lo que tarda el bloque,
+    sin contar sus consultas. Los bloques anidados se cuentan una sola vez.
+    """
+    medicion = _medicion_actual.get()
+    if medicion is None or medicion._serializando:
+        yield
+        return
+    medicion._serializando = True
+    db_previo = medicion._db_serializando
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicion._serializando = False
+        medicion.tiempo_serializacion += time.perf_counter() - inicio - (medicion._db_serializando - db_previo)
+
+
+def contar_cache(aciertos=0, fallos=0):
+    """Suma aciertos y fallos de caché a la petición en curso (si hay una medida)."""
+    medicion = _medicion_actual.get()
+    if medicion is not None:
+        medicion.cache_aciertos += aciertos
+        medicion.cache_fallos += fallos
+
+
+def accion_de_vista(view_func, metodo):
+    """(clase del viewset, acción) de una vista de DRF, o (None, None) si no es un viewset."""
+    clase = getattr(view_func, "cls", None)
+    acciones = getattr(view_func, "actions", None)
+    if clase is None or not acciones:
+        return None, None
+    return clase, acciones.get(metodo.lower())
+
+
+class MedicionMiddleware:
+    """Mide cada petición; ver el docstring del módulo."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.medicion_vista = (None, None)
+        with medir() as medicion:
+            response = self.get_response(request)
+        request.medicion = medicion
+
+        clase, accion = request.medicion_vista
+        presupuesto = getattr(clase, "presupuesto_consultas", {}).get(accion) if clase else None
+        peticion_medida.send(
+            sender=clase, request=request, accion=accion, presupuesto=presupuesto, medicion=medicion
+        )
+        if presupuesto is not None and medicion.cantidad > presupuesto:
+            mensaje = (
+                f"{clase.__name__}.{accion} ({request.method} {request.path}) hizo {medicion.cantidad} "
+                f"consultas; su presupuesto es {presupuesto}."
+            )
+            if getattr(settings, "PRESUPUESTO_CONSULTAS_ESTRICTO", False):
+                raise PresupuestoConsultasExcedido(mensaje + "\n" + "\n".join(medicion.consultas))
+            logger.warning(mensaje)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.medicion_vista = accion_de_vista(view_func, request.method)
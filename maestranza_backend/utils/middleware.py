@@ -1,5 +1,8 @@
 import uuid
 
+from inventario.services.auditoria import AuditoriaService
+from maestranza_backend.utils.logger import request_id_actual
+
 
 class RequestIDMiddleware:
     def __init__(self, get_response):
@@ -7,6 +10,22 @@ class RequestIDMiddleware:
 
     def __call__(self, request):
         request.request_id = uuid.uuid4().hex
-        response = self.get_response(request)
+        # Los logs de la petición lo toman de aquí (ColaHandler).
+        token = request_id_actual.set(request.request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id_actual.reset(token)
         response["X-Request-ID"] = request.request_id
         return response
+
+
+class AuditoriaMiddleware:
+    """Agrupa los registros de auditoría de cada petición en un solo bulk_create."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with AuditoriaService.lote():
+            return self.get_response(request)
@@ -0,0 +1,201 @@
+import json
+from functools import partial
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGE_SIZE = settings.REST_FRAMEWORK.get("PAGE_SIZE", 100)
+
+
+class AuditoriaCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) sobre (-fecha, -id): cada página es un rango
+    del índice auditoria_fecha_idx, sin OFFSET ni COUNT, así que la página
+    10.000 cuesta lo mismo que la primera.
+    """
+    ordering = ("-fecha", "-id")
+    page_size = PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+def estimar_conteo(queryset):
+    """
+    Cantidad aproximada de filas del queryset. En PostgreSQL usa la estimación del
+    planificador (EXPLAIN, sin recorrer la tabla); en otros motores hace COUNT(*).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class PaginadorConConteo(Paginator):
+    """Paginator que no hace COUNT cuando la vista ya conoce la cantidad de filas."""
+
+    def __init__(self, *args, conteo=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if conteo is not None:
+            self.count = conteo
+
+
+class PaginaNumerada(PageNumberPagination):
+    """
+    PageNumberPagination con COUNT configurable por petición (?count=):
+    - exacto (por defecto): igual que DRF; si la vista ya contó las filas del
+      listado (`conteo_filtrado`, ver RespuestaCondicionalViewMixin) no repite el COUNT.
+    - estimado: "count" es la estimación de estimar_conteo.
+    - no: no se cuenta; "count" es null y "next" se decide leyendo una fila extra.
+    """
+    page_size = PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.conteo_modo = request.query_params.get(self.count_query_param, "exacto")
+        if self.conteo_modo not in ("estimado", "no"):
+            self.conteo_modo = "exacto"
+            conteo = getattr(view, "conteo_filtrado", None)
+            if conteo is not None:
+                self.django_paginator_class = partial(PaginadorConConteo, conteo=conteo)
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        valor = request.query_params.get(self.page_query_param, 1)
+        try:
+            self.numero = int(valor)
+            if self.numero < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_page_message.format(page_number=valor, message="Página inválida."))
+
+        inicio = (self.numero - 1) * page_size
+        filas = list(queryset[inicio:inicio + page_size + 1])
+        self.hay_siguiente = len(filas) > page_size
+        self.conteo = estimar_conteo(queryset) if self.conteo_modo == "estimado" else None
+        if not filas and self.numero > 1:
+            raise NotFound(self.invalid_page_message.format(page_number=self.numero, message="Página vacía."))
+        return filas[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.conteo_modo == "exacto":
+            return super().get_paginated_response(data)
+        return Response({
+            "count": self.conteo,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_next_link(self):
+        if self.conteo_modo == "exacto":
+            return super().get_next_link()
+        if not self.hay_siguiente:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.numero + 1)
+
+    def get_previous_link(self):
+        if self.conteo_modo == "exacto":
+            return super().get_previous_link()
+        if self.numero <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.numero == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.numero - 1)
+
+    def get_paginated_response_schema(self, schema):
+        respuesta = super().get_paginated_response_schema(schema)
+        respuesta["properties"]["count"]["nullable"] = True
+        return respuesta
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            "name": self.count_query_param,
+            "required": False,
+            "in": "query",
+            "description": "Conteo total: exacto (por defecto), estimado o no.",
+            "schema": {"type": "string", "enum": ["exacto", "estimado", "no"]},
+        }]
+
+
+class PaginacionConfigurable(BasePagination):
+    """
+    Paginación por defecto de la API: por número de página (PaginaNumerada) o por
+    cursor, según la petición (?paginacion=cursor, o un ?cursor= recibido en un
+    enlace next/previous) o el viewset (atributo `paginacion = "cursor"`).
+
+    El cursor ordena por `cursor_ordering` del viewset (por ejemplo ("-fecha", "-id"));
+    si no lo define usa el ordering del modelo con el id como desempate.
+    """
+    paginacion_query_param = "paginacion"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.usa_cursor(request, view):
+            self.delegado = CursorPagination()
+            self.delegado.page_size = PAGE_SIZE
+            self.delegado.page_size_query_param = "page_size"
+            self.delegado.max_page_size = 1000
+            self.delegado.ordering = self.cursor_ordering(queryset, view)
+        else:
+            self.delegado = PaginaNumerada()
+        return self.delegado.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegado.get_paginated_response(data)
+
+    def usa_cursor(self, request, view):
+        modo = request.query_params.get(self.paginacion_query_param)
+        if modo:
+            return modo == "cursor"
+        if request.query_params.get(CursorPagination.cursor_query_param):
+            return True
+        return getattr(view, "paginacion", "pagina") == "cursor"
+
+    @staticmethod
+    def cursor_ordering(queryset, view):
+        ordering = getattr(view, "cursor_ordering", None)
+        if ordering:
+            return tuple(ordering)
+        ordering = list(queryset.model._meta.ordering or [])
+        if not any(campo.lstrip("-") in ("id", "pk") for campo in ordering):
+            descendente = ordering[0].startswith("-") if ordering else True
+            ordering.append("-id" if descendente else "id")
+        return tuple(ordering)
+
+    def get_paginated_response_schema(self, schema):
+        return PaginaNumerada().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return PaginaNumerada().get_schema_operation_parameters(view) + [
+            {
+                "name": self.paginacion_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Modo de paginación: pagina (por defecto) o cursor.",
+                "schema": {"type": "string", "enum": ["pagina", "cursor"]},
+            },
+            {
+                "name": CursorPagination.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor opaco de los enlaces next/previous en modo cursor.",
+                "schema": {"type": "string"},
+            },
+        ]
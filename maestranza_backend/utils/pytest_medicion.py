@@ -0,0 +1,72 @@
+"""
+Plugin de pytest para el presupuesto de consultas (ver maestranza_backend.utils.medicion).
+
+Se carga desde pytest.ini (-p maestranza_backend.utils.pytest_medicion):
+
+- Toda prueba corre con PRESUPUESTO_CONSULTAS_ESTRICTO=True, así una petición que
+  excede el presupuesto_consultas de su acción hace fallar la prueba.
+- Con --medicion-consultas, al final se imprime por viewset y acción el máximo de
+  consultas observado, su presupuesto y los tiempos de base de datos y de
+  serialización acumulados.
+"""
+from collections import defaultdict
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--medicion-consultas",
+        action="store_true",
+        default=False,
+        help="Resumen de consultas SQL, tiempo en la base y de serialización por viewset y acción.",
+    )
+
+
+class Registro:
+    """Acumula las mediciones de peticion_medida por (viewset, acción)."""
+
+    def __init__(self):
+        self.acciones = defaultdict(lambda: {
+            "peticiones": 0, "maximo": 0, "presupuesto": None, "tiempo_db": 0.0, "tiempo_serializacion": 0.0,
+        })
+
+    def __call__(self, sender, request, accion, presupuesto, medicion, **kwargs):
+        if sender is None:
+            return
+        datos = self.acciones[(sender.__name__, accion)]
+        datos["peticiones"] += 1
+        datos["maximo"] = max(datos["maximo"], medicion.cantidad)
+        datos["presupuesto"] = presupuesto
+        datos["tiempo_db"] += medicion.tiempo_db
+        datos["tiempo_serializacion"] += medicion.tiempo_serializacion
+
+
+def pytest_configure(config):
+    if config.getoption("--medicion-consultas"):
+        from maestranza_backend.utils.medicion import peticion_medida
+
+        registro = Registro()
+        peticion_medida.connect(registro, weak=False, dispatch_uid="pytest_medicion")
+        config._medicion_consultas = registro
+
+
+@pytest.fixture(autouse=True)
+def presupuesto_consultas_estricto(settings):
+    settings.PRESUPUESTO_CONSULTAS_ESTRICTO = True
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    registro = getattr(config, "_medicion_consultas", None)
+    if registro is None:
+        return
+    terminalreporter.section("consultas por acción")
+    terminalreporter.write_line(
+        f"{'viewset.accion':<52} {'pet.':>5} {'máx.':>5} {'presup.':>7} {'db ms':>9} {'serial. ms':>10}"
+    )
+    for (vista, accion), datos in sorted(registro.acciones.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        presupuesto = "-" if datos["presupuesto"] is None else datos["presupuesto"]
+        terminalreporter.write_line(
+            f"{vista + '.' + str(accion):<52} {datos['peticiones']:>5} {datos['maximo']:>5} {presupuesto:>7} "
+            f"{datos['tiempo_db'] * 1000:>9.1f} {datos['tiempo_serializacion'] * 1000:>10.1f}"
+        )
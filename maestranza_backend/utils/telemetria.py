@@ -0,0 +1,198 @@
+"""
+Telemetría por petición: duración total, tiempo y cantidad de consultas SQL,
+tiempo de serialización, aciertos/fallos de caché y tamaño de la respuesta.
+
+TelemetriaMiddleware toma la medición que deja MedicionMiddleware en la petición,
+la agrega por vista y acción en histogramas del proceso y, con
+settings.TELEMETRIA_SERVER_TIMING, la devuelve en el encabezado Server-Timing.
+La vista `metricas` (/metrics) los expone en el formato de texto de Prometheus.
+
+Los histogramas son de cada proceso: con varios workers, Prometheus debe leer
+cada uno (o sumar las series por instancia).
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+# Límites de los buckets (le) de cada histograma.
+SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONSULTAS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# nombre -> (ayuda, límites)
+HISTOGRAMAS = {
+    "maestranza_peticion_segundos": ("Duración total de la petición.", SEGUNDOS),
+    "maestranza_db_segundos": ("Tiempo en consultas SQL por petición.", SEGUNDOS),
+    "maestranza_db_consultas": ("Consultas SQL por petición.", CONSULTAS),
+    "maestranza_serializacion_segundos": ("Tiempo de serialización por petición.", SEGUNDOS),
+    "maestranza_respuesta_bytes": ("Tamaño del cuerpo de la respuesta (sin streaming).", BYTES),
+}
+CONTADORES = {
+    "maestranza_peticiones_total": "Peticiones atendidas, por clase de código de estado.",
+    "maestranza_cache_aciertos_total": "Aciertos de caché.",
+    "maestranza_cache_fallos_total": "Fallos de caché.",
+}
+
+
+class Histograma:
+    __slots__ = ("limites", "cuentas", "suma", "total")
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)
+        self.suma = 0
+        self.total = 0
+
+    def observar(self, valor):
+        self.cuentas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+
+class Telemetria:
+    """Histogramas y contadores del proceso, por (vista, acción)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self._series = {}
+            self._contadores = {}
+
+    def observar(self, vista, accion, codigo, segundos, medicion, tamano):
+        etiquetas = (vista, accion)
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = {
+                    nombre: Histograma(limites) for nombre, (_, limites) in HISTOGRAMAS.items()
+                }
+            serie["maestranza_peticion_segundos"].observar(segundos)
+            if medicion is not None:
+                serie["maestranza_db_segundos"].observar(medicion.tiempo_db)
+                serie["maestranza_db_consultas"].observar(len(medicion.consultas))
+                serie["maestranza_serializacion_segundos"].observar(medicion.tiempo_serializacion)
+                if medicion.cache_aciertos or medicion.cache_fallos:
+                    self._sumar("maestranza_cache_aciertos_total", etiquetas, medicion.cache_aciertos)
+                    self._sumar("maestranza_cache_fallos_total", etiquetas, medicion.cache_fallos)
+            if tamano is not None:
+                serie["maestranza_respuesta_bytes"].observar(tamano)
+            self._sumar("maestranza_peticiones_total", etiquetas + (f"{codigo // 100}xx",), 1)
+
+    def _sumar(self, nombre, etiquetas, cantidad):
+        clave = (nombre, etiquetas)
+        self._contadores[clave] = self._contadores.get(clave, 0) + cantidad
+
+    def exportar(self):
+        """Texto en el formato de exposición de Prometheus (0.0.4)."""
+        with self._lock:
+            series = {
+                etiquetas: {nombre: (h.limites, list(h.cuentas), h.suma, h.total) for nombre, h in serie.items()}
+                for etiquetas, serie in self._series.items()
+            }
+            contadores = dict(self._contadores)
+
+        lineas = []
+        for nombre, (ayuda, _) in HISTOGRAMAS.items():
+            lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} histogram"]
+            for (vista, accion), serie in sorted(series.items()):
+                limites, cuentas, suma, total = serie[nombre]
+                if not total:
+                    continue
+                base = f'vista="{vista}",accion="{accion}"'
+                acumulado = 0
+                for limite, cuenta in zip(limites, cuentas):
+                    acumulado += cuenta
+                    lineas.append(f'{nombre}_bucket{{{base},le="{limite}"}} {acumulado}')
+                lineas.append(f'{nombre}_bucket{{{base},le="+Inf"}} {total}')
+                lineas.append(f"{nombre}_sum{{{base}}} {suma}")
+                lineas.append(f"{nombre}_count{{{base}}} {total}")
+        for nombre, ayuda in CONTADORES.items():
+            lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} counter"]
+            for (contador, etiquetas), valor in sorted(contadores.items()):
+                if contador != nombre:
+                    continue
+                base = f'vista="{etiquetas[0]}",accion="{etiquetas[1]}"'
+                if len(etiquetas) > 2:
+                    base += f',codigo="{etiquetas[2]}"'
+                lineas.append(f"{nombre}{{{base}}} {valor}")
+        return "\n".join(lineas) + "\n"
+
+
+telemetria = Telemetria()
+
+
+def ruta_de(request):
+    """(vista, acción) para las etiquetas: viewset y acción de DRF, o el nombre de la URL y el método."""
+    clase, accion = getattr(request, "medicion_vista", (None, None))
+    if clase is not None:
+        return clase.__name__, accion or request.method.lower()
+    coincidencia = getattr(request, "resolver_match", None)
+    if coincidencia is None:
+        return "sin_ruta", request.method.lower()
+    return coincidencia.view_name or coincidencia.route, request.method.lower()
+
+
+def server_timing(segundos, medicion):
+    valor = f"total;dur={segundos * 1000:.2f}"
+    if medicion is not None:
+        valor += (
+            f', db;dur={medicion.tiempo_db * 1000:.2f};desc="{len(medicion.consultas)} consultas"'
+            f", serializacion;dur={medicion.tiempo_serializacion * 1000:.2f}"
+        )
+        if medicion.cache_aciertos or medicion.cache_fallos:
+            valor += f', cache;desc="{medicion.cache_aciertos} aciertos {medicion.cache_fallos} fallos"'
+    return valor
+
+
+class TelemetriaMiddleware:
+    """
+    Va antes que MedicionMiddleware en MIDDLEWARE (su tiempo total incluye el resto
+    de la cadena); ver el docstring del módulo.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        segundos = time.perf_counter() - inicio
+
+        medicion = getattr(request, "medicion", None)
+        if response.streaming:
+            tamano = int(response["Content-Length"]) if response.has_header("Content-Length") else None
+        else:
+            tamano = len(response.content)
+        vista, accion = ruta_de(request)
+        telemetria.observar(vista, accion, response.status_code, segundos, medicion, tamano)
+        if getattr(settings, "TELEMETRIA_SERVER_TIMING", True):
+            response["Server-Timing"] = server_timing(segundos, medicion)
+        return response
+
+
+def metricas_autorizadas(request):
+    """`Authorization: Bearer <settings.METRICAS_TOKEN>` (si hay token) o una sesión de staff."""
+    token = getattr(settings, "METRICAS_TOKEN", "")
+    if token and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return True
+    usuario = getattr(request, "user", None)
+    return bool(usuario and usuario.is_authenticated and usuario.is_staff)
+
+
+def metricas(request):
+    """
+    GET /metrics. Exige el token de METRICAS_TOKEN o un usuario staff; solo con
+    settings.METRICAS_PUBLICAS=True responde a cualquiera.
+    """
+    if not getattr(settings, "METRICAS_PUBLICAS", False) and not metricas_autorizadas(request):
+        respuesta = HttpResponse(status=401)
+        respuesta["WWW-Authenticate"] = "Bearer"
+        return respuesta
+    return HttpResponse(telemetria.exportar(), content_type="text/plain; version=0.0.4; charset=utf-8")